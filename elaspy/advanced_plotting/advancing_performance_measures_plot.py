@@ -33,6 +33,17 @@ EMP_QUANTILE_FILE_3 : str
     empirical quantiles of the response times.
 NUM_RUNS : int
     The number of runs that should be plotted.
+CI_METHOD : str
+    The type of the confidence intervals. Either "t" for t-based intervals,
+    or "percentile" or "bca" for bootstrap intervals (see
+    ``scipy.stats.bootstrap``).
+NUM_RESAMPLES : int
+    The number of bootstrap resamples if ``CI_METHOD`` is "percentile" or
+    "bca".
+NUM_CI_POINTS : int
+    The maximum number of run numbers (on a logarithmic grid) for which the
+    bootstrap intervals are calculated if ``CI_METHOD`` is "percentile" or
+    "bca".
 SAVE_PLOT : bool
     Whether the plot should be saved or not.
 PLOT_NAME : str
@@ -70,6 +81,9 @@ EMP_QUANTILE_FILE_3: str = (
 )
 #################################Parameters####################################
 NUM_RUNS: int = 10000
+CI_METHOD: str = "t"
+NUM_RESAMPLES: int = 2000
+NUM_CI_POINTS: int = 50
 SAVE_PLOT: bool = False
 PLOT_NAME: str = f"advancing_performance_measures_plot_{NUM_RUNS}"
 RUN_PARAMETERS_FILE_NAME: str = f"run_parameters_{PLOT_NAME}"
@@ -96,6 +110,9 @@ if __name__ == "__main__":
             f.write(f"EMP_QUANTILE_FILE_2: {EMP_QUANTILE_FILE_2}\n")
             f.write(f"EMP_QUANTILE_FILE_3: {EMP_QUANTILE_FILE_3}\n")
             f.write(f"NUM_RUNS: {NUM_RUNS}\n")
+            f.write(f"CI_METHOD: {CI_METHOD}\n")
+            f.write(f"NUM_RESAMPLES: {NUM_RESAMPLES}\n")
+            f.write(f"NUM_CI_POINTS: {NUM_CI_POINTS}\n")
             f.write(f"SAVE_PLOT: {SAVE_PLOT}\n")
             f.write(f"PLOT_NAME: {PLOT_NAME}\n")
             f.write(f"RUN_PARAMETERS_FILE_NAME: {RUN_PARAMETERS_FILE_NAME}\n")
@@ -103,294 +120,109 @@ if __name__ == "__main__":
     ##################################Read data################################
     start_time = datetime.datetime.now()
 
-    df_1 = pd.read_csv(
-        f"{DATA_DIRECTORY}{MEAN_RESPONSE_TIME_FILE_1}.csv", index_col=0
-    )
-    df_2 = pd.read_csv(
-        f"{DATA_DIRECTORY}{MEAN_RESPONSE_TIME_FILE_2}.csv", index_col=0
-    )
-    df_3 = pd.read_csv(
-        f"{DATA_DIRECTORY}{MEAN_RESPONSE_TIME_FILE_3}.csv", index_col=0
-    )
-
-    df_4 = pd.read_csv(
-        f"{DATA_DIRECTORY}{EMP_QUANTILE_FILE_1}.csv", index_col=0
-    )
-    df_5 = pd.read_csv(
-        f"{DATA_DIRECTORY}{EMP_QUANTILE_FILE_2}.csv", index_col=0
-    )
-    df_6 = pd.read_csv(
-        f"{DATA_DIRECTORY}{EMP_QUANTILE_FILE_3}.csv", index_col=0
-    )
-
-    mean_response_times_1 = df_1.iloc[:, 0].values
-    mean_response_times_2 = df_2.iloc[:, 0].values
-    mean_response_times_3 = df_3.iloc[:, 0].values
-    emp_quantile_response_times_1 = df_4.iloc[:, 0].values
-    emp_quantile_response_times_2 = df_5.iloc[:, 0].values
-    emp_quantile_response_times_3 = df_6.iloc[:, 0].values
-    #################################Initialize################################
-    am_mean_response_times_1 = np.full((NUM_RUNS - 1), np.nan)
-    am_mean_response_times_2 = np.full((NUM_RUNS - 1), np.nan)
-    am_mean_response_times_3 = np.full((NUM_RUNS - 1), np.nan)
-    astd_mean_response_times_1 = np.full((NUM_RUNS - 1), np.nan)
-    astd_mean_response_times_2 = np.full((NUM_RUNS - 1), np.nan)
-    astd_mean_response_times_3 = np.full((NUM_RUNS - 1), np.nan)
-    aerror_mean_response_times_1 = np.full((NUM_RUNS - 1), np.nan)
-    aerror_mean_response_times_2 = np.full((NUM_RUNS - 1), np.nan)
-    aerror_mean_response_times_3 = np.full((NUM_RUNS - 1), np.nan)
-
-    am_emp_quantile_response_times_1 = np.full((NUM_RUNS - 1), np.nan)
-    am_emp_quantile_response_times_2 = np.full((NUM_RUNS - 1), np.nan)
-    am_emp_quantile_response_times_3 = np.full((NUM_RUNS - 1), np.nan)
-    astd_emp_quantile_response_times_1 = np.full((NUM_RUNS - 1), np.nan)
-    astd_emp_quantile_response_times_2 = np.full((NUM_RUNS - 1), np.nan)
-    astd_emp_quantile_response_times_3 = np.full((NUM_RUNS - 1), np.nan)
-    aerror_emp_quantile_response_times_1 = np.full((NUM_RUNS - 1), np.nan)
-    aerror_emp_quantile_response_times_2 = np.full((NUM_RUNS - 1), np.nan)
-    aerror_emp_quantile_response_times_3 = np.full((NUM_RUNS - 1), np.nan)
-    #######################Calculate performance measures######################
-    for i in range(2, NUM_RUNS + 1):
-        am_mean_response_times_1[i - 2] = np.mean(mean_response_times_1[:i])
-        am_mean_response_times_2[i - 2] = np.mean(mean_response_times_2[:i])
-        am_mean_response_times_3[i - 2] = np.mean(mean_response_times_3[:i])
-        astd_mean_response_times_1[i - 2] = np.std(
-            mean_response_times_1[:i], ddof=1
-        )
-        astd_mean_response_times_2[i - 2] = np.std(
-            mean_response_times_2[:i], ddof=1
-        )
-        astd_mean_response_times_3[i - 2] = np.std(
-            mean_response_times_3[:i], ddof=1
-        )
-        aerror_mean_response_times_1[i - 2] = scipy.stats.t.ppf(
-            0.975, i - 1
-        ) * (astd_mean_response_times_1[i - 2] / np.sqrt(i))
-        aerror_mean_response_times_2[i - 2] = scipy.stats.t.ppf(
-            0.975, i - 1
-        ) * (astd_mean_response_times_2[i - 2] / np.sqrt(i))
-        aerror_mean_response_times_3[i - 2] = scipy.stats.t.ppf(
-            0.975, i - 1
-        ) * (astd_mean_response_times_3[i - 2] / np.sqrt(i))
-
-    for i in range(2, NUM_RUNS + 1):
-        am_emp_quantile_response_times_1[i - 2] = np.mean(
-            emp_quantile_response_times_1[:i]
-        )
-        am_emp_quantile_response_times_2[i - 2] = np.mean(
-            emp_quantile_response_times_2[:i]
-        )
-        am_emp_quantile_response_times_3[i - 2] = np.mean(
-            emp_quantile_response_times_3[:i]
-        )
-        astd_emp_quantile_response_times_1[i - 2] = np.std(
-            emp_quantile_response_times_1[:i], ddof=1
+    files = {
+        "mean_response_times": [
+            MEAN_RESPONSE_TIME_FILE_1,
+            MEAN_RESPONSE_TIME_FILE_2,
+            MEAN_RESPONSE_TIME_FILE_3,
+        ],
+        "emp_quantile_response_times": [
+            EMP_QUANTILE_FILE_1,
+            EMP_QUANTILE_FILE_2,
+            EMP_QUANTILE_FILE_3,
+        ],
+    }
+    # The values of each performance measure have a row per data set.
+    values = {
+        measure: np.array(
+            [
+                pd.read_csv(
+                    f"{DATA_DIRECTORY}{file_name}.csv", index_col=0
+                ).iloc[:NUM_RUNS, 0]
+                for file_name in file_names
+            ]
         )
-        astd_emp_quantile_response_times_2[i - 2] = np.std(
-            emp_quantile_response_times_2[:i], ddof=1
-        )
-        astd_emp_quantile_response_times_3[i - 2] = np.std(
-            emp_quantile_response_times_3[:i], ddof=1
-        )
-        aerror_emp_quantile_response_times_1[i - 2] = scipy.stats.t.ppf(
-            0.975, i - 1
-        ) * (astd_emp_quantile_response_times_1[i - 2] / np.sqrt(i))
-        aerror_emp_quantile_response_times_2[i - 2] = scipy.stats.t.ppf(
-            0.975, i - 1
-        ) * (astd_emp_quantile_response_times_2[i - 2] / np.sqrt(i))
-        aerror_emp_quantile_response_times_3[i - 2] = scipy.stats.t.ppf(
-            0.975, i - 1
-        ) * (astd_emp_quantile_response_times_3[i - 2] / np.sqrt(i))
-
+        for measure, file_names in files.items()
+    }
+    #######################Calculate performance measures######################
     x = np.arange(2, NUM_RUNS + 1)
-    fig, axs = plt.subplots(1, 2, figsize=(12, 5))
-
-    axs[0].plot(
-        x, am_mean_response_times_1, label="24 ambulances", color="#1b9e77"
-    )
-    axs[0].plot(
-        x,
-        am_mean_response_times_1 - aerror_mean_response_times_1,
-        linestyle="dashed",
-        color="#1b9e77",
-        alpha=0.1,
-    )
-    axs[0].plot(
-        x,
-        am_mean_response_times_1 + aerror_mean_response_times_1,
-        linestyle="dashed",
-        color="#1b9e77",
-        alpha=0.1,
-    )
-    axs[0].fill_between(
-        x,
-        am_mean_response_times_1 - aerror_mean_response_times_1,
-        am_mean_response_times_1 + aerror_mean_response_times_1,
-        color="#1b9e77",
-        alpha=0.1,
-    )
-
-    axs[0].plot(
-        x, am_mean_response_times_2, label="22 ambulances", color="#d95f02"
-    )
-    axs[0].plot(
-        x,
-        am_mean_response_times_2 - aerror_mean_response_times_2,
-        linestyle="dashed",
-        color="#d95f02",
-        alpha=0.1,
-    )
-    axs[0].plot(
-        x,
-        am_mean_response_times_2 + aerror_mean_response_times_2,
-        linestyle="dashed",
-        color="#d95f02",
-        alpha=0.1,
-    )
-    axs[0].fill_between(
-        x,
-        am_mean_response_times_2 - aerror_mean_response_times_2,
-        am_mean_response_times_2 + aerror_mean_response_times_2,
-        color="#d95f02",
-        alpha=0.1,
-    )
+    means = {}
+    lower = {}
+    upper = {}
+    for measure, measure_values in values.items():
+        means[measure] = np.full((len(measure_values), len(x)), np.nan)
+        stds = np.full((len(measure_values), len(x)), np.nan)
+        for i in x:
+            means[measure][:, i - 2] = np.mean(measure_values[:, :i], axis=1)
+            stds[:, i - 2] = np.std(measure_values[:, :i], axis=1, ddof=1)
+        if CI_METHOD == "t":
+            errors = scipy.stats.t.ppf(0.975, x - 1) * stds / np.sqrt(x)
+            lower[measure] = means[measure] - errors
+            upper[measure] = means[measure] + errors
+
+    if CI_METHOD == "t":
+        x_ci = x
+    else:
+        # The bootstrap intervals are calculated for a grid of run numbers.
+        x_ci = np.unique(np.geomspace(2, NUM_RUNS, NUM_CI_POINTS).astype(int))
+        for measure, measure_values in values.items():
+            lower[measure] = np.full((len(measure_values), len(x_ci)), np.nan)
+            upper[measure] = np.full((len(measure_values), len(x_ci)), np.nan)
+            for j, i in enumerate(x_ci):
+                confidence_interval = scipy.stats.bootstrap(
+                    (measure_values[:, :i],),
+                    np.mean,
+                    n_resamples=NUM_RESAMPLES,
+                    method="BCa" if CI_METHOD == "bca" else CI_METHOD,
+                    axis=1,
+                    random_state=j,
+                ).confidence_interval
+                lower[measure][:, j] = confidence_interval.low
+                upper[measure][:, j] = confidence_interval.high
+    ###################################Plot####################################
+    labels = ["24 ambulances", "22 ambulances", "20 ambulances"]
+    colours = ["#1b9e77", "#d95f02", "#7570b3"]
+    titles = {
+        "mean_response_times": "Mean response time",
+        "emp_quantile_response_times": "95% empirical quantile response time",
+    }
 
-    axs[0].plot(
-        x, am_mean_response_times_3, label="20 ambulances", color="#7570b3"
-    )
-    axs[0].plot(
-        x,
-        am_mean_response_times_3 - aerror_mean_response_times_3,
-        linestyle="dashed",
-        color="#7570b3",
-        alpha=0.1,
-    )
-    axs[0].plot(
-        x,
-        am_mean_response_times_3 + aerror_mean_response_times_3,
-        linestyle="dashed",
-        color="#7570b3",
-        alpha=0.1,
-    )
-    axs[0].fill_between(
-        x,
-        am_mean_response_times_3 - aerror_mean_response_times_3,
-        am_mean_response_times_3 + aerror_mean_response_times_3,
-        color="#7570b3",
-        alpha=0.1,
-    )
+    fig, axs = plt.subplots(1, 2, figsize=(12, 5))
+    for ax, measure in zip(axs, values):
+        for k, (label, colour) in enumerate(zip(labels, colours)):
+            ax.plot(x, means[measure][k], label=label, color=colour)
+            ax.plot(
+                x_ci,
+                lower[measure][k],
+                linestyle="dashed",
+                color=colour,
+                alpha=0.1,
+            )
+            ax.plot(
+                x_ci,
+                upper[measure][k],
+                linestyle="dashed",
+                color=colour,
+                alpha=0.1,
+            )
+            ax.fill_between(
+                x_ci,
+                lower[measure][k],
+                upper[measure][k],
+                color=colour,
+                alpha=0.1,
+            )
+        ax.set_title(titles[measure], fontsize=14)
+        ax.set_xlabel(r"Run $n$", fontsize=12)
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
 
-    axs[0].set_title("Mean response time", fontsize=14)
-    axs[0].set_xlabel(r"Run $n$", fontsize=12)
     axs[0].set_ylabel("Time (min)", fontsize=12)
     axs[0].set_ylim(5.5, 8.5)
     axs[0].text(1000, 7.7, "20 ambulances", color="#7570b3")
     axs[0].text(1000, 7.15, "22 ambulances", color="#d95f02")
     axs[0].text(1000, 6.55, "24 ambulances", color="#1b9e77")
-    axs[0].spines["top"].set_visible(False)
-    axs[0].spines["right"].set_visible(False)
-
-    axs[1].plot(
-        x,
-        am_emp_quantile_response_times_1,
-        label="24 ambulances",
-        color="#1b9e77",
-    )
-    axs[1].plot(
-        x,
-        am_emp_quantile_response_times_1
-        - aerror_emp_quantile_response_times_1,
-        linestyle="dashed",
-        color="#1b9e77",
-        alpha=0.1,
-    )
-    axs[1].plot(
-        x,
-        am_emp_quantile_response_times_1
-        + aerror_emp_quantile_response_times_1,
-        linestyle="dashed",
-        color="#1b9e77",
-        alpha=0.1,
-    )
-    axs[1].fill_between(
-        x,
-        am_emp_quantile_response_times_1
-        - aerror_emp_quantile_response_times_1,
-        am_emp_quantile_response_times_1
-        + aerror_emp_quantile_response_times_1,
-        color="#1b9e77",
-        alpha=0.1,
-    )
-
-    axs[1].plot(
-        x,
-        am_emp_quantile_response_times_2,
-        label="22 ambulances",
-        color="#d95f02",
-    )
-    axs[1].plot(
-        x,
-        am_emp_quantile_response_times_2
-        - aerror_emp_quantile_response_times_2,
-        linestyle="dashed",
-        color="#d95f02",
-        alpha=0.1,
-    )
-    axs[1].plot(
-        x,
-        am_emp_quantile_response_times_2
-        + aerror_emp_quantile_response_times_2,
-        linestyle="dashed",
-        color="#d95f02",
-        alpha=0.1,
-    )
-    axs[1].fill_between(
-        x,
-        am_emp_quantile_response_times_2
-        - aerror_emp_quantile_response_times_2,
-        am_emp_quantile_response_times_2
-        + aerror_emp_quantile_response_times_2,
-        color="#d95f02",
-        alpha=0.1,
-    )
-
-    axs[1].plot(
-        x,
-        am_emp_quantile_response_times_3,
-        label="20 ambulances",
-        color="#7570b3",
-    )
-    axs[1].plot(
-        x,
-        am_emp_quantile_response_times_3
-        - aerror_emp_quantile_response_times_3,
-        linestyle="dashed",
-        color="#7570b3",
-        alpha=0.1,
-    )
-    axs[1].plot(
-        x,
-        am_emp_quantile_response_times_3
-        + aerror_emp_quantile_response_times_3,
-        linestyle="dashed",
-        color="#7570b3",
-        alpha=0.1,
-    )
-    axs[1].fill_between(
-        x,
-        am_emp_quantile_response_times_3
-        - aerror_emp_quantile_response_times_3,
-        am_emp_quantile_response_times_3
-        + aerror_emp_quantile_response_times_3,
-        color="#7570b3",
-        alpha=0.1,
-    )
-
-    axs[1].set_title("95% empirical quantile response time", fontsize=14)
-    axs[1].set_xlabel(r"Run $n$", fontsize=12)
     axs[1].set_ylim(10, 17)
-    axs[1].spines["top"].set_visible(False)
-    axs[1].spines["right"].set_visible(False)
 
     plt.suptitle("Cumulative means with 95% confidence intervals", fontsize=16)
     if SAVE_PLOT:
@@ -48,6 +48,9 @@ class Ambulance:
     speed_charger : float
         The speed of the charger of the current charging session. Equal to
         ``np.nan`` if the ambulance is not charging.
+    telemetry : FleetTelemetry | None
+        The telemetry that is notified of the state changes of the ambulance.
+        Equal to ``None`` if no telemetry is recorded.
 
     """
 
@@ -93,6 +96,7 @@ class Ambulance:
         self.ambulance_ID: int = ID
         self.charging_since: float = np.nan
         self.speed_charger: float = np.nan
+        self.telemetry: Any = None
 
     def check_patient_reachable(
         self,
@@ -333,6 +337,8 @@ class Ambulance:
 
         """
         self.assigned_to_patient = True
+        if self.telemetry is not None:
+            self.telemetry.ambulance_assigned()
 
     def process_patient(
         self,
@@ -414,14 +420,15 @@ class Ambulance:
             yield req
 
             waiting_time_assigned = (
-                self.env.now - SIMULATION_DATA["output_patient"][patient_ID, 2]
+                self.env.now
+                - SIMULATION_DATA["output_patient"]["arrival_time"][patient_ID]
             )  # minus arrival time patient.
 
-            SIMULATION_DATA["output_patient"][
-                patient_ID, 6
+            SIMULATION_DATA["output_patient"]["assigned_to_ambulance_nr"][
+                patient_ID
             ] = self.ambulance_ID
-            SIMULATION_DATA["output_patient"][
-                patient_ID, 7
+            SIMULATION_DATA["output_patient"]["waiting_time_before_assigned"][
+                patient_ID
             ] = waiting_time_assigned
 
             if SIMULATION_PARAMETERS["PRINT"]:
@@ -447,9 +454,12 @@ class Ambulance:
                 )
             )
             response_time = (
-                self.env.now - SIMULATION_DATA["output_patient"][patient_ID, 2]
+                self.env.now
+                - SIMULATION_DATA["output_patient"]["arrival_time"][patient_ID]
             )  # minus arrival time patient.
-            SIMULATION_DATA["output_patient"][patient_ID, 9] = self.env.now
+            SIMULATION_DATA["output_patient"]["ambulance_arrival_time"][
+                patient_ID
+            ] = self.env.now
             yield self.env.process(
                 self.on_site_aid_patient(
                     patient_ID,
@@ -460,9 +470,11 @@ class Ambulance:
             )
 
             if to_hospital_bool[patient_ID]:
-                SIMULATION_DATA["output_patient"][patient_ID, 11] = 1
-                SIMULATION_DATA["output_patient"][
-                    patient_ID, 12
+                SIMULATION_DATA["output_patient"]["to_hospital"][
+                    patient_ID
+                ] = 1
+                SIMULATION_DATA["output_patient"]["hospital_ID"][
+                    patient_ID
                 ] = hospital_location_ID
                 if SIMULATION_PARAMETERS["PRINT"]:
                     print(
@@ -492,7 +504,9 @@ class Ambulance:
                         f"Patient {patient_ID} does not "
                         "have to be brought to hospital."
                     )
-                SIMULATION_DATA["output_patient"][patient_ID, 11] = 0
+                SIMULATION_DATA["output_patient"]["to_hospital"][
+                    patient_ID
+                ] = 0
 
             if SIMULATION_PARAMETERS["PRINT"]:
                 print(
@@ -501,9 +515,15 @@ class Ambulance:
                 )
             self.helps_patient = False
             self.assigned_to_patient = False
-            SIMULATION_DATA["output_patient"][patient_ID, 15] = self.env.now
+            if self.telemetry is not None:
+                self.telemetry.ambulance_released()
+            SIMULATION_DATA["output_patient"]["finish_time"][
+                patient_ID
+            ] = self.env.now
 
-        SIMULATION_DATA["output_patient"][patient_ID, 1] = response_time
+        SIMULATION_DATA["output_patient"]["response_time"][
+            patient_ID
+        ] = response_time
         if SIMULATION_PARAMETERS["PRINT"]:
             print(
                 f"Patient {patient_ID} had a total "
@@ -547,7 +567,9 @@ class Ambulance:
         to_site_travel_time = SIMULATION_DATA["SIREN_DRIVING_MATRIX"].loc[
             self.current_location_ID, patient_location_ID
         ]
-        SIMULATION_DATA["output_patient"][patient_ID, 8] = to_site_travel_time
+        SIMULATION_DATA["output_patient"]["driving_time_to_patient"][
+            patient_ID
+        ] = to_site_travel_time
         if SIMULATION_PARAMETERS["PRINT"]:
             print(
                 f"{self.env.now}: Ambulance {self.ambulance_ID} drives "
@@ -649,9 +671,9 @@ class Ambulance:
                 f"{on_site_aid_times[patient_ID]}."
             )
         yield self.env.timeout(on_site_aid_times[patient_ID])
-        SIMULATION_DATA["output_patient"][patient_ID, 10] = on_site_aid_times[
+        SIMULATION_DATA["output_patient"]["on_site_aid_time"][
             patient_ID
-        ]
+        ] = on_site_aid_times[patient_ID]
 
         if SIMULATION_PARAMETERS["ENGINE_TYPE"] == "electric":
             battery_reduction = Ambulance.calculate_battery_reduction_idling(
@@ -735,8 +757,8 @@ class Ambulance:
         to_hospital_travel_time = SIMULATION_DATA["SIREN_DRIVING_MATRIX"].loc[
             self.current_location_ID, hospital_location_ID
         ]
-        SIMULATION_DATA["output_patient"][
-            patient_ID, 13
+        SIMULATION_DATA["output_patient"]["driving_time_to_hospital"][
+            patient_ID
         ] = to_hospital_travel_time
         if SIMULATION_PARAMETERS["PRINT"]:
             print(
@@ -842,9 +864,9 @@ class Ambulance:
                 f"in {drop_off_times[patient_ID]}."
             )
 
-        SIMULATION_DATA["output_patient"][patient_ID, 14] = drop_off_times[
+        SIMULATION_DATA["output_patient"]["drop_off_time_hospital"][
             patient_ID
-        ]
+        ] = drop_off_times[patient_ID]
 
         dropping_off_patient = self.env.timeout(drop_off_times[patient_ID])
 
@@ -1172,8 +1194,8 @@ class Ambulance:
         target_location_ID : Optional[int]
             The target location the ambulance drove to.
         SIMULATION_PARAMETERS : dict[str, Any]
-            The simulation parameters. The parameter ``DATA_COLUMNS_AMBULANCE``
-            is at least necessary. See ``main.py`` for parameter explanations.
+            The simulation parameters. See ``main.py`` for parameter
+            explanations.
         SIMULATION_DATA : dict[str, Any]
             The simulation data. ``output_ambulance`` is at least necessary.
             See ``main.py`` and the input data section on the ELASPY website
@@ -1181,29 +1203,23 @@ class Ambulance:
 
         """
 
-        # Add new row with nans
-        SIMULATION_DATA["output_ambulance"] = np.append(
-            SIMULATION_DATA["output_ambulance"],
-            np.full(
-                (1, len(SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"])),
-                np.nan,
-            ),
-            axis=0,
-        )
-
-        # add general data
-        SIMULATION_DATA["output_ambulance"][-1, 0] = self.ambulance_ID
-        SIMULATION_DATA["output_ambulance"][-1, 1] = self.env.now
-
         if idle:
             # ambulance was idle
-            SIMULATION_DATA["output_ambulance"][-1, 5] = 0
-            SIMULATION_DATA["output_ambulance"][-1, 6] = idle_time
+            SIMULATION_DATA["output_ambulance"].add_row(
+                ambulance_ID=self.ambulance_ID,
+                time=self.env.now,
+                idle_or_driving_decrease=0,
+                idle_time=idle_time,
+            )
         else:
             # ambulance was driving
-            SIMULATION_DATA["output_ambulance"][-1, 5] = 1
-            SIMULATION_DATA["output_ambulance"][-1, 7] = source_location_ID
-            SIMULATION_DATA["output_ambulance"][-1, 8] = target_location_ID
+            SIMULATION_DATA["output_ambulance"].add_row(
+                ambulance_ID=self.ambulance_ID,
+                time=self.env.now,
+                idle_or_driving_decrease=1,
+                source_location_ID=source_location_ID,
+                target_location_ID=target_location_ID,
+            )
 
     def add_ambulance_data_battery_decrease(
         self,
@@ -1234,8 +1250,8 @@ class Ambulance:
         target_location_ID : Optional[int]
             The target location the ambulance drove to.
         SIMULATION_PARAMETERS : dict[str, Any]
-            The simulation parameters. The parameter ``DATA_COLUMNS_AMBULANCE``
-            is at least necessary. See ``main.py`` for parameter explanations.
+            The simulation parameters. See ``main.py`` for parameter
+            explanations.
         SIMULATION_DATA : dict[str, Any]
             The simulation data. ``output_ambulance`` is at least necessary.
             See ``main.py`` and the input data section on the ELASPY website
@@ -1243,39 +1259,29 @@ class Ambulance:
 
         """
 
-        # Add new row with nans
-        SIMULATION_DATA["output_ambulance"] = np.append(
-            SIMULATION_DATA["output_ambulance"],
-            np.full(
-                (1, len(SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"])),
-                np.nan,
-            ),
-            axis=0,
-        )
-
-        # add general data
-        SIMULATION_DATA["output_ambulance"][-1, 0] = self.ambulance_ID
-        SIMULATION_DATA["output_ambulance"][-1, 1] = self.env.now
-        SIMULATION_DATA["output_ambulance"][-1, 2] = self.battery
-        SIMULATION_DATA["output_ambulance"][-1, 3] = (
-            self.battery - decrease_quantity
-        )
-        # ambulance used battery
-        SIMULATION_DATA["output_ambulance"][-1, 4] = 0
+        # add general data, the ambulance used battery
+        row: dict[str, Any] = {
+            "ambulance_ID": self.ambulance_ID,
+            "time": self.env.now,
+            "battery_level_before": self.battery,
+            "battery_level_after": self.battery - decrease_quantity,
+            "use_or_charge": 0,
+            "battery_decrease": decrease_quantity,
+        }
 
         if idle:
             # ambulance was idle
-            SIMULATION_DATA["output_ambulance"][-1, 5] = 0
-            SIMULATION_DATA["output_ambulance"][-1, 6] = idle_time
+            row["idle_or_driving_decrease"] = 0
+            row["idle_time"] = idle_time
 
         else:
             # ambulance was driving
-            SIMULATION_DATA["output_ambulance"][-1, 5] = 1
-            SIMULATION_DATA["output_ambulance"][-1, 7] = source_location_ID
-            SIMULATION_DATA["output_ambulance"][-1, 8] = target_location_ID
-            SIMULATION_DATA["output_ambulance"][-1, 9] = driven_km
+            row["idle_or_driving_decrease"] = 1
+            row["source_location_ID"] = source_location_ID
+            row["target_location_ID"] = target_location_ID
+            row["driven_km"] = driven_km
 
-        SIMULATION_DATA["output_ambulance"][-1, 10] = decrease_quantity
+        SIMULATION_DATA["output_ambulance"].add_row(**row)
 
     def add_ambulance_data_charging(
         self,
@@ -1318,56 +1324,51 @@ class Ambulance:
             "1" if the charging session was interrupted,
             "0" if it was not interrupted.
         SIMULATION_PARAMETERS : dict[str, Any]
-            The simulation parameters. The parameter ``DATA_COLUMNS_AMBULANCE``
-            is at least necessary. See ``main.py`` for parameter explanations.
+            The simulation parameters. See ``main.py`` for parameter
+            explanations.
         SIMULATION_DATA : dict[str, Any]
-            The simulation data. ``output_ambulance`` is at least necessary.
-            See ``main.py`` and the input data section on the ELASPY website
-            for explanations.
+            The simulation data. ``output_ambulance`` and
+            ``charging_time_per_location`` are at least necessary. See
+            ``main.py`` and the input data section on the ELASPY website for
+            explanations.
 
         """
         # charging_type 0: drop-off
         # charging_type 1: hospital
         # charging_type 2: base
 
-        # Add new row with nans
-        SIMULATION_DATA["output_ambulance"] = np.append(
-            SIMULATION_DATA["output_ambulance"],
-            np.full(
-                (1, len(SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"])),
-                np.nan,
-            ),
-            axis=0,
-        )
-
-        # add general data
-        SIMULATION_DATA["output_ambulance"][-1, 0] = self.ambulance_ID
-        SIMULATION_DATA["output_ambulance"][-1, 1] = self.env.now
-        SIMULATION_DATA["output_ambulance"][-1, 2] = self.battery
-        SIMULATION_DATA["output_ambulance"][-1, 3] = (
-            self.battery + increase_quantity
-        )
-        # ambulance charged battery
-        SIMULATION_DATA["output_ambulance"][-1, 4] = 1
-
-        SIMULATION_DATA["output_ambulance"][-1, 11] = charging_type
-        SIMULATION_DATA["output_ambulance"][-1, 12] = charging_location_ID
-        SIMULATION_DATA["output_ambulance"][-1, 13] = speed_charger
+        # add general data, the ambulance charged battery
+        row: dict[str, Any] = {
+            "ambulance_ID": self.ambulance_ID,
+            "time": self.env.now,
+            "battery_level_before": self.battery,
+            "battery_level_after": self.battery + increase_quantity,
+            "use_or_charge": 1,
+            "charging_type": charging_type,
+            "charging_location_ID": charging_location_ID,
+            "speed_charger": speed_charger,
+            "waiting_time": waiting_time_at_charger,
+            "charging_interrupted": charging_interrupted,
+        }
 
         if charging_success:
-            SIMULATION_DATA["output_ambulance"][-1, 14] = 1
-            SIMULATION_DATA["output_ambulance"][
-                -1, 15
-            ] = waiting_time_at_charger
-            SIMULATION_DATA["output_ambulance"][-1, 16] = charging_interrupted
-            SIMULATION_DATA["output_ambulance"][-1, 17] = charging_time
-            SIMULATION_DATA["output_ambulance"][-1, 18] = increase_quantity
+            row["charging_success"] = 1
+            row["charging_time"] = charging_time
+            row["battery_increase"] = increase_quantity
+            SIMULATION_DATA["output_ambulance"].add_row(**row)
+
+            # Charging at drop-off and at the hospital use the same chargers.
+            location = (
+                f"{int(charging_location_ID)}"
+                f"{'B' if charging_type == 2 else 'H'}"
+            )
+            SIMULATION_DATA["charging_time_per_location"][location] = (
+                SIMULATION_DATA["charging_time_per_location"].get(location, 0)
+                + charging_time
+            )
         else:
-            SIMULATION_DATA["output_ambulance"][-1, 14] = 0
-            SIMULATION_DATA["output_ambulance"][
-                -1, 15
-            ] = waiting_time_at_charger
-            SIMULATION_DATA["output_ambulance"][-1, 16] = charging_interrupted
+            row["charging_success"] = 0
+            SIMULATION_DATA["output_ambulance"].add_row(**row)
 
     def decrease_battery(self, decrease_quantity: float) -> None:
         """
@@ -1384,6 +1385,7 @@ class Ambulance:
             If the battery level of the ambulance falls below 0.
 
         """
+        previous_battery = self.battery
         self.battery = self.battery - decrease_quantity
 
         # Due to Python's floating point arithmetic, it can be the case that
@@ -1392,6 +1394,8 @@ class Ambulance:
         # comparison is with 0 (see Pytest documentation).
         if self.battery == approx(0, abs=1e-14):
             self.battery = 0
+        if self.telemetry is not None:
+            self.telemetry.battery_changed(self.battery - previous_battery)
 
         if self.battery < 0:
             raise Exception(
@@ -1415,6 +1419,7 @@ class Ambulance:
             ``MAX_BATTERY_LEVEL``.
         """
 
+        previous_battery = self.battery
         self.battery = self.battery + increase_quantity
 
         # Due to Python's floating point arithmetic, it can be the case that
@@ -1423,6 +1428,8 @@ class Ambulance:
         # MAX_BATTERY_LEVEL explicitly.
         if self.battery == approx(self.MAX_BATTERY_LEVEL, abs=1e-14):
             self.battery = self.MAX_BATTERY_LEVEL
+        if self.telemetry is not None:
+            self.telemetry.battery_changed(self.battery - previous_battery)
 
         if self.battery > self.MAX_BATTERY_LEVEL:
             raise Exception(
@@ -1703,6 +1710,8 @@ class Ambulance:
                 self.charges = True
                 self.charging_since = self.env.now
                 self.speed_charger = speed_charger
+                if self.telemetry is not None:
+                    self.telemetry.charging_started(speed_charger)
                 if SIMULATION_PARAMETERS["PRINT"]:
                     print(
                         f"Ambulance {self.ambulance_ID} has started "
@@ -1813,6 +1822,10 @@ class Ambulance:
                 f"The battery of ambulance {self.ambulance_ID} "
                 f"is equal to: {self.battery} kWh."
             )
+        if self.charges and self.telemetry is not None:
+            self.telemetry.charging_stopped(
+                self.speed_charger, self.charging_since
+            )
         self.charges = False
         self.charging_since = np.nan
         self.speed_charger = np.nan
@@ -1914,6 +1927,8 @@ class Ambulance:
             self.charges = True
             self.charging_since = self.env.now
             self.speed_charger = speed_charger
+            if self.telemetry is not None:
+                self.telemetry.charging_started(speed_charger)
             if SIMULATION_PARAMETERS["PRINT"]:
                 print(
                     f"Ambulance {self.ambulance_ID} has started "
@@ -2022,6 +2037,10 @@ class Ambulance:
                 print(f"After release users: {selected_charger.users}.")
                 print(f"The queue is: {selected_charger.queue}.")
 
+        if self.charges and self.telemetry is not None:
+            self.telemetry.charging_stopped(
+                self.speed_charger, self.charging_since
+            )
         self.charges = False
         self.charging_since = np.nan
         self.speed_charger = np.nan
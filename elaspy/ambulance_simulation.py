@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import copy
+import scipy
 import simpy as sp
 import numpy as np
 import pandas as pd
@@ -10,6 +11,14 @@ import numpy.random as rnd
 from typing import Any
 from ambulance import Ambulance
 from patient import Patient
+from telemetry import FleetTelemetry
+from road_network import load_road_network
+from matrix_storage import reduce_matrix_precision, create_precision_report
+from output_columns import (
+    OutputColumns,
+    PATIENT_COLUMN_TYPES,
+    AMBULANCE_COLUMN_TYPES,
+)
 from collections import deque
 from coordinate_methods import (
     calculate_new_coordinate,
@@ -32,7 +41,8 @@ def initialize_simulation(
     Initializes all data and required objects of the simulation.
 
     Note that the ``SIMULATION_DATA`` dataframe will contain the data that is
-    initialized.
+    initialized. Region data that is already present in ``SIMULATION_DATA``
+    is not read again, see ``load_region_data``.
 
     Parameters
     ----------
@@ -46,7 +56,11 @@ def initialize_simulation(
         ``PROB_GO_TO_HOSPITAL``, ``CRN_GENERATOR``, ``SEED_VALUE``,
         ``CALL_LAMBDA``, ``PROCESS_TYPE``, ``PROCESS_NUM_CALLS``,
         ``PROCESS_TIME``, ``AID_PARAMETERS``, ``DROP_OFF_PARAMETERS`` are also
-        necessary. If historical data is used, the parameters
+        necessary. If ``ARRIVAL_RATE_FILE`` is given and not ``None``, the
+        arrivals are generated by ``generate_arrival_times_rate_function``
+        instead of with ``CALL_LAMBDA``. If ``ANTITHETIC=True``, the inputs
+        are generated by ``generate_antithetic_inputs`` instead.
+        If historical data is used, the parameters
         ``INTERARRIVAL_TIMES_FILE``, ``ON_SITE_AID_TIMES_FILE``,
         ``DROP_OFF_TIMES_FILE``, ``LOCATION_IDS_FILE`` and ``TO_HOSPITAL_FILE``
         are also necessary. Note that methods that are called within this
@@ -85,51 +99,7 @@ def initialize_simulation(
 
     """
 
-    SIREN_DRIVING_MATRIX = pd.read_csv(
-        f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
-        f"{SIMULATION_PARAMETERS['TRAVEL_TIMES_FILE']}",
-        index_col=0,
-    )
-    SIREN_DRIVING_MATRIX.columns = SIREN_DRIVING_MATRIX.columns.astype(int)
-
-    DISTANCE_MATRIX = pd.read_csv(
-        f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
-        f"{SIMULATION_PARAMETERS['DISTANCE_FILE']}",
-        index_col=0,
-    )
-    DISTANCE_MATRIX.columns = DISTANCE_MATRIX.columns.astype(int)
-
-    NODES_REGION = pd.read_csv(
-        f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
-        f"{SIMULATION_PARAMETERS['NODES_FILE']}",
-        index_col=0,
-    )
-    NODES_HOSPITAL = pd.read_csv(
-        f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
-        f"{SIMULATION_PARAMETERS['HOSPITAL_FILE']}"
-    )
-    NODES_BASE_LOCATIONS = pd.read_csv(
-        f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
-        f"{SIMULATION_PARAMETERS['BASE_LOCATIONS_FILE']}"
-    )
-    AMBULANCE_BASE_LOCATIONS = pd.read_csv(
-        f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
-        f"{SIMULATION_PARAMETERS['AMBULANCE_BASE_LOCATIONS_FILE']}",
-        index_col=0,
-    )
-    CHARGING_STATIONS_SCENARIO = pd.read_csv(
-        f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
-        f"{SIMULATION_PARAMETERS['CHARGING_SCENARIO_FILE']}",
-        index_col=0,
-    )
-
-    SIMULATION_DATA["SIREN_DRIVING_MATRIX"] = SIREN_DRIVING_MATRIX
-    SIMULATION_DATA["DISTANCE_MATRIX"] = DISTANCE_MATRIX
-    SIMULATION_DATA["NODES_REGION"] = NODES_REGION
-    SIMULATION_DATA["NODES_HOSPITAL"] = NODES_HOSPITAL
-    SIMULATION_DATA["NODES_BASE_LOCATIONS"] = NODES_BASE_LOCATIONS
-    SIMULATION_DATA["AMBULANCE_BASE_LOCATIONS"] = AMBULANCE_BASE_LOCATIONS
-    SIMULATION_DATA["CHARGING_STATIONS_SCENARIO"] = CHARGING_STATIONS_SCENARIO
+    load_region_data(SIMULATION_PARAMETERS, SIMULATION_DATA)
 
     if SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
         interarrival_times = (
@@ -181,6 +151,14 @@ def initialize_simulation(
         SIMULATION_PARAMETERS["NUM_CALLS"] = SIMULATION_PARAMETERS[
             "PROCESS_NUM_CALLS"
         ]
+    elif SIMULATION_PARAMETERS.get("ANTITHETIC", False):
+        (
+            interarrival_times,
+            on_site_aid_times,
+            drop_off_times,
+            location_IDs,
+            to_hospital_bool,
+        ) = generate_antithetic_inputs(SIMULATION_PARAMETERS, SIMULATION_DATA)
     else:
 
         rng: rnd._generator.Generator | rnd.mtrand.RandomState
@@ -194,7 +172,17 @@ def initialize_simulation(
                 "Invalid CRN_GENERATOR specified. Please change it."
             )
 
-        if SIMULATION_PARAMETERS["PROCESS_TYPE"] == "Number":
+        use_arrival_rates = (
+            SIMULATION_PARAMETERS.get("ARRIVAL_RATE_FILE") is not None
+        )
+        if use_arrival_rates:
+            (
+                interarrival_times,
+                rate_intervals,
+            ) = generate_arrival_times_rate_function(
+                rng, SIMULATION_PARAMETERS, SIMULATION_DATA
+            )
+        elif SIMULATION_PARAMETERS["PROCESS_TYPE"] == "Number":
             interarrival_times = rng.exponential(
                 1 / SIMULATION_PARAMETERS["CALL_LAMBDA"],
                 size=SIMULATION_PARAMETERS["PROCESS_NUM_CALLS"],
@@ -234,9 +222,14 @@ def initialize_simulation(
             SIMULATION_PARAMETERS["DROP_OFF_PARAMETERS"][3],
         )
 
-        location_IDs = location_generator(
-            rng, SIMULATION_PARAMETERS, SIMULATION_DATA
-        )
+        if use_arrival_rates:
+            location_IDs = location_generator_rate_function(
+                rng, rate_intervals, SIMULATION_PARAMETERS, SIMULATION_DATA
+            )
+        else:
+            location_IDs = location_generator(
+                rng, SIMULATION_PARAMETERS, SIMULATION_DATA
+            )
         to_hospital_bool = (
             rng.uniform(0, 1, size=SIMULATION_PARAMETERS["NUM_CALLS"])
             < SIMULATION_PARAMETERS["PROB_GO_TO_HOSPITAL"]
@@ -250,20 +243,19 @@ def initialize_simulation(
 
     print(f"NUM_CALLS: {SIMULATION_PARAMETERS['NUM_CALLS']}.")
 
-    output_patient = np.full(
-        (
-            SIMULATION_PARAMETERS["NUM_CALLS"],
-            len(SIMULATION_DATA["DATA_COLUMNS_PATIENT"]),
-        ),
-        np.nan,
+    output_patient = OutputColumns(
+        SIMULATION_DATA["DATA_COLUMNS_PATIENT"],
+        PATIENT_COLUMN_TYPES,
+        nr_rows=SIMULATION_PARAMETERS["NUM_CALLS"],
     )
-    output_ambulance = np.empty(
-        (0, len(SIMULATION_DATA["DATA_COLUMNS_AMBULANCE"])), dtype=float
+    output_ambulance = OutputColumns(
+        SIMULATION_DATA["DATA_COLUMNS_AMBULANCE"], AMBULANCE_COLUMN_TYPES
     )
 
     SIMULATION_DATA["output_patient"] = output_patient
     SIMULATION_DATA["output_ambulance"] = output_ambulance
     SIMULATION_DATA["nr_times_no_fast_no_regular_available"] = 0
+    SIMULATION_DATA["charging_time_per_location"] = {}
 
     SIMULATION_DATA["TIME_LAST_ARRIVAL"] = np.inf
 
@@ -286,6 +278,325 @@ def initialize_simulation(
     )
 
 
+def load_region_data(
+    SIMULATION_PARAMETERS: dict[str, Any], SIMULATION_DATA: dict[str, Any]
+) -> None:
+    """
+    Loads the region data into ``SIMULATION_DATA``.
+
+    Only the data that is not yet present in ``SIMULATION_DATA`` is read from
+    the input files. The files are therefore read once when multiple runs are
+    performed with the same ``SIMULATION_DATA``. Data can also be provided
+    in memory, for example a modified ``CHARGING_STATIONS_SCENARIO``, in which
+    case the corresponding file is not used.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``DATA_DIRECTORY``,
+        ``TRAVEL_TIMES_FILE``, ``DISTANCE_FILE``, ``NODES_FILE``,
+        ``HOSPITAL_FILE``, ``BASE_LOCATIONS_FILE``,
+        ``AMBULANCE_BASE_LOCATIONS_FILE`` and ``CHARGING_SCENARIO_FILE`` are
+        at least necessary for the data that is not yet present. If the
+        parameter ``ROAD_NETWORK_FILE`` is given and not ``None``, the travel
+        times and distances are computed on demand from the road network in
+        this file instead of being read from ``TRAVEL_TIMES_FILE`` and
+        ``DISTANCE_FILE``. If the parameter ``MATRIX_PRECISION`` is given,
+        the matrices that are read from these files are stored with this
+        precision and the errors are reported in
+        ``MATRIX_PRECISION_REPORT``. See ``main.py`` for parameter
+        explanations. If the parameter ``ARRIVAL_RATE_FILE`` is given and not
+        ``None``, the arrival rates are read from this file.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. It will contain ``SIREN_DRIVING_MATRIX``,
+        ``DISTANCE_MATRIX``, ``NODES_REGION``, ``NODES_HOSPITAL``,
+        ``NODES_BASE_LOCATIONS``, ``AMBULANCE_BASE_LOCATIONS``,
+        ``CHARGING_STATIONS_SCENARIO`` and, if ``ARRIVAL_RATE_FILE`` is
+        given, ``ARRIVAL_RATES`` afterwards.
+
+    Raises
+    ------
+    Exception
+        If the arrival rates are invalid.
+
+    """
+
+    use_road_network = (
+        SIMULATION_PARAMETERS.get("ROAD_NETWORK_FILE") is not None
+    )
+    MATRIX_PRECISION = SIMULATION_PARAMETERS.get("MATRIX_PRECISION", "float64")
+    read_matrices = {}
+
+    if "SIREN_DRIVING_MATRIX" not in SIMULATION_DATA and not use_road_network:
+        SIREN_DRIVING_MATRIX = pd.read_csv(
+            f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
+            f"{SIMULATION_PARAMETERS['TRAVEL_TIMES_FILE']}",
+            index_col=0,
+        )
+        SIREN_DRIVING_MATRIX.columns = SIREN_DRIVING_MATRIX.columns.astype(int)
+        read_matrices["SIREN_DRIVING_MATRIX"] = SIREN_DRIVING_MATRIX
+
+    if "DISTANCE_MATRIX" not in SIMULATION_DATA and not use_road_network:
+        DISTANCE_MATRIX = pd.read_csv(
+            f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
+            f"{SIMULATION_PARAMETERS['DISTANCE_FILE']}",
+            index_col=0,
+        )
+        DISTANCE_MATRIX.columns = DISTANCE_MATRIX.columns.astype(int)
+        read_matrices["DISTANCE_MATRIX"] = DISTANCE_MATRIX
+
+    stored_matrices = {
+        name: reduce_matrix_precision(matrix, MATRIX_PRECISION)
+        for name, matrix in read_matrices.items()
+    }
+    SIMULATION_DATA.update(stored_matrices)
+    if MATRIX_PRECISION != "float64" and read_matrices:
+        SIMULATION_DATA["MATRIX_PRECISION_REPORT"] = create_precision_report(
+            {
+                name: (read_matrices[name], stored_matrices[name])
+                for name in read_matrices
+            }
+        )
+
+    if "NODES_REGION" not in SIMULATION_DATA:
+        SIMULATION_DATA["NODES_REGION"] = pd.read_csv(
+            f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
+            f"{SIMULATION_PARAMETERS['NODES_FILE']}",
+            index_col=0,
+        )
+    if "NODES_HOSPITAL" not in SIMULATION_DATA:
+        SIMULATION_DATA["NODES_HOSPITAL"] = pd.read_csv(
+            f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
+            f"{SIMULATION_PARAMETERS['HOSPITAL_FILE']}"
+        )
+    if "NODES_BASE_LOCATIONS" not in SIMULATION_DATA:
+        SIMULATION_DATA["NODES_BASE_LOCATIONS"] = pd.read_csv(
+            f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
+            f"{SIMULATION_PARAMETERS['BASE_LOCATIONS_FILE']}"
+        )
+    if "AMBULANCE_BASE_LOCATIONS" not in SIMULATION_DATA:
+        SIMULATION_DATA["AMBULANCE_BASE_LOCATIONS"] = pd.read_csv(
+            f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
+            f"{SIMULATION_PARAMETERS['AMBULANCE_BASE_LOCATIONS_FILE']}",
+            index_col=0,
+        )
+    if "CHARGING_STATIONS_SCENARIO" not in SIMULATION_DATA:
+        SIMULATION_DATA["CHARGING_STATIONS_SCENARIO"] = pd.read_csv(
+            f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
+            f"{SIMULATION_PARAMETERS['CHARGING_SCENARIO_FILE']}",
+            index_col=0,
+        )
+    if (
+        SIMULATION_PARAMETERS.get("ARRIVAL_RATE_FILE") is not None
+        and "ARRIVAL_RATES" not in SIMULATION_DATA
+    ):
+        ARRIVAL_RATES = pd.read_csv(
+            f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
+            f"{SIMULATION_PARAMETERS['ARRIVAL_RATE_FILE']}"
+        )
+        check_arrival_rates(ARRIVAL_RATES, SIMULATION_DATA["NODES_REGION"])
+        SIMULATION_DATA["ARRIVAL_RATES"] = ARRIVAL_RATES
+    if use_road_network and (
+        "SIREN_DRIVING_MATRIX" not in SIMULATION_DATA
+        or "DISTANCE_MATRIX" not in SIMULATION_DATA
+    ):
+        # The bases and hospitals (and thus the charging stations) are
+        # needed to precompute the most frequent searches.
+        road_network = load_road_network(
+            SIMULATION_PARAMETERS, SIMULATION_DATA
+        )
+        SIMULATION_DATA["SIREN_DRIVING_MATRIX"] = road_network.travel_times
+        SIMULATION_DATA["DISTANCE_MATRIX"] = road_network.distances
+
+
+def get_rate_columns(ARRIVAL_RATES: pd.DataFrame) -> list[str]:
+    """
+    Returns the rate columns of the arrival rates.
+
+    Parameters
+    ----------
+    ARRIVAL_RATES : pd.DataFrame
+        The arrival rates, see ``check_arrival_rates``.
+
+    Returns
+    -------
+    list[str]
+        The columns other than "start_time" and "end_time".
+
+    """
+    return [
+        column
+        for column in ARRIVAL_RATES.columns
+        if column not in ["start_time", "end_time"]
+    ]
+
+
+def check_arrival_rates(
+    ARRIVAL_RATES: pd.DataFrame, NODES_REGION: pd.DataFrame
+) -> None:
+    """
+    Checks the piecewise-constant arrival rate function.
+
+    Each row is an interval from "start_time" to "end_time" (in minutes).
+    The intervals are consecutive and start at 0, and the rate function
+    repeats itself after the "end_time" of the last interval, e.g., after
+    10080 minutes for a weekly profile. The arrival rates (calls per minute)
+    are either given in one column "rate", or per postal code in columns
+    named by the location IDs of ``NODES_REGION``.
+
+    Parameters
+    ----------
+    ARRIVAL_RATES : pd.DataFrame
+        The arrival rates.
+    NODES_REGION : pd.DataFrame
+        The nodes of the region.
+
+    Raises
+    ------
+    Exception
+        If the arrival rates are invalid.
+
+    """
+
+    rate_columns = get_rate_columns(ARRIVAL_RATES)
+    if "start_time" not in ARRIVAL_RATES or "end_time" not in ARRIVAL_RATES:
+        raise Exception(
+            "The arrival rates should have the columns start_time and "
+            "end_time."
+        )
+    if rate_columns != ["rate"] and not set(rate_columns) <= set(
+        NODES_REGION.index.astype(str)
+    ):
+        raise Exception(
+            "The rate columns of the arrival rates should be 'rate' or "
+            "location IDs of the nodes of the region, but are "
+            f"{rate_columns}."
+        )
+
+    start_times = ARRIVAL_RATES["start_time"].to_numpy(dtype=float)
+    end_times = ARRIVAL_RATES["end_time"].to_numpy(dtype=float)
+    if (
+        start_times[0] != 0
+        or np.any(end_times <= start_times)
+        or np.any(start_times[1:] != end_times[:-1])
+    ):
+        raise Exception(
+            "The intervals of the arrival rates should be consecutive, "
+            "non-empty and start at time 0."
+        )
+    rates = ARRIVAL_RATES[rate_columns].to_numpy(dtype=float)
+    if np.any(rates < 0) or np.sum(rates) <= 0:
+        raise Exception(
+            "The arrival rates should be non-negative and not all zero."
+        )
+
+
+def generate_arrival_times_rate_function(
+    rng: rnd._generator.Generator | rnd.mtrand.RandomState,
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Generates the arrivals of a non-homogeneous Poisson process.
+
+    The arrival rate is the piecewise-constant function of
+    ``ARRIVAL_RATES`` (summed over the postal codes), which is repeated
+    periodically. The arrival times of a Poisson process with rate 1 are
+    transformed with the inverse of the cumulative rate function, which is
+    piecewise linear, so all arrivals are generated at once.
+
+    Parameters
+    ----------
+    rng : rnd._generator.Generator | rnd.mtrand.RandomState
+        An initialized common random number generator.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``PROCESS_TYPE``,
+        ``PROCESS_NUM_CALLS`` and ``PROCESS_TIME`` are at least necessary.
+        See ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. ``ARRIVAL_RATES`` is at least necessary. It is
+        based on ``ARRIVAL_RATE_FILE``, see ``check_arrival_rates``.
+
+    Raises
+    ------
+    Exception
+        If an invalid ``PROCESS_TYPE`` is specified.
+
+    Returns
+    -------
+    interarrival_times : np.ndarray
+        The generated interarrival times.
+    rate_intervals : np.ndarray
+        The row of ``ARRIVAL_RATES`` of the interval of each arrival.
+
+    """
+
+    ARRIVAL_RATES = SIMULATION_DATA["ARRIVAL_RATES"]
+    start_times = ARRIVAL_RATES["start_time"].to_numpy(dtype=float)
+    end_times = ARRIVAL_RATES["end_time"].to_numpy(dtype=float)
+    rates = (
+        ARRIVAL_RATES[get_rate_columns(ARRIVAL_RATES)]
+        .to_numpy(dtype=float)
+        .sum(axis=1)
+    )
+    period = end_times[-1]
+    cumulative_rates = np.concatenate(
+        [[0], np.cumsum(rates * (end_times - start_times))]
+    )
+    rate_per_period = cumulative_rates[-1]
+
+    if SIMULATION_PARAMETERS["PROCESS_TYPE"] == "Number":
+        unit_arrival_times = np.cumsum(
+            rng.exponential(
+                1.0, size=SIMULATION_PARAMETERS["PROCESS_NUM_CALLS"]
+            )
+        )
+    elif SIMULATION_PARAMETERS["PROCESS_TYPE"] == "Time":
+        PROCESS_TIME = SIMULATION_PARAMETERS["PROCESS_TIME"]
+        # The cumulative rate (expected number of arrivals) at PROCESS_TIME.
+        nr_periods, remaining_time = divmod(PROCESS_TIME, period)
+        cumulative_process_rate = nr_periods * rate_per_period + np.interp(
+            remaining_time, np.append(start_times, period), cumulative_rates
+        )
+        # The arrivals are generated in blocks that most likely cover
+        # PROCESS_TIME at once.
+        block_size = int(
+            cumulative_process_rate + 5 * np.sqrt(cumulative_process_rate)
+        )
+        unit_interarrival_times = np.empty(0, dtype=float)
+        while np.sum(unit_interarrival_times) <= cumulative_process_rate:
+            unit_interarrival_times = np.append(
+                unit_interarrival_times,
+                rng.exponential(1.0, size=block_size + 10),
+            )
+        unit_arrival_times = np.cumsum(unit_interarrival_times)
+        unit_arrival_times = unit_arrival_times[
+            unit_arrival_times <= cumulative_process_rate
+        ]
+    else:
+        raise Exception(
+            "The PROCESS_TYPE variable should be 'Number' "
+            "or 'Time', but it is not. Please change this."
+        )
+
+    period_numbers, period_unit_times = np.divmod(
+        unit_arrival_times, rate_per_period
+    )
+    # The last interval that starts before the arrival has a positive rate.
+    rate_intervals = np.minimum(
+        np.searchsorted(cumulative_rates, period_unit_times, side="right") - 1,
+        len(rates) - 1,
+    )
+    arrival_times = (
+        period_numbers * period
+        + start_times[rate_intervals]
+        + (period_unit_times - cumulative_rates[rate_intervals])
+        / rates[rate_intervals]
+    )
+
+    return np.diff(arrival_times, prepend=0.0), rate_intervals
+
+
 def generate_service_times(
     s: float,
     loc: float,
@@ -336,6 +647,230 @@ def generate_service_times(
     return service_times
 
 
+def generate_uniforms(
+    rng: rnd._generator.Generator, size: int, ANTITHETIC_RUN: bool
+) -> np.ndarray:
+    """
+    Generates uniforms for the inverse transformation method.
+
+    Parameters
+    ----------
+    rng : rnd._generator.Generator
+        An initialized random number generator of one input stream.
+    size : int
+        The number of uniforms to generate.
+    ANTITHETIC_RUN : bool
+        Whether the antithetic uniforms 1-U are returned instead of U.
+
+    Returns
+    -------
+    np.ndarray
+        The uniforms, strictly between 0 and 1.
+
+    """
+
+    uniforms = rng.random(size)
+    if ANTITHETIC_RUN:
+        uniforms = 1 - uniforms
+    # Avoids infinite inverse-CDF values at 0 and 1.
+    return np.clip(uniforms, np.finfo(float).tiny, 1 - np.finfo(float).epsneg)
+
+
+def generate_truncated_lognormal_times(
+    uniforms: np.ndarray,
+    s: float,
+    loc: float,
+    scale: float,
+    CUT_OFF: float,
+) -> np.ndarray:
+    """
+    Generates service times by inverting the truncated lognormal CDF.
+
+    The service times have the same distribution as the times of
+    ``generate_service_times``, which rejects times that are not between 0
+    and the ``CUT_OFF`` value, but each time is a monotone function of one
+    uniform.
+
+    Parameters
+    ----------
+    uniforms : np.ndarray
+        The uniforms, one per service time.
+    s : float
+        The sigma parameter.
+    loc : float
+        The location parameter.
+    scale : float
+        The scale parameter.
+    CUT_OFF : float
+        The cut off/maximum value.
+
+    Returns
+    -------
+    np.ndarray
+        The generated service times.
+
+    """
+
+    lower = (
+        scipy.stats.norm.cdf((np.log(-loc) - np.log(scale)) / s)
+        if loc < 0
+        else 0.0
+    )
+    upper = scipy.stats.norm.cdf((np.log(CUT_OFF - loc) - np.log(scale)) / s)
+    return loc + scale * np.exp(
+        s * scipy.stats.norm.ppf(lower + uniforms * (upper - lower))
+    )
+
+
+def generate_antithetic_inputs(
+    SIMULATION_PARAMETERS: dict[str, Any], SIMULATION_DATA: dict[str, Any]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Generates the inputs of a run of an antithetic pair of runs.
+
+    Every input (interarrival times, on-site aid times, drop-off times,
+    locations and transports to the hospital) has its own random number
+    generator, spawned from ``SEED_VALUE``, and is generated by the inverse
+    transformation method. Both runs of a pair use the same ``SEED_VALUE``.
+    The run with ``ANTITHETIC_RUN=True`` uses the uniforms 1-U instead of U,
+    which makes the outputs of the pair negatively correlated. As each input
+    has its own stream, the uniforms of the pair stay synchronized when the
+    runs have a different number of calls.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``SEED_VALUE``,
+        ``ANTITHETIC_RUN``, ``PROB_GO_TO_HOSPITAL``, ``CALL_LAMBDA``,
+        ``PROCESS_TYPE``, ``PROCESS_NUM_CALLS``, ``PROCESS_TIME``,
+        ``AID_PARAMETERS`` and ``DROP_OFF_PARAMETERS`` are at least
+        necessary. ``NUM_CALLS`` is set. See ``main.py`` for parameter
+        explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. ``NODES_REGION`` is at least necessary. It is
+        based on ``NODES_FILE``. See ``main.py`` and the input data section on
+        the ELASPY website for explanations.
+
+    Raises
+    ------
+    Exception
+        If invalid input parameters are detected.
+
+    Returns
+    -------
+    interarrival_times : np.ndarray
+        The generated interarrival times.
+    on_site_aid_times : np.ndarray
+        The generated on-site aid times.
+    drop_off_times : np.ndarray
+        The generated drop-off times.
+    location_IDs : np.ndarray
+        Contains the initial location IDs of the patients.
+    to_hospital_bool : np.ndarray
+        Specifies for each patient whether transportation to the hospital is
+        required or not.
+
+    """
+
+    ANTITHETIC_RUN = SIMULATION_PARAMETERS.get("ANTITHETIC_RUN", False)
+    (
+        interarrival_rng,
+        on_site_rng,
+        drop_off_rng,
+        location_rng,
+        to_hospital_rng,
+    ) = [
+        rnd.default_rng(seed)
+        for seed in rnd.SeedSequence(
+            SIMULATION_PARAMETERS["SEED_VALUE"]
+        ).spawn(5)
+    ]
+    CALL_LAMBDA = SIMULATION_PARAMETERS["CALL_LAMBDA"]
+
+    if SIMULATION_PARAMETERS["PROCESS_TYPE"] == "Number":
+        interarrival_times = (
+            -np.log1p(
+                -generate_uniforms(
+                    interarrival_rng,
+                    SIMULATION_PARAMETERS["PROCESS_NUM_CALLS"],
+                    ANTITHETIC_RUN,
+                )
+            )
+            / CALL_LAMBDA
+        )
+    elif SIMULATION_PARAMETERS["PROCESS_TYPE"] == "Time":
+        PROCESS_TIME = SIMULATION_PARAMETERS["PROCESS_TIME"]
+        # The interarrival times are generated in blocks that most likely
+        # cover PROCESS_TIME at once.
+        block_size = int(
+            CALL_LAMBDA * PROCESS_TIME
+            + 5 * np.sqrt(CALL_LAMBDA * PROCESS_TIME)
+        )
+        interarrival_times = np.empty(0, dtype=float)
+        while np.sum(interarrival_times) <= PROCESS_TIME:
+            interarrival_times = np.append(
+                interarrival_times,
+                -np.log1p(
+                    -generate_uniforms(
+                        interarrival_rng, block_size + 10, ANTITHETIC_RUN
+                    )
+                )
+                / CALL_LAMBDA,
+            )
+        interarrival_times = interarrival_times[
+            np.cumsum(interarrival_times) <= PROCESS_TIME
+        ]
+    else:
+        raise Exception(
+            "The PROCESS_TYPE variable should be 'Number' "
+            "or 'Time', but it is not. Please change this."
+        )
+
+    SIMULATION_PARAMETERS["NUM_CALLS"] = len(interarrival_times)
+    if SIMULATION_PARAMETERS["NUM_CALLS"] <= 0:
+        raise Exception(
+            "NUM_CALLS is smaller or equal to 0. This indicates"
+            " PROCESS_TIME is too small or PROCESS_NUM_CALLS is"
+            " smaller or equal to 0. Please make a change."
+        )
+    NUM_CALLS = SIMULATION_PARAMETERS["NUM_CALLS"]
+
+    on_site_aid_times = generate_truncated_lognormal_times(
+        generate_uniforms(on_site_rng, NUM_CALLS, ANTITHETIC_RUN),
+        *SIMULATION_PARAMETERS["AID_PARAMETERS"],
+    )
+    drop_off_times = generate_truncated_lognormal_times(
+        generate_uniforms(drop_off_rng, NUM_CALLS, ANTITHETIC_RUN),
+        *SIMULATION_PARAMETERS["DROP_OFF_PARAMETERS"],
+    )
+
+    # The first node whose cumulative inhabitant proportion exceeds the
+    # uniform, as in location_generator.
+    nodes_region = SIMULATION_DATA["NODES_REGION"]
+    location_IDs = nodes_region.index.to_numpy()[
+        np.minimum(
+            np.searchsorted(
+                nodes_region["inhabitantsIncreasing"].to_numpy(),
+                generate_uniforms(location_rng, NUM_CALLS, ANTITHETIC_RUN),
+                side="right",
+            ),
+            len(nodes_region) - 1,
+        )
+    ]
+    to_hospital_bool = (
+        generate_uniforms(to_hospital_rng, NUM_CALLS, ANTITHETIC_RUN)
+        < SIMULATION_PARAMETERS["PROB_GO_TO_HOSPITAL"]
+    )
+
+    return (
+        interarrival_times,
+        on_site_aid_times,
+        drop_off_times,
+        location_IDs,
+        to_hospital_bool,
+    )
+
+
 def generate_interarrival_times_process_type_time(
     rng: rnd._generator.Generator | rnd.mtrand.RandomState,
     SIMULATION_PARAMETERS: dict[str, Any],
@@ -401,7 +936,9 @@ def run_simulation(
         ``nr_times_no_fast_no_regular_available``, ``TIME_LAST_ARRIVAL`` are at
         least necessary. See ``main.py`` and the input data section
         on the ELASPY website for explanations. Note that methods that are
-        called within this method may require more data.
+        called within this method may require more data. If the parameter
+        ``TELEMETRY_INTERVAL`` is given and not ``None``, the telemetry
+        samples are stored in ``output_telemetry``.
 
     Raises
     ------
@@ -412,6 +949,38 @@ def run_simulation(
 
     """
 
+    simulation = start_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
+    finish_simulation(simulation, SIMULATION_PARAMETERS, SIMULATION_DATA)
+
+
+def start_simulation(
+    SIMULATION_PARAMETERS: dict[str, Any], SIMULATION_DATA: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Initializes a simulation run and starts its processes.
+
+    The run is not simulated yet. It can be simulated (partially) with
+    ``simulation["env"].run(until=...)`` and should be finished with
+    ``finish_simulation``.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. See ``run_simulation``.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. See ``run_simulation``.
+
+    Returns
+    -------
+    dict[str, Any]
+        The state of the run: the SimPy environment ("env"), the ambulances
+        ("ambulances"), the charging stations ("charging_stations"), the
+        patient queue ("patient_queue"), the telemetry or ``None``
+        ("telemetry") and a copy of the simulation data at the start of the
+        run ("copy_simulation_data").
+
+    """
+
     (
         location_IDs,
         simulation_times,
@@ -452,19 +1021,74 @@ def run_simulation(
             )
         )
 
-    env.run()
-    if len(patient_queue) != 0:
+    telemetry = None
+    if SIMULATION_PARAMETERS.get("TELEMETRY_INTERVAL") is not None:
+        telemetry = FleetTelemetry(
+            env,
+            ambulances,
+            patient_queue,
+            SIMULATION_PARAMETERS["TELEMETRY_INTERVAL"],
+            np.sum(simulation_times["interarrival"]),
+        )
+        env.process(telemetry.sample())
+
+    return {
+        "env": env,
+        "ambulances": ambulances,
+        "charging_stations": charging_stations,
+        "patient_queue": patient_queue,
+        "telemetry": telemetry,
+        "copy_simulation_data": copy_simulation_data,
+    }
+
+
+def finish_simulation(
+    simulation: dict[str, Any],
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+) -> None:
+    """
+    Simulates the remainder of a run and checks the result.
+
+    Parameters
+    ----------
+    simulation : dict[str, Any]
+        The state of the run, see ``start_simulation``.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. See ``run_simulation``.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. See ``run_simulation``.
+
+    Raises
+    ------
+    Exception
+        1. If the patient queue is not empty after completing the simulation run.
+        2. If the input data (``SIMULATION_DATA``) has been changed during the
+        simulation run.
+
+    """
+
+    simulation["env"].run()
+    if simulation["telemetry"] is not None:
+        SIMULATION_DATA["output_telemetry"] = simulation[
+            "telemetry"
+        ].get_samples()
+    if len(simulation["patient_queue"]) != 0:
         raise Exception(
             "The patient_queue should be empty, but there are "
-            f"{len(patient_queue)} waiting patients."
+            f"{len(simulation['patient_queue'])} waiting patients."
         )
 
+    copy_simulation_data = simulation["copy_simulation_data"]
+
     for key in copy_simulation_data.keys():
         if key in [
             "output_ambulance",
             "output_patient",
             "nr_times_no_fast_no_regular_available",
+            "charging_time_per_location",
             "TIME_LAST_ARRIVAL",
+            "output_telemetry",
         ]:
             # These objects are changed in the simulation.
             pass
@@ -773,6 +1397,75 @@ def location_generator(
     return location_IDs
 
 
+def location_generator_rate_function(
+    rng: rnd._generator.Generator | rnd.mtrand.RandomState,
+    rate_intervals: np.ndarray,
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+) -> np.ndarray:
+    """
+    Generates the patient arrival locations with time-dependent rates.
+
+    If the arrival rates are given per postal code, the location of a
+    patient is drawn according to the rates of the postal codes in the
+    interval of its arrival. Otherwise, ``location_generator`` is used.
+
+    Parameters
+    ----------
+    rng : rnd._generator.Generator | rnd.mtrand.RandomState
+        An initialized random number generator.
+    rate_intervals : np.ndarray
+        The row of ``ARRIVAL_RATES`` of the interval of each arrival, see
+        ``generate_arrival_times_rate_function``.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``NUM_CALLS`` and ``PRINT``
+        are at least necessary. See ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. ``ARRIVAL_RATES`` and ``NODES_REGION`` are at
+        least necessary. See ``check_arrival_rates``.
+
+    Returns
+    -------
+    location_IDs : np.ndarray
+        Contains the initial location IDs of the patients.
+
+    """
+
+    rate_columns = get_rate_columns(SIMULATION_DATA["ARRIVAL_RATES"])
+    if rate_columns == ["rate"]:
+        return location_generator(rng, SIMULATION_PARAMETERS, SIMULATION_DATA)
+
+    location_rates = SIMULATION_DATA["ARRIVAL_RATES"][rate_columns].to_numpy(
+        dtype=float
+    )
+    nr_intervals, nr_locations = location_rates.shape
+    total_rates = location_rates.sum(axis=1, keepdims=True)
+    cumulative_probabilities = np.divide(
+        np.cumsum(location_rates, axis=1),
+        total_rates,
+        out=np.ones_like(location_rates),
+        where=total_rates > 0,
+    )
+    # Adding the interval number makes the cumulative probabilities of all
+    # intervals one non-decreasing array.
+    location_uniforms = rng.uniform(
+        0, 1, size=SIMULATION_PARAMETERS["NUM_CALLS"]
+    )
+    positions = (
+        np.searchsorted(
+            (
+                cumulative_probabilities + np.arange(nr_intervals)[:, None]
+            ).ravel(),
+            rate_intervals + location_uniforms,
+            side="right",
+        )
+        - rate_intervals * nr_locations
+    )
+    return np.array(rate_columns, dtype=int)[
+        np.minimum(positions, nr_locations - 1)
+    ]
+
+
 def patient_arrival(
     env: sp.core.Environment,
     patient_ID: int,
@@ -821,9 +1514,13 @@ def patient_arrival(
         print(f"{env.now}: Call for patient {patient_ID}.")
     arrival_time_patient = env.now
 
-    SIMULATION_DATA["output_patient"][patient_ID, 0] = patient_ID
-    SIMULATION_DATA["output_patient"][patient_ID, 2] = arrival_time_patient
-    SIMULATION_DATA["output_patient"][patient_ID, 3] = patient_location_ID
+    SIMULATION_DATA["output_patient"]["patient_ID"][patient_ID] = patient_ID
+    SIMULATION_DATA["output_patient"]["arrival_time"][
+        patient_ID
+    ] = arrival_time_patient
+    SIMULATION_DATA["output_patient"]["location_ID"][
+        patient_ID
+    ] = patient_location_ID
 
     hospital_location_ID = select_hospital(
         patient_location_ID, SIMULATION_PARAMETERS, SIMULATION_DATA
@@ -1351,11 +2048,11 @@ def check_select_ambulance(
                 f"{patient.patient_ID}. The patient remains in the queue."
             )
     else:
-        SIMULATION_DATA["output_patient"][
-            patient.patient_ID, 4
+        SIMULATION_DATA["output_patient"]["nr_ambulances_available"][
+            patient.patient_ID
         ] = nr_ambulances_available
-        SIMULATION_DATA["output_patient"][
-            patient.patient_ID, 5
+        SIMULATION_DATA["output_patient"]["nr_ambulances_not_assignable"][
+            patient.patient_ID
         ] = nr_ambulances_not_assignable
         PATIENT_ASSIGNED = True
         postal_code_shortest_time = (
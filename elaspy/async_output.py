@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the asynchronous writer of the simulation output.
+
+Saving the dataframes of a run takes a considerable part of the running time
+of a run. An ``AsyncOutputWriter`` saves them in a separate process, while
+the next run is simulated. The number of runs that are waiting to be saved is
+bounded, so the memory does not grow if saving is slower than simulating.
+The outputs are saved in the order in which they are submitted, so runs can
+be appended to the same file.
+"""
+from typing import Any, Callable
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+
+class AsyncOutputWriter:
+    """
+    A class to save simulation output in a background process.
+
+    Attributes
+    ----------
+    MAX_PENDING : int
+        The maximum number of submitted outputs that are not saved yet. If 0,
+        the outputs are saved directly in the calling process.
+    executor : ProcessPoolExecutor | None
+        The executor with one worker process. It is started at the first
+        submission.
+    pending : deque[Future]
+        The submitted outputs that are not yet checked.
+
+    """
+
+    def __init__(self, MAX_PENDING: int = 2) -> None:
+        """
+        Initializes the writer.
+
+        Parameters
+        ----------
+        MAX_PENDING : int, optional
+            The maximum number of submitted outputs that are not saved yet. If
+            0, the outputs are saved directly in the calling process. The
+            default is 2.
+
+        """
+
+        self.MAX_PENDING: int = MAX_PENDING
+        self.executor: ProcessPoolExecutor | None = None
+        self.pending: deque[Future] = deque()
+
+    def __enter__(self) -> "AsyncOutputWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is None:
+            self.close()
+        elif self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def submit(self, function: Callable, *args: Any) -> None:
+        """
+        Submits a save function, e.g., ``save_simulation_output``.
+
+        If ``MAX_PENDING`` outputs are waiting, it first waits until the
+        oldest output is saved.
+
+        Parameters
+        ----------
+        function : Callable
+            The save function. It should be defined at the top level of a
+            module, such that it can be sent to the worker process.
+        *args : Any
+            The arguments of the save function.
+
+        Raises
+        ------
+        Exception
+            The exception of a previously submitted output that could not be
+            saved.
+
+        """
+
+        if self.MAX_PENDING == 0:
+            function(*args)
+            return
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=1)
+        while len(self.pending) >= self.MAX_PENDING:
+            self.pending.popleft().result()
+        self.pending.append(self.executor.submit(function, *args))
+
+    def close(self) -> None:
+        """
+        Waits until all submitted outputs are saved and stops the worker
+        process.
+
+        Raises
+        ------
+        Exception
+            The exception of the first submitted output that could not be
+            saved.
+
+        """
+
+        try:
+            while self.pending:
+                self.pending.popleft().result()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+                self.executor = None
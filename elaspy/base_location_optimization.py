@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This script improves the assignment of ambulances to bases with simulation.
+
+MEXCLP uses a fixed busy fraction and ignores charging, so its placement is
+not necessarily the best placement for an electric fleet. Starting from the
+``AMBULANCE_BASE_LOCATIONS_FILE`` of ``main.py`` (e.g. a MEXCLP placement),
+this script samples candidate placements that move one ambulance to another
+base. Each candidate is simulated ``NUM_RUNS`` times with the same seeds as
+the incumbent (common random numbers), and the best candidate is accepted if
+it significantly decreases the empirical 95% quantile of the response time
+according to a paired one-sided t-test. As the best of several candidates is
+tested, the significance level is divided by the number of candidates
+(Bonferroni correction). The runs of all candidates are
+performed in a process pool, where each process loads the region data only
+once. The simulation parameters are taken from ``main.py``.
+
+Parameters
+----------
+OUTPUT_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the output files should be saved.
+SAVE_OUTPUT : bool
+    Whether the output should be saved or not.
+SEED_VALUE_CANDIDATES : int
+    The seed value that is used to sample the candidate placements.
+NUM_WORKERS : int
+    The number of processes that are used to perform the runs. If equal to 1,
+    the runs are performed sequentially.
+NUM_ITERATIONS : int
+    The number of iterations.
+NUM_CANDIDATES : int
+    The number of candidate placements per iteration. If there are fewer
+    possible moves, all moves are evaluated.
+NUM_RUNS : int
+    The number of runs per candidate. Should be at least 2.
+SIGNIFICANCE_LEVEL : float
+    The significance level of the paired t-tests that are used to accept a
+    candidate. Each candidate is tested at this level divided by the number
+    of candidates of the iteration.
+OUTPUT_FILE_NAME : str
+    The name of the file where the results of the iterations will be saved if
+    ``SAVE_OUTPUT=True``.
+OPTIMIZED_BASE_LOCATIONS_FILE_NAME : str
+    The name of the file where the final assignment of ambulances to bases
+    will be saved if ``SAVE_OUTPUT=True``. It has the format of the
+    ``AMBULANCE_BASE_LOCATIONS_FILE``.
+RUN_PARAMETERS_FILE_NAME : str
+    The name of the text file with the script parameters if
+    ``SAVE_OUTPUT=True``.
+"""
+from typing import Any
+
+import os
+import datetime
+import scipy
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from ambulance_simulation import load_region_data
+from charger_optimization import simulate_run
+from input_output_functions import check_input_parameters
+from main import SIMULATION_PARAMETERS, SIMULATION_DATA
+
+################################Directories####################################
+ROOT_DIRECTORY: str = os.path.dirname(os.path.dirname(__file__))
+OUTPUT_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "results/")
+################################Parameters#####################################
+SAVE_OUTPUT: bool = False
+SEED_VALUE_CANDIDATES: int = 0
+NUM_WORKERS: int = 1
+NUM_ITERATIONS: int = 20
+NUM_CANDIDATES: int = 10
+NUM_RUNS: int = 20
+SIGNIFICANCE_LEVEL: float = 0.05
+#################################File names####################################
+OUTPUT_FILE_NAME: str = (
+    f"base_location_optimization_{SIMULATION_PARAMETERS['SCENARIO']}.csv"
+)
+OPTIMIZED_BASE_LOCATIONS_FILE_NAME: str = (
+    "Base_Locations_Ambulances_simulation_"
+    f"{SIMULATION_PARAMETERS['SCENARIO']}.csv"
+)
+RUN_PARAMETERS_FILE_NAME: str = (
+    f"base_location_optimization_{SIMULATION_PARAMETERS['SCENARIO']}"
+)
+##################################Functions####################################
+
+_WORKER_STATE: dict[str, Any] = {}
+
+
+def initialize_worker(
+    SIMULATION_PARAMETERS: dict[str, Any], SIMULATION_DATA: dict[str, Any]
+) -> None:
+    """
+    Stores the simulation parameters and loads the region data in a process.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. See ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. See ``load_region_data``.
+
+    """
+
+    load_region_data(SIMULATION_PARAMETERS, SIMULATION_DATA)
+    _WORKER_STATE["SIMULATION_PARAMETERS"] = SIMULATION_PARAMETERS
+    _WORKER_STATE["SIMULATION_DATA"] = SIMULATION_DATA
+
+
+def simulate_base_locations(
+    ambulance_base_locations: pd.DataFrame, seed_value: int
+) -> float:
+    """
+    Performs a simulation run with the given assignment of ambulances to
+    bases in a process that was initialized with ``initialize_worker``.
+
+    Parameters
+    ----------
+    ambulance_base_locations : pd.DataFrame
+        The assignment of ambulances to bases in the format of the
+        ``AMBULANCE_BASE_LOCATIONS_FILE``.
+    seed_value : int
+        The seed value of the run.
+
+    Returns
+    -------
+    float
+        The empirical 95% quantile of the response time.
+
+    """
+
+    SIMULATION_DATA = dict(_WORKER_STATE["SIMULATION_DATA"])
+    SIMULATION_DATA["AMBULANCE_BASE_LOCATIONS"] = ambulance_base_locations
+
+    return simulate_run(
+        _WORKER_STATE["SIMULATION_PARAMETERS"], SIMULATION_DATA, seed_value
+    )["emp_quantile_response_time"]
+
+
+def generate_base_moves(
+    ambulance_base_locations: pd.DataFrame, bases: list[int]
+) -> list[tuple[int, int]]:
+    """
+    Generates all moves of one ambulance from its base to another base.
+
+    Ambulances at the same base are interchangeable, so only one ambulance
+    per base is considered.
+
+    Parameters
+    ----------
+    ambulance_base_locations : pd.DataFrame
+        The assignment of ambulances to bases in the format of the
+        ``AMBULANCE_BASE_LOCATIONS_FILE``.
+    bases : list[int]
+        The postal codes of all bases.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        The moves as (ambulance ID, new base).
+
+    """
+
+    first_ambulance_per_base = (
+        ambulance_base_locations.reset_index()
+        .groupby("Base")
+        .first()
+        .iloc[:, 0]
+    )
+
+    return [
+        (int(ambulance_ID), int(base))
+        for current_base, ambulance_ID in first_ambulance_per_base.items()
+        for base in bases
+        if base != current_base
+    ]
+
+
+def compare_paired(
+    incumbent_results: np.ndarray,
+    candidate_results: np.ndarray,
+    SIGNIFICANCE_LEVEL: float,
+) -> tuple[float, bool]:
+    """
+    Compares a candidate with the incumbent with a paired one-sided t-test.
+
+    Parameters
+    ----------
+    incumbent_results : np.ndarray
+        The results of the incumbent per run.
+    candidate_results : np.ndarray
+        The results of the candidate per run, with the same seeds as the
+        incumbent.
+    SIGNIFICANCE_LEVEL : float
+        The significance level of the test.
+
+    Returns
+    -------
+    float
+        The mean difference between the candidate and the incumbent.
+    bool
+        Whether the candidate is significantly better (lower) than the
+        incumbent.
+
+    """
+
+    differences = candidate_results - incumbent_results
+    mean_difference = float(np.mean(differences))
+    half_width = (
+        scipy.stats.t.ppf(1 - SIGNIFICANCE_LEVEL, len(differences) - 1)
+        * np.std(differences, ddof=1)
+        / np.sqrt(len(differences))
+    )
+
+    return mean_difference, bool(mean_difference + half_width < 0)
+
+
+##############################Save parameters##################################
+if __name__ == "__main__":
+    start_running_time = datetime.datetime.now()
+
+    check_input_parameters(SIMULATION_PARAMETERS)
+    if SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
+        raise Exception(
+            "The base location optimization generates its own input data, "
+            "so LOAD_INPUT_DATA should be False."
+        )
+    if NUM_RUNS < 2:
+        raise Exception("NUM_RUNS should be at least 2.")
+
+    if SAVE_OUTPUT:
+        with open(
+            f"{OUTPUT_DIRECTORY}{RUN_PARAMETERS_FILE_NAME}.txt",
+            "w",
+            encoding="utf-8",
+        ) as f:
+            f.write(f"OUTPUT_DIRECTORY: {OUTPUT_DIRECTORY}\n")
+            f.write(f"SAVE_OUTPUT: {SAVE_OUTPUT}\n")
+            f.write(f"SEED_VALUE_CANDIDATES: {SEED_VALUE_CANDIDATES}\n")
+            f.write(f"NUM_WORKERS: {NUM_WORKERS}\n")
+            f.write(f"NUM_ITERATIONS: {NUM_ITERATIONS}\n")
+            f.write(f"NUM_CANDIDATES: {NUM_CANDIDATES}\n")
+            f.write(f"NUM_RUNS: {NUM_RUNS}\n")
+            f.write(f"SIGNIFICANCE_LEVEL: {SIGNIFICANCE_LEVEL}\n")
+            f.write(f"OUTPUT_FILE_NAME: {OUTPUT_FILE_NAME}\n")
+            f.write(
+                "OPTIMIZED_BASE_LOCATIONS_FILE_NAME: "
+                f"{OPTIMIZED_BASE_LOCATIONS_FILE_NAME}\n"
+            )
+            f.write(f"RUN_PARAMETERS_FILE_NAME: {RUN_PARAMETERS_FILE_NAME}\n")
+            for key, value in SIMULATION_PARAMETERS.items():
+                f.write(f"{key}: {value}\n")
+            f.close()
+
+    ##############################Optimization#################################
+    load_region_data(SIMULATION_PARAMETERS, SIMULATION_DATA)
+    bases = list(SIMULATION_DATA["NODES_BASE_LOCATIONS"]["Base Locations"])
+    seed_values = [
+        SIMULATION_PARAMETERS["START_SEED_VALUE"] + run_nr
+        for run_nr in range(NUM_RUNS)
+    ]
+    rng = np.random.default_rng(SEED_VALUE_CANDIDATES)
+
+    executor = None
+    if NUM_WORKERS > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=NUM_WORKERS,
+            initializer=initialize_worker,
+            initargs=(SIMULATION_PARAMETERS, SIMULATION_DATA),
+        )
+    else:
+        initialize_worker(SIMULATION_PARAMETERS, SIMULATION_DATA)
+
+    def evaluate(placements: list[pd.DataFrame]) -> list[np.ndarray]:
+        if executor is None:
+            return [
+                np.array(
+                    [
+                        simulate_base_locations(placement, seed)
+                        for seed in seed_values
+                    ]
+                )
+                for placement in placements
+            ]
+        futures = [
+            [
+                executor.submit(simulate_base_locations, placement, seed)
+                for seed in seed_values
+            ]
+            for placement in placements
+        ]
+        return [
+            np.array([future.result() for future in placement_futures])
+            for placement_futures in futures
+        ]
+
+    incumbent = SIMULATION_DATA["AMBULANCE_BASE_LOCATIONS"].copy()
+    (incumbent_results,) = evaluate([incumbent])
+    iteration_results = [
+        {
+            "iteration": 0,
+            "move": None,
+            "mean_difference": None,
+            "accepted": True,
+            "emp_quantile_response_time": np.mean(incumbent_results),
+        }
+    ]
+    print(
+        "The initial empirical 95% quantile of the response time is: "
+        f"{np.mean(incumbent_results)}."
+    )
+
+    for iteration in range(1, NUM_ITERATIONS + 1):
+        start_time_iteration = datetime.datetime.now()
+
+        moves = generate_base_moves(incumbent, bases)
+        if len(moves) > NUM_CANDIDATES:
+            moves = [
+                moves[i]
+                for i in rng.choice(len(moves), NUM_CANDIDATES, replace=False)
+            ]
+        candidates = []
+        for ambulance_ID, base in moves:
+            candidate = incumbent.copy()
+            candidate.loc[ambulance_ID, "Base"] = base
+            candidates.append(candidate)
+
+        candidate_results = evaluate(candidates)
+        # The best candidate is selected after the comparisons, so each
+        # comparison is Bonferroni-corrected to bound the probability that
+        # any of the candidates is accepted without being better.
+        comparisons = [
+            compare_paired(
+                incumbent_results,
+                results,
+                SIGNIFICANCE_LEVEL / len(candidates),
+            )
+            for results in candidate_results
+        ]
+        best = int(np.argmin([comparison[0] for comparison in comparisons]))
+        mean_difference, accepted = comparisons[best]
+        if accepted:
+            incumbent = candidates[best]
+            incumbent_results = candidate_results[best]
+
+        iteration_results.append(
+            {
+                "iteration": iteration,
+                "move": moves[best],
+                "mean_difference": mean_difference,
+                "accepted": accepted,
+                "emp_quantile_response_time": np.mean(incumbent_results),
+            }
+        )
+        print(
+            f"Iteration {iteration}: {iteration_results[-1]} "
+            f"({datetime.datetime.now()-start_time_iteration})."
+        )
+
+    if executor is not None:
+        executor.shutdown()
+
+    iteration_results_df = pd.DataFrame(iteration_results)
+    print(iteration_results_df)
+
+    if SAVE_OUTPUT:
+        iteration_results_df.to_csv(f"{OUTPUT_DIRECTORY}{OUTPUT_FILE_NAME}")
+        incumbent.to_csv(
+            f"{OUTPUT_DIRECTORY}{OPTIMIZED_BASE_LOCATIONS_FILE_NAME}"
+        )
+
+    print(
+        f"The total running time is: {datetime.datetime.now()-start_running_time}"
+    )
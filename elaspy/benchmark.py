@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This script benchmarks the simulation engine.
+
+For every combination of the number of calls, the number of ambulances, the
+engine type and the charging scenario, ``initialize_simulation``,
+``run_simulation`` and the post-processing of the output (building the
+DataFrames, ``calculate_response_time_ecdf`` and ``calculate_busy_fraction``)
+are timed. The number of processed SimPy events per second and, optionally,
+the peak memory usage of a run are recorded as well. The results are compared
+with a baseline that is stored in a json file, and the script exits with a
+non-zero exit code if a configuration has become slower or uses more memory
+than ``REGRESSION_THRESHOLD`` allows. Note that the baseline is only
+meaningful on the machine where it was created.
+
+The ambulances are spread evenly over the bases of ``BASE_LOCATIONS_FILE``
+and the arrival rate is scaled with the number of ambulances, such that the
+busy fraction is comparable for all fleet sizes. The other simulation
+parameters are taken from ``main.py``. Note that the default configurations
+take several hours in total, mainly due to the runs with 100000 calls.
+
+Parameters
+----------
+OUTPUT_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the output files should be saved.
+NUM_CALLS_LIST : list[int]
+    The numbers of calls per run.
+NUM_AMBULANCES_LIST : list[int]
+    The numbers of ambulances.
+ENGINE_TYPE_LIST : list[str]
+    The engine types. The "diesel" engine type is benchmarked with the
+    "Diesel" charging scenario.
+SCENARIO_LIST : list[str]
+    The charging scenarios that are benchmarked with the "electric" engine
+    type.
+CALL_LAMBDA_PER_AMBULANCE : float
+    The arrival rate of calls per minute per ambulance.
+NUM_REPETITIONS : int
+    The number of times each configuration is timed. The smallest time is
+    reported.
+MEASURE_MEMORY : bool
+    Whether the peak memory usage should be measured. This is done in a
+    separate run, as tracing the memory allocations slows down the
+    simulation.
+REGRESSION_THRESHOLD : float
+    The relative increase in time or memory (with respect to the baseline)
+    that is considered a regression.
+UPDATE_BASELINE : bool
+    Whether the baseline should be replaced by the results of this benchmark.
+    If there is no baseline yet, it is always created.
+BASELINE_FILE_NAME : str
+    The name of the json file with the baseline results.
+OUTPUT_FILE_NAME : str
+    The name of the csv file where the benchmark results are saved.
+"""
+from typing import Any, Iterator
+
+import os
+import sys
+import copy
+import json
+import time
+import contextlib
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+import ambulance_simulation
+from ambulance_simulation import run_simulation, load_region_data
+from profiling import count_events
+from input_output_functions import (
+    calculate_response_time_ecdf,
+    calculate_busy_fraction,
+)
+from main import SIMULATION_PARAMETERS, SIMULATION_DATA
+
+################################Directories####################################
+ROOT_DIRECTORY: str = os.path.dirname(os.path.dirname(__file__))
+OUTPUT_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "results/")
+################################Parameters#####################################
+NUM_CALLS_LIST: list[int] = [1000, 10000, 100000]
+NUM_AMBULANCES_LIST: list[int] = [20, 200]
+ENGINE_TYPE_LIST: list[str] = ["electric", "diesel"]
+SCENARIO_LIST: list[str] = ["FB1_FH1", "RB1_RH1"]
+CALL_LAMBDA_PER_AMBULANCE: float = 1 / (7.75 * 20)
+NUM_REPETITIONS: int = 1
+MEASURE_MEMORY: bool = True
+REGRESSION_THRESHOLD: float = 0.2
+UPDATE_BASELINE: bool = False
+#################################File names####################################
+BASELINE_FILE_NAME: str = "benchmark_baseline.json"
+OUTPUT_FILE_NAME: str = "benchmark_results.csv"
+##################################Functions####################################
+
+
+def create_benchmark_configuration(
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+    NUM_CALLS: int,
+    NUM_AMBULANCES: int,
+    ENGINE_TYPE: str,
+    SCENARIO: str,
+    CALL_LAMBDA_PER_AMBULANCE: float,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Creates the simulation parameters and data of a benchmark configuration.
+
+    The input dictionaries are not altered.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. See ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data with the region data, see ``load_region_data``.
+        ``NODES_BASE_LOCATIONS`` is at least necessary.
+    NUM_CALLS : int
+        The number of calls.
+    NUM_AMBULANCES : int
+        The number of ambulances. The ambulances are spread evenly over the
+        bases.
+    ENGINE_TYPE : str
+        The engine type, "electric" or "diesel".
+    SCENARIO : str
+        The charging scenario.
+    CALL_LAMBDA_PER_AMBULANCE : float
+        The arrival rate of calls per minute per ambulance.
+
+    Returns
+    -------
+    benchmark_parameters : dict[str, Any]
+        The simulation parameters of the configuration.
+    benchmark_data : dict[str, Any]
+        The simulation data of the configuration.
+
+    """
+
+    benchmark_parameters = copy.copy(SIMULATION_PARAMETERS)
+    benchmark_parameters.update(
+        {
+            "PROCESS_TYPE": "Number",
+            "PROCESS_NUM_CALLS": NUM_CALLS,
+            "PROCESS_TIME": None,
+            "NUM_AMBULANCES": NUM_AMBULANCES,
+            "CALL_LAMBDA": CALL_LAMBDA_PER_AMBULANCE * NUM_AMBULANCES,
+            "ENGINE_TYPE": ENGINE_TYPE,
+            "SCENARIO": SCENARIO,
+            "CHARGING_SCENARIO_FILE": f"charging_scenario_21_22_{SCENARIO}.csv",
+            "LOAD_INPUT_DATA": False,
+            "PRINT": False,
+            "FT_BOUNDARY": NUM_CALLS
+            / (CALL_LAMBDA_PER_AMBULANCE * NUM_AMBULANCES),
+        }
+    )
+    if ENGINE_TYPE == "diesel":
+        benchmark_parameters.update(
+            {
+                "IDLE_USAGE": None,
+                "DRIVING_USAGE": None,
+                "BATTERY_CAPACITY": np.inf,
+            }
+        )
+
+    bases = (
+        SIMULATION_DATA["NODES_BASE_LOCATIONS"]["Base Locations"]
+        .astype(int)
+        .to_numpy()
+    )
+    ambulance_base_locations = pd.DataFrame(
+        {"Base": bases[np.arange(NUM_AMBULANCES) % len(bases)]},
+        index=pd.Index(np.arange(NUM_AMBULANCES), name="Ambulance"),
+    )
+
+    benchmark_data = copy.copy(SIMULATION_DATA)
+    benchmark_data["AMBULANCE_BASE_LOCATIONS"] = ambulance_base_locations
+    benchmark_data.pop("CHARGING_STATIONS_SCENARIO", None)
+    load_region_data(benchmark_parameters, benchmark_data)
+
+    return benchmark_parameters, benchmark_data
+
+
+@contextlib.contextmanager
+def record_initialization(
+    measurements: dict[str, Any]
+) -> Iterator[dict[str, Any]]:
+    """
+    Records the running time of ``initialize_simulation`` and the processed
+    SimPy events of the runs within the context.
+
+    ``initialize_simulation`` is temporarily replaced by a wrapper in
+    ``ambulance_simulation``, such that ``run_simulation`` itself does not
+    have to be changed.
+
+    Parameters
+    ----------
+    measurements : dict[str, Any]
+        The dictionary in which the running time ("initialize_time") and the
+        number of processed events per event type ("event_counts") of the
+        last run are saved. The events are counted with ``count_events``.
+
+    Yields
+    ------
+    dict[str, Any]
+        The ``measurements`` dictionary.
+
+    """
+
+    initialize_simulation = ambulance_simulation.initialize_simulation
+
+    def timed_initialize_simulation(*args, **kwargs):
+        start_time = time.perf_counter()
+        initialization = initialize_simulation(*args, **kwargs)
+        measurements["initialize_time"] = time.perf_counter() - start_time
+        measurements["event_counts"] = {}
+        count_events(initialization[4], measurements["event_counts"])
+        return initialization
+
+    ambulance_simulation.initialize_simulation = timed_initialize_simulation
+    try:
+        yield measurements
+    finally:
+        ambulance_simulation.initialize_simulation = initialize_simulation
+
+
+def benchmark_run(
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+    MEASURE_MEMORY: bool = False,
+) -> dict[str, float]:
+    """
+    Benchmarks a single simulation run and the post-processing of its output.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. See ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. It is advised to load the region data beforehand
+        with ``load_region_data``, such that it is not read in every run.
+    MEASURE_MEMORY : bool, optional
+        Whether the peak memory usage of the run should be measured instead of
+        the running times. The default is ``False``.
+
+    Returns
+    -------
+    dict[str, float]
+        If ``MEASURE_MEMORY=False``, the running time of
+        ``initialize_simulation`` ("initialize_time"), of the remainder of
+        ``run_simulation`` ("simulation_time") and of the post-processing
+        ("postprocess_time") in seconds, the number of processed events
+        ("num_events") and the number of events per second of simulation time
+        ("events_per_second"). Otherwise, the peak memory usage of the run and
+        the post-processing in MB ("peak_memory_mb").
+
+    """
+
+    run_data = copy.copy(SIMULATION_DATA)
+    with record_initialization({}) as measurements:
+        if MEASURE_MEMORY:
+            tracemalloc.start()
+        start_time = time.perf_counter()
+        run_simulation(SIMULATION_PARAMETERS, run_data)
+        run_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    df_patient = calculate_response_time_ecdf(
+        run_data["output_patient"].to_dataframe()
+    )
+    run_data["output_ambulance"].to_dataframe()
+    calculate_busy_fraction(df_patient, SIMULATION_PARAMETERS)
+    postprocess_time = time.perf_counter() - start_time
+
+    if MEASURE_MEMORY:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {"peak_memory_mb": peak_memory / 2**20}
+
+    num_events = sum(measurements["event_counts"].values())
+    simulation_time = run_time - measurements["initialize_time"]
+
+    return {
+        "initialize_time": measurements["initialize_time"],
+        "simulation_time": simulation_time,
+        "postprocess_time": postprocess_time,
+        "num_events": num_events,
+        "events_per_second": num_events / simulation_time,
+    }
+
+
+def compare_with_baseline(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    REGRESSION_THRESHOLD: float,
+) -> list[str]:
+    """
+    Compares the benchmark results with the baseline.
+
+    Running times and the peak memory usage regress if they are more than
+    ``REGRESSION_THRESHOLD`` (relative) larger than the baseline, the number
+    of events per second regresses if it is more than ``REGRESSION_THRESHOLD``
+    (relative) smaller. Configurations or metrics that are not in the
+    baseline are skipped.
+
+    Parameters
+    ----------
+    results : dict[str, dict[str, float]]
+        The metrics per configuration.
+    baseline : dict[str, dict[str, float]]
+        The baseline metrics per configuration.
+    REGRESSION_THRESHOLD : float
+        The relative change that is considered a regression.
+
+    Returns
+    -------
+    list[str]
+        A description of each regression.
+
+    """
+
+    regressions = []
+    for configuration, metrics in results.items():
+        for metric, value in metrics.items():
+            if metric == "num_events" or metric not in baseline.get(
+                configuration, {}
+            ):
+                continue
+            baseline_value = baseline[configuration][metric]
+            if metric == "events_per_second":
+                regressed = value < baseline_value / (1 + REGRESSION_THRESHOLD)
+            else:
+                regressed = value > baseline_value * (1 + REGRESSION_THRESHOLD)
+            if regressed:
+                regressions.append(
+                    f"{configuration}: {metric} is {value:.4g}, the baseline "
+                    f"is {baseline_value:.4g}."
+                )
+
+    return regressions
+
+
+#################################Benchmark#####################################
+if __name__ == "__main__":
+    load_region_data(SIMULATION_PARAMETERS, SIMULATION_DATA)
+
+    configurations = [
+        (NUM_CALLS, NUM_AMBULANCES, ENGINE_TYPE, SCENARIO)
+        for ENGINE_TYPE in ENGINE_TYPE_LIST
+        for SCENARIO in (
+            SCENARIO_LIST if ENGINE_TYPE == "electric" else ["Diesel"]
+        )
+        for NUM_AMBULANCES in NUM_AMBULANCES_LIST
+        for NUM_CALLS in NUM_CALLS_LIST
+    ]
+
+    results: dict[str, dict[str, float]] = {}
+    for NUM_CALLS, NUM_AMBULANCES, ENGINE_TYPE, SCENARIO in configurations:
+        configuration = (
+            f"{ENGINE_TYPE}_{SCENARIO}_{NUM_AMBULANCES}_ambulances_"
+            f"{NUM_CALLS}_calls"
+        )
+        print(f"Benchmarking {configuration}.")
+        benchmark_parameters, benchmark_data = create_benchmark_configuration(
+            SIMULATION_PARAMETERS,
+            SIMULATION_DATA,
+            NUM_CALLS,
+            NUM_AMBULANCES,
+            ENGINE_TYPE,
+            SCENARIO,
+            CALL_LAMBDA_PER_AMBULANCE,
+        )
+
+        repetitions = []
+        for repetition in range(NUM_REPETITIONS):
+            benchmark_parameters["SEED_VALUE"] = (
+                SIMULATION_PARAMETERS["START_SEED_VALUE"] + repetition
+            )
+            repetitions.append(
+                benchmark_run(benchmark_parameters, benchmark_data)
+            )
+        results[configuration] = {
+            metric: min(repetition[metric] for repetition in repetitions)
+            for metric in repetitions[0]
+        }
+        results[configuration]["events_per_second"] = max(
+            repetition["events_per_second"] for repetition in repetitions
+        )
+        if MEASURE_MEMORY:
+            results[configuration].update(
+                benchmark_run(
+                    benchmark_parameters, benchmark_data, MEASURE_MEMORY=True
+                )
+            )
+
+    ####################################Output#################################
+    results_df = pd.DataFrame.from_dict(results, orient="index")
+    print(results_df)
+    results_df.to_csv(f"{OUTPUT_DIRECTORY}{OUTPUT_FILE_NAME}")
+
+    baseline_path = f"{OUTPUT_DIRECTORY}{BASELINE_FILE_NAME}"
+    regressions = []
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(
+            results, baseline, REGRESSION_THRESHOLD
+        )
+    else:
+        baseline = {}
+
+    if UPDATE_BASELINE or not baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"The baseline is saved in {baseline_path}.")
+
+    if regressions:
+        print("Performance regressions:")
+        for regression in regressions:
+            print(regression)
+        sys.exit(1)
+    print("No performance regressions were found.")
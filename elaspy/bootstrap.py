@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the bootstrap confidence intervals over runs.
+
+The runs are independent replications, so the distribution of the mean of a
+performance measure over the runs is estimated by resampling the runs with
+replacement. All resamples are drawn at once as an index array, and the
+means of all resamples and performance measures are calculated with one
+matrix product. Optionally, the patients are resampled within each resampled
+run as well, which also includes the variability of the patients of a run in
+the intervals of the mean and 95% empirical quantile of the response time.
+
+Percentile intervals use the quantiles of the bootstrap distribution. BCa
+(bias-corrected and accelerated) intervals correct these quantiles for the
+bias and skewness of the bootstrap distribution, which is better for skewed
+performance measures and few runs. The acceleration is estimated with the
+jackknife over the runs.
+"""
+import scipy
+import numpy as np
+import pandas as pd
+
+BOOTSTRAP_METHODS: list[str] = ["percentile", "bca"]
+
+
+def resample_run_means(
+    values: np.ndarray, run_indices: np.ndarray
+) -> np.ndarray:
+    """
+    Calculates the means of the resampled runs.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The value of each run, with one row per performance measure and one
+        column per run.
+    run_indices : np.ndarray
+        The indices of the resampled runs, with one row per resample and one
+        column per run.
+
+    Returns
+    -------
+    np.ndarray
+        The mean of each resample, with one row per performance measure and
+        one column per resample.
+
+    """
+
+    nr_resamples, nr_runs = run_indices.shape
+    # The number of times each run occurs in each resample.
+    counts = np.bincount(
+        (run_indices + nr_runs * np.arange(nr_resamples)[:, None]).ravel(),
+        minlength=nr_resamples * nr_runs,
+    ).reshape(nr_resamples, nr_runs)
+    return values @ counts.T / nr_runs
+
+
+def resample_patient_statistics(
+    response_times: list[np.ndarray],
+    run_indices: np.ndarray,
+    rng: np.random.Generator,
+    QUANTILE: float = 0.95,
+    MAX_DRAWS: int = 10**7,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the statistics of the resampled runs with resampled patients.
+
+    The patients of each resampled run are resampled with replacement and
+    counted per rank of their response time within the run. The resamples
+    are processed in chunks of at most about ``MAX_DRAWS`` counts to limit
+    the memory.
+
+    Parameters
+    ----------
+    response_times : list[np.ndarray]
+        The response times of the patients of each run.
+    run_indices : np.ndarray
+        The indices of the resampled runs, with one row per resample and one
+        column per run.
+    rng : np.random.Generator
+        An initialized random number generator.
+    QUANTILE : float, optional
+        The quantile of the response time. The default is 0.95.
+    MAX_DRAWS : int, optional
+        The approximate maximum number of counts per chunk. The default is
+        10**7.
+
+    Returns
+    -------
+    np.ndarray
+        The mean over the runs of the mean response time per resample.
+    np.ndarray
+        The mean over the runs of the empirical quantile of the response time
+        per resample.
+
+    """
+
+    lengths = np.array([len(times) for times in response_times])
+    max_length = int(np.max(lengths))
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    # The response times are sorted per run, so a resampled patient is
+    # represented by its rank within its run.
+    sorted_response_times = np.concatenate(
+        [np.sort(times) for times in response_times]
+    )
+    nr_resamples, nr_runs = run_indices.shape
+    chunk_size = max(1, MAX_DRAWS // (nr_runs * max_length))
+
+    means = np.empty(nr_resamples)
+    quantiles = np.empty(nr_resamples)
+    for start in range(0, nr_resamples, chunk_size):
+        runs = run_indices[start : start + chunk_size].ravel()
+        sizes = lengths[runs]
+        ranks = (
+            rng.random(int(np.sum(sizes))) * np.repeat(sizes, sizes)
+        ).astype(int)
+        counts = np.bincount(
+            np.repeat(np.arange(len(runs)) * max_length, sizes) + ranks,
+            minlength=len(runs) * max_length,
+        ).reshape(len(runs), max_length)
+
+        run_means = (
+            np.sum(
+                counts
+                * sorted_response_times[
+                    np.minimum(
+                        offsets[runs][:, None] + np.arange(max_length),
+                        len(sorted_response_times) - 1,
+                    )
+                ],
+                axis=1,
+            )
+            / sizes
+        )
+        # The smallest response time whose empirical CDF is at least the
+        # quantile, as np.quantile with method="inverted_cdf".
+        quantile_ranks = np.argmax(
+            np.cumsum(counts, axis=1)
+            >= np.ceil(QUANTILE * sizes).astype(int)[:, None],
+            axis=1,
+        )
+        run_quantiles = sorted_response_times[offsets[runs] + quantile_ranks]
+
+        means[start : start + chunk_size] = run_means.reshape(
+            -1, nr_runs
+        ).mean(axis=1)
+        quantiles[start : start + chunk_size] = run_quantiles.reshape(
+            -1, nr_runs
+        ).mean(axis=1)
+
+    return means, quantiles
+
+
+def calculate_bootstrap_intervals(
+    estimates: np.ndarray,
+    bootstrap_estimates: np.ndarray,
+    jackknife_estimates: np.ndarray,
+    CONFIDENCE: float = 0.95,
+    METHOD: str = "percentile",
+) -> np.ndarray:
+    """
+    Calculates percentile or BCa intervals from bootstrap distributions.
+
+    Parameters
+    ----------
+    estimates : np.ndarray
+        The estimate of each performance measure.
+    bootstrap_estimates : np.ndarray
+        The estimates of the resamples, with one row per performance measure.
+    jackknife_estimates : np.ndarray
+        The estimates without each run, with one row per performance measure.
+        They are only used for BCa intervals.
+    CONFIDENCE : float, optional
+        The confidence level. The default is 0.95.
+    METHOD : str, optional
+        Either "percentile" or "bca". The default is "percentile".
+
+    Returns
+    -------
+    np.ndarray
+        The lower and upper bound of each performance measure, with one row
+        per performance measure.
+
+    """
+
+    nr_resamples = bootstrap_estimates.shape[1]
+    alpha = (1 - CONFIDENCE) / 2
+    levels = np.tile([alpha, 1 - alpha], (len(estimates), 1))
+
+    if METHOD == "bca":
+        proportions = np.clip(
+            np.mean(bootstrap_estimates < estimates[:, None], axis=1),
+            1 / (nr_resamples + 1),
+            nr_resamples / (nr_resamples + 1),
+        )
+        bias = scipy.stats.norm.ppf(proportions)[:, None]
+        deviations = (
+            np.mean(jackknife_estimates, axis=1, keepdims=True)
+            - jackknife_estimates
+        )
+        squares = np.sum(deviations**2, axis=1)
+        acceleration = np.divide(
+            np.sum(deviations**3, axis=1),
+            6 * squares**1.5,
+            out=np.zeros(len(estimates)),
+            where=squares > 0,
+        )[:, None]
+        z = bias + scipy.stats.norm.ppf(levels)
+        levels = scipy.stats.norm.cdf(bias + z / (1 - acceleration * z))
+
+    # The quantiles of each row with linear interpolation, as np.quantile.
+    sorted_estimates = np.sort(bootstrap_estimates, axis=1)
+    positions = levels * (nr_resamples - 1)
+    lower_values = np.take_along_axis(
+        sorted_estimates, np.floor(positions).astype(int), axis=1
+    )
+    upper_values = np.take_along_axis(
+        sorted_estimates, np.ceil(positions).astype(int), axis=1
+    )
+    return lower_values + (positions - np.floor(positions)) * (
+        upper_values - lower_values
+    )
+
+
+def calculate_bootstrap_cis(
+    run_results: dict[str, np.ndarray],
+    NUM_RESAMPLES: int = 10000,
+    METHOD: str = "percentile",
+    CONFIDENCE: float = 0.95,
+    response_times: list[np.ndarray] | None = None,
+    QUANTILE: float = 0.95,
+    SEED: int | None = None,
+) -> pd.DataFrame:
+    """
+    Calculates bootstrap confidence intervals of the means over runs.
+
+    Parameters
+    ----------
+    run_results : dict[str, np.ndarray]
+        The value of each run per performance measure, e.g., the
+        "mean_response_time", the "emp_quantile_response_time" and the
+        "busy_fraction".
+    NUM_RESAMPLES : int, optional
+        The number of resamples. The default is 10000.
+    METHOD : str, optional
+        Either "percentile" or "bca". The default is "percentile".
+    CONFIDENCE : float, optional
+        The confidence level. The default is 0.95.
+    response_times : list[np.ndarray] | None, optional
+        The response times of the patients of each run. If given, the
+        patients are resampled within the resampled runs for the
+        "mean_response_time" and the "emp_quantile_response_time", which
+        should then be the mean and ``QUANTILE`` empirical quantile of these
+        response times. The default is None.
+    QUANTILE : float, optional
+        The quantile of the "emp_quantile_response_time". The default is
+        0.95.
+    SEED : int | None, optional
+        The seed of the resamples. The default is None.
+
+    Raises
+    ------
+    Exception
+        If the method is unknown, if there are less than two runs or if the
+        response times are given for a different number of runs.
+
+    Returns
+    -------
+    pd.DataFrame
+        The mean over the runs ("estimate") and the bounds of the confidence
+        interval ("lower" and "upper") of each performance measure.
+
+    """
+
+    if METHOD not in BOOTSTRAP_METHODS:
+        raise Exception(
+            f"METHOD should be one of {BOOTSTRAP_METHODS}, but is {METHOD}."
+        )
+    values = np.array(
+        [np.asarray(run_results[key], dtype=float) for key in run_results]
+    )
+    nr_runs = values.shape[1]
+    if nr_runs < 2:
+        raise Exception(
+            f"The bootstrap needs at least two runs, but there are {nr_runs}."
+        )
+    if response_times is not None and len(response_times) != nr_runs:
+        raise Exception(
+            f"The response times of {len(response_times)} runs are given, "
+            f"but there are {nr_runs} runs."
+        )
+
+    rng = np.random.default_rng(SEED)
+    run_indices = rng.integers(0, nr_runs, size=(NUM_RESAMPLES, nr_runs))
+    bootstrap_estimates = resample_run_means(values, run_indices)
+    if response_times is not None:
+        means, quantiles = resample_patient_statistics(
+            response_times, run_indices, rng, QUANTILE
+        )
+        keys = list(run_results)
+        bootstrap_estimates[keys.index("mean_response_time")] = means
+        bootstrap_estimates[
+            keys.index("emp_quantile_response_time")
+        ] = quantiles
+
+    estimates = values.mean(axis=1)
+    # The means without each run.
+    jackknife_estimates = (values.sum(axis=1, keepdims=True) - values) / (
+        nr_runs - 1
+    )
+    intervals = calculate_bootstrap_intervals(
+        estimates, bootstrap_estimates, jackknife_estimates, CONFIDENCE, METHOD
+    )
+
+    return pd.DataFrame(
+        {
+            "estimate": estimates,
+            "lower": intervals[:, 0],
+            "upper": intervals[:, 1],
+        },
+        index=list(run_results),
+    )
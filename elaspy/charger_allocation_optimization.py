@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This script searches for a good allocation of the regular chargers over the
+charging locations with simulation-based ranking and selection.
+
+Starting from the charging scenario of ``main.py``, candidate allocations are
+generated by moving one regular charger from one charging location to
+another, such that the total number of chargers remains equal. The incumbent
+and the candidates are compared with the Optimal Computing Budget Allocation
+(OCBA) procedure: each candidate is first simulated ``INITIAL_REPLICATIONS``
+times, after which additional replications are allocated in steps of
+``REPLICATIONS_INCREMENT`` to the candidates that are most likely to be the
+best, until ``REPLICATIONS_BUDGET`` replications have been performed. The
+``r``-th replication of every candidate uses the same seed (common random
+numbers). The best candidate becomes the new incumbent and this is repeated
+``NUM_ITERATIONS`` times or until the incumbent remains the best. The
+simulation parameters are taken from ``main.py``.
+
+Parameters
+----------
+OUTPUT_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the output files should be saved.
+SAVE_OUTPUT : bool
+    Whether the output should be saved or not.
+SEED_VALUE_CANDIDATES : int
+    The seed value that is used to sample the candidate allocations.
+NUM_WORKERS : int
+    The number of processes that are used to perform the replications. If
+    equal to 1, the replications are performed sequentially.
+NUM_ITERATIONS : int
+    The maximum number of iterations.
+NUM_CANDIDATES : int
+    The number of candidate allocations (besides the incumbent) per iteration.
+    If there are fewer possible charger moves, all moves are evaluated.
+INITIAL_REPLICATIONS : int
+    The number of replications that is first performed for every candidate.
+    Should be at least 2.
+REPLICATIONS_INCREMENT : int
+    The number of replications that is allocated in each OCBA step.
+REPLICATIONS_BUDGET : int
+    The total number of replications per iteration.
+OBJECTIVE : str
+    The performance measure that is minimized. Either "mean_response_time" or
+    "emp_quantile_response_time" (the empirical 95% quantile).
+OUTPUT_FILE_NAME : str
+    The name of the file where the results of the iterations will be saved if
+    ``SAVE_OUTPUT=True``.
+OPTIMIZED_SCENARIO_FILE_NAME : str
+    The name of the file where the final charging scenario will be saved if
+    ``SAVE_OUTPUT=True``.
+RUN_PARAMETERS_FILE_NAME : str
+    The name of the text file with the script parameters if
+    ``SAVE_OUTPUT=True``.
+"""
+from typing import Any
+
+import os
+import copy
+import datetime
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from ambulance_simulation import load_region_data
+from charger_optimization import simulate_run
+from input_output_functions import check_input_parameters
+from main import SIMULATION_PARAMETERS, SIMULATION_DATA
+
+################################Directories####################################
+ROOT_DIRECTORY: str = os.path.dirname(os.path.dirname(__file__))
+OUTPUT_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "results/")
+################################Parameters#####################################
+SAVE_OUTPUT: bool = False
+SEED_VALUE_CANDIDATES: int = 0
+NUM_WORKERS: int = 1
+NUM_ITERATIONS: int = 10
+NUM_CANDIDATES: int = 20
+INITIAL_REPLICATIONS: int = 10
+REPLICATIONS_INCREMENT: int = 20
+REPLICATIONS_BUDGET: int = 500
+OBJECTIVE: str = "mean_response_time"
+#################################File names####################################
+OUTPUT_FILE_NAME: str = (
+    f"charger_allocation_{SIMULATION_PARAMETERS['SCENARIO']}.csv"
+)
+OPTIMIZED_SCENARIO_FILE_NAME: str = (
+    f"charging_scenario_21_22_{SIMULATION_PARAMETERS['SCENARIO']}_ocba.csv"
+)
+RUN_PARAMETERS_FILE_NAME: str = (
+    f"charger_allocation_{SIMULATION_PARAMETERS['SCENARIO']}"
+)
+##################################Functions####################################
+
+
+def calculate_ocba_allocation(
+    means: np.ndarray,
+    stds: np.ndarray,
+    replications: np.ndarray,
+    budget_increment: int,
+) -> np.ndarray:
+    """
+    Calculates how many additional replications each candidate should receive
+    according to the Optimal Computing Budget Allocation (OCBA) procedure.
+
+    The candidate with the lowest mean is considered the best. The other
+    candidates receive replications proportional to
+    ``(std_i / (mean_i - mean_best))^2`` and the best candidate receives
+    ``std_best * sqrt(sum_i N_i^2 / std_i^2)``.
+
+    Parameters
+    ----------
+    means : np.ndarray
+        The sample means of the candidates.
+    stds : np.ndarray
+        The sample standard deviations of the candidates.
+    replications : np.ndarray
+        The number of replications that were already performed per candidate.
+    budget_increment : int
+        The number of additional replications that is allocated.
+
+    Returns
+    -------
+    np.ndarray
+        The number of additional replications per candidate. The sum is equal
+        to ``budget_increment``.
+
+    """
+
+    num_candidates = len(means)
+    additional_replications = np.zeros(num_candidates, dtype=int)
+    best = int(np.argmin(means))
+    if num_candidates == 1:
+        additional_replications[best] = budget_increment
+        return additional_replications
+
+    stds = np.maximum(stds, 1e-12)
+    others = np.arange(num_candidates) != best
+    differences = np.maximum(means[others] - means[best], 1e-12)
+
+    ratios = np.zeros(num_candidates)
+    ratios[others] = (stds[others] / differences) ** 2
+    ratios[best] = stds[best] * np.sqrt(
+        np.sum(ratios[others] ** 2 / stds[others] ** 2)
+    )
+
+    total_replications = replications.sum() + budget_increment
+    targets = total_replications * ratios / ratios.sum()
+    shortages = np.maximum(targets - replications, 0)
+    if shortages.sum() == 0:
+        additional_replications[best] = budget_increment
+        return additional_replications
+
+    shares = shortages / shortages.sum() * budget_increment
+    additional_replications = np.floor(shares).astype(int)
+    remainder = budget_increment - additional_replications.sum()
+    largest_fractions = np.argsort(
+        -(shares - additional_replications), kind="stable"
+    )
+    additional_replications[largest_fractions[:remainder]] += 1
+
+    return additional_replications
+
+
+def generate_charger_moves(
+    chargers_df: pd.DataFrame,
+) -> list[tuple[str, str]]:
+    """
+    Generates all moves of one regular charger between charging locations.
+
+    A charger is only removed from a hospital with at least one regular
+    charger or a base with more than one regular charger, such that every
+    base keeps a charger.
+
+    Parameters
+    ----------
+    chargers_df : pd.DataFrame
+        The charging scenario.
+
+    Returns
+    -------
+    list[tuple[str, str]]
+        The moves as (source location, target location).
+
+    """
+
+    number_of_chargers = chargers_df["Number of regular chargers"]
+    minimum_chargers = np.where(chargers_df.index.str.endswith("B"), 1, 0)
+    sources = list(
+        chargers_df.index[number_of_chargers.to_numpy() > minimum_chargers]
+    )
+
+    return [
+        (source, target)
+        for source in sources
+        for target in chargers_df.index
+        if source != target
+    ]
+
+
+def apply_charger_move(
+    chargers_df: pd.DataFrame, move: tuple[str, str]
+) -> pd.DataFrame:
+    """
+    Moves one regular charger from the source to the target location.
+
+    Parameters
+    ----------
+    chargers_df : pd.DataFrame
+        The charging scenario. It is not altered.
+    move : tuple[str, str]
+        The move as (source location, target location).
+
+    Returns
+    -------
+    pd.DataFrame
+        The new charging scenario.
+
+    """
+
+    new_chargers_df = chargers_df.copy()
+    new_chargers_df.loc[move[0], "Number of regular chargers"] -= 1
+    new_chargers_df.loc[move[1], "Number of regular chargers"] += 1
+
+    return new_chargers_df
+
+
+def rank_and_select(
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+    candidates: list[pd.DataFrame],
+    INITIAL_REPLICATIONS: int,
+    REPLICATIONS_INCREMENT: int,
+    REPLICATIONS_BUDGET: int,
+    OBJECTIVE: str = "mean_response_time",
+    NUM_WORKERS: int = 1,
+) -> pd.DataFrame:
+    """
+    Compares candidate charging scenarios with the OCBA procedure.
+
+    The ``r``-th replication of every candidate uses seed
+    ``START_SEED_VALUE + r``, such that the candidates are compared under
+    common random numbers. The replications of each OCBA step are performed
+    in parallel if ``NUM_WORKERS > 1``.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameter ``START_SEED_VALUE`` is at
+        least necessary. See ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. It is advised to load the region data beforehand
+        with ``load_region_data``. The ``CHARGING_STATIONS_SCENARIO`` is
+        replaced by the candidates.
+    candidates : list[pd.DataFrame]
+        The candidate charging scenarios.
+    INITIAL_REPLICATIONS : int
+        The number of replications that is first performed per candidate.
+    REPLICATIONS_INCREMENT : int
+        The number of replications that is allocated in each OCBA step.
+    REPLICATIONS_BUDGET : int
+        The total number of replications.
+    OBJECTIVE : str, optional
+        The performance measure of ``simulate_run`` that is minimized. The
+        default is "mean_response_time".
+    NUM_WORKERS : int, optional
+        The number of processes that are used. The default is 1.
+
+    Raises
+    ------
+    Exception
+        If the budget is smaller than the initial number of replications of
+        all candidates or if ``INITIAL_REPLICATIONS`` is smaller than 2.
+
+    Returns
+    -------
+    pd.DataFrame
+        The sample mean ("mean"), sample standard deviation ("std") and
+        number of replications ("replications") of each candidate.
+
+    """
+
+    num_candidates = len(candidates)
+    if INITIAL_REPLICATIONS < 2:
+        raise Exception("INITIAL_REPLICATIONS should be at least 2.")
+    if REPLICATIONS_BUDGET < num_candidates * INITIAL_REPLICATIONS:
+        raise Exception(
+            f"The REPLICATIONS_BUDGET ({REPLICATIONS_BUDGET}) should be at "
+            "least the number of candidates times the INITIAL_REPLICATIONS "
+            f"({num_candidates * INITIAL_REPLICATIONS})."
+        )
+
+    candidate_data = []
+    for chargers_df in candidates:
+        data = copy.copy(SIMULATION_DATA)
+        data["CHARGING_STATIONS_SCENARIO"] = chargers_df
+        candidate_data.append(data)
+
+    observations: list[list[float]] = [[] for _ in range(num_candidates)]
+    executor = (
+        ProcessPoolExecutor(max_workers=NUM_WORKERS)
+        if NUM_WORKERS > 1
+        else None
+    )
+
+    def simulate(additional_replications: np.ndarray) -> None:
+        jobs = [
+            (
+                candidate,
+                SIMULATION_PARAMETERS["START_SEED_VALUE"]
+                + len(observations[candidate])
+                + replication,
+            )
+            for candidate in range(num_candidates)
+            for replication in range(additional_replications[candidate])
+        ]
+        if executor is not None:
+            futures = [
+                executor.submit(
+                    simulate_run,
+                    SIMULATION_PARAMETERS,
+                    candidate_data[candidate],
+                    seed_value,
+                )
+                for candidate, seed_value in jobs
+            ]
+            summaries = [future.result() for future in futures]
+        else:
+            summaries = [
+                simulate_run(
+                    SIMULATION_PARAMETERS,
+                    candidate_data[candidate],
+                    seed_value,
+                )
+                for candidate, seed_value in jobs
+            ]
+        # Jobs are ordered by seed per candidate, so appending keeps the
+        # r-th observation of each candidate at seed START_SEED_VALUE + r.
+        for (candidate, _), summary in zip(jobs, summaries):
+            observations[candidate].append(summary[OBJECTIVE])
+
+    try:
+        simulate(np.full(num_candidates, INITIAL_REPLICATIONS))
+        remaining_budget = REPLICATIONS_BUDGET - num_candidates * (
+            INITIAL_REPLICATIONS
+        )
+        while remaining_budget > 0:
+            budget_increment = min(REPLICATIONS_INCREMENT, remaining_budget)
+            simulate(
+                calculate_ocba_allocation(
+                    np.array([np.mean(obs) for obs in observations]),
+                    np.array([np.std(obs, ddof=1) for obs in observations]),
+                    np.array([len(obs) for obs in observations]),
+                    budget_increment,
+                )
+            )
+            remaining_budget -= budget_increment
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return pd.DataFrame(
+        {
+            "mean": [np.mean(obs) for obs in observations],
+            "std": [np.std(obs, ddof=1) for obs in observations],
+            "replications": [len(obs) for obs in observations],
+        }
+    )
+
+
+##############################Save parameters##################################
+if __name__ == "__main__":
+    start_running_time = datetime.datetime.now()
+
+    check_input_parameters(SIMULATION_PARAMETERS)
+    if SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
+        raise Exception(
+            "The charger allocation optimization generates its own input "
+            "data, so LOAD_INPUT_DATA should be False."
+        )
+    if SIMULATION_PARAMETERS["ENGINE_TYPE"] != "electric":
+        raise Exception(
+            "The charger allocation optimization requires ENGINE_TYPE to be "
+            "electric."
+        )
+
+    if SAVE_OUTPUT:
+        with open(
+            f"{OUTPUT_DIRECTORY}{RUN_PARAMETERS_FILE_NAME}.txt",
+            "w",
+            encoding="utf-8",
+        ) as f:
+            f.write(f"OUTPUT_DIRECTORY: {OUTPUT_DIRECTORY}\n")
+            f.write(f"SAVE_OUTPUT: {SAVE_OUTPUT}\n")
+            f.write(f"SEED_VALUE_CANDIDATES: {SEED_VALUE_CANDIDATES}\n")
+            f.write(f"NUM_WORKERS: {NUM_WORKERS}\n")
+            f.write(f"NUM_ITERATIONS: {NUM_ITERATIONS}\n")
+            f.write(f"NUM_CANDIDATES: {NUM_CANDIDATES}\n")
+            f.write(f"INITIAL_REPLICATIONS: {INITIAL_REPLICATIONS}\n")
+            f.write(f"REPLICATIONS_INCREMENT: {REPLICATIONS_INCREMENT}\n")
+            f.write(f"REPLICATIONS_BUDGET: {REPLICATIONS_BUDGET}\n")
+            f.write(f"OBJECTIVE: {OBJECTIVE}\n")
+            f.write(f"OUTPUT_FILE_NAME: {OUTPUT_FILE_NAME}\n")
+            f.write(
+                "OPTIMIZED_SCENARIO_FILE_NAME: "
+                f"{OPTIMIZED_SCENARIO_FILE_NAME}\n"
+            )
+            f.write(f"RUN_PARAMETERS_FILE_NAME: {RUN_PARAMETERS_FILE_NAME}\n")
+            for key, value in SIMULATION_PARAMETERS.items():
+                f.write(f"{key}: {value}\n")
+            f.close()
+
+    ##############################Optimization#################################
+    load_region_data(SIMULATION_PARAMETERS, SIMULATION_DATA)
+    rng = np.random.default_rng(SEED_VALUE_CANDIDATES)
+
+    incumbent_df = SIMULATION_DATA["CHARGING_STATIONS_SCENARIO"].copy()
+    iteration_results = []
+
+    for iteration in range(NUM_ITERATIONS):
+        start_time_iteration = datetime.datetime.now()
+
+        moves = generate_charger_moves(incumbent_df)
+        if len(moves) > NUM_CANDIDATES:
+            moves = [
+                moves[i]
+                for i in rng.choice(len(moves), NUM_CANDIDATES, replace=False)
+            ]
+        candidates = [incumbent_df] + [
+            apply_charger_move(incumbent_df, move) for move in moves
+        ]
+
+        result_df = rank_and_select(
+            SIMULATION_PARAMETERS,
+            SIMULATION_DATA,
+            candidates,
+            INITIAL_REPLICATIONS,
+            REPLICATIONS_INCREMENT,
+            REPLICATIONS_BUDGET,
+            OBJECTIVE,
+            NUM_WORKERS,
+        )
+        best = int(result_df["mean"].idxmin())
+        iteration_results.append(
+            {
+                "iteration": iteration,
+                "incumbent_mean": result_df.loc[0, "mean"],
+                "incumbent_replications": result_df.loc[0, "replications"],
+                "best_move": None if best == 0 else moves[best - 1],
+                "best_mean": result_df.loc[best, "mean"],
+                "best_replications": result_df.loc[best, "replications"],
+            }
+        )
+        print(
+            f"Iteration {iteration}: {iteration_results[-1]} "
+            f"({datetime.datetime.now()-start_time_iteration})."
+        )
+
+        if best == 0:
+            print("The incumbent is the best allocation.")
+            break
+        incumbent_df = candidates[best]
+
+    iteration_results_df = pd.DataFrame(iteration_results)
+    print(iteration_results_df)
+
+    if SAVE_OUTPUT:
+        iteration_results_df.to_csv(f"{OUTPUT_DIRECTORY}{OUTPUT_FILE_NAME}")
+        incumbent_df.to_csv(
+            f"{OUTPUT_DIRECTORY}{OPTIMIZED_SCENARIO_FILE_NAME}"
+        )
+
+    print(
+        f"The total running time is: {datetime.datetime.now()-start_running_time}"
+    )
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This script performs the charging station allocation optimization in memory.
+
+Starting from the charging scenario of ``main.py``, the scenario is simulated
+``NUM_RUNS`` times, the utilization and the probability that at least one
+charger is available are calculated for each charging location (see
+``optimization_parser.py``) and a regular charger is removed at the location
+with the largest probability. This is repeated until the mean response time
+exceeds ``MAX_MEAN_RESPONSE_TIME`` or ``MAX_ITERATIONS`` is reached. The
+charging times are collected during the simulation, so no simulation output
+files are written or read. The simulation parameters are taken from
+``main.py``.
+
+Parameters
+----------
+OUTPUT_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the output files should be saved.
+SAVE_OUTPUT : bool
+    Whether the output should be saved or not.
+NUM_RUNS : int
+    The number of runs per iteration. The runs of all iterations use the same
+    seeds (common random numbers).
+NUM_WORKERS : int
+    The number of processes that are used to perform the runs. If equal to 1,
+    the runs are performed sequentially.
+MAX_ITERATIONS : int
+    The maximum number of chargers that are removed.
+MAX_MEAN_RESPONSE_TIME : float
+    The maximum mean response time (in minutes). The optimization stops when
+    the mean response time over all runs exceeds this value.
+OUTPUT_FILE_NAME : str
+    The name of the file where the results of the iterations will be saved if
+    ``SAVE_OUTPUT=True``.
+OPTIMIZED_SCENARIO_FILE_NAME : str
+    The name of the file where the last charging scenario that satisfied the
+    response time constraint will be saved if ``SAVE_OUTPUT=True``.
+RUN_PARAMETERS_FILE_NAME : str
+    The name of the text file with the script parameters if
+    ``SAVE_OUTPUT=True``.
+"""
+from typing import Any
+
+import os
+import copy
+import datetime
+import functools
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from ambulance_simulation import run_simulation, load_region_data
+from input_output_functions import (
+    calculate_response_time_ecdf,
+    calculate_busy_fraction,
+    check_input_parameters,
+)
+from optimization_parser import (
+    calculate_charger_utilization,
+    select_charging_locations,
+    select_location_remove_charger,
+)
+from main import SIMULATION_PARAMETERS, SIMULATION_DATA
+
+################################Directories####################################
+ROOT_DIRECTORY: str = os.path.dirname(os.path.dirname(__file__))
+OUTPUT_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "results/")
+################################Parameters#####################################
+SAVE_OUTPUT: bool = False
+NUM_RUNS: int = 500
+NUM_WORKERS: int = 1
+MAX_ITERATIONS: int = 50
+MAX_MEAN_RESPONSE_TIME: float = 12.0
+#################################File names####################################
+OUTPUT_FILE_NAME: str = (
+    f"charger_optimization_{SIMULATION_PARAMETERS['SCENARIO']}.csv"
+)
+OPTIMIZED_SCENARIO_FILE_NAME: str = (
+    f"charging_scenario_21_22_{SIMULATION_PARAMETERS['SCENARIO']}_opt.csv"
+)
+RUN_PARAMETERS_FILE_NAME: str = (
+    f"charger_optimization_{SIMULATION_PARAMETERS['SCENARIO']}"
+)
+##################################Functions####################################
+
+
+def simulate_run(
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+    seed_value: int,
+) -> dict[str, Any]:
+    """
+    Performs a single simulation run and summarizes its output.
+
+    The input dictionaries are not altered, so the same region data can be
+    used for all runs.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. See ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. Region data that is present is not read again.
+        See ``main.py`` and the input data section on the ELASPY website for
+        explanations.
+    seed_value : int
+        The seed value of the run.
+
+    Returns
+    -------
+    dict[str, Any]
+        The mean response time ("mean_response_time"), the empirical 95%
+        quantile of the response time ("emp_quantile_response_time"), the
+        busy fraction ("busy_fraction"), the total charging time per charging
+        location ("charging_time_per_location") and the total simulation time
+        ("total_simulation_time") of the run.
+
+    """
+
+    run_parameters = copy.copy(SIMULATION_PARAMETERS)
+    run_parameters["SEED_VALUE"] = seed_value
+    run_data = copy.copy(SIMULATION_DATA)
+
+    run_simulation(run_parameters, run_data)
+
+    df_patient = calculate_response_time_ecdf(
+        run_data["output_patient"].to_dataframe()
+    )
+
+    return {
+        "mean_response_time": np.mean(df_patient["response_time"]),
+        "emp_quantile_response_time": np.min(
+            df_patient.loc[df_patient["ecdf_rt"] >= 0.95]["response_time"]
+        ),
+        "busy_fraction": calculate_busy_fraction(df_patient, run_parameters),
+        "charging_time_per_location": run_data["charging_time_per_location"],
+        "total_simulation_time": run_data["output_ambulance"]["time"][-1],
+    }
+
+
+def simulate_scenario(
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+    seed_values: list[int],
+    NUM_WORKERS: int = 1,
+) -> list[dict[str, Any]]:
+    """
+    Performs a simulation run for each seed value, possibly in parallel.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. See ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. It is advised to load the region data beforehand
+        with ``load_region_data``, such that it is not read in every run.
+    seed_values : list[int]
+        The seed values of the runs.
+    NUM_WORKERS : int, optional
+        The number of processes that are used to perform the runs. The default
+        is 1.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        The summary of each run, see ``simulate_run``, in the order of
+        ``seed_values``.
+
+    """
+
+    simulate = functools.partial(
+        simulate_run, SIMULATION_PARAMETERS, SIMULATION_DATA
+    )
+
+    if NUM_WORKERS > 1:
+        with ProcessPoolExecutor(max_workers=NUM_WORKERS) as executor:
+            return list(executor.map(simulate, seed_values))
+    return [simulate(seed_value) for seed_value in seed_values]
+
+
+##############################Save parameters##################################
+if __name__ == "__main__":
+    start_running_time = datetime.datetime.now()
+
+    check_input_parameters(SIMULATION_PARAMETERS)
+    if SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
+        raise Exception(
+            "The charger optimization generates its own input data, so "
+            "LOAD_INPUT_DATA should be False."
+        )
+    if SIMULATION_PARAMETERS["ENGINE_TYPE"] != "electric":
+        raise Exception(
+            "The charger optimization requires ENGINE_TYPE to be electric."
+        )
+
+    if SAVE_OUTPUT:
+        with open(
+            f"{OUTPUT_DIRECTORY}{RUN_PARAMETERS_FILE_NAME}.txt",
+            "w",
+            encoding="utf-8",
+        ) as f:
+            f.write(f"OUTPUT_DIRECTORY: {OUTPUT_DIRECTORY}\n")
+            f.write(f"SAVE_OUTPUT: {SAVE_OUTPUT}\n")
+            f.write(f"NUM_RUNS: {NUM_RUNS}\n")
+            f.write(f"NUM_WORKERS: {NUM_WORKERS}\n")
+            f.write(f"MAX_ITERATIONS: {MAX_ITERATIONS}\n")
+            f.write(f"MAX_MEAN_RESPONSE_TIME: {MAX_MEAN_RESPONSE_TIME}\n")
+            f.write(f"OUTPUT_FILE_NAME: {OUTPUT_FILE_NAME}\n")
+            f.write(
+                "OPTIMIZED_SCENARIO_FILE_NAME: "
+                f"{OPTIMIZED_SCENARIO_FILE_NAME}\n"
+            )
+            f.write(f"RUN_PARAMETERS_FILE_NAME: {RUN_PARAMETERS_FILE_NAME}\n")
+            for key, value in SIMULATION_PARAMETERS.items():
+                f.write(f"{key}: {value}\n")
+            f.close()
+
+    ###############################Reading data################################
+    load_region_data(SIMULATION_PARAMETERS, SIMULATION_DATA)
+
+    hospitals = list(
+        SIMULATION_DATA["NODES_HOSPITAL"]["Hospital"].astype(str) + "H"
+    )
+    bases = list(
+        SIMULATION_DATA["AMBULANCE_BASE_LOCATIONS"]["Base"]
+        .astype(str)
+        .unique()
+        + "B"
+    )
+    seed_values = [
+        SIMULATION_PARAMETERS["START_SEED_VALUE"] + run_nr
+        for run_nr in range(NUM_RUNS)
+    ]
+    ###############################Optimization################################
+    chargers_df = SIMULATION_DATA["CHARGING_STATIONS_SCENARIO"].copy()
+    optimized_chargers_df = None
+    iteration_results = []
+
+    for iteration in range(MAX_ITERATIONS + 1):
+        start_time_iteration = datetime.datetime.now()
+        SIMULATION_DATA["CHARGING_STATIONS_SCENARIO"] = chargers_df
+
+        run_summaries = simulate_scenario(
+            SIMULATION_PARAMETERS, SIMULATION_DATA, seed_values, NUM_WORKERS
+        )
+        mean_response_time = np.mean(
+            [summary["mean_response_time"] for summary in run_summaries]
+        )
+        iteration_result = {
+            "iteration": iteration,
+            "mean_response_time": mean_response_time,
+            "emp_quantile_response_time": np.mean(
+                [
+                    summary["emp_quantile_response_time"]
+                    for summary in run_summaries
+                ]
+            ),
+            "busy_fraction": np.mean(
+                [summary["busy_fraction"] for summary in run_summaries]
+            ),
+            "location_remove_charger": None,
+        }
+        iteration_results.append(iteration_result)
+
+        print(
+            f"Iteration {iteration}: the mean response time is "
+            f"{mean_response_time} ({datetime.datetime.now()-start_time_iteration})."
+        )
+        if mean_response_time > MAX_MEAN_RESPONSE_TIME:
+            print("The response time constraint is violated.")
+            break
+        optimized_chargers_df = chargers_df.copy()
+        if iteration == MAX_ITERATIONS:
+            break
+
+        locations = select_charging_locations(chargers_df, hospitals, bases)
+        result_df = calculate_charger_utilization(
+            [
+                (
+                    summary["charging_time_per_location"],
+                    summary["total_simulation_time"],
+                )
+                for summary in run_summaries
+            ],
+            chargers_df.loc[locations, "Number of regular chargers"],
+        )
+        location_remove_charger = select_location_remove_charger(result_df)[
+            "Location"
+        ]
+        iteration_result["location_remove_charger"] = location_remove_charger
+        print(
+            "The location where a charger is removed is: "
+            f"{location_remove_charger}."
+        )
+
+        chargers_df = chargers_df.copy()
+        chargers_df.loc[
+            location_remove_charger, "Number of regular chargers"
+        ] -= 1
+
+    iteration_results_df = pd.DataFrame(iteration_results)
+    print(iteration_results_df)
+
+    if SAVE_OUTPUT:
+        iteration_results_df.to_csv(f"{OUTPUT_DIRECTORY}{OUTPUT_FILE_NAME}")
+        if optimized_chargers_df is not None:
+            optimized_chargers_df.to_csv(
+                f"{OUTPUT_DIRECTORY}{OPTIMIZED_SCENARIO_FILE_NAME}"
+            )
+
+    print(
+        f"The total running time is: {datetime.datetime.now()-start_running_time}"
+    )
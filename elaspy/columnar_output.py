@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the columnar binary output format of the simulator.
+
+Instead of a CSV file per run, all runs of an output dataframe are stored in
+one ``.npz`` file. Each column of each run is stored uncompressed as a
+separate ``.npy`` array named ``<run_nr>/<column>``, and new runs are
+appended to the file. The columns keep their type and can be loaded
+separately, so a script only reads the columns and runs that it needs.
+"""
+from typing import Any, Iterable
+
+import zipfile
+import numpy as np
+import pandas as pd
+
+
+def convert_to_typed_array(column: pd.Series) -> np.ndarray:
+    """
+    Converts a column to an array that can be stored without pickling.
+
+    Numerical and boolean columns keep their type and text columns (with
+    type ``object``) are stored as strings.
+
+    Parameters
+    ----------
+    column : pd.Series
+        The column.
+
+    Returns
+    -------
+    np.ndarray
+        The typed array.
+
+    """
+
+    values = column.to_numpy()
+    if values.dtype.kind == "O":
+        return values.astype(str)
+    return values
+
+
+def save_columnar_output(
+    directory: str, file_name_output: str, output_dataframe, run_nr: int
+) -> None:
+    """
+    Adds the output dataframe of a run to an ``.npz`` file.
+
+    The file is created if it does not exist yet.
+
+    Parameters
+    ----------
+    directory : str
+        The output directory where the ``.npz`` file is saved.
+    file_name_output : str
+        The name of the ``.npz`` file (without extension).
+    output_dataframe : pandas.DataFrame
+        The output dataframe of the run.
+    run_nr : int
+        The simulation run number.
+
+    Raises
+    ------
+    Exception
+        If the file already contains the run.
+
+    """
+
+    with zipfile.ZipFile(f"{directory}{file_name_output}.npz", "a") as f:
+        if any(name.startswith(f"{run_nr}/") for name in f.namelist()):
+            raise Exception(
+                f"The file {file_name_output}.npz already contains run "
+                f"{run_nr}."
+            )
+        for column in output_dataframe.columns:
+            with f.open(
+                f"{run_nr}/{column}.npy", "w", force_zip64=True
+            ) as member:
+                np.lib.format.write_array(
+                    member,
+                    convert_to_typed_array(output_dataframe[column]),
+                    allow_pickle=False,
+                )
+
+
+def get_columnar_runs(file_path: str) -> list[int]:
+    """
+    Returns the runs that are stored in an ``.npz`` file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the ``.npz`` file.
+
+    Returns
+    -------
+    list[int]
+        The sorted run numbers.
+
+    """
+
+    with zipfile.ZipFile(file_path) as f:
+        return sorted({int(name.split("/")[0]) for name in f.namelist()})
+
+
+def load_columnar_output(
+    file_path: str,
+    columns: list[str] | None = None,
+    run_nrs: Iterable[int] | None = None,
+) -> pd.DataFrame:
+    """
+    Loads (a part of) the runs of an ``.npz`` file as one dataframe.
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the ``.npz`` file.
+    columns : list[str] | None, optional
+        The columns that are loaded. If ``None``, all columns are loaded. The
+        default is None.
+    run_nrs : Iterable[int] | None, optional
+        The runs that are loaded. If ``None``, all runs are loaded. The
+        default is None.
+
+    Raises
+    ------
+    Exception
+        If a run or column is not stored in the file.
+
+    Returns
+    -------
+    pd.DataFrame
+        The dataframe with the column "run_nr" and the requested columns. The
+        rows are ordered by run.
+
+    """
+
+    stored_runs = get_columnar_runs(file_path)
+    runs = stored_runs if run_nrs is None else list(run_nrs)
+    missing_runs = set(runs) - set(stored_runs)
+    if missing_runs:
+        raise Exception(
+            f"The runs {sorted(missing_runs)} are not stored in {file_path}."
+        )
+
+    with np.load(file_path) as data:
+        if columns is None:
+            columns = [
+                name.split("/", 1)[1]
+                for name in data.files
+                if name.split("/")[0] == str(runs[0])
+            ]
+        missing_columns = [
+            column for column in columns if f"{runs[0]}/{column}" not in data
+        ]
+        if missing_columns:
+            raise Exception(
+                f"The columns {missing_columns} are not stored in {file_path}."
+            )
+
+        output: dict[str, Any] = {}
+        for column in columns:
+            arrays = [data[f"{run_nr}/{column}"] for run_nr in runs]
+            if "run_nr" not in output:
+                output["run_nr"] = np.repeat(
+                    runs, [len(array) for array in arrays]
+                )
+            output[column] = np.concatenate(arrays)
+    return pd.DataFrame(output)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the forking of partially simulated runs.
+
+To share a warm-up between scenario variants, ``fork_simulation`` forks the
+process after the warm-up, such that each variant continues from a copy of
+the simulated state without simulating the warm-up again. The processes of a
+run are Python generators, which cannot be pickled, so the state of a run is
+only copied in memory by forking and cannot be saved to a file.
+"""
+from typing import Any
+
+import multiprocessing
+
+from ambulance_simulation import finish_simulation
+
+FORKED_OUTPUT_KEYS: list[str] = [
+    "output_patient",
+    "output_ambulance",
+    "output_telemetry",
+    "nr_times_no_fast_no_regular_available",
+    "charging_time_per_location",
+]
+
+# The run that is continued by the forked worker processes.
+_forked_run: dict[str, Any] = {}
+
+
+def simulate_until(simulation: dict[str, Any], TIME: float) -> None:
+    """
+    Simulates a run until a certain time.
+
+    Parameters
+    ----------
+    simulation : dict[str, Any]
+        The state of the run, see ``start_simulation``.
+    TIME : float
+        The time until which the run is simulated. The events at this time
+        are not processed yet.
+
+    Raises
+    ------
+    Exception
+        If the run is already past this time.
+
+    """
+
+    if TIME < simulation["env"].now:
+        raise Exception(
+            f"The run cannot be simulated until {TIME}, since it is already "
+            f"at time {simulation['env'].now}."
+        )
+    if TIME > simulation["env"].now:
+        simulation["env"].run(until=TIME)
+
+
+def finish_forked_simulation(variant: dict[str, Any]) -> dict[str, Any]:
+    """
+    Finishes the forked run with changed simulation parameters.
+
+    It is called in a forked worker process of ``fork_simulation``.
+
+    Parameters
+    ----------
+    variant : dict[str, Any]
+        The simulation parameters that are changed.
+
+    Returns
+    -------
+    dict[str, Any]
+        The simulation data of ``FORKED_OUTPUT_KEYS`` after the run.
+
+    """
+
+    SIMULATION_PARAMETERS = _forked_run["SIMULATION_PARAMETERS"]
+    SIMULATION_DATA = _forked_run["SIMULATION_DATA"]
+    SIMULATION_PARAMETERS.update(variant)
+    finish_simulation(
+        _forked_run["simulation"], SIMULATION_PARAMETERS, SIMULATION_DATA
+    )
+    return {
+        key: SIMULATION_DATA[key]
+        for key in FORKED_OUTPUT_KEYS
+        if key in SIMULATION_DATA
+    }
+
+
+def fork_simulation(
+    simulation: dict[str, Any],
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+    variants: list[dict[str, Any]],
+    NUM_WORKERS: int = 1,
+) -> list[dict[str, Any]]:
+    """
+    Finishes copies of a partially simulated run for several variants.
+
+    Each variant is finished in a separate process that is forked from the
+    current process, so it continues from the current state of the run. The
+    run itself is not changed. Only the parameters that are used after the
+    current time have an effect, e.g., ``IDLE_USAGE``, ``DRIVING_USAGE``,
+    ``NO_SIREN_PENALTY`` and ``INTERVAL_CHECK_WP``. The parameters that are
+    used to initialize the run, such as ``NUM_AMBULANCES``, have no effect.
+
+    Parameters
+    ----------
+    simulation : dict[str, Any]
+        The state of the run, see ``start_simulation``.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters of the run.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data of the run.
+    variants : list[dict[str, Any]]
+        The simulation parameters that are changed per variant. An empty
+        dictionary finishes the run without changes.
+    NUM_WORKERS : int, optional
+        The number of variants that are simulated in parallel. The default
+        is 1.
+
+    Raises
+    ------
+    Exception
+        If processes cannot be forked on this platform.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        The simulation data of ``FORKED_OUTPUT_KEYS`` after the run per
+        variant.
+
+    """
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise Exception("Simulation runs can only be forked on POSIX systems.")
+
+    _forked_run.update(
+        {
+            "simulation": simulation,
+            "SIMULATION_PARAMETERS": SIMULATION_PARAMETERS,
+            "SIMULATION_DATA": SIMULATION_DATA,
+        }
+    )
+    try:
+        # Every worker finishes one variant, such that the next variant is
+        # forked from the unchanged run again.
+        with multiprocessing.get_context("fork").Pool(
+            NUM_WORKERS, maxtasksperchild=1
+        ) as pool:
+            return pool.map(finish_forked_simulation, variants, chunksize=1)
+    finally:
+        _forked_run.clear()
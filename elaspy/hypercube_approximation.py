@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This script approximates the ambulance utilizations and the response time
+distribution with the hypercube queueing model.
+
+The approximation of Larson (1975) is used: each ambulance is a server of an
+M/M/N queue, the calls are dispatched to the closest available ambulance and
+the probability that the ambulances that are closer are busy is approximated
+by the product of their utilizations times a correction factor. The
+utilizations are obtained with a fixed-point iteration in which the service
+time depends on the ambulance and the demand node (Budge et al., 2009). The
+model runs in milliseconds, so it can be used to screen many configurations
+(for example ambulance base locations) before the most promising ones are
+simulated with ``run_simulation``. Charging, the battery and the time of the
+day are not modelled: if ``ARRIVAL_RATE_FILE`` is given, the time-averaged
+arrival rates are used. The simulation parameters are taken from ``main.py``.
+
+Parameters
+----------
+OUTPUT_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the output files should be saved.
+SAVE_OUTPUT : bool
+    Whether the output should be saved or not.
+MAX_ITERATIONS : int
+    The maximum number of fixed-point iterations.
+TOLERANCE : float
+    The fixed-point iteration stops when the utilizations change less than
+    this value.
+OUTPUT_FILE_NAME : str
+    The name of the file where the utilizations of the ambulances will be
+    saved if ``SAVE_OUTPUT=True``.
+"""
+from typing import Any
+
+import os
+import time
+import numpy as np
+import pandas as pd
+import scipy.stats as st
+
+from scipy.special import gammaln, logsumexp
+from ambulance_simulation import get_rate_columns, load_region_data
+
+################################Directories####################################
+ROOT_DIRECTORY: str = os.path.dirname(os.path.dirname(__file__))
+OUTPUT_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "results/")
+################################Parameters#####################################
+SAVE_OUTPUT: bool = False
+MAX_ITERATIONS: int = 1000
+TOLERANCE: float = 1e-10
+#################################File names####################################
+OUTPUT_FILE_NAME: str = "hypercube_approximation_utilization.csv"
+##################################Functions####################################
+
+
+def calculate_truncated_lognormal_mean(
+    s: float, loc: float, scale: float, CUT_OFF: float
+) -> float:
+    """
+    Calculates the mean of the service times of ``generate_service_times``.
+
+    Parameters
+    ----------
+    s : float
+        The sigma parameter.
+    loc : float
+        The location parameter.
+    scale : float
+        The scale parameter.
+    CUT_OFF : float
+        The cut off/maximum value.
+
+    Returns
+    -------
+    float
+        The mean of the lognormal distribution conditioned on values between
+        0 and ``CUT_OFF``.
+
+    """
+
+    return st.lognorm(s, loc=loc, scale=scale).expect(
+        lb=0, ub=CUT_OFF, conditional=True
+    )
+
+
+def calculate_time_averaged_rates(ARRIVAL_RATES: pd.DataFrame) -> pd.Series:
+    """
+    Calculates the time-averaged rates of a piecewise-constant rate function.
+
+    Parameters
+    ----------
+    ARRIVAL_RATES : pd.DataFrame
+        The arrival rates, see ``check_arrival_rates``.
+
+    Returns
+    -------
+    pd.Series
+        The mean arrival rate (calls per minute) over one period of each rate
+        column.
+
+    """
+
+    interval_lengths = (
+        ARRIVAL_RATES["end_time"] - ARRIVAL_RATES["start_time"]
+    ).to_numpy(dtype=float)
+    rates = ARRIVAL_RATES[get_rate_columns(ARRIVAL_RATES)]
+    return rates.mul(interval_lengths, axis=0).sum() / interval_lengths.sum()
+
+
+def calculate_correction_factors(
+    NUM_AMBULANCES: int, utilization: float
+) -> tuple[np.ndarray, float]:
+    """
+    Calculates the correction factors of the hypercube approximation.
+
+    The correction factor ``Q[k]`` corrects the probability that the ``k``
+    closest ambulances are busy and the next one is available for the
+    dependence between the ambulances. It is calculated with the stationary
+    distribution of the M/M/N queue.
+
+    Parameters
+    ----------
+    NUM_AMBULANCES : int
+        The number of ambulances.
+    utilization : float
+        The average utilization of the ambulances.
+
+    Raises
+    ------
+    Exception
+        If the utilization is not between 0 and 1.
+
+    Returns
+    -------
+    correction_factors : np.ndarray
+        The correction factors ``Q[0], ..., Q[NUM_AMBULANCES - 1]``.
+    delay_probability : float
+        The probability that all ambulances are busy and the call has to wait.
+
+    """
+
+    if not 0 < utilization < 1:
+        raise Exception(
+            "The average utilization should be between 0 and 1, but it is "
+            f"{utilization}. The system is not stable."
+        )
+
+    N = NUM_AMBULANCES
+    k = np.arange(N)
+    log_offered_load = np.log(N * utilization)
+    log_p = k * log_offered_load - gammaln(k + 1)
+    log_p_wait = (
+        N * log_offered_load - gammaln(N + 1) - np.log(1 - utilization)
+    )
+    log_normalization = logsumexp(np.append(log_p, log_p_wait))
+    log_p -= log_normalization
+
+    # Q[j] = sum_{k=j}^{N-1} P_k k!/(k-j)! (N-k) (N-j-1)!/N! / (r^j (1-r))
+    j = k[:, None]
+    with np.errstate(invalid="ignore"):
+        log_terms = (
+            log_p[None, :]
+            + gammaln(k + 1)[None, :]
+            - gammaln(np.maximum(k[None, :] - j, 0) + 1)
+            + np.log(N - k)[None, :]
+            + gammaln(N - j)
+            - gammaln(N + 1)
+            - j * np.log(utilization)
+            - np.log(1 - utilization)
+        )
+    log_terms = np.where(k[None, :] >= j, log_terms, -np.inf)
+    correction_factors = np.exp(logsumexp(log_terms, axis=1))
+
+    return correction_factors, float(np.exp(log_p_wait - log_normalization))
+
+
+def approximate_hypercube(
+    SIMULATION_PARAMETERS: dict[str, Any],
+    SIMULATION_DATA: dict[str, Any],
+    MAX_ITERATIONS: int = 1000,
+    TOLERANCE: float = 1e-10,
+) -> dict[str, Any]:
+    """
+    Approximates the utilization of the ambulances and the response times
+    with the hypercube queueing model.
+
+    The service time of an ambulance from its base to a demand node consists
+    of the driving time to the patient, the mean on-site aid time, with
+    probability ``PROB_GO_TO_HOSPITAL`` the driving time to the closest
+    hospital and the mean drop-off time and the driving time back to the base
+    without sirens. The response time of a call that has to wait is
+    approximated by the mean waiting time of the M/M/N queue plus the driving
+    time from the closest base.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``CALL_LAMBDA``,
+        ``PROB_GO_TO_HOSPITAL``, ``AID_PARAMETERS``, ``DROP_OFF_PARAMETERS``
+        and ``NO_SIREN_PENALTY`` are at least necessary. If
+        ``ARRIVAL_RATE_FILE`` is given and not ``None``, the time-averaged
+        rates of ``ARRIVAL_RATES`` are used instead of ``CALL_LAMBDA``, and
+        the rates per postal code (if given) instead of the inhabitants as
+        the demand of the nodes. See ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. ``SIREN_DRIVING_MATRIX``, ``NODES_REGION``,
+        ``NODES_HOSPITAL``, ``AMBULANCE_BASE_LOCATIONS`` and, if
+        ``ARRIVAL_RATE_FILE`` is given and not ``None``, ``ARRIVAL_RATES``
+        are at least necessary. See ``main.py`` and the input data section on
+        the ELASPY website for explanations.
+    MAX_ITERATIONS : int, optional
+        The maximum number of fixed-point iterations. The default is 1000.
+    TOLERANCE : float, optional
+        The fixed-point iteration stops when the utilizations change less than
+        this value. The default is 1e-10.
+
+    Raises
+    ------
+    Exception
+        If one of the necessary parameters is ``None``.
+    Exception
+        If the fixed-point iteration does not converge.
+
+    Returns
+    -------
+    dict[str, Any]
+        The utilization per ambulance ("utilization"), the probability that a
+        call at each demand node is served by each ambulance
+        ("dispatch_probabilities", with shape (nodes, ambulances)), the
+        probability that a call has to wait ("delay_probability"), the mean
+        service time ("mean_service_time"), the response times
+        ("response_times", with shape (nodes, ambulances + 1), where the last
+        column contains the response times of waiting calls) and their
+        probabilities ("response_time_probabilities", with the same shape)
+        and the mean response time ("mean_response_time").
+
+    """
+
+    use_arrival_rates = (
+        SIMULATION_PARAMETERS.get("ARRIVAL_RATE_FILE") is not None
+    )
+    for parameter in [
+        "CALL_LAMBDA",
+        "PROB_GO_TO_HOSPITAL",
+        "AID_PARAMETERS",
+        "DROP_OFF_PARAMETERS",
+    ]:
+        if parameter == "CALL_LAMBDA" and use_arrival_rates:
+            continue
+        if SIMULATION_PARAMETERS[parameter] is None:
+            raise Exception(
+                f"The hypercube approximation requires {parameter}, but it "
+                "is None."
+            )
+
+    prob_hospital = SIMULATION_PARAMETERS["PROB_GO_TO_HOSPITAL"]
+    aid_mean = calculate_truncated_lognormal_mean(
+        *SIMULATION_PARAMETERS["AID_PARAMETERS"]
+    )
+    drop_off_mean = calculate_truncated_lognormal_mean(
+        *SIMULATION_PARAMETERS["DROP_OFF_PARAMETERS"]
+    )
+
+    nodes = SIMULATION_DATA["NODES_REGION"].index.to_numpy()
+    if use_arrival_rates:
+        average_rates = calculate_time_averaged_rates(
+            SIMULATION_DATA["ARRIVAL_RATES"]
+        )
+        call_lambda = average_rates.sum()
+    else:
+        call_lambda = SIMULATION_PARAMETERS["CALL_LAMBDA"]
+    if use_arrival_rates and list(average_rates.index) != ["rate"]:
+        demand = average_rates.reindex(
+            SIMULATION_DATA["NODES_REGION"].index.astype(str), fill_value=0.0
+        ).to_numpy()
+    else:
+        demand = SIMULATION_DATA["NODES_REGION"]["inhabitants"].to_numpy()
+    demand = demand / demand.sum()
+    driving_times = (
+        SIMULATION_DATA["SIREN_DRIVING_MATRIX"].loc[nodes, nodes].to_numpy()
+    )
+    node_indices = pd.Series(np.arange(len(nodes)), index=nodes)
+    bases = node_indices[
+        SIMULATION_DATA["AMBULANCE_BASE_LOCATIONS"]["Base"].to_numpy()
+    ].to_numpy()
+    hospitals = node_indices[
+        SIMULATION_DATA["NODES_HOSPITAL"]["Hospital"].to_numpy()
+    ].to_numpy()
+    NUM_AMBULANCES = len(bases)
+
+    # Service times per demand node (rows) and ambulance (columns).
+    to_patient = driving_times[np.ix_(bases, np.arange(len(nodes)))].T
+    closest_hospital = hospitals[
+        np.argmin(driving_times[:, hospitals], axis=1)
+    ]
+    to_hospital = driving_times[np.arange(len(nodes)), closest_hospital]
+    penalty = SIMULATION_PARAMETERS["NO_SIREN_PENALTY"]
+    service_times = (
+        to_patient
+        + aid_mean
+        + prob_hospital
+        * (
+            to_hospital[:, None]
+            + drop_off_mean
+            + driving_times[np.ix_(closest_hospital, bases)] / penalty
+        )
+        + (1 - prob_hospital) * driving_times[:, bases] / penalty
+    )
+
+    # Ambulances in order of preference, ties are broken by ambulance ID.
+    preferences = np.argsort(to_patient, axis=1, kind="stable")
+    mean_service_time_per_ambulance = demand @ service_times
+
+    utilization = np.full(
+        NUM_AMBULANCES,
+        call_lambda * mean_service_time_per_ambulance.mean() / NUM_AMBULANCES,
+    )
+    for _ in range(MAX_ITERATIONS):
+        correction_factors, delay_probability = calculate_correction_factors(
+            NUM_AMBULANCES, utilization.mean()
+        )
+        busy = utilization[preferences]
+        all_closer_busy = np.cumprod(
+            np.hstack([np.ones((len(nodes), 1)), busy[:, :-1]]), axis=1
+        )
+        available_probabilities = np.zeros_like(all_closer_busy)
+        np.put_along_axis(
+            available_probabilities,
+            preferences,
+            correction_factors * all_closer_busy,
+            axis=1,
+        )
+
+        # The workload of ambulance n is V_n (1 - rho_n), with V_n the
+        # workload if it is available, plus its share of the waiting calls,
+        # which are served by an arbitrary ambulance.
+        workload_if_available = call_lambda * (
+            demand @ (available_probabilities * service_times)
+        )
+        new_utilization = (
+            workload_if_available
+            + call_lambda
+            * delay_probability
+            * mean_service_time_per_ambulance
+            / NUM_AMBULANCES
+        ) / (1 + workload_if_available)
+        converged = np.max(np.abs(new_utilization - utilization)) < TOLERANCE
+        utilization = new_utilization
+        if converged:
+            break
+    else:
+        raise Exception(
+            "The hypercube approximation did not converge in "
+            f"{MAX_ITERATIONS} iterations."
+        )
+
+    # The dispatch probabilities are scaled such that they sum to one minus
+    # the delay probability for each demand node.
+    dispatch_probabilities = available_probabilities * (1 - utilization)
+    dispatch_probabilities *= (1 - delay_probability) / np.sum(
+        dispatch_probabilities, axis=1, keepdims=True
+    )
+    mean_service_time = utilization.sum() / call_lambda
+    mean_waiting_time = 1 / (NUM_AMBULANCES / mean_service_time - call_lambda)
+    response_times = np.hstack(
+        [to_patient, (mean_waiting_time + to_patient.min(axis=1))[:, None]]
+    )
+    response_time_probabilities = demand[:, None] * np.hstack(
+        [
+            dispatch_probabilities,
+            np.full((len(nodes), 1), delay_probability),
+        ]
+    )
+
+    return {
+        "utilization": utilization,
+        "dispatch_probabilities": dispatch_probabilities,
+        "delay_probability": delay_probability,
+        "mean_service_time": mean_service_time,
+        "response_times": response_times,
+        "response_time_probabilities": response_time_probabilities,
+        "mean_response_time": float(
+            np.sum(response_times * response_time_probabilities)
+        ),
+    }
+
+
+def calculate_response_time_quantile(
+    response_times: np.ndarray,
+    response_time_probabilities: np.ndarray,
+    quantile: float,
+) -> float:
+    """
+    Calculates a quantile of the approximated response time distribution.
+
+    Parameters
+    ----------
+    response_times : np.ndarray
+        The response times, see ``approximate_hypercube``.
+    response_time_probabilities : np.ndarray
+        The probabilities of the response times, see
+        ``approximate_hypercube``.
+    quantile : float
+        The quantile, between 0 and 1.
+
+    Returns
+    -------
+    float
+        The smallest response time for which the cumulative probability is at
+        least ``quantile``.
+
+    """
+
+    order = np.argsort(response_times, axis=None)
+    cumulative_probabilities = np.cumsum(
+        response_time_probabilities.ravel()[order]
+    )
+    index = np.searchsorted(
+        cumulative_probabilities, quantile * cumulative_probabilities[-1]
+    )
+    return float(
+        response_times.ravel()[order][
+            min(index, len(cumulative_probabilities) - 1)
+        ]
+    )
+
+
+##############################Approximation####################################
+if __name__ == "__main__":
+    # The parameters of main.py are only imported when this file is run as a
+    # script, such that its functions can be imported by output_analysis.py,
+    # which is imported by main.py itself.
+    from main import SIMULATION_PARAMETERS, SIMULATION_DATA
+
+    load_region_data(SIMULATION_PARAMETERS, SIMULATION_DATA)
+
+    start_time = time.perf_counter()
+    result = approximate_hypercube(
+        SIMULATION_PARAMETERS, SIMULATION_DATA, MAX_ITERATIONS, TOLERANCE
+    )
+    print(
+        "The hypercube approximation took "
+        f"{(time.perf_counter() - start_time) * 1000:.1f} milliseconds."
+    )
+
+    ####################################Output#################################
+    utilization_df = pd.DataFrame(
+        {
+            "Base": SIMULATION_DATA["AMBULANCE_BASE_LOCATIONS"]["Base"],
+            "utilization": result["utilization"],
+        },
+        index=SIMULATION_DATA["AMBULANCE_BASE_LOCATIONS"].index,
+    )
+    print(utilization_df)
+    print(f"The busy fraction is: {result['utilization'].mean()}.")
+    print(f"The delay probability is: {result['delay_probability']}.")
+    print(f"The mean response time is: {result['mean_response_time']}.")
+    print(
+        "The 95% quantile of the response time is: "
+        + str(
+            calculate_response_time_quantile(
+                result["response_times"],
+                result["response_time_probabilities"],
+                0.95,
+            )
+        )
+        + "."
+    )
+
+    if SAVE_OUTPUT:
+        utilization_df.to_csv(f"{OUTPUT_DIRECTORY}{OUTPUT_FILE_NAME}")
@@ -8,6 +8,8 @@ import datetime
 import numpy as np
 import pandas as pd
 
+from matrix_storage import MATRIX_PRECISIONS
+
 
 def print_parameters(SIMULATION_PARAMETERS: dict[str, Any]) -> None:
     """
@@ -580,8 +582,33 @@ def check_input_parameters(SIMULATION_PARAMETERS: dict[str, Any]) -> None:
             "is not None. Please make it None."
         )
 
+    if (
+        SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]
+        and SIMULATION_PARAMETERS["ARRIVAL_RATE_FILE"] is not None
+    ):
+        raise Exception(
+            "LOAD_INPUT_DATA is True, but ARRIVAL_RATE_FILE "
+            "is not None. Please make it None."
+        )
+
+    if SIMULATION_PARAMETERS["ARRIVAL_RATE_FILE"] is not None:
+        if SIMULATION_PARAMETERS["CALL_LAMBDA"] is not None:
+            raise Exception(
+                "ARRIVAL_RATE_FILE is not None, but CALL_LAMBDA "
+                "is not None. Please make it None."
+            )
+        if (
+            SIMULATION_PARAMETERS["ANTITHETIC"]
+            or SIMULATION_PARAMETERS["CONTROL_VARIATES"]
+        ):
+            raise Exception(
+                "ANTITHETIC and CONTROL_VARIATES require a homogeneous "
+                "arrival process, so ARRIVAL_RATE_FILE should be None."
+            )
+
     if (
         not SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]
+        and SIMULATION_PARAMETERS["ARRIVAL_RATE_FILE"] is None
         and SIMULATION_PARAMETERS["CALL_LAMBDA"] is None
     ):
         raise Exception(
@@ -590,7 +617,7 @@ def check_input_parameters(SIMULATION_PARAMETERS: dict[str, Any]) -> None:
         )
 
     if (
-        not SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]
+        SIMULATION_PARAMETERS["CALL_LAMBDA"] is not None
         and SIMULATION_PARAMETERS["CALL_LAMBDA"] <= 0
     ):
         raise Exception(
@@ -891,6 +918,119 @@ def check_input_parameters(SIMULATION_PARAMETERS: dict[str, Any]) -> None:
             "exists and will be overwritten if SAVE_DFS is True."
         )
 
+    if SIMULATION_PARAMETERS["MAX_PENDING_OUTPUTS"] < 0:
+        raise Exception(
+            "MAX_PENDING_OUTPUTS should be larger or equal to 0, but is "
+            f"{SIMULATION_PARAMETERS['MAX_PENDING_OUTPUTS']}."
+        )
+
+    if (
+        SIMULATION_PARAMETERS["DETECT_WARM_UP"]
+        and SIMULATION_PARAMETERS["FT_BOUNDARY"] < 600
+    ):
+        raise Exception(
+            "The warm-up detection needs at least ten hourly busy fractions, "
+            "so FT_BOUNDARY should be at least 600 if DETECT_WARM_UP=True, "
+            f"but it is {SIMULATION_PARAMETERS['FT_BOUNDARY']}."
+        )
+
+    if SIMULATION_PARAMETERS["ANTITHETIC"]:
+        if SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
+            raise Exception(
+                "ANTITHETIC is True, but the input data is loaded. Set "
+                "LOAD_INPUT_DATA to False or ANTITHETIC to False."
+            )
+        if SIMULATION_PARAMETERS["NUM_RUNS"] % 2 != 0:
+            raise Exception(
+                "NUM_RUNS should be even if ANTITHETIC is True, but is "
+                f"{SIMULATION_PARAMETERS['NUM_RUNS']}."
+            )
+
+    if SIMULATION_PARAMETERS["CONTROL_VARIATES"]:
+        if SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
+            raise Exception(
+                "CONTROL_VARIATES is True, but the input data is loaded, so "
+                "the input means are unknown. Set CONTROL_VARIATES to False."
+            )
+        nr_replications = SIMULATION_PARAMETERS["NUM_RUNS"] // (
+            2 if SIMULATION_PARAMETERS["ANTITHETIC"] else 1
+        )
+        if nr_replications < 6:
+            raise Exception(
+                "The control variates need at least six (pairs of) runs, "
+                f"but there are {nr_replications}."
+            )
+
+    if SIMULATION_PARAMETERS["BOOTSTRAP_CI"] not in [
+        None,
+        "percentile",
+        "bca",
+    ]:
+        raise Exception(
+            "BOOTSTRAP_CI should be 'percentile', 'bca' or None, but is "
+            f"{SIMULATION_PARAMETERS['BOOTSTRAP_CI']}."
+        )
+    if SIMULATION_PARAMETERS["NUM_BOOTSTRAP_RESAMPLES"] < 1:
+        raise Exception(
+            "NUM_BOOTSTRAP_RESAMPLES should be at least 1, but is "
+            f"{SIMULATION_PARAMETERS['NUM_BOOTSTRAP_RESAMPLES']}."
+        )
+    if (
+        SIMULATION_PARAMETERS["BOOTSTRAP_PATIENTS"]
+        and SIMULATION_PARAMETERS["ANTITHETIC"]
+    ):
+        raise Exception(
+            "The patients of antithetic runs cannot be resampled. Set "
+            "BOOTSTRAP_PATIENTS or ANTITHETIC to False."
+        )
+
+    if SIMULATION_PARAMETERS["BATCH_MEANS_CI"] is not None:
+        if SIMULATION_PARAMETERS["BATCH_MEANS_CI"] not in [
+            "batch_means",
+            "overlapping_batch_means",
+        ]:
+            raise Exception(
+                "BATCH_MEANS_CI should be 'batch_means', "
+                "'overlapping_batch_means' or None, but is "
+                f"{SIMULATION_PARAMETERS['BATCH_MEANS_CI']}."
+            )
+        if SIMULATION_PARAMETERS["NUM_BATCHES"] < 2:
+            raise Exception(
+                "NUM_BATCHES should be at least 2, but is "
+                f"{SIMULATION_PARAMETERS['NUM_BATCHES']}."
+            )
+        if (
+            SIMULATION_PARAMETERS["FT_BOUNDARY"]
+            - SIMULATION_PARAMETERS["AT_BOUNDARY"]
+            < 2 * 60 * SIMULATION_PARAMETERS["NUM_BATCHES"]
+        ):
+            raise Exception(
+                "The batch means confidence interval of the busy fraction "
+                "needs at least two hourly busy fractions per batch, so "
+                "FT_BOUNDARY - AT_BOUNDARY should be at least "
+                f"{2 * 60 * SIMULATION_PARAMETERS['NUM_BATCHES']} minutes."
+            )
+
+    if SIMULATION_PARAMETERS["OUTPUT_FORMAT"] not in ["csv", "npz"]:
+        raise Exception(
+            "OUTPUT_FORMAT should be 'csv' or 'npz', but is "
+            f"{SIMULATION_PARAMETERS['OUTPUT_FORMAT']}."
+        )
+
+    for file_name in [
+        "SIMULATION_PATIENT_OUTPUT_FILE_NAME",
+        "SIMULATION_AMBULANCE_OUTPUT_FILE_NAME",
+    ]:
+        if Path(
+            SIMULATION_PARAMETERS["SIMULATION_OUTPUT_DIRECTORY"]
+            + SIMULATION_PARAMETERS[file_name]
+            + ".npz"
+        ).exists():
+            raise Exception(
+                f"The {file_name} already exists and will be extended if "
+                "SAVE_DFS is True."
+            )
+
     if Path(
         SIMULATION_PARAMETERS["SIMULATION_OUTPUT_DIRECTORY"]
         + SIMULATION_PARAMETERS["RUN_PARAMETERS_FILE_NAME"]
@@ -1020,6 +1160,21 @@ def check_input_parameters(SIMULATION_PARAMETERS: dict[str, Any]) -> None:
             f"{SIMULATION_PARAMETERS['TIME_AFTER_LAST_ARRIVAL']}."
         )
 
+    if SIMULATION_PARAMETERS["MATRIX_PRECISION"] not in MATRIX_PRECISIONS:
+        raise Exception(
+            f"MATRIX_PRECISION should be one of {MATRIX_PRECISIONS}, but is "
+            f"{SIMULATION_PARAMETERS['MATRIX_PRECISION']}."
+        )
+
+    if (
+        SIMULATION_PARAMETERS["TELEMETRY_INTERVAL"] is not None
+        and SIMULATION_PARAMETERS["TELEMETRY_INTERVAL"] <= 0
+    ):
+        raise Exception(
+            "TELEMETRY_INTERVAL should be larger than 0, "
+            f"but is {SIMULATION_PARAMETERS['TELEMETRY_INTERVAL']}."
+        )
+
     if SIMULATION_PARAMETERS["AT_BOUNDARY"] < 0:
         raise Exception(
             "AT_BOUNDARY should be larger or equal to 0, but is "
@@ -1108,6 +1263,162 @@ def calculate_response_time_ecdf(df_patient):
     return df_patient
 
 
+def calculate_cumulative_busy_time(
+    assignment_times: np.ndarray,
+    finish_times: np.ndarray,
+    time_points: np.ndarray,
+) -> np.ndarray:
+    """
+    Calculates the cumulative busy time up to each of the given time points.
+
+    The cumulative busy time up to time ``t`` is the sum over all patients of
+    the overlap of the interval (assignment time, finish time) with (0, t).
+    It is computed from the sorted assignment and finish times and their
+    cumulative sums, such that the busy time in any window (s, e) is equal to
+    the difference of the cumulative busy times at ``e`` and ``s``.
+
+    Parameters
+    ----------
+    assignment_times : np.ndarray
+        The times at which the ambulances were assigned to the patients.
+    finish_times : np.ndarray
+        The times at which the ambulances finished helping the patients.
+    time_points : np.ndarray
+        The time points at which the cumulative busy time is evaluated.
+
+    Returns
+    -------
+    np.ndarray
+        The cumulative busy time at each time point. It has the same shape as
+        ``time_points``.
+
+    """
+
+    sorted_assignment_times = np.sort(assignment_times)
+    sorted_finish_times = np.sort(finish_times)
+    cumsum_assignment_times = np.concatenate(
+        ([0.0], np.cumsum(sorted_assignment_times))
+    )
+    cumsum_finish_times = np.concatenate(
+        ([0.0], np.cumsum(sorted_finish_times))
+    )
+
+    nr_assigned = np.searchsorted(
+        sorted_assignment_times, time_points, side="right"
+    )
+    nr_finished = np.searchsorted(
+        sorted_finish_times, time_points, side="right"
+    )
+
+    return (
+        nr_assigned * time_points - cumsum_assignment_times[nr_assigned]
+    ) - (nr_finished * time_points - cumsum_finish_times[nr_finished])
+
+
+def calculate_busy_fractions(
+    assignment_times: np.ndarray,
+    finish_times: np.ndarray,
+    window_starts: np.ndarray,
+    window_ends: np.ndarray,
+    NUM_AMBULANCES: int,
+    ambulance_IDs: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Calculates the busy fractions of multiple time windows at once.
+
+    The busy time of a patient in a window is the overlap of the interval
+    (assignment time, finish time) with the window. The input arrays are not
+    altered.
+
+    Parameters
+    ----------
+    assignment_times : np.ndarray
+        The times at which the ambulances were assigned to the patients.
+    finish_times : np.ndarray
+        The times at which the ambulances finished helping the patients.
+    window_starts : np.ndarray
+        The start times of the windows.
+    window_ends : np.ndarray
+        The end times of the windows. Should have the same shape as
+        ``window_starts``.
+    NUM_AMBULANCES : int
+        The number of ambulances.
+    ambulance_IDs : np.ndarray | None, optional
+        The ID of the ambulance that helped each patient. If provided, the
+        busy fractions are calculated per ambulance. The default is ``None``.
+
+    Raises
+    ------
+    Exception
+        1. If the input arrays do not have matching shapes.
+        2. If a window end is smaller than or equal to its window start.
+
+    Returns
+    -------
+    np.ndarray
+        The busy fraction of each window. If ``ambulance_IDs`` is ``None``,
+        this is the busy fraction of the whole fleet with the same shape as
+        ``window_starts``. Otherwise, it has shape
+        ``(NUM_AMBULANCES,) + window_starts.shape`` and row ``i`` contains the
+        busy fractions of ambulance ``i``.
+
+    """
+
+    assignment_times = np.asarray(assignment_times, dtype=float)
+    finish_times = np.asarray(finish_times, dtype=float)
+    window_starts = np.asarray(window_starts, dtype=float)
+    window_ends = np.asarray(window_ends, dtype=float)
+
+    if assignment_times.shape != finish_times.shape:
+        raise Exception(
+            "The assignment_times and finish_times should have the same "
+            "shape, but they do not."
+        )
+    if window_starts.shape != window_ends.shape:
+        raise Exception(
+            "The window_starts and window_ends should have the same shape, "
+            "but they do not."
+        )
+    if np.any(window_ends <= window_starts):
+        raise Exception(
+            "All window ends should be larger than their window starts."
+        )
+
+    window_lengths = window_ends - window_starts
+
+    if ambulance_IDs is None:
+        busy_times = calculate_cumulative_busy_time(
+            assignment_times, finish_times, window_ends
+        ) - calculate_cumulative_busy_time(
+            assignment_times, finish_times, window_starts
+        )
+        return busy_times / (window_lengths * NUM_AMBULANCES)
+
+    ambulance_IDs = np.asarray(ambulance_IDs).astype(int)
+    if ambulance_IDs.shape != assignment_times.shape:
+        raise Exception(
+            "The ambulance_IDs should have the same shape as the "
+            "assignment_times, but they do not."
+        )
+
+    busy_fractions = np.zeros((NUM_AMBULANCES,) + window_starts.shape)
+    order = np.argsort(ambulance_IDs, kind="stable")
+    split_indices = np.searchsorted(
+        ambulance_IDs[order], np.arange(1, NUM_AMBULANCES)
+    )
+    for ambulance_ID, patients in enumerate(np.split(order, split_indices)):
+        if patients.size == 0:
+            continue
+        busy_times = calculate_cumulative_busy_time(
+            assignment_times[patients], finish_times[patients], window_ends
+        ) - calculate_cumulative_busy_time(
+            assignment_times[patients], finish_times[patients], window_starts
+        )
+        busy_fractions[ambulance_ID] = busy_times / window_lengths
+
+    return busy_fractions
+
+
 def calculate_busy_fraction(
     df_patient, SIMULATION_PARAMETERS: dict[str, Any]
 ) -> float:
@@ -1116,7 +1427,8 @@ def calculate_busy_fraction(
 
     A warm-up period of ``AT_BOUNDARY`` and cool-down period of ``FT_BOUNDARY``
     is used, which means that the calculation does not consider data before
-    the warm-up period and after the cool-down period.
+    the warm-up period and after the cool-down period. The dataframe is not
+    altered.
 
     Parameters
     ----------
@@ -1130,11 +1442,6 @@ def calculate_busy_fraction(
         ``FT_BOUNDARY`` and ``NUM_AMBULANCES`` are at least necessary.
         See ``main.py`` for parameter explanations.
 
-    Raises
-    ------
-    Exception
-        If the busy fraction calculation uses the same data more than once.
-
     Returns
     -------
     float
@@ -1143,82 +1450,137 @@ def calculate_busy_fraction(
     """
 
     # Note that the assignment time is used as then the ambu becomes active.
-    df_patient["assignment_time"] = (
-        df_patient["arrival_time"] + df_patient["waiting_time_before_assigned"]
+    assignment_times = (
+        df_patient["arrival_time"].to_numpy()
+        + df_patient["waiting_time_before_assigned"].to_numpy()
     )
 
-    busy_time = 0
+    return float(
+        calculate_busy_fractions(
+            assignment_times,
+            df_patient["finish_time"].to_numpy(),
+            np.array([SIMULATION_PARAMETERS["AT_BOUNDARY"]]),
+            np.array([SIMULATION_PARAMETERS["FT_BOUNDARY"]]),
+            SIMULATION_PARAMETERS["NUM_AMBULANCES"],
+        )[0]
+    )
 
-    # Case 1: patient is processed by ambulance completely within the interval
-    # (AT_BOUNDARY, FT_BOUNDARY).
-    case_1 = (
-        df_patient["assignment_time"] >= SIMULATION_PARAMETERS["AT_BOUNDARY"]
-    ) & (df_patient["finish_time"] <= SIMULATION_PARAMETERS["FT_BOUNDARY"])
 
-    busy_time += np.sum(
-        (
-            df_patient.loc[case_1]["finish_time"]
-            - df_patient.loc[case_1]["assignment_time"]
-        )
-    )
+def calculate_busy_fraction_profile(
+    df_patient,
+    SIMULATION_PARAMETERS: dict[str, Any],
+    BIN_WIDTH: float = 60.0,
+    PERIOD: float = 1440.0,
+    per_ambulance: bool = False,
+) -> np.ndarray:
+    """
+    Calculates the time-of-day busy fraction profile of a simulation run.
 
-    # Case 2: the assignment time is before AT_BOUNDARY, the finish time before
-    # FT_BOUNDARY but after AT_BOUNDARY.
-    case_2 = (
-        df_patient["assignment_time"] < SIMULATION_PARAMETERS["AT_BOUNDARY"]
-    ) & (
-        (df_patient["finish_time"] > SIMULATION_PARAMETERS["AT_BOUNDARY"])
-        & (df_patient["finish_time"] <= SIMULATION_PARAMETERS["FT_BOUNDARY"])
-    )
+    The interval (``AT_BOUNDARY``, ``FT_BOUNDARY``) is divided into bins of
+    ``BIN_WIDTH`` minutes. Each bin is mapped to its time of day (modulo
+    ``PERIOD``), after which the busy times and the lengths of all bins with
+    the same time of day are added. The final bin is shortened if it exceeds
+    ``FT_BOUNDARY``.
 
-    busy_time += np.sum(
-        df_patient.loc[case_2]["finish_time"]
-        - SIMULATION_PARAMETERS["AT_BOUNDARY"]
-    )
+    Parameters
+    ----------
+    df_patient : pandas.DataFrame
+        A dataframe with the patient data where each row represents a patient.
+        At least columns "arrival_time", "waiting_time_before_assigned" and
+        "finish_time" are necessary. If ``per_ambulance=True``, also column
+        "assigned_to_ambulance_nr" is necessary. See the output data section
+        on the ELASPY website for explanations.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``AT_BOUNDARY``,
+        ``FT_BOUNDARY`` and ``NUM_AMBULANCES`` are at least necessary.
+        See ``main.py`` for parameter explanations.
+    BIN_WIDTH : float, optional
+        The width of the bins in minutes. The default is 60.0.
+    PERIOD : float, optional
+        The length of the profile in minutes. Should be a multiple of
+        ``BIN_WIDTH``. The default is 1440.0 (one day).
+    per_ambulance : bool, optional
+        Whether the profile should be calculated per ambulance. The default is
+        ``False``.
 
-    # Case 3: the assignment time is before AT_BOUNDARY, the finish time after
-    # FT_BOUNDARY.
-    case_3 = (
-        df_patient["assignment_time"] < SIMULATION_PARAMETERS["AT_BOUNDARY"]
-    ) & (df_patient["finish_time"] > SIMULATION_PARAMETERS["FT_BOUNDARY"])
+    Raises
+    ------
+    Exception
+        If ``PERIOD`` is not a multiple of ``BIN_WIDTH``.
 
-    busy_time += np.sum(case_3) * (
-        SIMULATION_PARAMETERS["FT_BOUNDARY"]
-        - SIMULATION_PARAMETERS["AT_BOUNDARY"]
-    )
+    Returns
+    -------
+    np.ndarray
+        The busy fraction per bin of the period. Bins that do not overlap with
+        (``AT_BOUNDARY``, ``FT_BOUNDARY``) are ``np.nan``. If
+        ``per_ambulance=True``, the array has shape
+        ``(NUM_AMBULANCES, PERIOD / BIN_WIDTH)``.
+
+    """
 
-    # Case:4 the assignment time is after AT_BOUNDARY but before FT_BOUNDARY,
-    # the finish time after FT_BOUNDARY.
-    case_4 = (
-        (df_patient["assignment_time"] >= SIMULATION_PARAMETERS["AT_BOUNDARY"])
-        & (
-            df_patient["assignment_time"]
-            < SIMULATION_PARAMETERS["FT_BOUNDARY"]
+    nr_bins_period = int(round(PERIOD / BIN_WIDTH))
+    if not np.isclose(nr_bins_period * BIN_WIDTH, PERIOD):
+        raise Exception(
+            f"The PERIOD ({PERIOD}) should be a multiple of the BIN_WIDTH "
+            f"({BIN_WIDTH})."
         )
-    ) & (df_patient["finish_time"] > SIMULATION_PARAMETERS["FT_BOUNDARY"])
 
-    busy_time += np.sum(
-        SIMULATION_PARAMETERS["FT_BOUNDARY"]
-        - df_patient.loc[case_4]["assignment_time"]
+    window_starts = np.arange(
+        SIMULATION_PARAMETERS["AT_BOUNDARY"],
+        SIMULATION_PARAMETERS["FT_BOUNDARY"],
+        BIN_WIDTH,
+    )
+    window_ends = np.minimum(
+        window_starts + BIN_WIDTH, SIMULATION_PARAMETERS["FT_BOUNDARY"]
+    )
+    window_lengths = window_ends - window_starts
+    bins_of_period = (
+        np.floor(np.mod(window_starts, PERIOD) / BIN_WIDTH).astype(int)
+        % nr_bins_period
     )
 
-    total_time = (
-        SIMULATION_PARAMETERS["FT_BOUNDARY"]
-        - SIMULATION_PARAMETERS["AT_BOUNDARY"]
-    ) * SIMULATION_PARAMETERS["NUM_AMBULANCES"]
-
-    df_patient.drop(["assignment_time"], axis=1, inplace=True)
+    assignment_times = (
+        df_patient["arrival_time"].to_numpy()
+        + df_patient["waiting_time_before_assigned"].to_numpy()
+    )
+    busy_fractions = calculate_busy_fractions(
+        assignment_times,
+        df_patient["finish_time"].to_numpy(),
+        window_starts,
+        window_ends,
+        SIMULATION_PARAMETERS["NUM_AMBULANCES"],
+        (
+            df_patient["assigned_to_ambulance_nr"].to_numpy()
+            if per_ambulance
+            else None
+        ),
+    )
 
-    if not np.isin(
-        np.sum([case_1, case_2, case_3, case_4], axis=0), [0, 1]
-    ).all():
-        raise Exception(
-            "Error: in the busy_fraction calculation, some data "
-            "is considered more than once."
+    total_lengths = np.bincount(
+        bins_of_period, weights=window_lengths, minlength=nr_bins_period
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if per_ambulance:
+            return np.array(
+                [
+                    np.bincount(
+                        bins_of_period,
+                        weights=busy_fractions[i] * window_lengths,
+                        minlength=nr_bins_period,
+                    )
+                    / total_lengths
+                    for i in range(SIMULATION_PARAMETERS["NUM_AMBULANCES"])
+                ]
+            )
+        return (
+            np.bincount(
+                bins_of_period,
+                weights=busy_fractions * window_lengths,
+                minlength=nr_bins_period,
+            )
+            / total_lengths
         )
 
-    return busy_time / total_time
-
 
 def simulation_statistics(
     df_patient,
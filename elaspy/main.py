@@ -11,7 +11,8 @@ Parameters
 ----------
 START_SEED_VALUE : int
     The initial seed value. The seed of the ith run is equal to
-    ``START_SEED_VALUE  + (i-1)``.
+    ``START_SEED_VALUE  + (i-1)``. If ``ANTITHETIC=True``, the seed of the
+    jth pair of runs is equal to ``START_SEED_VALUE + (j-1)``.
 DATA_DIRECTORY : str
     The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
     where the input data is located.
@@ -27,6 +28,23 @@ TRAVEL_TIMES_FILE : str
     between nodes.
 DISTANCE_FILE : str
     The name of the file that contains the data with the distance between nodes.
+ROAD_NETWORK_FILE : str | None
+    The name of the file that contains the edges of the road network (with the
+    columns "source", "target", "travel_time" and "distance"). If not
+    ``None``, the siren travel times and distances are computed on demand from
+    the road network instead of being read from ``TRAVEL_TIMES_FILE`` and
+    ``DISTANCE_FILE``, which saves memory for very large regions. See
+    ``road_network.py``.
+ROAD_NETWORK_CACHE_SIZE : int
+    The maximum number of shortest route searches that are kept in the cache
+    if ``ROAD_NETWORK_FILE`` is not ``None``. The searches from and to the
+    bases and hospitals are always kept.
+MATRIX_PRECISION : str
+    The precision with which the siren travel times and distances are stored.
+    Either "float64", "float32" (half the memory) or "uint16" (a quarter of
+    the memory, see ``matrix_storage.py``). If not "float64", the maximum
+    errors compared to ``TRAVEL_TIMES_FILE`` and ``DISTANCE_FILE`` are
+    printed.
 NODES_FILE : str
     The name of the file that contains the data with the nodes of the region.
 HOSPITAL_FILE : str
@@ -40,6 +58,11 @@ SCENARIO : str
     RB1_FH1, FB1_RH1, FB1_FH1, RB50_RH50, Diesel.
 CHARGING_SCENARIO_FILE : str
     The name of the file that contains the charging scenario data.
+ARRIVAL_RATE_FILE : str | None
+    The name of the file that contains the piecewise-constant arrival rates
+    per time interval (e.g., per hour of the week), in total or per postal
+    code, if ``LOAD_INPUT_DATA=False``. If ``None``, the arrivals are a
+    homogeneous Poisson process with rate ``CALL_LAMBDA``.
 SIMULATION_PATIENT_OUTPUT_FILE_NAME : str
     The name of the file where the patient dataframe will be saved.
 SIMULATION_AMBULANCE_OUTPUT_FILE_NAME : str
@@ -58,6 +81,18 @@ EMP_QUANTILE_RESPONSE_TIMES_FILE_NAME : str
 BUSY_FRACTIONS_FILE_NAME : str
     The name of the file where the empirical busy fraction of each run will be
     saved.
+WARM_UP_FILE_NAME : str
+    The name of the file where the suggested truncation points and truncated
+    estimators of each run will be saved if ``DETECT_WARM_UP=True``.
+BATCH_MEANS_FILE_NAME : str
+    The name of the file where the batch means confidence intervals of each
+    run will be saved if ``BATCH_MEANS_CI`` is not ``None``.
+PROFILE_FILE_NAME : str
+    The name of the json file where the profile of each run will be saved if
+    ``PROFILE=True`` and ``SAVE_OUTPUT=True`` (adding a run_i suffix).
+SIMULATION_TELEMETRY_OUTPUT_FILE_NAME : str
+    The name of the file where the telemetry dataframe will be saved if
+    ``TELEMETRY_INTERVAL`` is not ``None``.
 INTERARRIVAL_TIMES_FILE : str
     The name of the file with the interarrival times of the patients if
     ``LOAD_INPUT_DATA=True``. Otherwise it should be ``None``.
@@ -93,7 +128,8 @@ PROB_GO_TO_HOSPITAL : float | None
     ``LOAD_INPUT_DATA=False``. Otherwise it should be ``None``.
 CALL_LAMBDA : float | None
     The arrival rate parameter of the arrival Poisson process if
-    ``LOAD_INPUT_DATA=False``. Otherwise it should be ``None``.
+    ``LOAD_INPUT_DATA=False`` and ``ARRIVAL_RATE_FILE=None``. Otherwise it
+    should be ``None``.
 AID_PARAMETERS : list[float | int]
     The parameters of the lognormal distribution for providing treatment on
     site. The first parameter is the sigma parameter, the second the
@@ -126,16 +162,69 @@ CRN_GENERATOR : str | None
     `LOAD_INPUT_DATA=False``. Either "Generator" for using NumPy's default or
     "RandomState" for Numpy's legacy generator. It should be ``None`` if
     ``LOAD_INPUT_DATA=True``.
+ANTITHETIC : bool
+    If ``True``, the runs are antithetic pairs: the inputs are generated by
+    the inverse transformation method from the uniforms U in the first run of
+    a pair and from 1-U in the second run (see
+    ``generate_antithetic_inputs``). ``CRN_GENERATOR`` is not used then.
+    ``NUM_RUNS`` should be even and the confidence intervals over the runs
+    use the means of the pairs. It requires ``LOAD_INPUT_DATA=False``.
+CONTROL_VARIATES : bool
+    If ``True``, control variate estimates and confidence intervals of the
+    mean response time, the 95% empirical quantile of the response time and
+    the busy fraction over the runs are printed. The controls are the sample
+    means of the inputs of each run, whose expectations are known (see
+    ``output_analysis.py``). It requires ``LOAD_INPUT_DATA=False`` and more
+    than five (pairs of) runs.
 INTERVAL_CHECK_WP : float | None
     The interval (in minutes) at which the simulator checks for waiting
     patients. If ``ENGINE_TYPE="diesel"`` it should be ``None``.
 TIME_AFTER_LAST_ARRIVAL : float | None
     The time after the last arriving patient the simulator needs to check for
     waiting patients. If ``ENGINE_TYPE="diesel"`` it should be ``None``.
+TELEMETRY_INTERVAL : float | None
+    The interval (in minutes) at which the queue length, the number of
+    available and charging ambulances and the mean state of charge of the
+    fleet are sampled during a run. See ``telemetry.py``. If ``None``, no
+    telemetry is recorded.
 AT_BOUNDARY : float
     The warm-up period (in minutes) for the busy fraction calculation.
 FT_BOUNDARY : float
     The cool-down period (in minutes) for the busy fraction calculation.
+DETECT_WARM_UP : bool
+    If ``True``, the warm-up period of each run is detected with the MSER-5
+    rule on the response times and on the hourly busy fractions before
+    ``FT_BOUNDARY`` (see ``output_analysis.py``). The suggested truncation
+    points and the truncated mean and 95% empirical quantile of the response
+    time and busy fraction are printed and saved in ``WARM_UP_FILE_NAME`` if
+    ``SAVE_OUTPUT=True``. The other statistics still use all patients and
+    ``AT_BOUNDARY``.
+BATCH_MEANS_CI : str | None
+    The type of the confidence intervals of the mean response time, the 95%
+    empirical quantile of the response time and the busy fraction within each
+    run. Either "batch_means", "overlapping_batch_means" or ``None``. The
+    patients that arrive before ``AT_BOUNDARY`` are not used. This gives
+    valid confidence intervals for one long run (``NUM_RUNS=1``) with a single
+    warm-up period (see ``output_analysis.py``). If ``None``, they are not
+    calculated. The intervals are printed and saved in
+    ``BATCH_MEANS_FILE_NAME`` if ``SAVE_OUTPUT=True``.
+BOOTSTRAP_CI : str | None
+    The type of the bootstrap confidence intervals of the mean response time,
+    the 95% empirical quantile of the response time and the busy fraction
+    over the runs, which are printed next to the t-based intervals. Either
+    "percentile", "bca" or ``None``. If ``None``, they are not calculated.
+    BCa intervals are preferred for skewed performance measures and few runs
+    (see ``bootstrap.py``).
+NUM_BOOTSTRAP_RESAMPLES : int
+    The number of bootstrap resamples of the runs.
+BOOTSTRAP_PATIENTS : bool
+    If ``True``, the patients are resampled within the resampled runs for the
+    bootstrap intervals of the response time. The response times of all runs
+    are then kept in memory. It cannot be used with ``ANTITHETIC=True``.
+NUM_BATCHES : int
+    The number of batches of the batch means confidence intervals. The busy
+    fraction uses hourly bins between ``AT_BOUNDARY`` and ``FT_BOUNDARY``, so
+    this period should contain at least ``2 * NUM_BATCHES`` hours.
 PRINT : bool
     If ``True``, debug prints are provided that clarify the simulation process.
 PRINT_STATISTICS : bool
@@ -158,6 +247,33 @@ SAVE_DFS : bool
     ``SIMULATION_AMBULANCE_OUTPUT_FILE_NAME`` (adding a run_i suffix) and the
     patient dataframe of each run in ``SIMULATION_PATIENT_OUTPUT_FILE_NAME``
     (adding a run_i suffix).
+OUTPUT_FORMAT : str
+    The format of the dataframes that are saved if ``SAVE_DFS=True``. Either
+    "csv" for a CSV file per run or "npz" for one columnar binary file with
+    all runs per dataframe (see ``columnar_output.py``), which is much faster
+    to write and read.
+MAX_PENDING_OUTPUTS : int
+    The maximum number of dataframes that are waiting to be saved if
+    ``SAVE_DFS=True``. The dataframes are saved in a background process while
+    the next run is simulated (see ``async_output.py``). If 0, the dataframes
+    are saved before the next run starts.
+RESULTS_STORE_FILE_NAME : str | None
+    The name of the SQLite results store (without extension) in the
+    ``SIMULATION_OUTPUT_DIRECTORY``. The mean response time, the 95% empirical
+    quantile of the response time, the busy fraction and the running time of
+    each run are stored, keyed by the effective parameters, the checksums of
+    the input files and the seed (see ``results_store.py``). Runs that are
+    already stored are loaded instead of simulated, so an interrupted
+    experiment can be resumed and ``NUM_RUNS`` can be increased. The patient
+    output columns that are needed for the bootstrap, control variates,
+    warm-up detection and batch means are stored as well, so these are also
+    computed for loaded runs. The plots, statistics and dataframes are not
+    created for loaded runs. If ``None``, no results store is used.
+PROFILE : bool
+    If ``True``, the number of calls and the time spent in the most important
+    functions of the simulator and the number of processed SimPy events are
+    recorded and printed for each run. See ``profiling.py``. Note that this
+    slightly slows down the simulation.
 DATA_COLUMNS_PATIENT : list[str]
     The columns for the patient DataFrame.
 DATA_COLUMNS_AMBULANCE : list[str]
@@ -168,6 +284,7 @@ from typing import Any
 import os
 import sys
 import copy
+import contextlib
 import scipy
 import datetime
 import numpy as np
@@ -183,6 +300,24 @@ from input_output_functions import (
     save_input_parameters,
     calculate_busy_fraction,
 )
+from profiling import (
+    profile_simulation,
+    create_profile_report,
+    save_profile,
+)
+from telemetry import TELEMETRY_COLUMNS
+from columnar_output import save_columnar_output
+from async_output import AsyncOutputWriter
+from results_store import ResultsStore, calculate_input_checksums
+from bootstrap import calculate_bootstrap_cis
+from output_analysis import (
+    detect_warm_up,
+    calculate_single_run_cis,
+    calculate_input_means,
+    calculate_input_statistics,
+    calculate_control_variate_ci,
+    CONTROL_VARIATE_COLUMNS,
+)
 from plot_functions import (
     plot_battery_levels,
     plot_response_times,
@@ -199,6 +334,9 @@ SIMULATION_OUTPUT_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "results/")
 #################################File names####################################
 TRAVEL_TIMES_FILE: str = "siren_driving_matrix_2022.csv"
 DISTANCE_FILE: str = "distance_matrix_2022.csv"
+ROAD_NETWORK_FILE: str | None = None
+ROAD_NETWORK_CACHE_SIZE: int = 1024
+MATRIX_PRECISION: str = "float64"
 NODES_FILE: str = "nodes_Utrecht_2021.csv"
 HOSPITAL_FILE: str = "Hospital_Postal_Codes_Utrecht_2021.csv"
 BASE_LOCATIONS_FILE: str = "RAVU_base_locations_Utrecht_2021.csv"
@@ -207,8 +345,10 @@ AMBULANCE_BASE_LOCATIONS_FILE: str = (
 )
 SCENARIO: str = "FB1_FH1"
 CHARGING_SCENARIO_FILE: str = f"charging_scenario_21_22_{SCENARIO}.csv"
+ARRIVAL_RATE_FILE: str | None = None
 SIMULATION_PATIENT_OUTPUT_FILE_NAME: str = f"Patient_df_{SCENARIO}"
 SIMULATION_AMBULANCE_OUTPUT_FILE_NAME: str = f"Ambulance_df_{SCENARIO}"
+SIMULATION_TELEMETRY_OUTPUT_FILE_NAME: str = f"Telemetry_df_{SCENARIO}"
 
 RUN_PARAMETERS_FILE_NAME: str = f"run_parameters_{SCENARIO}"
 RUNNING_TIME_FILE_NAME: str = f"running_times_{SCENARIO}"
@@ -218,6 +358,9 @@ EMP_QUANTILE_RESPONSE_TIMES_FILE_NAME: str = (
     f"emp_quantile_response_times_all_runs_{SCENARIO}"
 )
 BUSY_FRACTIONS_FILE_NAME: str = f"busy_fractions_all_runs_{SCENARIO}"
+WARM_UP_FILE_NAME: str = f"warm_up_all_runs_{SCENARIO}"
+BATCH_MEANS_FILE_NAME: str = f"batch_means_all_runs_{SCENARIO}"
+PROFILE_FILE_NAME: str = f"profile_{SCENARIO}"
 
 INTERARRIVAL_TIMES_FILE: str | None = None
 ON_SITE_AID_TIMES_FILE: str | None = None
@@ -245,10 +388,19 @@ else:
 NO_SIREN_PENALTY: float = 0.95
 LOAD_INPUT_DATA: bool = False
 CRN_GENERATOR: str | None = "Generator"
+ANTITHETIC: bool = False
+CONTROL_VARIATES: bool = False
 INTERVAL_CHECK_WP: float | None = 1
 TIME_AFTER_LAST_ARRIVAL: float | None = 100
+TELEMETRY_INTERVAL: float | None = None
 AT_BOUNDARY: float = 60.0
 FT_BOUNDARY: float = 720.0
+DETECT_WARM_UP: bool = False
+BATCH_MEANS_CI: str | None = None
+NUM_BATCHES: int = 20
+BOOTSTRAP_CI: str | None = None
+NUM_BOOTSTRAP_RESAMPLES: int = 10000
+BOOTSTRAP_PATIENTS: bool = False
 ##############################Output Parameters################################
 PRINT: bool = False
 PRINT_STATISTICS: bool = False
@@ -258,6 +410,10 @@ SAVE_PRINTS_TXT: bool = False
 SAVE_OUTPUT: bool = False
 SAVE_PLOTS: bool = False
 SAVE_DFS: bool = False
+OUTPUT_FORMAT: str = "csv"
+MAX_PENDING_OUTPUTS: int = 2
+RESULTS_STORE_FILE_NAME: str | None = None
+PROFILE: bool = False
 
 DATA_COLUMNS_PATIENT: list["str"] = [
     "patient_ID",
@@ -320,14 +476,19 @@ SIMULATION_PARAMETERS: dict[str, Any] = {
     "DATA_COLUMNS_AMBULANCE": DATA_COLUMNS_AMBULANCE,
     "TRAVEL_TIMES_FILE": TRAVEL_TIMES_FILE,
     "DISTANCE_FILE": DISTANCE_FILE,
+    "ROAD_NETWORK_FILE": ROAD_NETWORK_FILE,
+    "ROAD_NETWORK_CACHE_SIZE": ROAD_NETWORK_CACHE_SIZE,
+    "MATRIX_PRECISION": MATRIX_PRECISION,
     "NODES_FILE": NODES_FILE,
     "HOSPITAL_FILE": HOSPITAL_FILE,
     "BASE_LOCATIONS_FILE": BASE_LOCATIONS_FILE,
     "AMBULANCE_BASE_LOCATIONS_FILE": AMBULANCE_BASE_LOCATIONS_FILE,
     "SCENARIO": SCENARIO,
     "CHARGING_SCENARIO_FILE": CHARGING_SCENARIO_FILE,
+    "ARRIVAL_RATE_FILE": ARRIVAL_RATE_FILE,
     "SIMULATION_PATIENT_OUTPUT_FILE_NAME": SIMULATION_PATIENT_OUTPUT_FILE_NAME,
     "SIMULATION_AMBULANCE_OUTPUT_FILE_NAME": SIMULATION_AMBULANCE_OUTPUT_FILE_NAME,
+    "SIMULATION_TELEMETRY_OUTPUT_FILE_NAME": SIMULATION_TELEMETRY_OUTPUT_FILE_NAME,
     "SIMULATION_OUTPUT_DIRECTORY": SIMULATION_OUTPUT_DIRECTORY,
     "DATA_DIRECTORY": DATA_DIRECTORY,
     "SIMULATION_INPUT_DIRECTORY": SIMULATION_INPUT_DIRECTORY,
@@ -339,13 +500,19 @@ SIMULATION_PARAMETERS: dict[str, Any] = {
     "LOCATION_IDS_FILE": LOCATION_IDS_FILE,
     "TO_HOSPITAL_FILE": TO_HOSPITAL_FILE,
     "CRN_GENERATOR": CRN_GENERATOR,
+    "ANTITHETIC": ANTITHETIC,
+    "CONTROL_VARIATES": CONTROL_VARIATES,
     "INTERVAL_CHECK_WP": INTERVAL_CHECK_WP,
     "TIME_AFTER_LAST_ARRIVAL": TIME_AFTER_LAST_ARRIVAL,
+    "TELEMETRY_INTERVAL": TELEMETRY_INTERVAL,
     "RUN_PARAMETERS_FILE_NAME": RUN_PARAMETERS_FILE_NAME,
     "RUNNING_TIME_FILE_NAME": RUNNING_TIME_FILE_NAME,
     "PLOT_FIGURES": PLOT_FIGURES,
     "SAVE_PLOTS": SAVE_PLOTS,
     "SAVE_DFS": SAVE_DFS,
+    "OUTPUT_FORMAT": OUTPUT_FORMAT,
+    "MAX_PENDING_OUTPUTS": MAX_PENDING_OUTPUTS,
+    "RESULTS_STORE_FILE_NAME": RESULTS_STORE_FILE_NAME,
     "PRINT_STATISTICS": PRINT_STATISTICS,
     "SIMULATION_PRINTS_FILE_NAME": SIMULATION_PRINTS_FILE_NAME,
     "SAVE_PRINTS_TXT": SAVE_PRINTS_TXT,
@@ -354,6 +521,16 @@ SIMULATION_PARAMETERS: dict[str, Any] = {
     "AT_BOUNDARY": AT_BOUNDARY,
     "FT_BOUNDARY": FT_BOUNDARY,
     "BUSY_FRACTIONS_FILE_NAME": BUSY_FRACTIONS_FILE_NAME,
+    "DETECT_WARM_UP": DETECT_WARM_UP,
+    "WARM_UP_FILE_NAME": WARM_UP_FILE_NAME,
+    "BATCH_MEANS_CI": BATCH_MEANS_CI,
+    "NUM_BATCHES": NUM_BATCHES,
+    "BOOTSTRAP_CI": BOOTSTRAP_CI,
+    "NUM_BOOTSTRAP_RESAMPLES": NUM_BOOTSTRAP_RESAMPLES,
+    "BOOTSTRAP_PATIENTS": BOOTSTRAP_PATIENTS,
+    "BATCH_MEANS_FILE_NAME": BATCH_MEANS_FILE_NAME,
+    "PROFILE": PROFILE,
+    "PROFILE_FILE_NAME": PROFILE_FILE_NAME,
 }
 SIMULATION_DATA: dict[str, Any] = {
     "DATA_COLUMNS_PATIENT": DATA_COLUMNS_PATIENT,
@@ -382,105 +559,263 @@ if __name__ == "__main__":
     emp_quantile_response_times: np.ndarray = np.zeros((NUM_RUNS))
     busy_fractions: np.ndarray = np.zeros(NUM_RUNS)
     running_times: np.ndarray = np.zeros(NUM_RUNS)
+    input_statistics: np.ndarray = np.full(
+        (NUM_RUNS, len(CONTROL_VARIATE_COLUMNS)), np.nan
+    )
+    warm_up: dict[int, dict[str, float]] = {}
+    batch_means: dict[int, pd.DataFrame] = {}
+    patient_response_times: list[np.ndarray | None] = [None] * NUM_RUNS
+    output_writer = AsyncOutputWriter(
+        SIMULATION_PARAMETERS["MAX_PENDING_OUTPUTS"]
+    )
+    results_store = None
+    if SIMULATION_PARAMETERS["RESULTS_STORE_FILE_NAME"] is not None:
+        results_store = ResultsStore(
+            f"{SIMULATION_PARAMETERS['SIMULATION_OUTPUT_DIRECTORY']}"
+            f"{SIMULATION_PARAMETERS['RESULTS_STORE_FILE_NAME']}.sqlite"
+        )
+        configuration_key = results_store.add_configuration(
+            SIMULATION_PARAMETERS,
+            calculate_input_checksums(SIMULATION_PARAMETERS),
+        )
 
     for run_nr in range(NUM_RUNS):
         print(f"Run nr: {run_nr}.")
 
-        if not SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
+        if SIMULATION_PARAMETERS["ANTITHETIC"]:
+            SIMULATION_PARAMETERS["SEED_VALUE"] = (
+                SIMULATION_PARAMETERS["START_SEED_VALUE"] + run_nr // 2
+            )
+            SIMULATION_PARAMETERS["ANTITHETIC_RUN"] = run_nr % 2 == 1
+        elif not SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
             SIMULATION_PARAMETERS["SEED_VALUE"] = (
                 SIMULATION_PARAMETERS["START_SEED_VALUE"] + run_nr
             )
 
-        start_time_simulation_run = datetime.datetime.now()
-        run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-        end_time_simulation_run = datetime.datetime.now()
-        running_times[run_nr] = (
-            end_time_simulation_run - start_time_simulation_run
-        ).total_seconds()
-
-        # Create DataFrames of simulation output
-        start_time_df = datetime.datetime.now()
-        df_patient = pd.DataFrame(
-            SIMULATION_DATA["output_patient"],
-            columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-        )
-        df_patient = calculate_response_time_ecdf(df_patient)
-        df_ambulance = pd.DataFrame(
-            SIMULATION_DATA["output_ambulance"],
-            columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-        )
-        print(
-            "The running time for creating the dfs is: "
-            f"{datetime.datetime.now()-start_time_df}."
-        )
+        # All runs with historical input data are the same, so they are
+        # stored by run number. Both runs of an antithetic pair have the
+        # same seed, so they are stored by twice the seed plus the side.
+        if SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
+            seed = run_nr
+        elif SIMULATION_PARAMETERS["ANTITHETIC"]:
+            seed = 2 * SIMULATION_PARAMETERS["SEED_VALUE"] + run_nr % 2
+        else:
+            seed = SIMULATION_PARAMETERS["SEED_VALUE"]
+        # The post-processing of a stored run uses its stored patient
+        # output, so only the simulation and the output are skipped.
+        stored_results = None
+        if results_store is not None:
+            stored_results = results_store.get_replication(
+                configuration_key, seed
+            )
+        if results_store is not None and stored_results is not None:
+            print(f"Run nr {run_nr} is loaded from the results store.")
+            mean_response_times[run_nr] = stored_results["mean_response_time"]
+            emp_quantile_response_times[run_nr] = stored_results[
+                "emp_quantile_response_time"
+            ]
+            busy_fractions[run_nr] = stored_results["busy_fraction"]
+            running_times[run_nr] = stored_results["running_time"]
+            df_patient = results_store.get_patient_output(
+                configuration_key, seed
+            )
+            if df_patient is None:
+                print(
+                    f"The patient output of run nr {run_nr} is not stored, "
+                    "so the run is not post-processed."
+                )
+                continue
+        else:
+            start_time_simulation_run = datetime.datetime.now()
+            with (
+                profile_simulation()
+                if SIMULATION_PARAMETERS["PROFILE"]
+                else contextlib.nullcontext()
+            ) as profile:
+                run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
+            end_time_simulation_run = datetime.datetime.now()
+            running_times[run_nr] = (
+                end_time_simulation_run - start_time_simulation_run
+            ).total_seconds()
+            if run_nr == 0 and "MATRIX_PRECISION_REPORT" in SIMULATION_DATA:
+                print(
+                    "The errors of the matrices with reduced precision are: "
+                )
+                print(SIMULATION_DATA["MATRIX_PRECISION_REPORT"].to_string())
+            if profile is not None:
+                print(create_profile_report(profile).to_string())
+                print(f"The processed SimPy events are: {profile['events']}.")
+                if SIMULATION_PARAMETERS["SAVE_OUTPUT"]:
+                    save_profile(
+                        profile,
+                        f"{SIMULATION_PARAMETERS['SIMULATION_OUTPUT_DIRECTORY']}"
+                        f"{SIMULATION_PARAMETERS['PROFILE_FILE_NAME']}_run_"
+                        f"{run_nr}.json",
+                    )
 
-        # Plot simulation output
-        start_time_plots_stats = datetime.datetime.now()
-        if SIMULATION_PARAMETERS["PLOT_FIGURES"]:
-            plot_response_times(df_patient, run_nr, SIMULATION_PARAMETERS)
-            if SIMULATION_PARAMETERS["ENGINE_TYPE"] == "electric":
-                plot_battery_levels(
-                    df_ambulance, run_nr, SIMULATION_PARAMETERS
+            # Create DataFrames of simulation output
+            start_time_df = datetime.datetime.now()
+            df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
+            df_patient = calculate_response_time_ecdf(df_patient)
+            df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
+            if SIMULATION_PARAMETERS["TELEMETRY_INTERVAL"] is not None:
+                df_telemetry = pd.DataFrame(
+                    SIMULATION_DATA["output_telemetry"],
+                    columns=TELEMETRY_COLUMNS,
                 )
-                hist_battery_increase_decrease(
-                    df_ambulance, run_nr, SIMULATION_PARAMETERS
+            print(
+                "The running time for creating the dfs is: "
+                f"{datetime.datetime.now()-start_time_df}."
+            )
+
+            # Plot simulation output
+            start_time_plots_stats = datetime.datetime.now()
+            if SIMULATION_PARAMETERS["PLOT_FIGURES"]:
+                plot_response_times(df_patient, run_nr, SIMULATION_PARAMETERS)
+                if SIMULATION_PARAMETERS["ENGINE_TYPE"] == "electric":
+                    plot_battery_levels(
+                        df_ambulance, run_nr, SIMULATION_PARAMETERS
+                    )
+                    hist_battery_increase_decrease(
+                        df_ambulance, run_nr, SIMULATION_PARAMETERS
+                    )
+            if SIMULATION_PARAMETERS["PRINT_STATISTICS"]:
+                simulation_statistics(
+                    df_patient,
+                    df_ambulance,
+                    start_time_simulation_run,
+                    end_time_simulation_run,
+                    SIMULATION_DATA["nr_times_no_fast_no_regular_available"],
+                    SIMULATION_PARAMETERS,
                 )
-        if SIMULATION_PARAMETERS["PRINT_STATISTICS"]:
-            simulation_statistics(
-                df_patient,
-                df_ambulance,
-                start_time_simulation_run,
-                end_time_simulation_run,
-                SIMULATION_DATA["nr_times_no_fast_no_regular_available"],
-                SIMULATION_PARAMETERS,
+            print(
+                "The running time for creating the plots and printing the "
+                "simulation stats is: "
+                f"{datetime.datetime.now()-start_time_plots_stats}."
             )
-        print(
-            "The running time for creating the plots and printing the "
-            "simulation stats is: "
-            f"{datetime.datetime.now()-start_time_plots_stats}."
-        )
 
-        # Save simulation output
-        if SIMULATION_PARAMETERS["SAVE_DFS"]:
-            start_time_saving = datetime.datetime.now()
-            save_simulation_output(
-                SIMULATION_PARAMETERS["SIMULATION_OUTPUT_DIRECTORY"],
-                SIMULATION_PARAMETERS["SIMULATION_PATIENT_OUTPUT_FILE_NAME"],
-                df_patient,
-                run_nr,
+            # Save simulation output
+            if SIMULATION_PARAMETERS["SAVE_DFS"]:
+                start_time_saving = datetime.datetime.now()
+                save_output = (
+                    save_columnar_output
+                    if SIMULATION_PARAMETERS["OUTPUT_FORMAT"] == "npz"
+                    else save_simulation_output
+                )
+                output_writer.submit(
+                    save_output,
+                    SIMULATION_PARAMETERS["SIMULATION_OUTPUT_DIRECTORY"],
+                    SIMULATION_PARAMETERS[
+                        "SIMULATION_PATIENT_OUTPUT_FILE_NAME"
+                    ],
+                    df_patient,
+                    run_nr,
+                )
+                output_writer.submit(
+                    save_output,
+                    SIMULATION_PARAMETERS["SIMULATION_OUTPUT_DIRECTORY"],
+                    SIMULATION_PARAMETERS[
+                        "SIMULATION_AMBULANCE_OUTPUT_FILE_NAME"
+                    ],
+                    df_ambulance,
+                    run_nr,
+                )
+                if SIMULATION_PARAMETERS["TELEMETRY_INTERVAL"] is not None:
+                    output_writer.submit(
+                        save_output,
+                        SIMULATION_PARAMETERS["SIMULATION_OUTPUT_DIRECTORY"],
+                        SIMULATION_PARAMETERS[
+                            "SIMULATION_TELEMETRY_OUTPUT_FILE_NAME"
+                        ],
+                        df_telemetry,
+                        run_nr,
+                    )
+                print(
+                    "The running time for submitting the data for saving is: "
+                    f"{datetime.datetime.now()-start_time_saving}."
+                )
+
+            mean_response_times[run_nr] = np.mean(df_patient["response_time"])
+            emp_quantile_response_times[run_nr] = np.min(
+                df_patient.loc[df_patient["ecdf_rt"] >= 0.95]["response_time"]
+            )
+            busy_fractions[run_nr] = calculate_busy_fraction(
+                df_patient, SIMULATION_PARAMETERS
             )
-            save_simulation_output(
-                SIMULATION_PARAMETERS["SIMULATION_OUTPUT_DIRECTORY"],
-                SIMULATION_PARAMETERS["SIMULATION_AMBULANCE_OUTPUT_FILE_NAME"],
-                df_ambulance,
-                run_nr,
+        if SIMULATION_PARAMETERS["BOOTSTRAP_PATIENTS"]:
+            patient_response_times[run_nr] = df_patient[
+                "response_time"
+            ].to_numpy(copy=True)
+        if SIMULATION_PARAMETERS["CONTROL_VARIATES"]:
+            input_statistics[run_nr] = calculate_input_statistics(
+                df_patient, SIMULATION_PARAMETERS
             )
+        if SIMULATION_PARAMETERS["DETECT_WARM_UP"]:
+            warm_up[run_nr] = detect_warm_up(df_patient, SIMULATION_PARAMETERS)
             print(
-                "The running time for saving the data is: "
-                f"{datetime.datetime.now()-start_time_saving}."
+                f"The warm-up detection of the run gives: {warm_up[run_nr]}."
+            )
+        if SIMULATION_PARAMETERS["BATCH_MEANS_CI"] is not None:
+            batch_means[run_nr] = calculate_single_run_cis(
+                df_patient,
+                SIMULATION_PARAMETERS,
+                SIMULATION_PARAMETERS["NUM_BATCHES"],
+                SIMULATION_PARAMETERS["BATCH_MEANS_CI"]
+                == "overlapping_batch_means",
+            )
+            print("The 95% batch means CIs of the run are:")
+            print(batch_means[run_nr].to_string())
+        if results_store is not None and stored_results is None:
+            results_store.add_replication(
+                configuration_key,
+                seed,
+                {
+                    "mean_response_time": mean_response_times[run_nr],
+                    "emp_quantile_response_time": emp_quantile_response_times[
+                        run_nr
+                    ],
+                    "busy_fraction": busy_fractions[run_nr],
+                    "running_time": running_times[run_nr],
+                },
+                df_patient,
             )
 
-        mean_response_times[run_nr] = np.mean(df_patient["response_time"])
-        emp_quantile_response_times[run_nr] = np.min(
-            df_patient.loc[df_patient["ecdf_rt"] >= 0.95]["response_time"]
-        )
-        busy_fractions[run_nr] = calculate_busy_fraction(
-            df_patient, SIMULATION_PARAMETERS
-        )
+    # Wait until all dataframes are saved and raise saving errors, if any.
+    output_writer.close()
+    if results_store is not None:
+        results_store.close()
 
     m_mean_response_times = np.mean(mean_response_times)
     m_emp_quantile_response_times = np.mean(emp_quantile_response_times)
     m_busy_fractions = np.mean(busy_fractions)
 
+    # The runs of an antithetic pair are dependent, so the confidence
+    # intervals are based on the means of the independent pairs.
+    nr_replications = (
+        NUM_RUNS // 2 if SIMULATION_PARAMETERS["ANTITHETIC"] else NUM_RUNS
+    )
+    replication_results = {
+        "mean_response_time": mean_response_times,
+        "emp_quantile_response_time": emp_quantile_response_times,
+        "busy_fraction": busy_fractions,
+    }
+    for statistic, results in replication_results.items():
+        replication_results[statistic] = results.reshape(
+            nr_replications, -1
+        ).mean(axis=1)
+
     print("\nAll runs finished")
     print(
         "The mean mean response time over "
         f"all runs is: {m_mean_response_times}."
     )
-    if NUM_RUNS > 1:
+    if nr_replications > 1:
         CI_error_m_mean_response_times = scipy.stats.t.ppf(
-            0.975, NUM_RUNS - 1
-        ) * (np.std(mean_response_times, ddof=1) / np.sqrt(NUM_RUNS))
+            0.975, nr_replications - 1
+        ) * (
+            np.std(replication_results["mean_response_time"], ddof=1)
+            / np.sqrt(nr_replications)
+        )
         print(
             "The 95% CI of the mean mean response time is:"
             f"({m_mean_response_times-CI_error_m_mean_response_times},"
@@ -491,10 +826,13 @@ if __name__ == "__main__":
         "The mean 95% empirical quantile of the response time over "
         f"all runs is: {m_emp_quantile_response_times}."
     )
-    if NUM_RUNS > 1:
+    if nr_replications > 1:
         CI_error_m_emp_quantile_response_times = scipy.stats.t.ppf(
-            0.975, NUM_RUNS - 1
-        ) * (np.std(emp_quantile_response_times, ddof=1) / np.sqrt(NUM_RUNS))
+            0.975, nr_replications - 1
+        ) * (
+            np.std(replication_results["emp_quantile_response_time"], ddof=1)
+            / np.sqrt(nr_replications)
+        )
         print(
             "The 95% CI of the mean 95% empirical quantile of the response time is:"
             f"({m_emp_quantile_response_times-CI_error_m_emp_quantile_response_times},"
@@ -502,9 +840,12 @@ if __name__ == "__main__":
         )
 
     print(f"The mean busy fraction over all runs is: {m_busy_fractions}.")
-    if NUM_RUNS > 1:
-        CI_error_m_busy_fractions = scipy.stats.t.ppf(0.975, NUM_RUNS - 1) * (
-            np.std(busy_fractions, ddof=1) / np.sqrt(NUM_RUNS)
+    if nr_replications > 1:
+        CI_error_m_busy_fractions = scipy.stats.t.ppf(
+            0.975, nr_replications - 1
+        ) * (
+            np.std(replication_results["busy_fraction"], ddof=1)
+            / np.sqrt(nr_replications)
         )
         print(
             "The 95% CI of the mean busy fraction is:"
@@ -512,7 +853,81 @@ if __name__ == "__main__":
             f"{m_busy_fractions+CI_error_m_busy_fractions})."
         )
 
+    if (
+        SIMULATION_PARAMETERS["BOOTSTRAP_CI"] is not None
+        and nr_replications > 1
+    ):
+        response_times: list[np.ndarray] | None = None
+        if SIMULATION_PARAMETERS["BOOTSTRAP_PATIENTS"]:
+            if any(times is None for times in patient_response_times):
+                print(
+                    "The patients are not resampled, as the runs that are "
+                    "loaded from the results store have no response times."
+                )
+            else:
+                response_times = [
+                    times
+                    for times in patient_response_times
+                    if times is not None
+                ]
+        print(
+            f"The 95% {SIMULATION_PARAMETERS['BOOTSTRAP_CI']} bootstrap CIs "
+            "over all runs are:"
+        )
+        print(
+            calculate_bootstrap_cis(
+                replication_results,
+                SIMULATION_PARAMETERS["NUM_BOOTSTRAP_RESAMPLES"],
+                SIMULATION_PARAMETERS["BOOTSTRAP_CI"],
+                response_times=response_times,
+                SEED=SIMULATION_PARAMETERS["START_SEED_VALUE"],
+            ).to_string()
+        )
+
+    if SIMULATION_PARAMETERS["CONTROL_VARIATES"]:
+        if np.isnan(input_statistics).any():
+            print(
+                "The control variates are not calculated, as the runs that "
+                "are loaded from the results store have no input statistics."
+            )
+        else:
+            controls = input_statistics.reshape(
+                nr_replications, -1, len(CONTROL_VARIATE_COLUMNS)
+            ).mean(axis=1)
+            control_means = calculate_input_means(SIMULATION_PARAMETERS)
+            for statistic, results in replication_results.items():
+                estimate, lower, upper = calculate_control_variate_ci(
+                    results, controls, control_means
+                )
+                print(
+                    f"The control variate estimate of the {statistic} is "
+                    f"{estimate} with 95% CI: ({lower},{upper})."
+                )
+
+    if warm_up:
+        df_warm_up = pd.DataFrame.from_dict(warm_up, orient="index")
+        print(
+            "The mean suggested truncation points and truncated estimators "
+            "over all runs are:"
+        )
+        print(df_warm_up.mean().to_string())
+        print(
+            "The largest suggested AT_BOUNDARY over all runs is: "
+            f"{df_warm_up['busy_fraction_truncation_time'].max()}."
+        )
+
     if SIMULATION_PARAMETERS["SAVE_OUTPUT"]:
+        if batch_means:
+            pd.concat(batch_means, names=["run_nr", "statistic"]).to_csv(
+                f"{SIMULATION_PARAMETERS['SIMULATION_OUTPUT_DIRECTORY']}"
+                f"{SIMULATION_PARAMETERS['BATCH_MEANS_FILE_NAME']}.csv"
+            )
+        if warm_up:
+            df_warm_up.to_csv(
+                f"{SIMULATION_PARAMETERS['SIMULATION_OUTPUT_DIRECTORY']}"
+                f"{SIMULATION_PARAMETERS['WARM_UP_FILE_NAME']}.csv",
+                index_label="run_nr",
+            )
         pd.DataFrame(mean_response_times).to_csv(
             f"{SIMULATION_PARAMETERS['SIMULATION_OUTPUT_DIRECTORY']}"
             f"{SIMULATION_PARAMETERS['MEAN_RESPONSE_TIMES_FILE_NAME']}.csv"
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the reduced-precision storage of the region matrices.
+
+The ``SIREN_DRIVING_MATRIX`` and ``DISTANCE_MATRIX`` are stored as float64 by
+default. With ``MATRIX_PRECISION="float32"`` they are stored as float32
+DataFrames, which halves their memory. With ``MATRIX_PRECISION="uint16"``
+they are stored as a ``QuantizedMatrix``, which quarters their memory. The
+values are then stored as integer multiples of a power of two, such that the
+dequantization on read is exact and the error of a value is at most half of
+this scale. A ``QuantizedMatrix`` supports the ``.loc`` lookups that the
+simulator uses on the dense matrices and returns float64 values.
+"""
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+MATRIX_PRECISIONS: list[str] = ["float64", "float32", "uint16"]
+
+
+class QuantizedMatrix:
+    """
+    A class to represent a matrix that is stored as 16-bit unsigned integers.
+
+    Attributes
+    ----------
+    codes : np.ndarray
+        The quantized values. The value of a code is ``code * scale``, except
+        for the largest code, which represents ``np.inf``.
+    scale : float
+        The scale of the codes, which is a power of two.
+    index : pd.Index
+        The row labels.
+    columns : pd.Index
+        The column labels.
+    row_positions : dict[Any, int]
+        The position of each row label.
+    column_positions : dict[Any, int]
+        The position of each column label.
+    loc : QuantizedMatrixIndexer
+        The label-based lookup, e.g., ``matrix.loc[source, target]``.
+
+    """
+
+    INF_CODE: int = np.iinfo(np.uint16).max
+
+    def __init__(self, matrix: pd.DataFrame) -> None:
+        """
+        Quantizes a matrix.
+
+        Parameters
+        ----------
+        matrix : pd.DataFrame
+            The matrix. All values should be non-negative or ``np.inf``.
+
+        Raises
+        ------
+        Exception
+            If the matrix contains negative or NaN values.
+
+        """
+
+        values = matrix.to_numpy(dtype=float)
+        if np.isnan(values).any() or (values < 0).any():
+            raise Exception(
+                "A matrix can only be quantized if all its values are larger "
+                "or equal to 0."
+            )
+        finite = np.isfinite(values)
+        max_value = values[finite].max(initial=0)
+        # The smallest power of two for which the largest value fits in the
+        # codes that are not reserved for np.inf.
+        self.scale: float = 2.0 ** np.ceil(
+            np.log2(max(max_value, np.finfo(float).tiny) / (self.INF_CODE - 1))
+        )
+        self.codes: np.ndarray = np.full(
+            values.shape, self.INF_CODE, dtype=np.uint16
+        )
+        self.codes[finite] = np.rint(values[finite] / self.scale)
+        self.index: pd.Index = matrix.index
+        self.columns: pd.Index = matrix.columns
+        self.row_positions: dict[Any, int] = {
+            label: position for position, label in enumerate(self.index)
+        }
+        self.column_positions: dict[Any, int] = {
+            label: position for position, label in enumerate(self.columns)
+        }
+        self.loc: QuantizedMatrixIndexer = QuantizedMatrixIndexer(self)
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, QuantizedMatrix)
+            and self.scale == other.scale
+            and self.index.equals(other.index)
+            and self.columns.equals(other.columns)
+            and np.array_equal(self.codes, other.codes)
+        )
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """
+        The number of rows and columns.
+
+        """
+        return (self.codes.shape[0], self.codes.shape[1])
+
+    def dequantize(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Converts codes to their float64 values.
+
+        Parameters
+        ----------
+        codes : np.ndarray
+            The codes.
+
+        Returns
+        -------
+        np.ndarray
+            The values.
+
+        """
+        return np.where(
+            codes == self.INF_CODE, np.inf, codes.astype(float) * self.scale
+        )
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Converts the matrix to a float64 DataFrame.
+
+        Returns
+        -------
+        pd.DataFrame
+            The dequantized matrix.
+
+        """
+        return pd.DataFrame(
+            self.dequantize(self.codes), index=self.index, columns=self.columns
+        )
+
+
+class QuantizedMatrixIndexer:
+    """
+    A class for the ``.loc`` lookups of a ``QuantizedMatrix``.
+
+    Like ``DataFrame.loc``, a pair of scalars returns a float, a scalar and a
+    list-like return a ``Series`` and two list-likes return a ``DataFrame``.
+
+    Attributes
+    ----------
+    matrix : QuantizedMatrix
+        The matrix.
+
+    """
+
+    def __init__(self, matrix: QuantizedMatrix) -> None:
+        """
+        Initializes the indexer.
+
+        Parameters
+        ----------
+        matrix : QuantizedMatrix
+            The matrix.
+
+        """
+        self.matrix: QuantizedMatrix = matrix
+
+    def __getitem__(self, key: tuple[Any, Any]) -> Any:
+        """
+        Looks up the values of row and column labels.
+
+        Parameters
+        ----------
+        key : tuple[Any, Any]
+            The row label(s) and the column label(s).
+
+        Returns
+        -------
+        float | pd.Series | pd.DataFrame
+            The value(s), see the class description.
+
+        """
+
+        row_key, column_key = key
+        matrix = self.matrix
+        if np.ndim(row_key) == 0 and np.ndim(column_key) == 0:
+            return float(
+                matrix.dequantize(
+                    matrix.codes[
+                        matrix.row_positions[row_key],
+                        matrix.column_positions[column_key],
+                    ]
+                )
+            )
+
+        rows = [row_key] if np.ndim(row_key) == 0 else list(row_key)
+        columns = (
+            [column_key] if np.ndim(column_key) == 0 else list(column_key)
+        )
+        values = matrix.dequantize(
+            matrix.codes[
+                np.ix_(
+                    [matrix.row_positions[row] for row in rows],
+                    [matrix.column_positions[column] for column in columns],
+                )
+            ]
+        )
+
+        if np.ndim(row_key) == 0:
+            return pd.Series(values[0], index=columns, name=row_key)
+        if np.ndim(column_key) == 0:
+            return pd.Series(values[:, 0], index=rows, name=column_key)
+        return pd.DataFrame(values, index=rows, columns=columns)
+
+
+def reduce_matrix_precision(
+    matrix: pd.DataFrame, MATRIX_PRECISION: str
+) -> pd.DataFrame | QuantizedMatrix:
+    """
+    Stores a matrix with the given precision.
+
+    Parameters
+    ----------
+    matrix : pd.DataFrame
+        The float64 matrix.
+    MATRIX_PRECISION : str
+        The precision. Either "float64", "float32" or "uint16".
+
+    Raises
+    ------
+    Exception
+        If the precision is unknown.
+
+    Returns
+    -------
+    pd.DataFrame | QuantizedMatrix
+        The matrix with the given precision.
+
+    """
+
+    if MATRIX_PRECISION == "float64":
+        return matrix
+    elif MATRIX_PRECISION == "float32":
+        return matrix.astype(np.float32)
+    elif MATRIX_PRECISION == "uint16":
+        return QuantizedMatrix(matrix)
+    else:
+        raise Exception(
+            f"MATRIX_PRECISION should be one of {MATRIX_PRECISIONS}, but is "
+            f"{MATRIX_PRECISION}."
+        )
+
+
+def calculate_matrix_memory(matrix: pd.DataFrame | QuantizedMatrix) -> float:
+    """
+    Calculates the memory of the values of a matrix.
+
+    Parameters
+    ----------
+    matrix : pd.DataFrame | QuantizedMatrix
+        The matrix.
+
+    Returns
+    -------
+    float
+        The memory in MB.
+
+    """
+
+    if isinstance(matrix, QuantizedMatrix):
+        return matrix.codes.nbytes / 1e6
+    return matrix.to_numpy().nbytes / 1e6
+
+
+def create_precision_report(
+    matrices: dict[str, tuple[pd.DataFrame, pd.DataFrame | QuantizedMatrix]]
+) -> pd.DataFrame:
+    """
+    Compares the matrices with reduced precision with their source.
+
+    Parameters
+    ----------
+    matrices : dict[str, tuple[pd.DataFrame, pd.DataFrame | QuantizedMatrix]]
+        The source matrix and the matrix with reduced precision per name.
+
+    Returns
+    -------
+    pd.DataFrame
+        The maximum absolute error ("max_absolute_error"), the maximum
+        relative error of the non-zero values ("max_relative_error") and the
+        memory in MB before ("memory_source") and after ("memory_stored")
+        the reduction per matrix.
+
+    """
+
+    report = {}
+    for name, (source, stored) in matrices.items():
+        source_values = source.to_numpy(dtype=float)
+        if isinstance(stored, QuantizedMatrix):
+            stored_values = stored.dequantize(stored.codes)
+        else:
+            stored_values = stored.to_numpy(dtype=float)
+
+        finite = np.isfinite(source_values)
+        errors = np.abs(stored_values[finite] - source_values[finite])
+        non_zero = source_values[finite] != 0
+        report[name] = {
+            "max_absolute_error": errors.max(initial=0),
+            "max_relative_error": (
+                errors[non_zero] / source_values[finite][non_zero]
+            ).max(initial=0),
+            "memory_source": calculate_matrix_memory(source),
+            "memory_stored": calculate_matrix_memory(stored),
+        }
+    return pd.DataFrame.from_dict(report, orient="index")
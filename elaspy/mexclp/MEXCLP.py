@@ -51,12 +51,157 @@ ROOT_DIRECTORY: str = os.path.dirname(
 DATA_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "data/")
 OUTPUT_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "results/")
 
-NODES_FILE: str = "Nodes_Utrecht_2021.csv"
+NODES_FILE: str = "nodes_Utrecht_2021.csv"
 BASE_LOCATIONS_FILE: str = "RAVU_base_locations_Utrecht_2021.csv"
 TRAVEL_TIMES_FILE: str = "siren_driving_matrix_2022.csv"
 RESULTS_FILE: str = f"MEXCLP_{TIME_THRESHOLD}mins_{NUM_AMBULANCES}ambusUtrecht"
 
 SOLVER_NAME: str = "PULP_CBC_CMD"
+##################################Functions####################################
+
+
+def calculate_coverage_matrix(
+    travel_times: np.ndarray, base_indices: np.ndarray, TIME_THRESHOLD: float
+) -> np.ndarray:
+    """
+    Calculates which bases cover which demand nodes.
+
+    Parameters
+    ----------
+    travel_times : np.ndarray
+        The travel times in minutes between all nodes. Entry ``(i, j)`` is
+        used as the travel time between demand node ``i`` and base ``j``.
+        The rows and columns should follow the same node order.
+    base_indices : np.ndarray
+        The node indices of the bases.
+    TIME_THRESHOLD : float
+        The threshold for the driving time in minutes.
+
+    Returns
+    -------
+    np.ndarray
+        A boolean matrix of shape (number of nodes, number of bases) where
+        entry ``(i, b)`` is ``True`` if node ``i`` can be reached from base
+        ``b`` within ``TIME_THRESHOLD`` minutes.
+
+    """
+
+    return travel_times[:, base_indices] <= TIME_THRESHOLD
+
+
+def build_mexclp_model(
+    coverage_matrix: np.ndarray,
+    inhabitants: np.ndarray,
+    base_indices: np.ndarray,
+    q: float,
+    NUM_AMBULANCES: int,
+) -> tuple[pulp.LpProblem, dict, dict]:
+    """
+    Builds the MEXCLP model.
+
+    The coverage constraint of each demand node only contains the bases that
+    cover the node, which are obtained from the nonzero entries of the
+    coverage matrix.
+
+    Parameters
+    ----------
+    coverage_matrix : np.ndarray
+        The boolean coverage matrix, see ``calculate_coverage_matrix``.
+    inhabitants : np.ndarray
+        The fraction of inhabitants per demand node.
+    base_indices : np.ndarray
+        The node indices of the bases. The columns of ``coverage_matrix``
+        should follow this order.
+    q : float
+        The busy fraction.
+    NUM_AMBULANCES : int
+        The number of ambulances that should be assigned to bases.
+
+    Returns
+    -------
+    mip : pulp.LpProblem
+        The MEXCLP model. The constraint on the number of ambulances is named
+        "fleet_size".
+    x : dict
+        The number of ambulances per base, indexed by node index.
+    y : dict
+        ``y[i][k]`` is 1 if node ``i`` is within reach of at least ``k``
+        ambulances.
+
+    """
+
+    NUM_LOCATIONS = coverage_matrix.shape[0]
+    base_locations = [int(b) for b in base_indices]
+    levels = range(1, NUM_AMBULANCES + 1)
+
+    mip = pulp.LpProblem("MEXCLP", pulp.LpMaximize)
+    x = pulp.LpVariable.dicts(
+        "x", (base_locations), lowBound=0, cat=pulp.LpInteger
+    )  # nof ambus at base
+    y = pulp.LpVariable.dicts(
+        "y", (range(NUM_LOCATIONS), levels), cat=pulp.LpBinary
+    )  # y_ik = 1 if i is within reach of at least k vehicles
+
+    coverage_probabilities = (1 - q) * q ** np.arange(NUM_AMBULANCES)
+    objective_coefficients = np.outer(inhabitants, coverage_probabilities)
+    mip += (
+        pulp.LpAffineExpression(
+            (y[i][k], objective_coefficients[i, k - 1])
+            for i in range(NUM_LOCATIONS)
+            for k in levels
+        ),
+        "coverage",
+    )
+
+    covering_bases = np.split(
+        np.nonzero(coverage_matrix)[1],
+        np.cumsum(coverage_matrix.sum(axis=1))[:-1],
+    )
+    for i in range(NUM_LOCATIONS):
+        mip += pulp.LpAffineExpression(
+            (x[base_locations[b]], 1) for b in covering_bases[i]
+        ) >= pulp.LpAffineExpression((y[i][k], 1) for k in levels)
+
+    mip += (
+        pulp.LpAffineExpression((x[b], 1) for b in base_locations)
+        <= NUM_AMBULANCES,
+        "fleet_size",
+    )
+
+    return mip, x, y
+
+
+def create_ambulance_base_locations(
+    ambulances_per_base: dict[int, int]
+) -> pd.DataFrame:
+    """
+    Assigns the ambulances to the bases.
+
+    Parameters
+    ----------
+    ambulances_per_base : dict[int, int]
+        The number of ambulances per base postal code.
+
+    Returns
+    -------
+    pd.DataFrame
+        The assignment of ambulances to bases in the format of the
+        ``AMBULANCE_BASE_LOCATIONS_FILE``, with index "Ambulance" and column
+        "Base".
+
+    """
+
+    bases = [
+        postal_code
+        for postal_code, number_of_ambulances in ambulances_per_base.items()
+        for _ in range(int(round(number_of_ambulances)))
+    ]
+
+    return pd.DataFrame(
+        {"Base": bases}, index=pd.RangeIndex(len(bases), name="Ambulance")
+    )
+
+
 ###################################LP##########################################
 if __name__ == "__main__":
     regionAllDemandNodes = pd.read_csv(f"{DATA_DIRECTORY}{NODES_FILE}")
@@ -66,26 +211,23 @@ if __name__ == "__main__":
     # bases = range(n_locations) use this if you want every postal code to be a potential base
     regionBasePCs = pd.read_csv(f"{DATA_DIRECTORY}{BASE_LOCATIONS_FILE}")
     BasesPcs = np.array(regionBasePCs.loc[:, "Base Locations"]).astype("int")
-    BaseIndices = []
-    for i in range(NUM_LOCATIONS):
-        if AllPCs[i] in BasesPcs:
-            BaseIndices.append(i)
-    print("The bases are located at location indices", BaseIndices)
+    BaseIndices = np.flatnonzero(np.isin(AllPCs, BasesPcs))
+    print("The bases are located at location indices", list(BaseIndices))
 
     DrivingTimes = pd.read_csv(
         f"{DATA_DIRECTORY}{TRAVEL_TIMES_FILE}", index_col=0
     )
     DrivingTimes.columns = DrivingTimes.columns.astype(int)
-    # you can now access a driving time by e.g. DrivingTimes.loc[1391,3433]
-    PCsInDrivingTimeFile = DrivingTimes.columns.values.astype("int")
     # check files are ordering the postal codes in the same way:
-    for i in range(NUM_LOCATIONS):
-        if AllPCs[i] != PCsInDrivingTimeFile[i]:
-            print(PCsInDrivingTimeFile)
-            raise Exception(
-                "error: data files are not ordering the "
-                "postal codes in the same way"
-            )
+    if not (
+        np.array_equal(AllPCs, DrivingTimes.columns.values.astype("int"))
+        and np.array_equal(AllPCs, DrivingTimes.index.values.astype("int"))
+    ):
+        print(DrivingTimes.columns.values)
+        raise Exception(
+            "error: data files are not ordering the "
+            "postal codes in the same way"
+        )
 
     print(
         "OK: your data files are ordering the postal codes in the same way;"
@@ -98,41 +240,16 @@ if __name__ == "__main__":
     if sum(inhab) < 0.9999999:
         print("Warning, sum of inhabitants is not 1 but ", sum(inhab))
 
-    # Creates the 'mip' element to contain the problem data
-    mip = pulp.LpProblem("MEXCLP", pulp.LpMaximize)
-    x = pulp.LpVariable.dicts(
-        "x", (BaseIndices), cat=pulp.LpInteger
-    )  # nof ambus at base
-
-    y = pulp.LpVariable.dicts(
-        "y",
-        (range(NUM_LOCATIONS), range(1, NUM_AMBULANCES + 1)),
-        cat=pulp.LpBinary,
-    )  # y_ik = 1 if i is within reach of at least k vehicles
-
-    # The objective function is added to the mip first
-    mip += (
-        pulp.lpSum(
-            [
-                inhab[i] * (1 - q) * q ** (k - 1) * y[i][k]
-                for i in range(NUM_LOCATIONS)
-                for k in range(1, NUM_AMBULANCES + 1)
-            ]
-        ),
-        "coverage",
+    coverage_matrix = calculate_coverage_matrix(
+        DrivingTimes.to_numpy(), BaseIndices, TIME_THRESHOLD
+    )
+    mip, x, y = build_mexclp_model(
+        coverage_matrix,
+        inhab.to_numpy(),
+        BaseIndices,
+        q,
+        NUM_AMBULANCES,
     )
-
-    for i in range(NUM_LOCATIONS):
-        mip += pulp.lpSum(
-            x[j]
-            for j in BaseIndices
-            if DrivingTimes.loc[AllPCs[i], AllPCs[j]] <= TIME_THRESHOLD
-        ) >= pulp.lpSum(y[i][k] for k in range(1, NUM_AMBULANCES + 1))
-
-    mip += pulp.lpSum(x[j] for j in BaseIndices) <= NUM_AMBULANCES
-
-    for b in BaseIndices:
-        mip += x[b] >= 0
 
     # The problem data is written to an .lp file
     mip.writeLP(f"{OUTPUT_DIRECTORY}{RESULTS_FILE}.lp")
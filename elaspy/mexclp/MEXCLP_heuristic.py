@@ -0,0 +1,322 @@
+"""
+This script assigns ambulances to bases with a heuristic for MEXCLP.
+
+The expected coverage of MEXCLP is equal to the sum over the demand nodes of
+``inhabitants * (1 - q^n)``, with ``n`` the number of ambulances that can
+reach the node within ``TIME_THRESHOLD`` minutes. The heuristic first places
+the ambulances one by one at the base with the largest marginal coverage
+(greedy) and then moves single ambulances to other bases as long as this
+improves the expected coverage (swap-based local search). Optionally, the
+linear programming (LP) relaxation of MEXCLP is solved to report an upper
+bound on the optimality gap. Below, all parameters are discussed.
+
+Parameters
+----------
+q : float
+    Input parameter called the busy fraction. Can be interpreted as the
+    probability that any ambulance is busy at any time.
+NUM_AMBULANCES : int
+    The number of ambulances that should be assigned to bases.
+TIME_THRESHOLD : float
+    Represents the threshold for the driving time in minutes.
+ALL_NODES_AS_BASES : bool
+    Whether every node is a potential base. If ``False``, only the nodes in
+    the ``BASE_LOCATIONS_FILE`` are potential bases.
+COMPUTE_LP_BOUND : bool
+    Whether the LP relaxation should be solved to report the optimality gap.
+DATA_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the input data is located.
+OUTPUT_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the output files should be saved.
+NODES_FILE : str
+    The name of the file that contains the data with the nodes of the region.
+BASE_LOCATIONS_FILE : str
+    The name of the file that contains the nodes where bases are located.
+TRAVEL_TIMES_FILE : str
+    The name of the file that contains the data with the siren travel times
+    between nodes.
+RESULTS_FILE : str
+    The name of the csv output file with the assignment of the ambulances to
+    the bases.
+SOLVER_NAME: str
+    The name of the solver that should be used for the LP relaxation.
+    Examples are "GUROBI_CMD" and "PULP_CBC_CMD".
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+import scipy
+import pulp
+
+from MEXCLP import (
+    calculate_coverage_matrix,
+    build_mexclp_model,
+    create_ambulance_base_locations,
+)
+
+####################################Input######################################
+q: float = 0.6  # busy fraction
+NUM_AMBULANCES: int = 19  # input
+TIME_THRESHOLD: float = 12  # input in minutes
+ALL_NODES_AS_BASES: bool = False
+COMPUTE_LP_BOUND: bool = True
+
+ROOT_DIRECTORY: str = os.path.dirname(
+    os.path.dirname(os.path.dirname(__file__))
+)
+DATA_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "data/")
+OUTPUT_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "results/")
+
+NODES_FILE: str = "nodes_Utrecht_2021.csv"
+BASE_LOCATIONS_FILE: str = "RAVU_base_locations_Utrecht_2021.csv"
+TRAVEL_TIMES_FILE: str = "siren_driving_matrix_2022.csv"
+RESULTS_FILE: str = (
+    f"Base_Locations_Ambulances_MEXCLP_heuristic_{TIME_THRESHOLD}mins_"
+    f"{NUM_AMBULANCES}"
+)
+
+SOLVER_NAME: str = "PULP_CBC_CMD"
+##################################Functions####################################
+
+
+def calculate_expected_coverage(
+    coverage_matrix: np.ndarray | scipy.sparse.spmatrix,
+    inhabitants: np.ndarray,
+    ambulances_per_base: np.ndarray,
+    q: float,
+) -> float:
+    """
+    Calculates the expected coverage of an assignment of ambulances.
+
+    Parameters
+    ----------
+    coverage_matrix : np.ndarray | scipy.sparse.spmatrix
+        The boolean coverage matrix, see ``calculate_coverage_matrix``.
+    inhabitants : np.ndarray
+        The fraction of inhabitants per demand node.
+    ambulances_per_base : np.ndarray
+        The number of ambulances per base, in the order of the columns of
+        ``coverage_matrix``.
+    q : float
+        The busy fraction.
+
+    Returns
+    -------
+    float
+        The expected coverage.
+
+    """
+
+    covering_ambulances = (
+        scipy.sparse.csc_matrix(coverage_matrix) @ ambulances_per_base
+    )
+    return float(inhabitants @ (1 - q**covering_ambulances))
+
+
+def solve_mexclp_heuristic(
+    coverage_matrix: np.ndarray | scipy.sparse.spmatrix,
+    inhabitants: np.ndarray,
+    q: float,
+    NUM_AMBULANCES: int,
+) -> np.ndarray:
+    """
+    Assigns ambulances to bases with greedy placement followed by swap-based
+    local search.
+
+    In the local search, the move of one ambulance from one base to another
+    that improves the expected coverage the most is performed, until no move
+    improves the expected coverage. The coverage matrix is stored as a sparse
+    matrix, so the memory and the time of the marginal coverages are
+    proportional to the number of covered node-base pairs.
+
+    Parameters
+    ----------
+    coverage_matrix : np.ndarray | scipy.sparse.spmatrix
+        The boolean coverage matrix, see ``calculate_coverage_matrix``.
+    inhabitants : np.ndarray
+        The fraction of inhabitants per demand node.
+    q : float
+        The busy fraction.
+    NUM_AMBULANCES : int
+        The number of ambulances that should be assigned to bases.
+
+    Returns
+    -------
+    np.ndarray
+        The number of ambulances per base, in the order of the columns of
+        ``coverage_matrix``.
+
+    """
+
+    coverage = scipy.sparse.csc_matrix(coverage_matrix, dtype=bool)
+    # The nodes that are covered by each base.
+    covered_nodes = np.split(coverage.indices, coverage.indptr[1:-1])
+    ambulances_per_base = np.zeros(coverage.shape[1], dtype=int)
+    covering_ambulances = np.zeros(coverage.shape[0], dtype=int)
+
+    # The coverage of node i increases by inhabitants_i*(1-q)*q^n_i if an
+    # ambulance is added that covers i.
+    for _ in range(NUM_AMBULANCES):
+        marginal_coverage = coverage.T @ (
+            inhabitants * q**covering_ambulances
+        )
+        best_base = int(np.argmax(marginal_coverage))
+        ambulances_per_base[best_base] += 1
+        covering_ambulances[covered_nodes[best_base]] += 1
+
+    expected_coverage = inhabitants @ (1 - q**covering_ambulances)
+    while True:
+        best_move = None
+        best_coverage = expected_coverage + 1e-12
+        for source in np.flatnonzero(ambulances_per_base):
+            covering_without_source = covering_ambulances.copy()
+            covering_without_source[covered_nodes[source]] -= 1
+            coverage_without_source = inhabitants @ (
+                1 - q**covering_without_source
+            )
+            marginal_coverage = (1 - q) * (
+                coverage.T @ (inhabitants * q**covering_without_source)
+            )
+            marginal_coverage[source] = -np.inf
+            target = int(np.argmax(marginal_coverage))
+            if coverage_without_source + marginal_coverage[target] > (
+                best_coverage
+            ):
+                best_coverage = (
+                    coverage_without_source + marginal_coverage[target]
+                )
+                best_move = (source, target)
+
+        if best_move is None:
+            break
+        ambulances_per_base[best_move[0]] -= 1
+        ambulances_per_base[best_move[1]] += 1
+        covering_ambulances[covered_nodes[best_move[0]]] -= 1
+        covering_ambulances[covered_nodes[best_move[1]]] += 1
+        expected_coverage = inhabitants @ (1 - q**covering_ambulances)
+
+    return ambulances_per_base
+
+
+def calculate_lp_bound(
+    coverage_matrix: np.ndarray,
+    inhabitants: np.ndarray,
+    base_indices: np.ndarray,
+    q: float,
+    NUM_AMBULANCES: int,
+    SOLVER_NAME: str,
+) -> float:
+    """
+    Calculates an upper bound on the expected coverage by solving the LP
+    relaxation of MEXCLP.
+
+    Parameters
+    ----------
+    coverage_matrix : np.ndarray
+        The boolean coverage matrix, see ``calculate_coverage_matrix``.
+    inhabitants : np.ndarray
+        The fraction of inhabitants per demand node.
+    base_indices : np.ndarray
+        The node indices of the bases.
+    q : float
+        The busy fraction.
+    NUM_AMBULANCES : int
+        The number of ambulances that should be assigned to bases.
+    SOLVER_NAME : str
+        The name of the solver that should be used.
+
+    Raises
+    ------
+    Exception
+        If the LP relaxation is not solved to optimality.
+
+    Returns
+    -------
+    float
+        The optimal objective value of the LP relaxation.
+
+    """
+
+    mip, _, _ = build_mexclp_model(
+        coverage_matrix, inhabitants, base_indices, q, NUM_AMBULANCES
+    )
+    mip.solve(pulp.getSolver(SOLVER_NAME, mip=False, msg=False))
+    if pulp.LpStatus[mip.status] != "Optimal":
+        raise Exception(
+            f"The LP relaxation could not be solved to optimality. Status: "
+            f"{pulp.LpStatus[mip.status]}."
+        )
+
+    return pulp.value(mip.objective)
+
+
+##################################Heuristic####################################
+if __name__ == "__main__":
+    regionAllDemandNodes = pd.read_csv(f"{DATA_DIRECTORY}{NODES_FILE}")
+    AllPCs = np.array(regionAllDemandNodes.loc[:, "postal code"]).astype("int")
+
+    if ALL_NODES_AS_BASES:
+        BaseIndices = np.arange(len(AllPCs))
+    else:
+        regionBasePCs = pd.read_csv(f"{DATA_DIRECTORY}{BASE_LOCATIONS_FILE}")
+        BasesPcs = np.array(regionBasePCs.loc[:, "Base Locations"]).astype(
+            "int"
+        )
+        BaseIndices = np.flatnonzero(np.isin(AllPCs, BasesPcs))
+
+    DrivingTimes = pd.read_csv(
+        f"{DATA_DIRECTORY}{TRAVEL_TIMES_FILE}", index_col=0
+    )
+    DrivingTimes.columns = DrivingTimes.columns.astype(int)
+    if not (
+        np.array_equal(AllPCs, DrivingTimes.columns.values.astype("int"))
+        and np.array_equal(AllPCs, DrivingTimes.index.values.astype("int"))
+    ):
+        raise Exception(
+            "error: data files are not ordering the "
+            "postal codes in the same way"
+        )
+
+    inhab = regionAllDemandNodes["inhabitants"].to_numpy()
+    if sum(inhab) < 0.9999999:
+        print("Warning, sum of inhabitants is not 1 but ", sum(inhab))
+
+    start_time = time.perf_counter()
+    coverage_matrix = calculate_coverage_matrix(
+        DrivingTimes.to_numpy(), BaseIndices, TIME_THRESHOLD
+    )
+    ambulances_per_base = solve_mexclp_heuristic(
+        coverage_matrix, inhab, q, NUM_AMBULANCES
+    )
+    expected_coverage = calculate_expected_coverage(
+        coverage_matrix, inhab, ambulances_per_base, q
+    )
+    print(
+        f"total coverage (heuristic) = {expected_coverage} "
+        f"({time.perf_counter() - start_time} seconds)"
+    )
+
+    if COMPUTE_LP_BOUND:
+        lp_bound = calculate_lp_bound(
+            coverage_matrix, inhab, BaseIndices, q, NUM_AMBULANCES, SOLVER_NAME
+        )
+        print(f"LP bound = {lp_bound}")
+        print(f"gap = {(lp_bound - expected_coverage) / lp_bound:.4%}")
+
+    ####################################Output#################################
+    for b in np.flatnonzero(ambulances_per_base):
+        print(
+            f"The base at postal code {AllPCs[BaseIndices[b]]} gets "
+            f"{ambulances_per_base[b]} ambulances"
+        )
+
+    create_ambulance_base_locations(
+        {
+            int(AllPCs[BaseIndices[b]]): int(ambulances_per_base[b])
+            for b in np.flatnonzero(ambulances_per_base)
+        }
+    ).to_csv(f"{OUTPUT_DIRECTORY}{RESULTS_FILE}.csv")
@@ -0,0 +1,294 @@
+"""
+This script solves the MEXCLP model for multiple parameter combinations.
+
+For each ``TIME_THRESHOLD``, the coverage matrix and the model are built
+once. The model is built with ``max(NUM_AMBULANCES_LIST)`` coverage levels,
+which gives the same optimal solutions for every smaller number of
+ambulances. The model is then re-solved for each busy fraction ``q`` (by
+changing the objective) and each number of ambulances (by changing the
+right-hand side of the fleet size constraint). Each solve is warm-started
+from the solution with the same number of ambulances and the previous busy
+fraction, or otherwise from the solution with the previous number of
+ambulances. Different time thresholds are solved in parallel. Below, all
+parameters are discussed.
+
+Parameters
+----------
+Q_LIST : list[float]
+    The busy fractions.
+NUM_AMBULANCES_LIST : list[int]
+    The numbers of ambulances that should be assigned to bases.
+TIME_THRESHOLD_LIST : list[float]
+    The thresholds for the driving time in minutes.
+NUM_WORKERS : int
+    The number of processes that are used to solve the different time
+    thresholds. If equal to 1, the time thresholds are solved sequentially.
+WARM_START : bool
+    Whether the solver should be warm-started with the previous solution.
+DATA_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the input data is located.
+OUTPUT_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the output files should be saved.
+NODES_FILE : str
+    The name of the file that contains the data with the nodes of the region.
+BASE_LOCATIONS_FILE : str
+    The name of the file that contains the nodes where bases are located.
+TRAVEL_TIMES_FILE : str
+    The name of the file that contains the data with the siren travel times
+    between nodes.
+AMBULANCE_BASE_LOCATIONS_FILE_NAME : str
+    The start of the names of the csv files with the assignment of the
+    ambulances to the bases. The time threshold, busy fraction and number of
+    ambulances are added automatically.
+SUMMARY_FILE : str
+    The name of the csv file with the expected coverage of all parameter
+    combinations.
+SOLVER_NAME: str
+    The name of the solver that should be used. Examples are "GUROBI_CMD" and
+    "PULP_CBC_CMD".
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+import pulp
+
+from concurrent.futures import ProcessPoolExecutor
+from MEXCLP import (
+    calculate_coverage_matrix,
+    build_mexclp_model,
+    create_ambulance_base_locations,
+)
+
+####################################Input######################################
+Q_LIST: list[float] = [0.6]
+NUM_AMBULANCES_LIST: list[int] = [19, 20, 23, 24]
+TIME_THRESHOLD_LIST: list[float] = [12]
+NUM_WORKERS: int = 1
+WARM_START: bool = True
+
+ROOT_DIRECTORY: str = os.path.dirname(
+    os.path.dirname(os.path.dirname(__file__))
+)
+DATA_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "data/")
+OUTPUT_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "results/")
+
+NODES_FILE: str = "nodes_Utrecht_2021.csv"
+BASE_LOCATIONS_FILE: str = "RAVU_base_locations_Utrecht_2021.csv"
+TRAVEL_TIMES_FILE: str = "siren_driving_matrix_2022.csv"
+AMBULANCE_BASE_LOCATIONS_FILE_NAME: str = "Base_Locations_Ambulances_MEXCLP"
+SUMMARY_FILE: str = "MEXCLP_sweep_summary.csv"
+
+SOLVER_NAME: str = "PULP_CBC_CMD"
+##################################Functions####################################
+
+
+def solve_mexclp_sweep(
+    travel_times: np.ndarray,
+    inhabitants: np.ndarray,
+    base_indices: np.ndarray,
+    postal_codes: np.ndarray,
+    TIME_THRESHOLD: float,
+    Q_LIST: list[float],
+    NUM_AMBULANCES_LIST: list[int],
+    SOLVER_NAME: str,
+    WARM_START: bool = True,
+) -> list[dict]:
+    """
+    Solves the MEXCLP model for one time threshold and all busy fractions and
+    numbers of ambulances.
+
+    Parameters
+    ----------
+    travel_times : np.ndarray
+        The travel times in minutes between all nodes, see
+        ``calculate_coverage_matrix``.
+    inhabitants : np.ndarray
+        The fraction of inhabitants per demand node.
+    base_indices : np.ndarray
+        The node indices of the bases.
+    postal_codes : np.ndarray
+        The postal code of each node.
+    TIME_THRESHOLD : float
+        The threshold for the driving time in minutes.
+    Q_LIST : list[float]
+        The busy fractions.
+    NUM_AMBULANCES_LIST : list[int]
+        The numbers of ambulances.
+    SOLVER_NAME : str
+        The name of the solver that should be used.
+    WARM_START : bool, optional
+        Whether the solver should be warm-started with the previous solution.
+        The default is ``True``.
+
+    Raises
+    ------
+    Exception
+        If a model is not solved to optimality.
+
+    Returns
+    -------
+    list[dict]
+        For each busy fraction and number of ambulances, the parameters, the
+        expected coverage ("expected_coverage"), the solve time in seconds
+        ("solve_time") and the number of ambulances per base postal code
+        ("ambulances_per_base").
+
+    """
+
+    coverage_matrix = calculate_coverage_matrix(
+        travel_times, base_indices, TIME_THRESHOLD
+    )
+    max_num_ambulances = max(NUM_AMBULANCES_LIST)
+    mip, x, y = build_mexclp_model(
+        coverage_matrix,
+        inhabitants,
+        base_indices,
+        Q_LIST[0],
+        max_num_ambulances,
+    )
+    solver = pulp.getSolver(SOLVER_NAME, msg=False, warmStart=WARM_START)
+    levels = range(1, max_num_ambulances + 1)
+
+    results = []
+    solutions: dict[int, dict[str, float]] = {}
+    for q in Q_LIST:
+        coverage_probabilities = (1 - q) * q ** np.arange(max_num_ambulances)
+        objective_coefficients = np.outer(inhabitants, coverage_probabilities)
+        mip.setObjective(
+            pulp.LpAffineExpression(
+                (y[i][k], objective_coefficients[i, k - 1])
+                for i in range(len(inhabitants))
+                for k in levels
+            )
+        )
+
+        previous_solution = None
+        for NUM_AMBULANCES in sorted(NUM_AMBULANCES_LIST):
+            mip.constraints["fleet_size"].changeRHS(NUM_AMBULANCES)
+
+            # The solution of the previous busy fraction with the same number
+            # of ambulances is feasible, and so is the solution with fewer
+            # ambulances.
+            start_solution = solutions.get(NUM_AMBULANCES, previous_solution)
+            if WARM_START and start_solution is not None:
+                for variable in mip.variables():
+                    variable.setInitialValue(start_solution[variable.name])
+
+            start_time = time.perf_counter()
+            mip.solve(solver)
+            solve_time = time.perf_counter() - start_time
+            if pulp.LpStatus[mip.status] != "Optimal":
+                raise Exception(
+                    f"Status: {pulp.LpStatus[mip.status]} for TIME_THRESHOLD "
+                    f"{TIME_THRESHOLD}, q {q} and NUM_AMBULANCES "
+                    f"{NUM_AMBULANCES}. Error: exiting early because you are "
+                    "looking at a suboptimal solution!"
+                )
+
+            solutions[NUM_AMBULANCES] = previous_solution = {
+                variable.name: variable.varValue
+                for variable in mip.variables()
+            }
+            results.append(
+                {
+                    "TIME_THRESHOLD": TIME_THRESHOLD,
+                    "q": q,
+                    "NUM_AMBULANCES": NUM_AMBULANCES,
+                    "expected_coverage": pulp.value(mip.objective),
+                    "solve_time": solve_time,
+                    "ambulances_per_base": {
+                        int(postal_codes[b]): int(round(x[int(b)].varValue))
+                        for b in base_indices
+                        if x[int(b)].varValue > 0.5
+                    },
+                }
+            )
+
+    return results
+
+
+###################################Sweep#######################################
+if __name__ == "__main__":
+    start_time_sweep = time.perf_counter()
+
+    regionAllDemandNodes = pd.read_csv(f"{DATA_DIRECTORY}{NODES_FILE}")
+    AllPCs = np.array(regionAllDemandNodes.loc[:, "postal code"]).astype("int")
+
+    regionBasePCs = pd.read_csv(f"{DATA_DIRECTORY}{BASE_LOCATIONS_FILE}")
+    BasesPcs = np.array(regionBasePCs.loc[:, "Base Locations"]).astype("int")
+    BaseIndices = np.flatnonzero(np.isin(AllPCs, BasesPcs))
+
+    DrivingTimes = pd.read_csv(
+        f"{DATA_DIRECTORY}{TRAVEL_TIMES_FILE}", index_col=0
+    )
+    DrivingTimes.columns = DrivingTimes.columns.astype(int)
+    if not (
+        np.array_equal(AllPCs, DrivingTimes.columns.values.astype("int"))
+        and np.array_equal(AllPCs, DrivingTimes.index.values.astype("int"))
+    ):
+        raise Exception(
+            "error: data files are not ordering the "
+            "postal codes in the same way"
+        )
+
+    inhab = regionAllDemandNodes["inhabitants"].to_numpy()
+    if sum(inhab) < 0.9999999:
+        print("Warning, sum of inhabitants is not 1 but ", sum(inhab))
+
+    arguments = [
+        (
+            DrivingTimes.to_numpy(),
+            inhab,
+            BaseIndices,
+            AllPCs,
+            TIME_THRESHOLD,
+            Q_LIST,
+            NUM_AMBULANCES_LIST,
+            SOLVER_NAME,
+            WARM_START,
+        )
+        for TIME_THRESHOLD in TIME_THRESHOLD_LIST
+    ]
+    if NUM_WORKERS > 1:
+        with ProcessPoolExecutor(max_workers=NUM_WORKERS) as executor:
+            cell_results = list(
+                executor.map(solve_mexclp_sweep, *zip(*arguments))
+            )
+    else:
+        cell_results = [
+            solve_mexclp_sweep(*argument) for argument in arguments
+        ]
+
+    ####################################Output#################################
+    summary = []
+    for result in (result for results in cell_results for result in results):
+        create_ambulance_base_locations(result["ambulances_per_base"]).to_csv(
+            f"{OUTPUT_DIRECTORY}{AMBULANCE_BASE_LOCATIONS_FILE_NAME}_"
+            f"{result['TIME_THRESHOLD']}mins_q{result['q']}_"
+            f"{result['NUM_AMBULANCES']}.csv"
+        )
+        summary.append(
+            {
+                key: value
+                for key, value in result.items()
+                if key != "ambulances_per_base"
+            }
+        )
+
+    summary_df = pd.DataFrame(summary)
+    summary_df.to_csv(f"{OUTPUT_DIRECTORY}{SUMMARY_FILE}", index=False)
+    print(
+        summary_df.pivot_table(
+            index="NUM_AMBULANCES",
+            columns=["TIME_THRESHOLD", "q"],
+            values="expected_coverage",
+        )
+    )
+    print(
+        f"The total running time is: {time.perf_counter()-start_time_sweep} "
+        "seconds."
+    )
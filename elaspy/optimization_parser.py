@@ -20,12 +20,19 @@ SAVE_OUTPUT : bool
     Whether the output should be saved or not.
 NUM_RUNS : int
     The number of runs that should be parsed.
+NUM_WORKERS : int
+    The number of processes that are used to read the simulation output
+    files. If equal to 1, the files are read sequentially.
 SCENARIO : str
     The scenario. Corresponds to the SCENARIO that was used in the simulation
     run.
 SIMULATION_AMBULANCE_OUTPUT_FILE_NAME : str
     The name of the file where the ambulance dataframe is saved. Note that the
     run number is automatically added by the script in a for-loop.
+OUTPUT_FORMAT : str
+    The format in which the ambulance dataframes are saved, see ``main.py``.
+    If "npz", only the necessary columns are read from the single file with
+    all runs.
 CHARGING_SCENARIO_FILE : str
     The name of the file that contains the charging scenario data.
 HOSPITAL_FILE : str
@@ -48,6 +55,9 @@ import datetime
 import numpy as np
 import pandas as pd
 
+from concurrent.futures import ProcessPoolExecutor
+from columnar_output import load_columnar_output
+
 ################################Directories####################################
 ROOT_DIRECTORY: str = os.path.dirname(
     os.path.dirname(os.path.dirname(__file__))
@@ -64,9 +74,11 @@ OUTPUT_DIRECTORY: str = os.path.join(
 ################################Parameters#####################################
 SAVE_OUTPUT: bool = False
 NUM_RUNS: int = 500
+NUM_WORKERS: int = 1
 #################################File names####################################
 SCENARIO: str = "opt_iteration_1"
 SIMULATION_AMBULANCE_OUTPUT_FILE_NAME: str = f"Ambulance_df_{SCENARIO}"
+OUTPUT_FORMAT: str = "csv"
 CHARGING_SCENARIO_FILE: str = f"charging_scenario_21_22_{SCENARIO}.csv"
 HOSPITAL_FILE: str = "Hospital_Postal_Codes_Utrecht_2021.csv"
 AMBULANCE_BASE_LOCATIONS_FILE: str = (
@@ -75,6 +87,260 @@ AMBULANCE_BASE_LOCATIONS_FILE: str = (
 OUTPUT_FILE_NAME: str = f"result_df_{SCENARIO}.csv"
 OUTPUT_FILE_NAME_2: str = f"remove_location_{SCENARIO}.csv"
 RUN_PARAMETERS_FILE_NAME: str = f"optimization_parser_{SCENARIO}"
+##################################Functions####################################
+
+
+CHARGING_COLUMNS: list[str] = [
+    "time",
+    "charging_type",
+    "charging_location_ID",
+    "charging_time",
+]
+
+
+def calculate_charging_times_run(file_path: str) -> tuple[pd.Series, float]:
+    """
+    Calculates the total charging time per charging location of one run.
+
+    Only the columns that are necessary are read from the ambulance output
+    file. See ``calculate_charging_times``.
+
+    Parameters
+    ----------
+    file_path : str
+        The path to the ambulance output file of the run.
+
+    Returns
+    -------
+    pd.Series
+        The total charging time per charging location.
+    float
+        The total simulation time, which is the time of the last ambulance
+        event.
+
+    """
+
+    return calculate_charging_times(
+        pd.read_csv(file_path, usecols=CHARGING_COLUMNS)
+    )
+
+
+def calculate_charging_times(
+    ambulance_df: pd.DataFrame,
+) -> tuple[pd.Series, float]:
+    """
+    Calculates the total charging time per charging location of one run.
+
+    Charging at a base (``charging_type`` 2) is assigned to location
+    "<postal code>B" and charging at a hospital or at drop-off
+    (``charging_type`` 0 or 1) to location "<postal code>H".
+
+    Parameters
+    ----------
+    ambulance_df : pd.DataFrame
+        The ambulance output of the run. At least the columns of
+        ``CHARGING_COLUMNS`` are necessary.
+
+    Returns
+    -------
+    pd.Series
+        The total charging time per charging location.
+    float
+        The total simulation time, which is the time of the last ambulance
+        event.
+
+    """
+
+    total_simulation_time = float(ambulance_df["time"].iloc[-1])
+
+    charging_df = ambulance_df.dropna(
+        subset=["charging_type", "charging_location_ID"]
+    )
+    location_types = np.where(charging_df["charging_type"] == 2, "B", "H")
+    locations = (
+        charging_df["charging_location_ID"].astype(int).astype(str)
+        + location_types
+    )
+
+    return (
+        charging_df["charging_time"].groupby(locations.to_numpy()).sum(),
+        total_simulation_time,
+    )
+
+
+def aggregate_charger_utilization(
+    file_paths: list[str],
+    number_of_chargers: pd.Series,
+    NUM_WORKERS: int = 1,
+) -> pd.DataFrame:
+    """
+    Calculates the charger utilization and availability probability of all
+    charging locations at once.
+
+    Each ambulance output file is read only once. For each run, the
+    utilization of a location is its total charging time divided by the
+    number of chargers times the total simulation time. The probability that
+    at least one charger is available is equal to ``1 - u^c``, with ``u`` the
+    utilization and ``c`` the number of chargers. Both are averaged over the
+    runs.
+
+    Parameters
+    ----------
+    file_paths : list[str]
+        The paths to the ambulance output files, one per run.
+    number_of_chargers : pd.Series
+        The number of regular chargers per charging location. The index
+        contains the locations (e.g. "3584H").
+    NUM_WORKERS : int, optional
+        The number of processes that are used to read the files. The default
+        is 1.
+
+    Returns
+    -------
+    pd.DataFrame
+        A dataframe with columns "Location", "Utilization", "Probability" and
+        "Number of regular chargers". The rows are in the order of
+        ``number_of_chargers``.
+
+    """
+
+    if NUM_WORKERS > 1:
+        with ProcessPoolExecutor(max_workers=NUM_WORKERS) as executor:
+            run_results = list(
+                executor.map(calculate_charging_times_run, file_paths)
+            )
+    else:
+        run_results = [
+            calculate_charging_times_run(file_path) for file_path in file_paths
+        ]
+
+    return calculate_charger_utilization(run_results, number_of_chargers)
+
+
+def calculate_charger_utilization(
+    run_results: list[tuple[pd.Series | dict[str, float], float]],
+    number_of_chargers: pd.Series,
+) -> pd.DataFrame:
+    """
+    Calculates the charger utilization and availability probability of all
+    charging locations from the charging times of multiple runs.
+
+    Parameters
+    ----------
+    run_results : list[tuple[pd.Series | dict[str, float], float]]
+        For each run, the total charging time per charging location and the
+        total simulation time. Locations without charging time may be absent.
+    number_of_chargers : pd.Series
+        The number of regular chargers per charging location. The index
+        contains the locations (e.g. "3584H").
+
+    Returns
+    -------
+    pd.DataFrame
+        A dataframe with columns "Location", "Utilization", "Probability" and
+        "Number of regular chargers". The rows are in the order of
+        ``number_of_chargers``.
+
+    """
+
+    locations = number_of_chargers.index
+    charging_times = np.array(
+        [
+            pd.Series(charging_times_run, dtype=float)
+            .reindex(locations, fill_value=0)
+            .to_numpy()
+            for charging_times_run, _ in run_results
+        ]
+    )
+    total_simulation_times = np.array(
+        [total_simulation_time for _, total_simulation_time in run_results]
+    )
+    chargers = number_of_chargers.to_numpy(dtype=float)
+
+    utilizations = charging_times / (
+        chargers[np.newaxis, :] * total_simulation_times[:, np.newaxis]
+    )
+    probabilities = 1 - np.power(utilizations, chargers[np.newaxis, :])
+
+    return pd.DataFrame(
+        {
+            "Location": list(locations),
+            "Utilization": utilizations.mean(axis=0),
+            "Probability": probabilities.mean(axis=0),
+            "Number of regular chargers": chargers,
+        }
+    )
+
+
+def select_charging_locations(
+    chargers_df: pd.DataFrame, hospitals: list[str], bases: list[str]
+) -> list[str]:
+    """
+    Selects the charging locations that are considered.
+
+    Only hospitals with regular chargers are considered. All bases are
+    considered.
+
+    Parameters
+    ----------
+    chargers_df : pd.DataFrame
+        The charging scenario.
+    hospitals : list[str]
+        The hospital locations (e.g. "3584H").
+    bases : list[str]
+        The base locations (e.g. "3812B").
+
+    Returns
+    -------
+    list[str]
+        The charging locations.
+
+    """
+
+    charger_hospital_df = chargers_df.loc[hospitals]
+    filtered_hospitals = list(
+        charger_hospital_df.loc[
+            charger_hospital_df["Number of regular chargers"] > 0
+        ].index
+    )
+
+    return filtered_hospitals + bases
+
+
+def select_location_remove_charger(result_df: pd.DataFrame) -> pd.Series:
+    """
+    Selects the charging location where a charger can be removed.
+
+    This is the location with the largest probability that at least one
+    charger is available. Bases are only considered if they have more than
+    one charger.
+
+    Parameters
+    ----------
+    result_df : pd.DataFrame
+        The result of ``calculate_charger_utilization``.
+
+    Returns
+    -------
+    pd.Series
+        The row of ``result_df`` of the selected location.
+
+    """
+
+    filter_hospitals_df = result_df[result_df["Location"].str.endswith("H")]
+
+    # Only consider bases with more than 1 charger.
+    filter_bases_df = result_df[result_df["Location"].str.endswith("B")]
+    filter_bases_df = filter_bases_df.loc[
+        filter_bases_df["Number of regular chargers"] > 1
+    ]
+
+    filtered_results_df = pd.concat((filter_hospitals_df, filter_bases_df))
+
+    max_probability_index = filtered_results_df["Probability"].idxmax()
+    return filtered_results_df.loc[max_probability_index]
+
+
 ##############################Save parameters##################################
 if __name__ == "__main__":
     start_running_time = datetime.datetime.now()
@@ -89,10 +355,12 @@ if __name__ == "__main__":
             f.write(f"OUTPUT_DIRECTORY: {OUTPUT_DIRECTORY}\n")
             f.write(f"SAVE_OUTPUT: {SAVE_OUTPUT}\n")
             f.write(f"NUM_RUNS: {NUM_RUNS}\n")
+            f.write(f"NUM_WORKERS: {NUM_WORKERS}\n")
             f.write(f"SCENARIO: {SCENARIO}\n")
             f.write(
                 f"SIMULATION_AMBULANCE_OUTPUT_FILE_NAME: {SIMULATION_AMBULANCE_OUTPUT_FILE_NAME}\n"
             )
+            f.write(f"OUTPUT_FORMAT: {OUTPUT_FORMAT}\n")
             f.write(f"CHARGING_SCENARIO_FILE: {CHARGING_SCENARIO_FILE}\n")
             f.write(f"HOSPITAL_FILE: {HOSPITAL_FILE}\n")
             f.write(
@@ -116,86 +384,32 @@ if __name__ == "__main__":
     hospitals = list(hospital_df["Hospital"])
     bases = list(base_locations_df["Base"].unique())
 
-    # Only consider hospitals with chargers
-    charger_hospital_df = chargers_df.loc[hospitals]
-    filtered_hospitals = list(
-        charger_hospital_df.loc[
-            charger_hospital_df["Number of regular chargers"] > 0
-        ].index
-    )
-
-    locations = filtered_hospitals + bases
-
-    result_df = pd.DataFrame(locations, columns=["Location"])
-    result_df["Utilization"] = np.nan
-    result_df["Probability"] = np.nan
-    result_df["Number of regular chargers"] = np.nan
-
-    for index, row in result_df.iterrows():
-        location = row.Location
-        postal_code = int(location[0:4])
-        loc_type = location[4]
-
-        number_of_reg_chargers = chargers_df.loc[location][
-            "Number of regular chargers"
-        ]
-
-        utilizations = []
-        probabilities = []
-
-        for i in range(NUM_RUNS):
-            ambulance_df = pd.read_csv(
-                f"{SIM_RESULTS_DIRECTORY}{SIMULATION_AMBULANCE_OUTPUT_FILE_NAME}_run_{i}.csv",
-                index_col=0,
-            )
-
-            total_simulation_time = ambulance_df.iloc[-1]["time"]
-
-            if loc_type == "B":
-                selected_data = ambulance_df.loc[
-                    (ambulance_df["charging_location_ID"] == postal_code)
-                    & (ambulance_df["charging_type"] == 2)
-                ]
-                total_charge_time = selected_data["charging_time"].sum()
-            elif loc_type == "H":
-                selected_data = ambulance_df.loc[
-                    (ambulance_df["charging_location_ID"] == postal_code)
-                    & (
-                        (ambulance_df["charging_type"] == 0)
-                        | (ambulance_df["charging_type"] == 1)
-                    )
-                ]
-                total_charge_time = selected_data["charging_time"].sum()
-            else:
-                raise RuntimeError(
-                    "Incorrect value for the location type provided."
-                )
-
-            utilization = total_charge_time / (
-                number_of_reg_chargers * total_simulation_time
-            )
+    locations = select_charging_locations(chargers_df, hospitals, bases)
 
-            probability = 1 - np.power(utilization, number_of_reg_chargers)
+    if OUTPUT_FORMAT == "npz":
+        ambulance_df = load_columnar_output(
+            f"{SIM_RESULTS_DIRECTORY}{SIMULATION_AMBULANCE_OUTPUT_FILE_NAME}.npz",
+            CHARGING_COLUMNS,
+            range(NUM_RUNS),
+        )
+        result_df = calculate_charger_utilization(
+            [
+                calculate_charging_times(run_df)
+                for _, run_df in ambulance_df.groupby("run_nr")
+            ],
+            chargers_df.loc[locations, "Number of regular chargers"],
+        )
+    else:
+        result_df = aggregate_charger_utilization(
+            [
+                f"{SIM_RESULTS_DIRECTORY}{SIMULATION_AMBULANCE_OUTPUT_FILE_NAME}_run_{i}.csv"
+                for i in range(NUM_RUNS)
+            ],
+            chargers_df.loc[locations, "Number of regular chargers"],
+            NUM_WORKERS,
+        )
 
-            utilizations.append(utilization)
-            probabilities.append(probability)
-
-        result_df.at[index, "Utilization"] = np.mean(utilizations)
-        result_df.at[index, "Probability"] = np.mean(probabilities)
-        result_df.at[index, "Number of regular chargers"] = number_of_reg_chargers
-
-    filter_hospitals_df = result_df[result_df["Location"].str.endswith("H")]
-
-    # Only consider bases with more than 1 charger.
-    filter_bases_df = result_df[result_df["Location"].str.endswith("B")]
-    filter_bases_df = filter_bases_df.loc[
-        filter_bases_df["Number of regular chargers"] > 1
-    ]
-
-    filtered_results_df = pd.concat((filter_hospitals_df, filter_bases_df))
-
-    max_probability_index = filtered_results_df["Probability"].idxmax()
-    max_probability_row = filtered_results_df.loc[max_probability_index]
+    max_probability_row = select_location_remove_charger(result_df)
 
     print(
         f"The location where a charger should be removed is: {max_probability_row['Location']}"
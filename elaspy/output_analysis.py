@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the statistical analysis of the simulation output.
+
+The simulation starts with an empty system and all ambulances at their bases,
+so the first part of a run is not representative for the steady state. The
+length of this initial transient (warm-up period) is detected with the MSER-5
+rule: the series is divided into batches of five observations and the
+truncation point minimizes the marginal standard error of the mean of the
+remaining batches. It is applied to the response times (in order of arrival)
+and to the busy fractions of consecutive time bins.
+
+The confidence intervals of a single long run are based on batch means. The
+observations after the warm-up period are divided into (non-overlapping or
+overlapping) batches, whose means are approximately independent and normally
+distributed if the batches are long enough. This avoids a warm-up period per
+replication.
+
+The control variates are the sample means of the inputs of a run, whose
+expectations are known: the number of calls (or the mean interarrival time),
+the fraction of patients that is brought to a hospital and the mean on-site
+aid and drop-off times. The estimate over the runs is corrected with the
+regression of the results on the deviations of these sample means from their
+expectations.
+"""
+from typing import Any
+
+import scipy
+import numpy as np
+import pandas as pd
+
+from input_output_functions import calculate_busy_fractions
+from hypercube_approximation import calculate_truncated_lognormal_mean
+
+CONTROL_VARIATE_COLUMNS: list[str] = [
+    "arrivals",
+    "to_hospital",
+    "on_site_aid_time",
+    "drop_off_time",
+]
+
+
+def calculate_mser(
+    series: np.ndarray, BATCH_SIZE: int = 5
+) -> tuple[int, np.ndarray]:
+    """
+    Determines the truncation point of a series with the MSER rule.
+
+    The statistic of all truncation points is calculated at once with
+    cumulative sums over the batch means. Only truncation points in the first
+    half of the series are considered, as the MSER statistic is unreliable
+    when few batches remain.
+
+    Parameters
+    ----------
+    series : np.ndarray
+        The observations in order of time.
+    BATCH_SIZE : int, optional
+        The number of observations per batch. Incomplete batches at the end
+        of the series are ignored. The default is 5 (MSER-5).
+
+    Raises
+    ------
+    Exception
+        If the series contains less than two batches.
+
+    Returns
+    -------
+    int
+        The number of observations that should be truncated.
+    np.ndarray
+        The MSER statistic per number of truncated batches.
+
+    """
+
+    series = np.asarray(series, dtype=float)
+    nr_batches = len(series) // BATCH_SIZE
+    if nr_batches < 2:
+        raise Exception(
+            f"The series should contain at least {2 * BATCH_SIZE} "
+            f"observations, but contains {len(series)}."
+        )
+
+    batch_means = (
+        series[: nr_batches * BATCH_SIZE]
+        .reshape(nr_batches, BATCH_SIZE)
+        .mean(axis=1)
+    )
+    # The sums over the remaining batches for each number of truncated batches.
+    sums = np.cumsum(batch_means[::-1])[::-1]
+    sums_of_squares = np.cumsum(batch_means[::-1] ** 2)[::-1]
+    nr_remaining = np.arange(nr_batches, 0, -1)
+    mser = (sums_of_squares - sums**2 / nr_remaining) / nr_remaining**2
+
+    nr_truncated_batches = int(np.argmin(mser[: nr_batches // 2 + 1]))
+    return nr_truncated_batches * BATCH_SIZE, mser
+
+
+def calculate_busy_time_series(
+    df_patient,
+    SIMULATION_PARAMETERS: dict[str, Any],
+    BIN_WIDTH: float,
+    START_TIME: float = 0.0,
+) -> np.ndarray:
+    """
+    Calculates the busy fractions of consecutive time bins.
+
+    Parameters
+    ----------
+    df_patient : pandas.DataFrame
+        A dataframe with the patient data where each row represents a patient.
+        At least columns "arrival_time", "waiting_time_before_assigned" and
+        "finish_time" are necessary. See the output data section on the ELASPY
+        website for explanations.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``FT_BOUNDARY`` and
+        ``NUM_AMBULANCES`` are at least necessary. See ``main.py`` for
+        parameter explanations.
+    BIN_WIDTH : float
+        The width of the bins in minutes.
+    START_TIME : float, optional
+        The start time of the first bin. The default is 0.0.
+
+    Returns
+    -------
+    np.ndarray
+        The busy fraction of each complete bin between ``START_TIME`` and
+        ``FT_BOUNDARY``.
+
+    """
+
+    bin_starts = START_TIME + np.arange(
+        int((SIMULATION_PARAMETERS["FT_BOUNDARY"] - START_TIME) // BIN_WIDTH)
+    ) * float(BIN_WIDTH)
+    return calculate_busy_fractions(
+        df_patient["arrival_time"].to_numpy()
+        + df_patient["waiting_time_before_assigned"].to_numpy(),
+        df_patient["finish_time"].to_numpy(),
+        bin_starts,
+        bin_starts + BIN_WIDTH,
+        SIMULATION_PARAMETERS["NUM_AMBULANCES"],
+    )
+
+
+def detect_warm_up(
+    df_patient,
+    SIMULATION_PARAMETERS: dict[str, Any],
+    BIN_WIDTH: float = 60.0,
+    BATCH_SIZE: int = 5,
+) -> dict[str, float]:
+    """
+    Detects the warm-up period of a run and calculates truncated estimators.
+
+    Parameters
+    ----------
+    df_patient : pandas.DataFrame
+        A dataframe with the patient data where each row represents a patient
+        in order of arrival. At least columns "response_time",
+        "arrival_time", "waiting_time_before_assigned" and "finish_time" are
+        necessary. See the output data section on the ELASPY website for
+        explanations.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``FT_BOUNDARY`` and
+        ``NUM_AMBULANCES`` are at least necessary. See ``main.py`` for
+        parameter explanations.
+    BIN_WIDTH : float, optional
+        The width (in minutes) of the time bins of the busy fraction series.
+        The default is 60.0.
+    BATCH_SIZE : int, optional
+        The batch size of the MSER rule. The default is 5.
+
+    Returns
+    -------
+    dict[str, float]
+        The number of truncated patients ("nr_truncated_patients"), the
+        arrival time of the first patient that is kept
+        ("response_time_truncation_time"), the mean and 95% empirical quantile
+        of the response time of the kept patients ("mean_response_time" and
+        "emp_quantile_response_time"), the suggested ``AT_BOUNDARY`` based on
+        the busy fraction series ("busy_fraction_truncation_time") and the
+        busy fraction between that time and ``FT_BOUNDARY``
+        ("busy_fraction").
+
+    """
+
+    response_times = df_patient["response_time"].to_numpy(dtype=float)
+    nr_truncated_patients, _ = calculate_mser(response_times, BATCH_SIZE)
+    kept_response_times = response_times[nr_truncated_patients:]
+
+    busy_fractions = calculate_busy_time_series(
+        df_patient, SIMULATION_PARAMETERS, BIN_WIDTH
+    )
+    nr_truncated_bins, _ = calculate_mser(busy_fractions, BATCH_SIZE)
+    busy_fraction_truncation_time = nr_truncated_bins * BIN_WIDTH
+
+    return {
+        "nr_truncated_patients": nr_truncated_patients,
+        "response_time_truncation_time": float(
+            df_patient["arrival_time"].iloc[nr_truncated_patients]
+        ),
+        "mean_response_time": float(np.mean(kept_response_times)),
+        "emp_quantile_response_time": float(
+            np.quantile(kept_response_times, 0.95, method="inverted_cdf")
+        ),
+        "busy_fraction_truncation_time": busy_fraction_truncation_time,
+        "busy_fraction": float(
+            calculate_busy_fractions(
+                df_patient["arrival_time"].to_numpy()
+                + df_patient["waiting_time_before_assigned"].to_numpy(),
+                df_patient["finish_time"].to_numpy(),
+                np.array([busy_fraction_truncation_time]),
+                np.array([SIMULATION_PARAMETERS["FT_BOUNDARY"]]),
+                SIMULATION_PARAMETERS["NUM_AMBULANCES"],
+            )[0]
+        ),
+    }
+
+
+def calculate_batch_means_ci(
+    series: np.ndarray,
+    NUM_BATCHES: int = 20,
+    CONFIDENCE: float = 0.95,
+    OVERLAPPING: bool = False,
+) -> tuple[float, float, float]:
+    """
+    Calculates a batch means confidence interval of the mean of a series.
+
+    The series is divided into ``NUM_BATCHES`` batches of equal size.
+    Incomplete batches at the end of the series are ignored. With
+    overlapping batch means, every window of the batch size is a batch and
+    the variance estimator of Meketon and Schmeiser is used with
+    ``1.5 * (NUM_BATCHES - 1)`` degrees of freedom.
+
+    Parameters
+    ----------
+    series : np.ndarray
+        The observations in order of time.
+    NUM_BATCHES : int, optional
+        The number of (non-overlapping) batches. The default is 20.
+    CONFIDENCE : float, optional
+        The confidence level. The default is 0.95.
+    OVERLAPPING : bool, optional
+        Whether overlapping batch means are used. The default is False.
+
+    Raises
+    ------
+    Exception
+        If the series contains less than two observations per batch.
+
+    Returns
+    -------
+    tuple[float, float, float]
+        The mean and the lower and upper bound of the confidence interval.
+
+    """
+
+    series = np.asarray(series, dtype=float)
+    batch_size = len(series) // NUM_BATCHES
+    if NUM_BATCHES < 2 or batch_size < 2:
+        raise Exception(
+            "The series should contain at least two batches of two "
+            f"observations, but contains {len(series)} observations for "
+            f"{NUM_BATCHES} batches."
+        )
+    series = series[: NUM_BATCHES * batch_size]
+    mean = float(np.mean(series))
+
+    if OVERLAPPING:
+        sums = np.concatenate([[0.0], np.cumsum(series)])
+        batch_means = (sums[batch_size:] - sums[:-batch_size]) / batch_size
+        nr_observations = len(series)
+        variance = (
+            batch_size
+            * np.sum((batch_means - mean) ** 2)
+            / (
+                (nr_observations - batch_size + 1)
+                * (nr_observations - batch_size)
+            )
+        )
+        degrees_of_freedom = 1.5 * (NUM_BATCHES - 1)
+    else:
+        batch_means = series.reshape(NUM_BATCHES, batch_size).mean(axis=1)
+        variance = np.var(batch_means, ddof=1) / NUM_BATCHES
+        degrees_of_freedom = NUM_BATCHES - 1
+
+    error = scipy.stats.t.ppf(
+        (1 + CONFIDENCE) / 2, degrees_of_freedom
+    ) * np.sqrt(variance)
+    return mean, mean - error, mean + error
+
+
+def calculate_batch_quantile_ci(
+    series: np.ndarray,
+    QUANTILE: float = 0.95,
+    NUM_BATCHES: int = 20,
+    CONFIDENCE: float = 0.95,
+) -> tuple[float, float, float]:
+    """
+    Calculates a batch confidence interval of an empirical quantile.
+
+    The empirical quantile of each non-overlapping batch is calculated at
+    once and the variance of the quantile of the series is estimated by the
+    variance of the batch quantiles divided by ``NUM_BATCHES``.
+
+    Parameters
+    ----------
+    series : np.ndarray
+        The observations in order of time.
+    QUANTILE : float, optional
+        The quantile. The default is 0.95.
+    NUM_BATCHES : int, optional
+        The number of batches. The default is 20.
+    CONFIDENCE : float, optional
+        The confidence level. The default is 0.95.
+
+    Raises
+    ------
+    Exception
+        If the series contains less than two observations per batch.
+
+    Returns
+    -------
+    tuple[float, float, float]
+        The empirical quantile of the series and the lower and upper bound of
+        the confidence interval.
+
+    """
+
+    series = np.asarray(series, dtype=float)
+    batch_size = len(series) // NUM_BATCHES
+    if NUM_BATCHES < 2 or batch_size < 2:
+        raise Exception(
+            "The series should contain at least two batches of two "
+            f"observations, but contains {len(series)} observations for "
+            f"{NUM_BATCHES} batches."
+        )
+    series = series[: NUM_BATCHES * batch_size]
+
+    quantile = float(np.quantile(series, QUANTILE, method="inverted_cdf"))
+    batch_quantiles = np.quantile(
+        series.reshape(NUM_BATCHES, batch_size),
+        QUANTILE,
+        axis=1,
+        method="inverted_cdf",
+    )
+    error = scipy.stats.t.ppf((1 + CONFIDENCE) / 2, NUM_BATCHES - 1) * np.sqrt(
+        np.var(batch_quantiles, ddof=1) / NUM_BATCHES
+    )
+    return quantile, quantile - error, quantile + error
+
+
+def calculate_single_run_cis(
+    df_patient,
+    SIMULATION_PARAMETERS: dict[str, Any],
+    NUM_BATCHES: int = 20,
+    OVERLAPPING: bool = False,
+    BIN_WIDTH: float = 60.0,
+    CONFIDENCE: float = 0.95,
+) -> pd.DataFrame:
+    """
+    Calculates batch means confidence intervals of the statistics of one run.
+
+    The patients that arrive before ``AT_BOUNDARY`` are not used for the
+    response time statistics. The busy fraction is based on the busy
+    fractions of the bins of ``BIN_WIDTH`` minutes between ``AT_BOUNDARY``
+    and ``FT_BOUNDARY``.
+
+    Parameters
+    ----------
+    df_patient : pandas.DataFrame
+        A dataframe with the patient data where each row represents a patient
+        in order of arrival. At least columns "response_time",
+        "arrival_time", "waiting_time_before_assigned" and "finish_time" are
+        necessary. See the output data section on the ELASPY website for
+        explanations.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``AT_BOUNDARY``,
+        ``FT_BOUNDARY`` and ``NUM_AMBULANCES`` are at least necessary.
+        See ``main.py`` for parameter explanations.
+    NUM_BATCHES : int, optional
+        The number of batches. The default is 20.
+    OVERLAPPING : bool, optional
+        Whether overlapping batch means are used for the mean response time
+        and the busy fraction. The 95% empirical quantile always uses
+        non-overlapping batches. The default is False.
+    BIN_WIDTH : float, optional
+        The width (in minutes) of the bins of the busy fraction series. The
+        default is 60.0.
+    CONFIDENCE : float, optional
+        The confidence level. The default is 0.95.
+
+    Returns
+    -------
+    pd.DataFrame
+        The estimate ("estimate") and the bounds of the confidence interval
+        ("lower" and "upper") of the "mean_response_time", the
+        "emp_quantile_response_time" and the "busy_fraction".
+
+    """
+
+    response_times = df_patient.loc[
+        df_patient["arrival_time"] >= SIMULATION_PARAMETERS["AT_BOUNDARY"],
+        "response_time",
+    ].to_numpy(dtype=float)
+    busy_fractions = calculate_busy_time_series(
+        df_patient,
+        SIMULATION_PARAMETERS,
+        BIN_WIDTH,
+        SIMULATION_PARAMETERS["AT_BOUNDARY"],
+    )
+
+    return pd.DataFrame.from_dict(
+        {
+            "mean_response_time": calculate_batch_means_ci(
+                response_times, NUM_BATCHES, CONFIDENCE, OVERLAPPING
+            ),
+            "emp_quantile_response_time": calculate_batch_quantile_ci(
+                response_times, 0.95, NUM_BATCHES, CONFIDENCE
+            ),
+            "busy_fraction": calculate_batch_means_ci(
+                busy_fractions, NUM_BATCHES, CONFIDENCE, OVERLAPPING
+            ),
+        },
+        orient="index",
+        columns=["estimate", "lower", "upper"],
+    )
+
+
+def calculate_input_means(SIMULATION_PARAMETERS: dict[str, Any]) -> np.ndarray:
+    """
+    Calculates the expectations of the control variates.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``PROCESS_TYPE``,
+        ``PROCESS_TIME``, ``CALL_LAMBDA``, ``PROB_GO_TO_HOSPITAL``,
+        ``AID_PARAMETERS`` and ``DROP_OFF_PARAMETERS`` are at least necessary.
+        See ``main.py`` for parameter explanations.
+
+    Returns
+    -------
+    np.ndarray
+        The expectation of each control variate of
+        ``CONTROL_VARIATE_COLUMNS``. The arrivals are the number of calls if
+        ``PROCESS_TYPE='Time'`` and the mean interarrival time otherwise.
+
+    """
+
+    if SIMULATION_PARAMETERS["PROCESS_TYPE"] == "Time":
+        arrivals = (
+            SIMULATION_PARAMETERS["CALL_LAMBDA"]
+            * SIMULATION_PARAMETERS["PROCESS_TIME"]
+        )
+    else:
+        arrivals = 1 / SIMULATION_PARAMETERS["CALL_LAMBDA"]
+    return np.array(
+        [
+            arrivals,
+            SIMULATION_PARAMETERS["PROB_GO_TO_HOSPITAL"],
+            calculate_truncated_lognormal_mean(
+                *SIMULATION_PARAMETERS["AID_PARAMETERS"]
+            ),
+            calculate_truncated_lognormal_mean(
+                *SIMULATION_PARAMETERS["DROP_OFF_PARAMETERS"]
+            ),
+        ]
+    )
+
+
+def calculate_input_statistics(
+    df_patient, SIMULATION_PARAMETERS: dict[str, Any]
+) -> np.ndarray:
+    """
+    Calculates the control variates of a run.
+
+    Parameters
+    ----------
+    df_patient : pandas.DataFrame
+        A dataframe with the patient data where each row represents a patient
+        in order of arrival. At least columns "arrival_time", "to_hospital",
+        "on_site_aid_time" and "drop_off_time_hospital" are necessary. See
+        the output data section on the ELASPY website for explanations.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameter ``PROCESS_TYPE`` is at least
+        necessary. See ``main.py`` for parameter explanations.
+
+    Returns
+    -------
+    np.ndarray
+        The observed value of each control variate of
+        ``CONTROL_VARIATE_COLUMNS``. The drop-off time is the mean over the
+        patients that are brought to a hospital, which has the same
+        expectation as the drop-off times are independent of the transports.
+
+    """
+
+    if SIMULATION_PARAMETERS["PROCESS_TYPE"] == "Time":
+        arrivals = len(df_patient)
+    else:
+        arrivals = df_patient["arrival_time"].max() / len(df_patient)
+    return np.array(
+        [
+            arrivals,
+            np.nanmean(df_patient["to_hospital"]),
+            np.nanmean(df_patient["on_site_aid_time"]),
+            np.nanmean(df_patient["drop_off_time_hospital"]),
+        ]
+    )
+
+
+def calculate_control_variate_ci(
+    results: np.ndarray,
+    controls: np.ndarray,
+    control_means: np.ndarray,
+    CONFIDENCE: float = 0.95,
+) -> tuple[float, float, float]:
+    """
+    Calculates a control variate confidence interval over replications.
+
+    The results are regressed on the deviations of the controls from their
+    expectations. The intercept is the control variate estimate, and its
+    standard error gives a t-based interval with ``n - q - 1`` degrees of
+    freedom for ``n`` replications and ``q`` controls.
+
+    Parameters
+    ----------
+    results : np.ndarray
+        The result of each (independent) replication.
+    controls : np.ndarray
+        The controls of each replication, with one row per replication and
+        one column per control.
+    control_means : np.ndarray
+        The expectation of each control.
+    CONFIDENCE : float, optional
+        The confidence level. The default is 0.95.
+
+    Raises
+    ------
+    Exception
+        If there are not more replications than controls plus one.
+
+    Returns
+    -------
+    tuple[float, float, float]
+        The estimate and the lower and upper bound of the confidence
+        interval.
+
+    """
+
+    results = np.asarray(results, dtype=float)
+    nr_replications, nr_controls = controls.shape
+    degrees_of_freedom = nr_replications - nr_controls - 1
+    if degrees_of_freedom < 1:
+        raise Exception(
+            f"The control variates need more than {nr_controls + 1} "
+            f"replications, but there are {nr_replications}."
+        )
+
+    design = np.column_stack(
+        [np.ones(nr_replications), controls - control_means]
+    )
+    coefficients, _, _, _ = np.linalg.lstsq(design, results, rcond=None)
+    residual_variance = (
+        np.sum((results - design @ coefficients) ** 2) / degrees_of_freedom
+    )
+    error = scipy.stats.t.ppf(
+        (1 + CONFIDENCE) / 2, degrees_of_freedom
+    ) * np.sqrt(residual_variance * np.linalg.inv(design.T @ design)[0, 0])
+    estimate = float(coefficients[0])
+    return estimate, estimate - error, estimate + error
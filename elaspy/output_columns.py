@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the typed storage of the patient and ambulance output.
+
+The output of a run is stored per column in a NumPy array with its own type,
+instead of in one float64 matrix. The columns are referenced by name. The
+integer columns that always have a value are stored as int32. The integer
+columns that can be missing (e.g., the hospital ID if a patient is not
+brought to a hospital) are stored as float32, which represents integers up to
+2**24 exactly and keeps ``np.nan`` as the missing value. The times, battery
+levels and other measured quantities are stored as float64, such that the
+output does not change. An ``OutputColumns`` object grows by doubling its
+capacity, and its columns are converted to a DataFrame without copying them.
+"""
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+PATIENT_COLUMN_TYPES: dict[str, type] = {
+    "patient_ID": np.int32,
+    "response_time": np.float64,
+    "arrival_time": np.float64,
+    "location_ID": np.int32,
+    "nr_ambulances_available": np.float32,
+    "nr_ambulances_not_assignable": np.float32,
+    "assigned_to_ambulance_nr": np.float32,
+    "waiting_time_before_assigned": np.float64,
+    "driving_time_to_patient": np.float64,
+    "ambulance_arrival_time": np.float64,
+    "on_site_aid_time": np.float64,
+    "to_hospital": np.float32,
+    "hospital_ID": np.float32,
+    "driving_time_to_hospital": np.float64,
+    "drop_off_time_hospital": np.float64,
+    "finish_time": np.float64,
+}
+AMBULANCE_COLUMN_TYPES: dict[str, type] = {
+    "ambulance_ID": np.int32,
+    "time": np.float64,
+    "battery_level_before": np.float64,
+    "battery_level_after": np.float64,
+    "use_or_charge": np.float32,
+    "idle_or_driving_decrease": np.float32,
+    "idle_time": np.float64,
+    "source_location_ID": np.float32,
+    "target_location_ID": np.float32,
+    "driven_km": np.float64,
+    "battery_decrease": np.float64,
+    "charging_type": np.float32,
+    "charging_location_ID": np.float32,
+    "speed_charger": np.float64,
+    "charging_success": np.float32,
+    "waiting_time": np.float64,
+    "charging_interrupted": np.float32,
+    "charging_time": np.float64,
+    "battery_increase": np.float64,
+}
+
+
+class OutputColumns:
+    """
+    A class to store the output of a run per column.
+
+    Attributes
+    ----------
+    columns : list[str]
+        The names of the columns.
+    arrays : dict[str, np.ndarray]
+        The allocated array of each column. Only the first ``nr_rows`` values
+        are part of the output.
+    nr_rows : int
+        The number of rows of the output.
+    capacity : int
+        The number of allocated rows.
+
+    """
+
+    def __init__(
+        self,
+        columns: list[str],
+        column_types: dict[str, type],
+        nr_rows: int = 0,
+        capacity: int = 1024,
+    ) -> None:
+        """
+        Allocates the columns.
+
+        Parameters
+        ----------
+        columns : list[str]
+            The names of the columns, e.g., ``DATA_COLUMNS_PATIENT``.
+        column_types : dict[str, type]
+            The type of each column, e.g., ``PATIENT_COLUMN_TYPES``. Columns
+            without a type are stored as float64.
+        nr_rows : int, optional
+            The initial number of rows. The missing values of these rows are
+            ``np.nan`` for the float columns and -1 for the integer columns.
+            The default is 0.
+        capacity : int, optional
+            The number of rows that is allocated if ``nr_rows`` is smaller.
+            The default is 1024.
+
+        """
+
+        self.columns: list[str] = list(columns)
+        self.nr_rows: int = nr_rows
+        self.capacity: int = max(nr_rows, capacity, 1)
+        self.arrays: dict[str, np.ndarray] = {
+            column: self.create_missing(
+                np.dtype(column_types.get(column, np.float64)),
+                self.capacity,
+            )
+            for column in self.columns
+        }
+
+    def __len__(self) -> int:
+        return self.nr_rows
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """
+        Returns the values of a column.
+
+        Parameters
+        ----------
+        column : str
+            The name of the column.
+
+        Returns
+        -------
+        np.ndarray
+            A view of the first ``nr_rows`` values of the column, so values
+            can be assigned to it.
+
+        """
+        return self.arrays[column][: self.nr_rows]
+
+    @staticmethod
+    def create_missing(dtype: np.dtype, size: int) -> np.ndarray:
+        """
+        Creates an array of missing values.
+
+        Parameters
+        ----------
+        dtype : np.dtype
+            The type of the array.
+        size : int
+            The size of the array.
+
+        Returns
+        -------
+        np.ndarray
+            The array with ``np.nan`` for a float type and -1 otherwise.
+
+        """
+        return np.full(size, np.nan if dtype.kind == "f" else -1, dtype=dtype)
+
+    def add_row(self, **values: Any) -> None:
+        """
+        Adds a row. The allocated arrays are doubled in size if they are full.
+
+        Parameters
+        ----------
+        **values : Any
+            The values of the row per column name. The other columns get
+            missing values.
+
+        Raises
+        ------
+        Exception
+            If a column does not exist.
+
+        """
+
+        if self.nr_rows == self.capacity:
+            self.arrays = {
+                column: np.concatenate(
+                    [array, self.create_missing(array.dtype, self.capacity)]
+                )
+                for column, array in self.arrays.items()
+            }
+            self.capacity *= 2
+
+        for column, value in values.items():
+            if column not in self.arrays:
+                raise Exception(f"The output has no column {column}.")
+            self.arrays[column][self.nr_rows] = value
+        self.nr_rows += 1
+
+    def get_memory(self) -> int:
+        """
+        Returns the memory of the values of the output.
+
+        Returns
+        -------
+        int
+            The memory in bytes of the first ``nr_rows`` values.
+
+        """
+        return sum(self[column].nbytes for column in self.columns)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Converts the output to a DataFrame without copying the columns.
+
+        Returns
+        -------
+        pd.DataFrame
+            The output with the columns in the order of ``columns``. It shares
+            its memory with this object.
+
+        """
+        return pd.DataFrame(
+            {column: self[column] for column in self.columns}, copy=False
+        )
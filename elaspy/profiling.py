@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the opt-in instrumentation of the simulator.
+
+Within ``profile_simulation``, the functions of ``PROFILED_FUNCTIONS`` are
+replaced by wrappers that count the calls and accumulate the time spent in
+them, and the SimPy events that are processed are counted per event type.
+Outside of it, the original functions are used, so the instrumentation does
+not cost anything when it is not used. Note that the times are inclusive:
+the time of ``check_select_ambulance`` includes the time spent in
+``check_patient_reachable``. For generator functions, such as
+``help_waiting_patients``, each resumption counts as a call (e.g., a sweep
+over the patient queue).
+"""
+from typing import Any, Callable, Iterator
+
+import json
+import heapq
+import time
+import functools
+import contextlib
+import inspect
+import itertools
+import pandas as pd
+
+from simpy.events import NORMAL
+
+import ambulance
+import ambulance_simulation
+from ambulance import Ambulance
+
+PROFILED_FUNCTIONS: dict[str, list[tuple[Any, str]]] = {
+    "initialize_simulation": [(ambulance_simulation, "initialize_simulation")],
+    "check_select_ambulance": [
+        (ambulance_simulation, "check_select_ambulance")
+    ],
+    "check_patient_reachable": [(Ambulance, "check_patient_reachable")],
+    "select_hospital": [(ambulance_simulation, "select_hospital")],
+    "calculate_new_coordinate": [
+        (ambulance, "calculate_new_coordinate"),
+        (ambulance_simulation, "calculate_new_coordinate"),
+    ],
+    "select_closest_location_ID": [
+        (ambulance, "select_closest_location_ID"),
+        (ambulance_simulation, "select_closest_location_ID"),
+    ],
+    "select_charging_station": [(Ambulance, "select_charging_station")],
+    "help_waiting_patients": [(ambulance_simulation, "help_waiting_patients")],
+    "add_ambulance_data_diesel": [(Ambulance, "add_ambulance_data_diesel")],
+    "add_ambulance_data_battery_decrease": [
+        (Ambulance, "add_ambulance_data_battery_decrease")
+    ],
+    "add_ambulance_data_charging": [
+        (Ambulance, "add_ambulance_data_charging")
+    ],
+}
+
+
+def timed_function(function: Callable, counter: dict[str, float]) -> Callable:
+    """
+    Creates a wrapper of a function that counts its calls and accumulates
+    its running time.
+
+    Parameters
+    ----------
+    function : Callable
+        The function. If it is a generator function, the wrapper is a
+        generator function as well and every resumption is timed separately,
+        such that the time during which the generator is suspended is not
+        counted.
+    counter : dict[str, float]
+        The dictionary with the number of calls ("calls") and the total time
+        in seconds ("time") that is updated by the wrapper.
+
+    Returns
+    -------
+    Callable
+        The wrapper.
+
+    """
+
+    if inspect.isgeneratorfunction(function):
+
+        @functools.wraps(function)
+        def generator_wrapper(*args, **kwargs):
+            generator = function(*args, **kwargs)
+            send_value = None
+            exception = None
+            while True:
+                start_time = time.perf_counter()
+                try:
+                    if exception is None:
+                        event = generator.send(send_value)
+                    else:
+                        event = generator.throw(exception)
+                except StopIteration as stop:
+                    counter["calls"] += 1
+                    counter["time"] += time.perf_counter() - start_time
+                    return stop.value
+                counter["calls"] += 1
+                counter["time"] += time.perf_counter() - start_time
+
+                # SimPy sends the value of the event or throws an exception
+                # (e.g., an interrupt) into the process, which is passed on.
+                try:
+                    send_value = yield event
+                    exception = None
+                except BaseException as thrown_exception:
+                    send_value = None
+                    exception = thrown_exception
+
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            counter["calls"] += 1
+            counter["time"] += time.perf_counter() - start_time
+
+    return wrapper
+
+
+def count_events(env: Any, event_counts: dict[str, int]) -> None:
+    """
+    Counts the processed events of a SimPy environment per event type.
+
+    The ``schedule`` and ``step`` methods of the environment are replaced by
+    wrappers. The scheduled events are kept in a heap in the same order as
+    the event queue of SimPy (time, priority and order of scheduling), so the
+    event that ``step`` processes is the first event of this heap.
+
+    Parameters
+    ----------
+    env : simpy.core.Environment
+        The SimPy environment. It should not have scheduled events yet.
+    event_counts : dict[str, int]
+        The number of processed events per event type, which is updated
+        during the simulation.
+
+    Raises
+    ------
+    Exception
+        If the environment already has scheduled events.
+
+    """
+
+    if env.peek() != float("inf"):
+        raise Exception(
+            "The events can only be counted if no events are scheduled yet."
+        )
+
+    schedule = env.schedule
+    step = env.step
+    scheduled_events: list[tuple[float, int, int, Any]] = []
+    event_numbers = itertools.count()
+
+    def recording_schedule(
+        event: Any, priority: int = NORMAL, delay: float = 0
+    ) -> None:
+        heapq.heappush(
+            scheduled_events,
+            (env.now + delay, priority, next(event_numbers), event),
+        )
+        schedule(event, priority, delay)
+
+    def counting_step() -> None:
+        # If there are no scheduled events, step raises EmptySchedule, which
+        # ends the run.
+        if scheduled_events:
+            event_type = type(heapq.heappop(scheduled_events)[3]).__name__
+            event_counts[event_type] = event_counts.get(event_type, 0) + 1
+        step()
+
+    env.schedule = recording_schedule
+    env.step = counting_step
+
+
+@contextlib.contextmanager
+def profile_simulation() -> Iterator[dict[str, Any]]:
+    """
+    Profiles the simulation runs within the context.
+
+    Yields
+    ------
+    dict[str, Any]
+        The profile, which is filled during the runs. It contains the number
+        of calls and the total time per function of ``PROFILED_FUNCTIONS``
+        ("functions") and the number of processed SimPy events per event type
+        ("events").
+
+    """
+
+    profile: dict[str, Any] = {
+        "functions": {
+            name: {"calls": 0, "time": 0.0} for name in PROFILED_FUNCTIONS
+        },
+        "events": {},
+    }
+
+    originals = []
+    for name, targets in PROFILED_FUNCTIONS.items():
+        for owner, attribute in targets:
+            original = vars(owner)[attribute]
+            originals.append((owner, attribute, original))
+            wrapper: Any
+            if isinstance(original, staticmethod):
+                wrapper = staticmethod(
+                    timed_function(
+                        original.__func__, profile["functions"][name]
+                    )
+                )
+            else:
+                wrapper = timed_function(original, profile["functions"][name])
+            setattr(owner, attribute, wrapper)
+
+    initialize_simulation = ambulance_simulation.initialize_simulation
+
+    def counting_initialize_simulation(*args, **kwargs):
+        initialization = initialize_simulation(*args, **kwargs)
+        count_events(initialization[4], profile["events"])
+        return initialization
+
+    ambulance_simulation.initialize_simulation = counting_initialize_simulation
+    try:
+        yield profile
+    finally:
+        for owner, attribute, original in reversed(originals):
+            setattr(owner, attribute, original)
+
+
+def create_profile_report(profile: dict[str, Any]) -> pd.DataFrame:
+    """
+    Creates a table of the profiled functions.
+
+    Parameters
+    ----------
+    profile : dict[str, Any]
+        The profile, see ``profile_simulation``.
+
+    Returns
+    -------
+    pd.DataFrame
+        The number of calls ("calls"), the total time ("total_time") and the
+        mean time ("mean_time") in seconds per function, sorted by the total
+        time.
+
+    """
+
+    report = pd.DataFrame.from_dict(profile["functions"], orient="index")
+    report = report.rename(columns={"time": "total_time"})
+    report["calls"] = report["calls"].astype(int)
+    report["mean_time"] = report["total_time"] / report["calls"].where(
+        report["calls"] > 0
+    )
+    return report.sort_values("total_time", ascending=False)
+
+
+def save_profile(profile: dict[str, Any], file_path: str) -> None:
+    """
+    Saves the profile in a json file.
+
+    Parameters
+    ----------
+    profile : dict[str, Any]
+        The profile, see ``profile_simulation``.
+    file_path : str
+        The path of the json file.
+
+    """
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=4)
+        f.close()
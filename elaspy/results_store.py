@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the results store of the simulation experiments.
+
+The performance measures of each simulation run (replication) are stored in
+a SQLite database. A replication is identified by the key of its
+configuration and its seed. The configuration key is a hash of the effective
+simulation parameters and of the checksums of the input files, so a
+replication is only reused if the simulation would produce the same results.
+The parameters that only affect the output of the simulator (e.g., file
+names, plots and prints) are not part of the key. Every replication is
+committed when it is added, so an interrupted experiment can be resumed and
+an experiment can be extended with more runs. The patient output columns
+that the post-processing of a run needs (e.g., warm-up detection, batch
+means and control variates) are stored with the replication, so the
+post-processing parameters are not part of the key either.
+"""
+from typing import Any
+
+import io
+import json
+import sqlite3
+import hashlib
+import datetime
+import numpy as np
+import pandas as pd
+
+REGION_FILE_PARAMETERS: list[str] = [
+    "TRAVEL_TIMES_FILE",
+    "DISTANCE_FILE",
+    "ROAD_NETWORK_FILE",
+    "NODES_FILE",
+    "HOSPITAL_FILE",
+    "BASE_LOCATIONS_FILE",
+    "AMBULANCE_BASE_LOCATIONS_FILE",
+    "CHARGING_SCENARIO_FILE",
+    "ARRIVAL_RATE_FILE",
+]
+INPUT_FILE_PARAMETERS: list[str] = [
+    "INTERARRIVAL_TIMES_FILE",
+    "ON_SITE_AID_TIMES_FILE",
+    "DROP_OFF_TIMES_FILE",
+    "LOCATION_IDS_FILE",
+    "TO_HOSPITAL_FILE",
+]
+IGNORED_PARAMETERS: list[str] = [
+    "NUM_RUNS",
+    "START_SEED_VALUE",
+    "SEED_VALUE",
+    "ROAD_NETWORK_CACHE_SIZE",
+    "TELEMETRY_INTERVAL",
+    "PRINT",
+    "PRINT_STATISTICS",
+    "PLOT_FIGURES",
+    "SAVE_PRINTS_TXT",
+    "SAVE_OUTPUT",
+    "SAVE_PLOTS",
+    "SAVE_DFS",
+    "OUTPUT_FORMAT",
+    "MAX_PENDING_OUTPUTS",
+    "PROFILE",
+    "BOOTSTRAP_CI",
+    "NUM_BOOTSTRAP_RESAMPLES",
+    "BOOTSTRAP_PATIENTS",
+    "DETECT_WARM_UP",
+    "BATCH_MEANS_CI",
+    "NUM_BATCHES",
+    "CONTROL_VARIATES",
+]
+RESULT_COLUMNS: list[str] = [
+    "mean_response_time",
+    "emp_quantile_response_time",
+    "busy_fraction",
+    "running_time",
+]
+PATIENT_OUTPUT_COLUMNS: list[str] = [
+    "response_time",
+    "arrival_time",
+    "waiting_time_before_assigned",
+    "on_site_aid_time",
+    "to_hospital",
+    "drop_off_time_hospital",
+    "finish_time",
+]
+
+
+def calculate_file_checksum(file_path: str) -> str:
+    """
+    Calculates the SHA-256 checksum of a file.
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the file.
+
+    Returns
+    -------
+    str
+        The hexadecimal checksum.
+
+    """
+
+    checksum = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def calculate_input_checksums(
+    SIMULATION_PARAMETERS: dict[str, Any]
+) -> dict[str, str | None]:
+    """
+    Calculates the checksums of the input files of the simulation.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``DATA_DIRECTORY`` and
+        ``LOAD_INPUT_DATA`` are at least necessary. The files of the
+        parameters in ``REGION_FILE_PARAMETERS`` and, if
+        ``LOAD_INPUT_DATA=True``, ``INPUT_FILE_PARAMETERS`` are used if they
+        are given and not ``None``. See ``main.py`` for parameter
+        explanations.
+
+    Returns
+    -------
+    dict[str, str | None]
+        The checksum of the file of each file parameter, or ``None`` if the
+        parameter is ``None``.
+
+    """
+
+    files = {
+        parameter: SIMULATION_PARAMETERS["DATA_DIRECTORY"]
+        for parameter in REGION_FILE_PARAMETERS
+    }
+    if SIMULATION_PARAMETERS["LOAD_INPUT_DATA"]:
+        for parameter in INPUT_FILE_PARAMETERS:
+            files[parameter] = SIMULATION_PARAMETERS[
+                "SIMULATION_INPUT_DIRECTORY"
+            ]
+
+    checksums: dict[str, str | None] = {}
+    for parameter, directory in files.items():
+        if SIMULATION_PARAMETERS.get(parameter) is None:
+            checksums[parameter] = None
+        else:
+            checksums[parameter] = calculate_file_checksum(
+                f"{directory}{SIMULATION_PARAMETERS[parameter]}"
+            )
+    return checksums
+
+
+def convert_to_json_value(value: Any) -> Any:
+    """
+    Converts a parameter value that is not supported by ``json``.
+
+    Parameters
+    ----------
+    value : Any
+        The parameter value.
+
+    Returns
+    -------
+    Any
+        A list for a NumPy array, a Python number for a NumPy number and the
+        string representation otherwise.
+
+    """
+
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
+
+
+def get_effective_parameters(
+    SIMULATION_PARAMETERS: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Selects the parameters that can change the results of a replication.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. See ``main.py`` for parameter
+        explanations.
+
+    Returns
+    -------
+    dict[str, Any]
+        The parameters without the parameters in ``IGNORED_PARAMETERS``, the
+        output file names, the directories and the input file parameters. The
+        input files are included by their checksums instead.
+
+    """
+
+    return {
+        parameter: value
+        for parameter, value in SIMULATION_PARAMETERS.items()
+        if parameter not in IGNORED_PARAMETERS
+        and parameter not in REGION_FILE_PARAMETERS
+        and parameter not in INPUT_FILE_PARAMETERS
+        and not parameter.endswith("_FILE_NAME")
+        and not parameter.endswith("_DIRECTORY")
+    }
+
+
+def calculate_configuration_key(
+    SIMULATION_PARAMETERS: dict[str, Any],
+    input_checksums: dict[str, str | None],
+) -> str:
+    """
+    Calculates the key of a simulation configuration.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. See ``main.py`` for parameter
+        explanations.
+    input_checksums : dict[str, str | None]
+        The checksums of the input files, see ``calculate_input_checksums``.
+
+    Returns
+    -------
+    str
+        The SHA-256 hash of the effective parameters and the checksums.
+
+    """
+
+    configuration = json.dumps(
+        {
+            "parameters": get_effective_parameters(SIMULATION_PARAMETERS),
+            "input_checksums": input_checksums,
+        },
+        sort_keys=True,
+        default=convert_to_json_value,
+    )
+    return hashlib.sha256(configuration.encode()).hexdigest()
+
+
+class ResultsStore:
+    """
+    A class to store the results of simulation replications in SQLite.
+
+    Attributes
+    ----------
+    connection : sqlite3.Connection
+        The connection to the database.
+
+    """
+
+    def __init__(self, file_path: str) -> None:
+        """
+        Opens the store and creates its tables if they do not exist yet.
+
+        Parameters
+        ----------
+        file_path : str
+            The path of the SQLite database.
+
+        """
+
+        self.connection: sqlite3.Connection = sqlite3.connect(file_path)
+        result_columns = ", ".join(
+            f"{column} REAL" for column in RESULT_COLUMNS
+        )
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS configurations ("
+                "configuration_key TEXT PRIMARY KEY, parameters TEXT, "
+                "input_checksums TEXT, created TEXT)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS replications ("
+                "configuration_key TEXT, seed INTEGER, "
+                f"{result_columns}, created TEXT, "
+                "PRIMARY KEY (configuration_key, seed))"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS patient_outputs ("
+                "configuration_key TEXT, seed INTEGER, output BLOB, "
+                "PRIMARY KEY (configuration_key, seed))"
+            )
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+
+    def add_configuration(
+        self,
+        SIMULATION_PARAMETERS: dict[str, Any],
+        input_checksums: dict[str, str | None],
+    ) -> str:
+        """
+        Adds a configuration if it is not stored yet.
+
+        Parameters
+        ----------
+        SIMULATION_PARAMETERS : dict[str, Any]
+            The simulation parameters. See ``main.py`` for parameter
+            explanations.
+        input_checksums : dict[str, str | None]
+            The checksums of the input files, see
+            ``calculate_input_checksums``.
+
+        Returns
+        -------
+        str
+            The key of the configuration.
+
+        """
+
+        configuration_key = calculate_configuration_key(
+            SIMULATION_PARAMETERS, input_checksums
+        )
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO configurations VALUES (?, ?, ?, ?)",
+                (
+                    configuration_key,
+                    json.dumps(
+                        get_effective_parameters(SIMULATION_PARAMETERS),
+                        sort_keys=True,
+                        default=convert_to_json_value,
+                    ),
+                    json.dumps(input_checksums, sort_keys=True),
+                    datetime.datetime.now().isoformat(),
+                ),
+            )
+        return configuration_key
+
+    def get_replication(
+        self, configuration_key: str, seed: int
+    ) -> dict[str, float] | None:
+        """
+        Returns the results of a replication.
+
+        Parameters
+        ----------
+        configuration_key : str
+            The key of the configuration.
+        seed : int
+            The seed of the replication.
+
+        Returns
+        -------
+        dict[str, float] | None
+            The results per column of ``RESULT_COLUMNS``, or ``None`` if the
+            replication is not stored.
+
+        """
+
+        row = self.connection.execute(
+            f"SELECT {', '.join(RESULT_COLUMNS)} FROM replications "
+            "WHERE configuration_key = ? AND seed = ?",
+            (configuration_key, int(seed)),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(RESULT_COLUMNS, row))
+
+    def get_patient_output(
+        self, configuration_key: str, seed: int
+    ) -> pd.DataFrame | None:
+        """
+        Returns the stored patient output of a replication.
+
+        Parameters
+        ----------
+        configuration_key : str
+            The key of the configuration.
+        seed : int
+            The seed of the replication.
+
+        Returns
+        -------
+        pd.DataFrame | None
+            The columns of ``PATIENT_OUTPUT_COLUMNS`` of the patient output,
+            or ``None`` if the patient output of the replication is not
+            stored.
+
+        """
+
+        row = self.connection.execute(
+            "SELECT output FROM patient_outputs "
+            "WHERE configuration_key = ? AND seed = ?",
+            (configuration_key, int(seed)),
+        ).fetchone()
+        if row is None:
+            return None
+        with np.load(io.BytesIO(row[0])) as arrays:
+            return pd.DataFrame(
+                {column: arrays[column] for column in arrays.files}
+            )
+
+    def add_replication(
+        self,
+        configuration_key: str,
+        seed: int,
+        results: dict[str, float],
+        df_patient: pd.DataFrame | None = None,
+    ) -> None:
+        """
+        Adds the results of a replication and commits them.
+
+        Parameters
+        ----------
+        configuration_key : str
+            The key of the configuration.
+        seed : int
+            The seed of the replication.
+        results : dict[str, float]
+            The results per column of ``RESULT_COLUMNS``.
+        df_patient : pd.DataFrame | None, optional
+            The patient output of the replication, of which the columns of
+            ``PATIENT_OUTPUT_COLUMNS`` are stored. The default is ``None``,
+            in which case no patient output is stored.
+
+        Raises
+        ------
+        Exception
+            If the replication is already stored.
+
+        """
+
+        try:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT INTO replications VALUES "
+                    f"(?, ?, {', '.join('?' for _ in RESULT_COLUMNS)}, ?)",
+                    (
+                        configuration_key,
+                        int(seed),
+                        *[float(results[column]) for column in RESULT_COLUMNS],
+                        datetime.datetime.now().isoformat(),
+                    ),
+                )
+                if df_patient is not None:
+                    output = io.BytesIO()
+                    np.savez_compressed(
+                        output,
+                        **{
+                            column: df_patient[column].to_numpy()
+                            for column in PATIENT_OUTPUT_COLUMNS
+                        },
+                    )
+                    self.connection.execute(
+                        "INSERT INTO patient_outputs VALUES (?, ?, ?)",
+                        (configuration_key, int(seed), output.getvalue()),
+                    )
+        except sqlite3.IntegrityError:
+            raise Exception(
+                f"The replication with seed {seed} of configuration "
+                f"{configuration_key} is already stored."
+            )
+
+    def get_replications(self, configuration_key: str) -> pd.DataFrame:
+        """
+        Returns the results of all stored replications of a configuration.
+
+        Parameters
+        ----------
+        configuration_key : str
+            The key of the configuration.
+
+        Returns
+        -------
+        pd.DataFrame
+            The results with the column "seed" and the columns of
+            ``RESULT_COLUMNS``, ordered by seed.
+
+        """
+
+        return pd.read_sql_query(
+            f"SELECT seed, {', '.join(RESULT_COLUMNS)} FROM replications "
+            "WHERE configuration_key = ? ORDER BY seed",
+            self.connection,
+            params=(configuration_key,),
+        )
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+
+        """
+        self.connection.close()
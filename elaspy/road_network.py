@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains a road network backend for very large regions.
+
+The dense ``SIREN_DRIVING_MATRIX`` and ``DISTANCE_MATRIX`` require memory that
+grows quadratically with the number of nodes. A ``RoadNetwork`` stores the
+road graph as an edge list instead and computes the travel times and
+distances on demand with a single-source Dijkstra search. The results of the
+searches are kept in a least recently used cache, and the searches from and
+to the locations that are used most often (e.g., the bases and hospitals)
+can be precomputed and kept permanently. The ``travel_times`` and
+``distances`` of a ``RoadNetwork`` support the ``.loc`` lookups that the
+simulator uses on the dense matrices, so they can be used as
+``SIREN_DRIVING_MATRIX`` and ``DISTANCE_MATRIX`` without other changes.
+
+The distance between two nodes is the length of the fastest route, so the
+travel time and distance always refer to the same route.
+"""
+from typing import Any, Iterable
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+
+from scipy.sparse.csgraph import dijkstra
+
+
+class RoadNetwork:
+    """
+    A class to represent a road network with on-demand shortest routes.
+
+    Attributes
+    ----------
+    node_IDs : pd.Index
+        The IDs of the nodes of the network.
+    positions : dict[Any, int]
+        The position of each node ID in ``node_IDs``.
+    travel_time_graph : sparse.csr_matrix
+        The travel times of the edges, where the rows are the source nodes.
+    distance_graph : sparse.csr_matrix
+        The distances of the edges, where the rows are the source nodes.
+    reverse_travel_time_graph : sparse.csr_matrix
+        The transpose of ``travel_time_graph``, used for the searches to a
+        node.
+    reverse_distance_graph : sparse.csr_matrix
+        The transpose of ``distance_graph``.
+    CACHE_SIZE : int
+        The maximum number of searches in the least recently used cache.
+    cache : OrderedDict[tuple[bool, int], tuple[np.ndarray, np.ndarray]]
+        The travel times and distances of the cached searches. The key is
+        whether the search is from (``True``) or to (``False``) a node and
+        the position of that node.
+    precomputed : dict[tuple[bool, int], tuple[np.ndarray, np.ndarray]]
+        The travel times and distances of the precomputed searches, which are
+        never removed.
+    nr_searches : int
+        The number of searches that are performed.
+    travel_times : RoadNetworkMatrix
+        The travel times with the lookup API of ``SIREN_DRIVING_MATRIX``.
+    distances : RoadNetworkMatrix
+        The distances with the lookup API of ``DISTANCE_MATRIX``.
+
+    """
+
+    def __init__(self, edges: pd.DataFrame, CACHE_SIZE: int = 1024) -> None:
+        """
+        Initializes a road network.
+
+        Parameters
+        ----------
+        edges : pd.DataFrame
+            The directed edges of the network with the columns "source",
+            "target", "travel_time" and "distance". If there are multiple
+            edges between two nodes, the fastest one is used.
+        CACHE_SIZE : int, optional
+            The maximum number of searches in the least recently used cache.
+            The default is 1024.
+
+        Raises
+        ------
+        Exception
+            If an edge has a negative travel time or distance.
+
+        """
+
+        if (edges["travel_time"] < 0).any() or (edges["distance"] < 0).any():
+            raise Exception(
+                "The travel times and distances of the edges should be "
+                "larger or equal to 0."
+            )
+        edges = edges.sort_values(
+            ["travel_time", "distance"], kind="stable"
+        ).drop_duplicates(["source", "target"])
+
+        self.node_IDs: pd.Index = pd.Index(
+            pd.unique(pd.concat([edges["source"], edges["target"]]))
+        )
+        self.positions: dict[Any, int] = {
+            node_ID: position for position, node_ID in enumerate(self.node_IDs)
+        }
+        sources = self.node_IDs.get_indexer(edges["source"])
+        targets = self.node_IDs.get_indexer(edges["target"])
+        shape = (len(self.node_IDs), len(self.node_IDs))
+        # Edges with a travel time of 0 are stored explicitly, as implicit
+        # zeros mean that there is no edge.
+        self.travel_time_graph: sparse.csr_matrix = sparse.csr_matrix(
+            (
+                np.maximum(edges["travel_time"].to_numpy(float), 1e-300),
+                (sources, targets),
+            ),
+            shape=shape,
+        )
+        self.distance_graph: sparse.csr_matrix = sparse.csr_matrix(
+            (edges["distance"].to_numpy(float), (sources, targets)),
+            shape=shape,
+        )
+        self.reverse_travel_time_graph: sparse.csr_matrix = (
+            self.travel_time_graph.transpose().tocsr()
+        )
+        self.reverse_distance_graph: sparse.csr_matrix = (
+            self.distance_graph.transpose().tocsr()
+        )
+        self.CACHE_SIZE: int = CACHE_SIZE
+        self.cache: OrderedDict[
+            tuple[bool, int], tuple[np.ndarray, np.ndarray]
+        ] = OrderedDict()
+        self.precomputed: dict[
+            tuple[bool, int], tuple[np.ndarray, np.ndarray]
+        ] = {}
+        self.nr_searches: int = 0
+        self.travel_times: RoadNetworkMatrix = RoadNetworkMatrix(self, 0)
+        self.distances: RoadNetworkMatrix = RoadNetworkMatrix(self, 1)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "RoadNetwork":
+        # The network is not changed by the lookups (only the cache is), so
+        # it is shared instead of copied, e.g., in run_simulation.
+        return self
+
+    def search(
+        self, position: int, from_node: bool
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Performs a single-source search from or to a node.
+
+        Parameters
+        ----------
+        position : int
+            The position of the node in ``node_IDs``.
+        from_node : bool
+            If ``True``, the fastest routes from the node to all nodes are
+            computed. Otherwise, the fastest routes from all nodes to the node.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The travel times and distances of the fastest routes, in the order
+            of ``node_IDs``. Both are ``np.inf`` for unreachable nodes.
+
+        """
+
+        self.nr_searches += 1
+        if from_node:
+            travel_time_graph = self.travel_time_graph
+            distance_graph = self.distance_graph
+        else:
+            travel_time_graph = self.reverse_travel_time_graph
+            distance_graph = self.reverse_distance_graph
+
+        travel_times, predecessors = dijkstra(
+            travel_time_graph, indices=position, return_predecessors=True
+        )
+        travel_times[travel_times < 1e-200] = 0
+
+        # The distances follow from a search on the shortest path tree, in
+        # which the route to each node is unique.
+        tree_nodes = np.flatnonzero(predecessors >= 0)
+        tree_distances = np.zeros(len(tree_nodes))
+        if len(tree_nodes) > 0:
+            tree_distances = np.asarray(
+                distance_graph[predecessors[tree_nodes], tree_nodes]
+            ).ravel()
+        tree = sparse.csr_matrix(
+            (
+                np.maximum(tree_distances, 1e-300),
+                (predecessors[tree_nodes], tree_nodes),
+            ),
+            shape=distance_graph.shape,
+        )
+        distances = dijkstra(tree, indices=position)
+        distances[distances < 1e-200] = 0
+        return travel_times, distances
+
+    def get_search(
+        self, position: int, from_node: bool
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the search from or to a node, using the precomputed searches
+        and the cache if possible.
+
+        Parameters
+        ----------
+        position : int
+            The position of the node in ``node_IDs``.
+        from_node : bool
+            Whether the search is from (``True``) or to (``False``) the node.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The travel times and distances, see ``search``.
+
+        """
+
+        key = (from_node, position)
+        if key in self.precomputed:
+            return self.precomputed[key]
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        result = self.search(position, from_node)
+        self.cache[key] = result
+        if len(self.cache) > self.CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return result
+
+    def is_available(self, position: int, from_node: bool) -> bool:
+        """
+        Checks whether a search is precomputed or cached.
+
+        Parameters
+        ----------
+        position : int
+            The position of the node in ``node_IDs``.
+        from_node : bool
+            Whether the search is from (``True``) or to (``False``) the node.
+
+        Returns
+        -------
+        bool
+            Whether the search is available without computing it.
+
+        """
+        key = (from_node, position)
+        return key in self.precomputed or key in self.cache
+
+    def precompute(self, node_IDs: Iterable[Any]) -> None:
+        """
+        Precomputes the searches from and to nodes, which are never removed.
+
+        Parameters
+        ----------
+        node_IDs : Iterable[Any]
+            The node IDs, for example the bases and hospitals.
+
+        """
+
+        for position in np.unique(self.get_positions(list(node_IDs))):
+            for from_node in [True, False]:
+                self.precomputed[(from_node, position)] = self.search(
+                    position, from_node
+                )
+
+    def get_positions(self, node_IDs: Any) -> np.ndarray:
+        """
+        Returns the positions of nodes in ``node_IDs``.
+
+        Parameters
+        ----------
+        node_IDs : Any
+            A list-like of node IDs.
+
+        Raises
+        ------
+        KeyError
+            If a node is not part of the network.
+
+        Returns
+        -------
+        np.ndarray
+            The positions of the nodes.
+
+        """
+
+        try:
+            return np.array(
+                [self.positions[node_ID] for node_ID in node_IDs], dtype=int
+            )
+        except KeyError as error:
+            raise KeyError(f"{error} not in the road network.") from None
+
+    def lookup(
+        self, sources: np.ndarray, targets: np.ndarray, field: int
+    ) -> np.ndarray:
+        """
+        Looks up the travel times or distances between sources and targets.
+
+        The searches from the sources are used if they are all available,
+        otherwise the searches to the targets if they are all available.
+        Otherwise, the searches of the smallest group are computed.
+
+        Parameters
+        ----------
+        sources : np.ndarray
+            The positions of the source nodes.
+        targets : np.ndarray
+            The positions of the target nodes.
+        field : int
+            0 for the travel times and 1 for the distances.
+
+        Returns
+        -------
+        np.ndarray
+            The values with a row per source and a column per target.
+
+        """
+
+        if all(self.is_available(position, True) for position in sources):
+            from_node = True
+        elif all(self.is_available(position, False) for position in targets):
+            from_node = False
+        else:
+            from_node = len(sources) <= len(targets)
+
+        if from_node:
+            return np.array(
+                [
+                    self.get_search(position, True)[field][targets]
+                    for position in sources
+                ]
+            ).reshape(len(sources), len(targets))
+        return (
+            np.array(
+                [
+                    self.get_search(position, False)[field][sources]
+                    for position in targets
+                ]
+            )
+            .reshape(len(targets), len(sources))
+            .T
+        )
+
+
+class RoadNetworkMatrix:
+    """
+    A class to represent the travel times or distances of a road network with
+    the lookup API of a dense matrix (``DataFrame``).
+
+    Attributes
+    ----------
+    network : RoadNetwork
+        The road network.
+    field : int
+        0 for the travel times and 1 for the distances.
+    loc : RoadNetworkIndexer
+        The label-based lookup, e.g., ``matrix.loc[source, target]``.
+
+    """
+
+    def __init__(self, network: RoadNetwork, field: int) -> None:
+        """
+        Initializes the matrix.
+
+        Parameters
+        ----------
+        network : RoadNetwork
+            The road network.
+        field : int
+            0 for the travel times and 1 for the distances.
+
+        """
+
+        self.network: RoadNetwork = network
+        self.field: int = field
+        self.loc: RoadNetworkIndexer = RoadNetworkIndexer(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "RoadNetworkMatrix":
+        return self
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """
+        The number of rows and columns, i.e., the number of nodes twice.
+
+        """
+        return (len(self.network.node_IDs), len(self.network.node_IDs))
+
+    @property
+    def index(self) -> pd.Index:
+        """
+        The source node IDs.
+
+        """
+        return self.network.node_IDs
+
+    @property
+    def columns(self) -> pd.Index:
+        """
+        The target node IDs.
+
+        """
+        return self.network.node_IDs
+
+
+class RoadNetworkIndexer:
+    """
+    A class for the ``.loc`` lookups of a ``RoadNetworkMatrix``.
+
+    Like ``DataFrame.loc``, a pair of scalars returns a float, a scalar and a
+    list-like return a ``Series`` and two list-likes return a ``DataFrame``.
+
+    Attributes
+    ----------
+    matrix : RoadNetworkMatrix
+        The matrix.
+
+    """
+
+    def __init__(self, matrix: RoadNetworkMatrix) -> None:
+        """
+        Initializes the indexer.
+
+        Parameters
+        ----------
+        matrix : RoadNetworkMatrix
+            The matrix.
+
+        """
+        self.matrix: RoadNetworkMatrix = matrix
+
+    def __getitem__(self, key: tuple[Any, Any]) -> Any:
+        """
+        Looks up the values of source (row) and target (column) node IDs.
+
+        Parameters
+        ----------
+        key : tuple[Any, Any]
+            The source node ID(s) and the target node ID(s).
+
+        Returns
+        -------
+        float | pd.Series | pd.DataFrame
+            The value(s), see the class description.
+
+        """
+
+        row_key, column_key = key
+        row_scalar = np.ndim(row_key) == 0
+        column_scalar = np.ndim(column_key) == 0
+        rows = [row_key] if row_scalar else list(row_key)
+        columns = [column_key] if column_scalar else list(column_key)
+
+        network = self.matrix.network
+        values = network.lookup(
+            network.get_positions(rows),
+            network.get_positions(columns),
+            self.matrix.field,
+        )
+
+        if row_scalar and column_scalar:
+            return values[0, 0]
+        if row_scalar:
+            return pd.Series(values[0], index=columns, name=row_key)
+        if column_scalar:
+            return pd.Series(values[:, 0], index=rows, name=column_key)
+        return pd.DataFrame(values, index=rows, columns=columns)
+
+
+def load_road_network(
+    SIMULATION_PARAMETERS: dict[str, Any], SIMULATION_DATA: dict[str, Any]
+) -> RoadNetwork:
+    """
+    Loads the road network and precomputes the searches from and to the
+    bases and hospitals.
+
+    Parameters
+    ----------
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The simulation parameters. The parameters ``DATA_DIRECTORY`` and
+        ``ROAD_NETWORK_FILE`` are at least necessary. If
+        ``ROAD_NETWORK_CACHE_SIZE`` is given, it is used as cache size. See
+        ``main.py`` for parameter explanations.
+    SIMULATION_DATA : dict[str, Any]
+        The simulation data. ``NODES_BASE_LOCATIONS`` and ``NODES_HOSPITAL``
+        are at least necessary.
+
+    Returns
+    -------
+    RoadNetwork
+        The road network.
+
+    """
+
+    edges = pd.read_csv(
+        f"{SIMULATION_PARAMETERS['DATA_DIRECTORY']}"
+        f"{SIMULATION_PARAMETERS['ROAD_NETWORK_FILE']}"
+    )
+    network = RoadNetwork(
+        edges, SIMULATION_PARAMETERS.get("ROAD_NETWORK_CACHE_SIZE", 1024)
+    )
+    network.precompute(
+        np.concatenate(
+            [
+                SIMULATION_DATA["NODES_BASE_LOCATIONS"]["Base Locations"],
+                SIMULATION_DATA["NODES_HOSPITAL"]["Hospital"],
+            ]
+        )
+    )
+    return network
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This script generates a synthetic region with an arbitrary number of nodes.
+
+The nodes are placed in a square region: a fraction ``CITY_FRACTION`` of the
+nodes is placed around ``NUM_CITIES`` city centres and the remaining nodes are
+placed uniformly. The inhabitants of the nodes are lognormally distributed,
+where nodes in a city get more inhabitants. The driving distance between two
+nodes is the Euclidean distance times ``DETOUR_FACTOR`` and the siren driving
+time is based on a speed that increases with the distance, from
+``MIN_SPEED`` to ``MAX_SPEED``, as longer trips use faster roads. The
+hospitals are placed at the nodes with the most inhabitants, the bases are
+spread over the region and the ambulances are assigned to the bases
+proportional to the inhabitants that are closest to each base.
+
+All files are saved in the formats of the input data section on the ELASPY
+website, such that they can directly be used by the simulator by changing the
+file names in ``main.py``.
+
+Parameters
+----------
+SEED_VALUE : int
+    The seed value of the random number generator.
+NUM_NODES : int
+    The number of nodes of the region.
+NUM_HOSPITALS : int
+    The number of hospitals.
+NUM_BASES : int
+    The number of bases.
+NUM_AMBULANCES : int
+    The number of ambulances.
+NUM_CITIES : int
+    The number of cities.
+CITY_FRACTION : float
+    The fraction of the nodes that is located in a city.
+CITY_RADIUS : float
+    The standard deviation (in km) of the location of the nodes around a city
+    centre.
+REGION_WIDTH : float
+    The width and height (in km) of the region.
+DETOUR_FACTOR : float
+    The ratio between the driving distance and the Euclidean distance.
+MIN_SPEED : float
+    The siren driving speed (in km/h) of very short trips.
+MAX_SPEED : float
+    The siren driving speed (in km/h) of very long trips.
+NUM_REGULAR_CHARGERS_BASE : int
+    The number of regular chargers at each base.
+NUM_FAST_CHARGERS_BASE : int
+    The number of fast chargers at each base.
+NUM_REGULAR_CHARGERS_HOSPITAL : int
+    The number of regular chargers at each hospital.
+NUM_FAST_CHARGERS_HOSPITAL : int
+    The number of fast chargers at each hospital.
+SPEED_REGULAR_CHARGERS : float
+    The speed (in kW) of the regular chargers.
+SPEED_FAST_CHARGERS : float
+    The speed (in kW) of the fast chargers.
+DATA_DIRECTORY : str
+    The folder, relative to the ``ROOT_DIRECTORY`` (automatically determined),
+    where the files should be saved.
+FLOAT_FORMAT : str
+    The format of the driving times and distances in the csv files.
+TRAVEL_TIMES_FILE, DISTANCE_FILE, NODES_FILE, HOSPITAL_FILE, BASE_LOCATIONS_FILE, AMBULANCE_BASE_LOCATIONS_FILE, CHARGING_SCENARIO_FILE : str
+    The names of the files that are created, see ``main.py``.
+"""
+from typing import Any
+
+import os
+import datetime
+import numpy as np
+import numpy.random as rnd
+import pandas as pd
+
+###################################Seed########################################
+SEED_VALUE: int = 1
+################################Directories####################################
+ROOT_DIRECTORY: str = os.path.dirname(os.path.dirname(__file__))
+DATA_DIRECTORY: str = os.path.join(ROOT_DIRECTORY, "data/")
+################################Parameters#####################################
+NUM_NODES: int = 1000
+NUM_HOSPITALS: int = 5
+NUM_BASES: int = 20
+NUM_AMBULANCES: int = 20
+NUM_CITIES: int = 5
+CITY_FRACTION: float = 0.6
+CITY_RADIUS: float = 3.0  # km
+REGION_WIDTH: float = 50.0  # km
+DETOUR_FACTOR: float = 1.3
+MIN_SPEED: float = 40.0  # km/h
+MAX_SPEED: float = 90.0  # km/h
+NUM_REGULAR_CHARGERS_BASE: int = 1
+NUM_FAST_CHARGERS_BASE: int = 0
+NUM_REGULAR_CHARGERS_HOSPITAL: int = 1
+NUM_FAST_CHARGERS_HOSPITAL: int = 0
+SPEED_REGULAR_CHARGERS: float = 11.0  # kW
+SPEED_FAST_CHARGERS: float = 50.0  # kW
+FLOAT_FORMAT: str = "%.4f"
+#################################File names####################################
+TRAVEL_TIMES_FILE: str = f"siren_driving_matrix_synthetic_{NUM_NODES}.csv"
+DISTANCE_FILE: str = f"distance_matrix_synthetic_{NUM_NODES}.csv"
+NODES_FILE: str = f"nodes_synthetic_{NUM_NODES}.csv"
+HOSPITAL_FILE: str = f"hospital_postal_codes_synthetic_{NUM_NODES}.csv"
+BASE_LOCATIONS_FILE: str = f"base_locations_synthetic_{NUM_NODES}.csv"
+AMBULANCE_BASE_LOCATIONS_FILE: str = (
+    f"ambulance_base_locations_synthetic_{NUM_NODES}_{NUM_AMBULANCES}.csv"
+)
+CHARGING_SCENARIO_FILE: str = f"charging_scenario_synthetic_{NUM_NODES}.csv"
+##################################Functions####################################
+
+
+def generate_nodes(
+    rng: rnd._generator.Generator,
+    NUM_NODES: int,
+    NUM_CITIES: int,
+    CITY_FRACTION: float,
+    CITY_RADIUS: float,
+    REGION_WIDTH: float,
+) -> pd.DataFrame:
+    """
+    Generates the nodes of the region.
+
+    Parameters
+    ----------
+    rng : rnd._generator.Generator
+        An initialized random number generator.
+    NUM_NODES : int
+        The number of nodes.
+    NUM_CITIES : int
+        The number of cities.
+    CITY_FRACTION : float
+        The fraction of the nodes that is located in a city.
+    CITY_RADIUS : float
+        The standard deviation (in km) of the location of the nodes around a
+        city centre.
+    REGION_WIDTH : float
+        The width and height (in km) of the region.
+
+    Returns
+    -------
+    pd.DataFrame
+        The nodes with the postal code as index and the columns "x", "y" (in
+        meters), "inhabitants" and "inhabitantsIncreasing".
+
+    """
+
+    num_city_nodes = int(round(CITY_FRACTION * NUM_NODES))
+    city_centres = rng.uniform(
+        0.2 * REGION_WIDTH, 0.8 * REGION_WIDTH, size=(NUM_CITIES, 2)
+    )
+    coordinates = np.vstack(
+        [
+            city_centres[rng.integers(NUM_CITIES, size=num_city_nodes)]
+            + rng.normal(0, CITY_RADIUS, size=(num_city_nodes, 2)),
+            rng.uniform(0, REGION_WIDTH, size=(NUM_NODES - num_city_nodes, 2)),
+        ]
+    )
+    coordinates = np.clip(coordinates, 0, REGION_WIDTH)
+
+    inhabitants = rng.lognormal(0, 1, size=NUM_NODES)
+    inhabitants[:num_city_nodes] *= 3
+
+    order = rng.permutation(NUM_NODES)
+    coordinates = coordinates[order]
+    inhabitants = inhabitants[order] / inhabitants.sum()
+    inhabitants_increasing = np.cumsum(inhabitants)
+    # Ensures that every uniform number is smaller than the last value.
+    inhabitants_increasing[-1] = 1.0
+
+    return pd.DataFrame(
+        {
+            "x": coordinates[:, 0] * 1000,
+            "y": coordinates[:, 1] * 1000,
+            "inhabitants": inhabitants,
+            "inhabitantsIncreasing": inhabitants_increasing,
+        },
+        index=pd.Index(np.arange(1, NUM_NODES + 1), name="postal code"),
+    )
+
+
+def calculate_driving_matrices(
+    nodes: pd.DataFrame,
+    DETOUR_FACTOR: float,
+    MIN_SPEED: float,
+    MAX_SPEED: float,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Calculates the siren driving times and the driving distances between all
+    nodes.
+
+    The speed of a trip of ``d`` km is
+    ``MIN_SPEED + (MAX_SPEED - MIN_SPEED) * (1 - exp(-d / 15))``.
+
+    Parameters
+    ----------
+    nodes : pd.DataFrame
+        The nodes, see ``generate_nodes``.
+    DETOUR_FACTOR : float
+        The ratio between the driving distance and the Euclidean distance.
+    MIN_SPEED : float
+        The siren driving speed (in km/h) of very short trips.
+    MAX_SPEED : float
+        The siren driving speed (in km/h) of very long trips.
+
+    Returns
+    -------
+    siren_driving_matrix : pd.DataFrame
+        The siren driving times in minutes.
+    distance_matrix : pd.DataFrame
+        The driving distances in km.
+
+    """
+
+    coordinates = nodes[["x", "y"]].to_numpy() / 1000
+    distances = np.empty((len(nodes), len(nodes)))
+    driving_times = np.empty((len(nodes), len(nodes)))
+
+    # The matrices are filled in blocks of rows to limit the memory usage of
+    # the intermediate arrays.
+    block_size = max(1, 2**22 // len(nodes))
+    for start in range(0, len(nodes), block_size):
+        rows = slice(start, start + block_size)
+        distances[rows] = DETOUR_FACTOR * np.sqrt(
+            np.sum(
+                (coordinates[rows, None, :] - coordinates[None, :, :]) ** 2,
+                axis=2,
+            )
+        )
+        speeds = MIN_SPEED + (MAX_SPEED - MIN_SPEED) * (
+            1 - np.exp(-distances[rows] / 15)
+        )
+        driving_times[rows] = distances[rows] / speeds * 60
+
+    return (
+        pd.DataFrame(driving_times, index=nodes.index, columns=nodes.index),
+        pd.DataFrame(distances, index=nodes.index, columns=nodes.index),
+    )
+
+
+def select_bases(
+    nodes: pd.DataFrame, siren_driving_matrix: pd.DataFrame, NUM_BASES: int
+) -> np.ndarray:
+    """
+    Selects the bases such that they are spread over the region.
+
+    The first base is the node with the most inhabitants. Each next base is
+    the node with the largest driving time to its closest base, weighted by
+    the square root of its inhabitants (farthest point sampling).
+
+    Parameters
+    ----------
+    nodes : pd.DataFrame
+        The nodes, see ``generate_nodes``.
+    siren_driving_matrix : pd.DataFrame
+        The siren driving times in minutes.
+    NUM_BASES : int
+        The number of bases.
+
+    Returns
+    -------
+    np.ndarray
+        The postal codes of the bases.
+
+    """
+
+    driving_times = siren_driving_matrix.to_numpy()
+    weights = np.sqrt(nodes["inhabitants"].to_numpy())
+    base_indices = [int(np.argmax(weights))]
+    time_to_closest_base = driving_times[base_indices[0]].copy()
+    for _ in range(1, NUM_BASES):
+        base_indices.append(int(np.argmax(weights * time_to_closest_base)))
+        time_to_closest_base = np.minimum(
+            time_to_closest_base, driving_times[base_indices[-1]]
+        )
+
+    return nodes.index.to_numpy()[base_indices]
+
+
+def assign_ambulances(
+    nodes: pd.DataFrame,
+    siren_driving_matrix: pd.DataFrame,
+    bases: np.ndarray,
+    NUM_AMBULANCES: int,
+) -> pd.DataFrame:
+    """
+    Assigns the ambulances to the bases proportional to the inhabitants that
+    are closest to each base (largest remainder method).
+
+    Parameters
+    ----------
+    nodes : pd.DataFrame
+        The nodes, see ``generate_nodes``.
+    siren_driving_matrix : pd.DataFrame
+        The siren driving times in minutes.
+    bases : np.ndarray
+        The postal codes of the bases.
+    NUM_AMBULANCES : int
+        The number of ambulances.
+
+    Returns
+    -------
+    pd.DataFrame
+        The base of each ambulance, with the ambulance ID as index ("Ambulance")
+        and the column "Base".
+
+    """
+
+    closest_base = np.argmin(
+        siren_driving_matrix.loc[bases].to_numpy(), axis=0
+    )
+    demand = np.bincount(
+        closest_base,
+        weights=nodes["inhabitants"].to_numpy(),
+        minlength=len(bases),
+    )
+    quota = NUM_AMBULANCES * demand / demand.sum()
+    ambulances_per_base = np.floor(quota).astype(int)
+    remainders = np.argsort(ambulances_per_base - quota, kind="stable")
+    ambulances_per_base[
+        remainders[: NUM_AMBULANCES - ambulances_per_base.sum()]
+    ] += 1
+
+    return pd.DataFrame(
+        {"Base": np.repeat(bases, ambulances_per_base)},
+        index=pd.Index(np.arange(NUM_AMBULANCES), name="Ambulance"),
+    )
+
+
+def generate_synthetic_region(
+    rng: rnd._generator.Generator,
+    NUM_NODES: int,
+    NUM_HOSPITALS: int,
+    NUM_BASES: int,
+    NUM_AMBULANCES: int,
+    CHARGERS: dict[str, Any],
+    NUM_CITIES: int = 5,
+    CITY_FRACTION: float = 0.6,
+    CITY_RADIUS: float = 3.0,
+    REGION_WIDTH: float = 50.0,
+    DETOUR_FACTOR: float = 1.3,
+    MIN_SPEED: float = 40.0,
+    MAX_SPEED: float = 90.0,
+) -> dict[str, pd.DataFrame]:
+    """
+    Generates all region data of a synthetic region.
+
+    Parameters
+    ----------
+    rng : rnd._generator.Generator
+        An initialized random number generator.
+    NUM_NODES : int
+        The number of nodes.
+    NUM_HOSPITALS : int
+        The number of hospitals.
+    NUM_BASES : int
+        The number of bases.
+    NUM_AMBULANCES : int
+        The number of ambulances.
+    CHARGERS : dict[str, Any]
+        The number of regular and fast chargers at each base
+        ("NUM_REGULAR_CHARGERS_BASE", "NUM_FAST_CHARGERS_BASE") and at each
+        hospital ("NUM_REGULAR_CHARGERS_HOSPITAL",
+        "NUM_FAST_CHARGERS_HOSPITAL") and the speed of the chargers
+        ("SPEED_REGULAR_CHARGERS", "SPEED_FAST_CHARGERS").
+    NUM_CITIES, CITY_FRACTION, CITY_RADIUS, REGION_WIDTH : optional
+        See ``generate_nodes``.
+    DETOUR_FACTOR, MIN_SPEED, MAX_SPEED : optional
+        See ``calculate_driving_matrices``.
+
+    Raises
+    ------
+    Exception
+        If there are more hospitals or bases than nodes.
+
+    Returns
+    -------
+    dict[str, pd.DataFrame]
+        The region data with the same keys as ``SIMULATION_DATA``, see
+        ``load_region_data``. It can be added to ``SIMULATION_DATA`` directly.
+
+    """
+
+    if max(NUM_HOSPITALS, NUM_BASES) > NUM_NODES:
+        raise Exception(
+            "The number of hospitals and the number of bases should not be "
+            "larger than the number of nodes."
+        )
+
+    nodes = generate_nodes(
+        rng, NUM_NODES, NUM_CITIES, CITY_FRACTION, CITY_RADIUS, REGION_WIDTH
+    )
+    siren_driving_matrix, distance_matrix = calculate_driving_matrices(
+        nodes, DETOUR_FACTOR, MIN_SPEED, MAX_SPEED
+    )
+    hospitals = nodes["inhabitants"].nlargest(NUM_HOSPITALS).index.to_numpy()
+    bases = select_bases(nodes, siren_driving_matrix, NUM_BASES)
+
+    charging_scenario = pd.DataFrame(
+        {
+            "Number of regular chargers": [
+                CHARGERS["NUM_REGULAR_CHARGERS_HOSPITAL"]
+            ]
+            * NUM_HOSPITALS
+            + [CHARGERS["NUM_REGULAR_CHARGERS_BASE"]] * NUM_BASES,
+            "Speed regular chargers (kW)": CHARGERS["SPEED_REGULAR_CHARGERS"],
+            "Number of fast chargers": [CHARGERS["NUM_FAST_CHARGERS_HOSPITAL"]]
+            * NUM_HOSPITALS
+            + [CHARGERS["NUM_FAST_CHARGERS_BASE"]] * NUM_BASES,
+            "Speed fast chargers (kW)": CHARGERS["SPEED_FAST_CHARGERS"],
+        },
+        index=pd.Index(
+            [f"{hospital}H" for hospital in hospitals]
+            + [f"{base}B" for base in bases],
+            name="Location",
+        ),
+    )
+
+    return {
+        "SIREN_DRIVING_MATRIX": siren_driving_matrix,
+        "DISTANCE_MATRIX": distance_matrix,
+        "NODES_REGION": nodes,
+        "NODES_HOSPITAL": pd.DataFrame({"Hospital": hospitals}),
+        "NODES_BASE_LOCATIONS": pd.DataFrame({"Base Locations": bases}),
+        "AMBULANCE_BASE_LOCATIONS": assign_ambulances(
+            nodes, siren_driving_matrix, bases, NUM_AMBULANCES
+        ),
+        "CHARGING_STATIONS_SCENARIO": charging_scenario,
+    }
+
+
+def save_synthetic_region(
+    region: dict[str, pd.DataFrame],
+    SIMULATION_PARAMETERS: dict[str, Any],
+    FLOAT_FORMAT: str = "%.4f",
+) -> None:
+    """
+    Saves the region data in the formats that are read by
+    ``load_region_data``.
+
+    Parameters
+    ----------
+    region : dict[str, pd.DataFrame]
+        The region data, see ``generate_synthetic_region``.
+    SIMULATION_PARAMETERS : dict[str, Any]
+        The parameters ``DATA_DIRECTORY``, ``TRAVEL_TIMES_FILE``,
+        ``DISTANCE_FILE``, ``NODES_FILE``, ``HOSPITAL_FILE``,
+        ``BASE_LOCATIONS_FILE``, ``AMBULANCE_BASE_LOCATIONS_FILE`` and
+        ``CHARGING_SCENARIO_FILE`` are at least necessary. See ``main.py`` for
+        parameter explanations.
+    FLOAT_FORMAT : str, optional
+        The format of the driving times and distances. The default is "%.4f".
+
+    """
+
+    directory = SIMULATION_PARAMETERS["DATA_DIRECTORY"]
+    for key, file_name in [
+        ("SIREN_DRIVING_MATRIX", "TRAVEL_TIMES_FILE"),
+        ("DISTANCE_MATRIX", "DISTANCE_FILE"),
+    ]:
+        matrix = region[key]
+        with open(
+            f"{directory}{SIMULATION_PARAMETERS[file_name]}",
+            "w",
+            encoding="utf-8",
+        ) as f:
+            f.write(
+                "postal code,"
+                + ",".join(str(column) for column in matrix.columns)
+                + "\n"
+            )
+            # The rows are written in blocks with numpy, which is much faster
+            # than pandas for large matrices and limits the memory usage.
+            block_size = max(1, 2**20 // len(matrix))
+            for start in range(0, len(matrix), block_size):
+                block = matrix.iloc[start : start + block_size]
+                np.savetxt(
+                    f,
+                    np.column_stack([block.index, block.to_numpy()]),
+                    fmt=["%d"] + [FLOAT_FORMAT] * len(matrix.columns),
+                    delimiter=",",
+                )
+            f.close()
+
+    region["NODES_REGION"].to_csv(
+        f"{directory}{SIMULATION_PARAMETERS['NODES_FILE']}"
+    )
+    region["NODES_HOSPITAL"].to_csv(
+        f"{directory}{SIMULATION_PARAMETERS['HOSPITAL_FILE']}", index=False
+    )
+    region["NODES_BASE_LOCATIONS"].to_csv(
+        f"{directory}{SIMULATION_PARAMETERS['BASE_LOCATIONS_FILE']}",
+        index=False,
+    )
+    region["AMBULANCE_BASE_LOCATIONS"].to_csv(
+        f"{directory}{SIMULATION_PARAMETERS['AMBULANCE_BASE_LOCATIONS_FILE']}"
+    )
+    region["CHARGING_STATIONS_SCENARIO"].to_csv(
+        f"{directory}{SIMULATION_PARAMETERS['CHARGING_SCENARIO_FILE']}"
+    )
+
+
+##################################Generation###################################
+if __name__ == "__main__":
+    start_time = datetime.datetime.now()
+
+    region = generate_synthetic_region(
+        rnd.default_rng(SEED_VALUE),
+        NUM_NODES,
+        NUM_HOSPITALS,
+        NUM_BASES,
+        NUM_AMBULANCES,
+        {
+            "NUM_REGULAR_CHARGERS_BASE": NUM_REGULAR_CHARGERS_BASE,
+            "NUM_FAST_CHARGERS_BASE": NUM_FAST_CHARGERS_BASE,
+            "NUM_REGULAR_CHARGERS_HOSPITAL": NUM_REGULAR_CHARGERS_HOSPITAL,
+            "NUM_FAST_CHARGERS_HOSPITAL": NUM_FAST_CHARGERS_HOSPITAL,
+            "SPEED_REGULAR_CHARGERS": SPEED_REGULAR_CHARGERS,
+            "SPEED_FAST_CHARGERS": SPEED_FAST_CHARGERS,
+        },
+        NUM_CITIES,
+        CITY_FRACTION,
+        CITY_RADIUS,
+        REGION_WIDTH,
+        DETOUR_FACTOR,
+        MIN_SPEED,
+        MAX_SPEED,
+    )
+    print(f"The region is generated in {datetime.datetime.now()-start_time}.")
+
+    ####################################Output#################################
+    save_synthetic_region(
+        region,
+        {
+            "DATA_DIRECTORY": DATA_DIRECTORY,
+            "TRAVEL_TIMES_FILE": TRAVEL_TIMES_FILE,
+            "DISTANCE_FILE": DISTANCE_FILE,
+            "NODES_FILE": NODES_FILE,
+            "HOSPITAL_FILE": HOSPITAL_FILE,
+            "BASE_LOCATIONS_FILE": BASE_LOCATIONS_FILE,
+            "AMBULANCE_BASE_LOCATIONS_FILE": AMBULANCE_BASE_LOCATIONS_FILE,
+            "CHARGING_SCENARIO_FILE": CHARGING_SCENARIO_FILE,
+        },
+        FLOAT_FORMAT,
+    )
+    print(
+        f"The region is saved in {DATA_DIRECTORY} in "
+        f"{datetime.datetime.now()-start_time}."
+    )
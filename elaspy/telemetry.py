@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module contains the opt-in telemetry of the simulator.
+
+The telemetry samples the queue length, the number of available and charging
+ambulances and the mean state of charge of the fleet at a fixed interval
+during a simulation run. The counters are maintained incrementally by the
+ambulances, so a sample takes constant time regardless of the fleet size.
+"""
+from typing import Any
+from collections import deque
+
+import simpy as sp
+import numpy as np
+
+TELEMETRY_COLUMNS: list[str] = [
+    "time",
+    "queue_length",
+    "nr_ambulances_available",
+    "nr_ambulances_charging",
+    "mean_state_of_charge",
+]
+
+
+class FleetTelemetry:
+    """
+    A class to record the state of the fleet and the patient queue over time.
+
+    The counters are updated by the ambulances when their state changes, so
+    the ambulances do not have to be inspected when a sample is taken. An
+    ambulance is available if it is not assigned to or helping a patient,
+    like in ``check_select_ambulance``. The state of charge includes the
+    battery increase of the charging sessions that are in progress.
+
+    Attributes
+    ----------
+    env : sp.core.Environment
+        The SimPy environment.
+    patient_queue : deque
+        The patient queue.
+    INTERVAL : float
+        The time (in minutes) between two samples.
+    nr_ambulances : int
+        The number of ambulances.
+    total_capacity : float
+        The total battery capacity of the fleet (kWh).
+    nr_ambulances_available : int
+        The current number of available ambulances.
+    nr_ambulances_charging : int
+        The current number of charging ambulances.
+    total_battery : float
+        The current total battery level of the fleet (kWh), excluding the
+        charging sessions that are in progress.
+    charging_speed : float
+        The sum of the charging speeds (kW) of the charging ambulances.
+    charging_start : float
+        The sum of the start times of the charging sessions times their
+        charging speeds.
+    samples : np.ndarray
+        The preallocated samples, with the columns ``TELEMETRY_COLUMNS``.
+    nr_samples : int
+        The number of samples that are taken.
+
+    """
+
+    def __init__(
+        self,
+        env: sp.core.Environment,
+        ambulances: list[Any],
+        patient_queue: deque,
+        INTERVAL: float,
+        EXPECTED_END_TIME: float,
+    ) -> None:
+        """
+        Initializes the telemetry and registers it at the ambulances.
+
+        Parameters
+        ----------
+        env : sp.core.Environment
+            The SimPy environment.
+        ambulances : list[Ambulance]
+            A list of ambulances at the start of the simulation.
+        patient_queue : deque
+            The patient queue.
+        INTERVAL : float
+            The time (in minutes) between two samples.
+        EXPECTED_END_TIME : float
+            The expected end time of the simulation, which is used to allocate
+            the samples. More samples are allocated if necessary.
+
+        """
+
+        self.env: sp.core.Environment = env
+        self.patient_queue: deque = patient_queue
+        self.INTERVAL: float = INTERVAL
+        self.nr_ambulances: int = len(ambulances)
+        self.total_capacity: float = sum(
+            ambulance.MAX_BATTERY_LEVEL for ambulance in ambulances
+        )
+        self.nr_ambulances_available: int = self.nr_ambulances
+        self.nr_ambulances_charging: int = 0
+        self.total_battery: float = sum(
+            ambulance.battery for ambulance in ambulances
+        )
+        self.charging_speed: float = 0.0
+        self.charging_start: float = 0.0
+        self.samples: np.ndarray = np.full(
+            (int(EXPECTED_END_TIME / INTERVAL) + 2, len(TELEMETRY_COLUMNS)),
+            np.nan,
+        )
+        self.nr_samples: int = 0
+
+        for ambulance in ambulances:
+            ambulance.telemetry = self
+
+    def ambulance_assigned(self) -> None:
+        """
+        Registers that an available ambulance is assigned to a patient.
+
+        """
+        self.nr_ambulances_available -= 1
+
+    def ambulance_released(self) -> None:
+        """
+        Registers that an ambulance is available again.
+
+        """
+        self.nr_ambulances_available += 1
+
+    def charging_started(self, speed_charger: float) -> None:
+        """
+        Registers that an ambulance starts charging now.
+
+        Parameters
+        ----------
+        speed_charger : float
+            The speed of the charger (kW).
+
+        """
+        self.nr_ambulances_charging += 1
+        self.charging_speed += speed_charger
+        self.charging_start += speed_charger * self.env.now
+
+    def charging_stopped(
+        self, speed_charger: float, charging_since: float
+    ) -> None:
+        """
+        Registers that an ambulance stops charging.
+
+        Parameters
+        ----------
+        speed_charger : float
+            The speed of the charger (kW).
+        charging_since : float
+            The start time of the charging session.
+
+        """
+        self.nr_ambulances_charging -= 1
+        self.charging_speed -= speed_charger
+        self.charging_start -= speed_charger * charging_since
+
+    def battery_changed(self, change: float) -> None:
+        """
+        Registers a change of the battery level of an ambulance.
+
+        Parameters
+        ----------
+        change : float
+            The change of the battery level (kWh).
+
+        """
+        self.total_battery += change
+
+    def sample(self):
+        """
+        Samples the counters every ``INTERVAL`` minutes until all other events
+        of the simulation are processed.
+
+        Yields
+        ------
+        simpy.events.Timeout
+            The time until the next sample.
+
+        """
+
+        while True:
+            if self.nr_samples == len(self.samples):
+                self.samples = np.vstack(
+                    [self.samples, np.full_like(self.samples, np.nan)]
+                )
+
+            if np.isinf(self.total_capacity):
+                mean_state_of_charge = np.nan
+            else:
+                mean_state_of_charge = (
+                    self.total_battery
+                    + (
+                        self.env.now * self.charging_speed
+                        - self.charging_start
+                    )
+                    / 60
+                ) / self.total_capacity
+            self.samples[self.nr_samples] = (
+                self.env.now,
+                len(self.patient_queue),
+                self.nr_ambulances_available,
+                self.nr_ambulances_charging,
+                mean_state_of_charge,
+            )
+            self.nr_samples += 1
+
+            # The simulation ends when no other events are scheduled.
+            if self.env.peek() == np.inf:
+                break
+            yield self.env.timeout(self.INTERVAL)
+
+    def get_samples(self) -> np.ndarray:
+        """
+        Returns the samples that are taken.
+
+        Returns
+        -------
+        np.ndarray
+            The samples, with the columns ``TELEMETRY_COLUMNS``.
+
+        """
+        return self.samples[: self.nr_samples]
@@ -7,12 +7,70 @@ Created on Fri Jun 16 13:37:16 2023
 """
 
 import os
+import copy
+import itertools
+import pytest
+import scipy
 import numpy as np
+import simpy as sp
 import pandas as pd
+import pulp
+import ambulance_simulation
 
 from ambulance import Ambulance
-from ambulance_simulation import run_simulation
-from input_output_functions import calculate_response_time_ecdf
+from collections import deque
+from ambulance_simulation import (
+    run_simulation,
+    load_region_data,
+    generate_antithetic_inputs,
+    check_arrival_rates,
+    generate_arrival_times_rate_function,
+    location_generator_rate_function,
+)
+from input_output_functions import (
+    calculate_response_time_ecdf,
+    calculate_busy_fraction,
+    calculate_busy_fractions,
+    calculate_busy_fraction_profile,
+)
+from base_location_optimization import compare_paired
+from benchmark import compare_with_baseline
+from profiling import timed_function, count_events, profile_simulation
+from telemetry import FleetTelemetry
+from road_network import RoadNetwork
+from matrix_storage import QuantizedMatrix, create_precision_report
+from columnar_output import save_columnar_output, load_columnar_output
+from async_output import AsyncOutputWriter
+from output_columns import (
+    OutputColumns,
+    PATIENT_COLUMN_TYPES,
+    AMBULANCE_COLUMN_TYPES,
+)
+from results_store import (
+    PATIENT_OUTPUT_COLUMNS,
+    ResultsStore,
+    calculate_input_checksums,
+)
+from bootstrap import calculate_bootstrap_cis
+from ambulance_simulation import start_simulation, finish_simulation
+from output_analysis import (
+    calculate_mser,
+    calculate_batch_means_ci,
+    calculate_batch_quantile_ci,
+    calculate_control_variate_ci,
+)
+from forking import simulate_until, fork_simulation
+from charger_allocation_optimization import calculate_ocba_allocation
+from hypercube_approximation import (
+    approximate_hypercube,
+    calculate_truncated_lognormal_mean,
+)
+from synthetic_region import generate_synthetic_region, save_synthetic_region
+from optimization_parser import (
+    aggregate_charger_utilization,
+    calculate_charger_utilization,
+    select_location_remove_charger,
+)
 
 
 def test_calculate_charging_time():
@@ -40,6 +98,1370 @@ def test_calculate_battery_reduction_idling():
     )
 
 
+def test_calculate_busy_fractions():
+    """
+    Suppose ambulance 0 is busy during (1, 4) and ambulance 1 during (3, 8).
+    Then in the window (2, 6) ambulance 0 is busy for 2 minutes and
+    ambulance 1 for 3 minutes, so the busy fraction of the two ambulances is
+    5/(4*2). In the window (0, 2) only ambulance 0 is busy, for 1 minute.
+    """
+
+    assignment_times = np.array([3.0, 1.0])
+    finish_times = np.array([8.0, 4.0])
+    window_starts = np.array([2.0, 0.0])
+    window_ends = np.array([6.0, 2.0])
+
+    assert np.allclose(
+        calculate_busy_fractions(
+            assignment_times, finish_times, window_starts, window_ends, 2
+        ),
+        [5 / 8, 1 / 4],
+    )
+    assert np.allclose(
+        calculate_busy_fractions(
+            assignment_times,
+            finish_times,
+            window_starts,
+            window_ends,
+            2,
+            np.array([1, 0]),
+        ),
+        [[2 / 4, 1 / 2], [3 / 4, 0]],
+    )
+
+
+def test_calculate_busy_fraction_profile():
+    """
+    Suppose ambulance 0 is busy during (30, 90) and ambulance 1 during
+    (100, 190), and the run from 0 to 210 is divided into hourly bins with a
+    period of two hours. The first hour of the period consists of (0, 60) and
+    (120, 180), in which ambulance 0 is busy for 30 minutes and ambulance 1
+    for 60 minutes. The second hour consists of (60, 120) and the shortened
+    bin (180, 210), in which both ambulances are busy for 30 minutes.
+    """
+
+    df_patient = pd.DataFrame(
+        {
+            "arrival_time": [25.0, 95.0],
+            "waiting_time_before_assigned": [5.0, 5.0],
+            "finish_time": [90.0, 190.0],
+            "assigned_to_ambulance_nr": [0, 1],
+        }
+    )
+    SIMULATION_PARAMETERS = {
+        "AT_BOUNDARY": 0,
+        "FT_BOUNDARY": 210,
+        "NUM_AMBULANCES": 2,
+    }
+
+    assert np.allclose(
+        calculate_busy_fraction_profile(
+            df_patient, SIMULATION_PARAMETERS, BIN_WIDTH=60, PERIOD=120
+        ),
+        [90 / (2 * 120), 60 / (2 * 90)],
+    )
+    assert np.allclose(
+        calculate_busy_fraction_profile(
+            df_patient,
+            SIMULATION_PARAMETERS,
+            BIN_WIDTH=60,
+            PERIOD=120,
+            per_ambulance=True,
+        ),
+        [[30 / 120, 30 / 90], [60 / 120, 30 / 90]],
+    )
+    with pytest.raises(Exception):
+        calculate_busy_fraction_profile(
+            df_patient, SIMULATION_PARAMETERS, BIN_WIDTH=50, PERIOD=120
+        )
+
+
+def test_calculate_busy_fraction_does_not_alter_input():
+    """
+    The busy fraction of a single window should equal the overlap of every
+    busy interval with the window, and the input dataframe should not change.
+    """
+
+    rng = np.random.default_rng(0)
+    arrival_times = np.sort(rng.uniform(0, 1000, 200))
+    df_patient = pd.DataFrame(
+        {
+            "arrival_time": arrival_times,
+            "waiting_time_before_assigned": rng.uniform(0, 5, 200),
+            "finish_time": arrival_times + rng.uniform(5, 120, 200),
+        }
+    )
+    df_patient_copy = df_patient.copy()
+    SIMULATION_PARAMETERS = {
+        "AT_BOUNDARY": 100,
+        "FT_BOUNDARY": 900,
+        "NUM_AMBULANCES": 10,
+    }
+
+    assignment_times = (
+        df_patient["arrival_time"] + df_patient["waiting_time_before_assigned"]
+    )
+    overlap = np.clip(
+        np.minimum(df_patient["finish_time"], 900)
+        - np.maximum(assignment_times, 100),
+        0,
+        None,
+    )
+
+    assert np.isclose(
+        calculate_busy_fraction(df_patient, SIMULATION_PARAMETERS),
+        overlap.sum() / (800 * 10),
+    )
+    pd.testing.assert_frame_equal(df_patient, df_patient_copy)
+
+
+def test_calculate_charger_utilization():
+    """
+    Suppose a location with 2 chargers was charged for 30 minutes in a run of
+    60 minutes. Then the utilization is 30/(2*60) and the probability that at
+    least one charger is available is 1-(30/120)^2. A location that is absent
+    in the charging times has utilization 0. A charger should be removed at
+    the location with the largest probability, but not at a base with one
+    charger.
+    """
+
+    result_df = calculate_charger_utilization(
+        [({"3584H": 30.0, "3812B": 12.0}, 60.0), ({"3584H": 60.0}, 120.0)],
+        pd.Series({"3584H": 2, "3812B": 1, "3417B": 2}),
+    )
+
+    assert np.allclose(result_df["Utilization"], [1 / 4, 1 / 10, 0])
+    assert np.allclose(result_df["Probability"], [1 - 1 / 16, 1 - 1 / 10, 1])
+    assert select_location_remove_charger(result_df)["Location"] == "3417B"
+
+
+def test_aggregate_charger_utilization():
+    """
+    The utilization and availability probability of the charging locations
+    should be equal to those of the previous parser, which selected the
+    charging sessions of each location in each run separately.
+    """
+
+    ROOT_DIRECTORY = os.path.dirname(os.path.dirname(__file__))
+    file_paths = [
+        os.path.join(
+            ROOT_DIRECTORY, f"data/unit_tests/Ambulance_Test_Electric_{i}.csv"
+        )
+        for i in [4, 5, 6, 7]
+    ]
+    ambulance_dfs = [
+        pd.read_csv(file_path, index_col=0) for file_path in file_paths
+    ]
+    charging_df = pd.concat(ambulance_dfs).dropna(
+        subset=["charging_location_ID"]
+    )
+    locations = sorted(
+        set(
+            charging_df["charging_location_ID"].astype(int).astype(str)
+            + np.where(charging_df["charging_type"] == 2, "B", "H")
+        )
+    ) + ["9999B"]
+    number_of_chargers = pd.Series(
+        np.random.default_rng(6).integers(1, 4, len(locations)),
+        index=locations,
+    )
+
+    expected_utilizations = []
+    expected_probabilities = []
+    for location in locations:
+        postal_code = int(location[0:4])
+        charging_types = [2] if location[4] == "B" else [0, 1]
+        utilizations = []
+        probabilities = []
+        for ambulance_df in ambulance_dfs:
+            total_charge_time = ambulance_df.loc[
+                (ambulance_df["charging_location_ID"] == postal_code)
+                & ambulance_df["charging_type"].isin(charging_types),
+                "charging_time",
+            ].sum()
+            utilization = total_charge_time / (
+                number_of_chargers[location] * ambulance_df.iloc[-1]["time"]
+            )
+            utilizations.append(utilization)
+            probabilities.append(
+                1 - np.power(utilization, number_of_chargers[location])
+            )
+        expected_utilizations.append(np.mean(utilizations))
+        expected_probabilities.append(np.mean(probabilities))
+
+    for NUM_WORKERS in [1, 2]:
+        result_df = aggregate_charger_utilization(
+            file_paths, number_of_chargers, NUM_WORKERS
+        )
+        assert list(result_df["Location"]) == locations
+        assert np.allclose(
+            result_df["Utilization"], expected_utilizations, rtol=1e-12
+        )
+        assert np.allclose(
+            result_df["Probability"], expected_probabilities, rtol=1e-12
+        )
+    assert result_df["Utilization"].iloc[-1] == 0
+
+
+def test_calculate_ocba_allocation():
+    """
+    OCBA should allocate the complete budget increment, give no replications
+    to a candidate that is clearly worse than the best candidate and give
+    (almost) equal replications to candidates with the same mean and
+    standard deviation.
+    """
+
+    additional_replications = calculate_ocba_allocation(
+        np.array([1.3, 1.0, 5.0, 1.3]),
+        np.array([0.5, 0.5, 0.5, 0.5]),
+        np.array([5, 5, 5, 5]),
+        21,
+    )
+
+    assert additional_replications.sum() == 21
+    assert additional_replications[2] == 0
+    assert abs(additional_replications[0] - additional_replications[3]) <= 1
+
+
+def test_compare_paired():
+    """
+    A candidate that is 1 minute faster in every run with common random
+    numbers is significantly better, even if the runs themselves vary a lot.
+    A candidate whose differences are centred around 0 is not.
+    """
+
+    incumbent_results = np.array([10.0, 20.0, 15.0, 30.0])
+
+    assert compare_paired(
+        incumbent_results, incumbent_results - 1.0, 0.05
+    ) == (-1.0, True)
+    assert not compare_paired(
+        incumbent_results, incumbent_results + [-1, 1, -1, 0.5], 0.05
+    )[1]
+
+
+def test_approximate_hypercube():
+    """
+    With a single ambulance, the hypercube model is the M/M/1 queue, so the
+    utilization is the arrival rate times the mean service time. The
+    response times of calls that have to wait include the mean waiting time.
+    """
+
+    SIMULATION_PARAMETERS = {
+        "CALL_LAMBDA": 1 / 100,
+        "PROB_GO_TO_HOSPITAL": 0.0,
+        "AID_PARAMETERS": [0.38, -10.01, 37.00, 88],
+        "DROP_OFF_PARAMETERS": [0.39, -8.25, 35.89, 88],
+        "NO_SIREN_PENALTY": 1.0,
+    }
+    SIMULATION_DATA = {
+        "NODES_REGION": pd.DataFrame(
+            {"inhabitants": [0.5, 0.5]}, index=[1, 2]
+        ),
+        "SIREN_DRIVING_MATRIX": pd.DataFrame(
+            [[0.0, 10.0], [10.0, 0.0]], index=[1, 2], columns=[1, 2]
+        ),
+        "NODES_HOSPITAL": pd.DataFrame({"Hospital": [2]}),
+        "AMBULANCE_BASE_LOCATIONS": pd.DataFrame({"Base": [1]}),
+    }
+
+    result = approximate_hypercube(SIMULATION_PARAMETERS, SIMULATION_DATA)
+    aid_mean = result["mean_service_time"] - 10.0
+
+    assert 20 < aid_mean < 40
+    assert np.allclose(
+        result["utilization"], [result["mean_service_time"] / 100]
+    )
+    assert np.isclose(result["delay_probability"], result["utilization"][0])
+    assert np.isclose(result["response_time_probabilities"].sum(), 1.0)
+    assert np.allclose(
+        result["response_times"][:, 1] - [0.0, 10.0],
+        result["mean_service_time"] / (1 - result["utilization"][0]),
+    )
+
+
+def test_approximate_hypercube_arrival_rates():
+    """
+    With arrival rates per postal code, the hypercube model uses their time
+    average, which gives the same result as the constant rate and demand.
+    """
+
+    SIMULATION_PARAMETERS = {
+        "CALL_LAMBDA": 1 / 100,
+        "ARRIVAL_RATE_FILE": None,
+        "PROB_GO_TO_HOSPITAL": 0.5,
+        "AID_PARAMETERS": [0.38, -10.01, 37.00, 88],
+        "DROP_OFF_PARAMETERS": [0.39, -8.25, 35.89, 88],
+        "NO_SIREN_PENALTY": 1.2,
+    }
+    SIMULATION_DATA = {
+        "NODES_REGION": pd.DataFrame(
+            {"inhabitants": [0.75, 0.25]}, index=[1, 2]
+        ),
+        "SIREN_DRIVING_MATRIX": pd.DataFrame(
+            [[0.0, 10.0], [10.0, 0.0]], index=[1, 2], columns=[1, 2]
+        ),
+        "NODES_HOSPITAL": pd.DataFrame({"Hospital": [2]}),
+        "AMBULANCE_BASE_LOCATIONS": pd.DataFrame({"Base": [1, 2]}),
+    }
+    result = approximate_hypercube(SIMULATION_PARAMETERS, SIMULATION_DATA)
+
+    SIMULATION_PARAMETERS |= {"CALL_LAMBDA": None, "ARRIVAL_RATE_FILE": "x"}
+    SIMULATION_DATA["NODES_REGION"] = pd.DataFrame(index=[1, 2])
+    SIMULATION_DATA["ARRIVAL_RATES"] = pd.DataFrame(
+        {
+            "start_time": [0, 360],
+            "end_time": [360, 1440],
+            "1": [0.0, 0.01],
+            "2": [0.01, 0.0],
+        }
+    )
+    result_arrival_rates = approximate_hypercube(
+        SIMULATION_PARAMETERS, SIMULATION_DATA
+    )
+
+    for key in ["utilization", "delay_probability", "mean_response_time"]:
+        assert np.allclose(result[key], result_arrival_rates[key])
+
+
+def test_compare_with_baseline():
+    """
+    Running times and memory regress if they increase too much, the events
+    per second if they decrease too much. Metrics without a baseline are
+    skipped.
+    """
+
+    baseline = {
+        "config": {
+            "simulation_time": 10.0,
+            "events_per_second": 1000.0,
+            "peak_memory_mb": 100.0,
+        }
+    }
+    results = {
+        "config": {
+            "simulation_time": 11.0,
+            "events_per_second": 800.0,
+            "peak_memory_mb": 130.0,
+            "postprocess_time": 5.0,
+        },
+        "new_config": {"simulation_time": 100.0},
+    }
+
+    regressions = compare_with_baseline(results, baseline, 0.2)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("config: events_per_second")
+    assert regressions[1].startswith("config: peak_memory_mb")
+
+
+def test_generate_synthetic_region(tmp_path):
+    """
+    The files of a synthetic region are read by ``load_region_data`` as the
+    generated region data and all ambulances are assigned to bases. A run on
+    the region from the files helps all patients.
+    """
+
+    region = generate_synthetic_region(
+        np.random.default_rng(1),
+        50,
+        2,
+        4,
+        7,
+        {
+            "NUM_REGULAR_CHARGERS_BASE": 1,
+            "NUM_FAST_CHARGERS_BASE": 0,
+            "NUM_REGULAR_CHARGERS_HOSPITAL": 0,
+            "NUM_FAST_CHARGERS_HOSPITAL": 1,
+            "SPEED_REGULAR_CHARGERS": 11.0,
+            "SPEED_FAST_CHARGERS": 50.0,
+        },
+    )
+    SIMULATION_PARAMETERS = {
+        "DATA_DIRECTORY": f"{tmp_path}/",
+        "TRAVEL_TIMES_FILE": "travel_times.csv",
+        "DISTANCE_FILE": "distances.csv",
+        "NODES_FILE": "nodes.csv",
+        "HOSPITAL_FILE": "hospitals.csv",
+        "BASE_LOCATIONS_FILE": "bases.csv",
+        "AMBULANCE_BASE_LOCATIONS_FILE": "ambulance_bases.csv",
+        "CHARGING_SCENARIO_FILE": "charging_scenario.csv",
+    }
+    save_synthetic_region(region, SIMULATION_PARAMETERS, "%.10f")
+    SIMULATION_DATA: dict = {}
+    load_region_data(SIMULATION_PARAMETERS, SIMULATION_DATA)
+
+    assert SIMULATION_DATA.keys() == region.keys()
+    for key in region:
+        pd.testing.assert_frame_equal(
+            SIMULATION_DATA[key],
+            region[key],
+            check_names=False,
+            check_index_type=False,
+            check_column_type=False,
+            atol=1e-9,
+        )
+    assert np.all(np.diag(region["SIREN_DRIVING_MATRIX"]) == 0)
+    assert (
+        SIMULATION_DATA["NODES_REGION"]["inhabitantsIncreasing"].iloc[-1] == 1
+    )
+    assert set(region["AMBULANCE_BASE_LOCATIONS"]["Base"]) <= set(
+        region["NODES_BASE_LOCATIONS"]["Base Locations"]
+    )
+
+    SIMULATION_PARAMETERS.update(
+        {
+            "SEED_VALUE": 2,
+            "CRN_GENERATOR": "Generator",
+            "PROCESS_TYPE": "Time",
+            "PROCESS_NUM_CALLS": None,
+            "PROCESS_TIME": 720,
+            "CALL_LAMBDA": 1 / 20,
+            "PROB_GO_TO_HOSPITAL": 0.63,
+            "AID_PARAMETERS": [0.38, -10.01, 37.00, 88],
+            "DROP_OFF_PARAMETERS": [0.39, -8.25, 35.89, 88],
+            "NUM_AMBULANCES": 7,
+            "ENGINE_TYPE": "electric",
+            "IDLE_USAGE": 5,
+            "DRIVING_USAGE": 0.4,
+            "BATTERY_CAPACITY": 150.0,
+            "NO_SIREN_PENALTY": 0.95,
+            "PRINT": False,
+            "DATA_COLUMNS_PATIENT": list(PATIENT_COLUMN_TYPES),
+            "DATA_COLUMNS_AMBULANCE": list(AMBULANCE_COLUMN_TYPES),
+            "LOAD_INPUT_DATA": False,
+            "INTERVAL_CHECK_WP": 1,
+            "TIME_AFTER_LAST_ARRIVAL": 100,
+        }
+    )
+    SIMULATION_DATA = {
+        "DATA_COLUMNS_PATIENT": SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
+        "DATA_COLUMNS_AMBULANCE": SIMULATION_PARAMETERS[
+            "DATA_COLUMNS_AMBULANCE"
+        ],
+    }
+    run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
+
+    assert len(df_patient) == SIMULATION_PARAMETERS["NUM_CALLS"] > 0
+    assert np.all(np.isfinite(df_patient["finish_time"]))
+    assert set(df_patient["location_ID"]) <= set(region["NODES_REGION"].index)
+    assert set(df_ambulance["ambulance_ID"]) <= set(range(7))
+
+
+def test_profile_simulation():
+    """
+    Generator functions are timed per resumption and values and exceptions
+    are passed on. The original functions are restored after profiling.
+    """
+
+    def process():
+        received = yield 1
+        try:
+            yield received
+        except ValueError:
+            yield "interrupted"
+
+    counter = {"calls": 0, "time": 0.0}
+    generator = timed_function(process, counter)()
+
+    assert next(generator) == 1
+    assert generator.send(2) == 2
+    assert generator.throw(ValueError()) == "interrupted"
+    assert counter["calls"] == 3
+
+    check_select_ambulance = ambulance_simulation.check_select_ambulance
+    with profile_simulation() as profile:
+        assert (
+            ambulance_simulation.check_select_ambulance
+            is not check_select_ambulance
+        )
+    assert (
+        ambulance_simulation.check_select_ambulance is check_select_ambulance
+    )
+    assert profile["functions"]["check_select_ambulance"]["calls"] == 0
+
+
+def test_count_events():
+    """
+    A process that waits for three timeouts, of which two at the same time,
+    processes its initialization, the three timeouts and its own termination.
+    A resource request is processed when it is granted. Counting does not
+    change the order of the events.
+    """
+
+    env = sp.Environment()
+    resource = sp.Resource(env, capacity=1)
+    event_counts: dict[str, int] = {}
+    count_events(env, event_counts)
+    order = []
+
+    def process(name, delays):
+        for delay in delays:
+            yield env.timeout(delay)
+            order.append((env.now, name))
+        with resource.request() as request:
+            yield request
+
+    env.process(process("a", [1, 2]))
+    env.process(process("b", [3]))
+    env.run()
+
+    assert event_counts == {
+        "Initialize": 2,
+        "Timeout": 3,
+        "Request": 2,
+        "Release": 2,
+        "Process": 2,
+    }
+    assert order == [(1, "a"), (3, "b"), (3, "a")]
+    with pytest.raises(Exception):
+        env.timeout(1)
+        count_events(env, {})
+
+
+def test_fleet_telemetry():
+    """
+    The samples are based on the incrementally updated counters and include
+    the battery increase of a charging session that is in progress. The
+    samples are extended if the expected end time is too early.
+    """
+
+    env = sp.Environment()
+    ambulances = [Ambulance(env, 1, "electric", i, 100.0) for i in range(2)]
+    patient_queue = deque([0])
+    telemetry = FleetTelemetry(env, ambulances, patient_queue, 10, 0)
+
+    def process():
+        ambulances[0].set_assigned_to_patient()
+        ambulances[1].decrease_battery(50)
+        yield env.timeout(5)
+        telemetry.charging_started(60)
+        yield env.timeout(10)
+        ambulances[1].increase_battery(10)
+        telemetry.charging_stopped(60, 5)
+        patient_queue.popleft()
+
+    env.process(process())
+    env.process(telemetry.sample())
+    env.run()
+
+    assert np.allclose(
+        telemetry.get_samples(),
+        [
+            [0, 1, 1, 0, 0.75],
+            [10, 1, 1, 1, 0.775],
+            [20, 0, 1, 0, 0.8],
+        ],
+    )
+
+
+def test_telemetry_does_not_change_output():
+    """
+    A run of electric ambulances with telemetry should give the same patient
+    and ambulance output as the same run without telemetry.
+    """
+
+    ROOT_DIRECTORY = os.path.dirname(os.path.dirname(__file__))
+    SIMULATION_PARAMETERS = {
+        "SEED_VALUE": 12,
+        "CRN_GENERATOR": "Generator",
+        "PROCESS_TYPE": "Time",
+        "PROCESS_NUM_CALLS": None,
+        "PROCESS_TIME": 1440,
+        "CALL_LAMBDA": 1 / 6,
+        "PROB_GO_TO_HOSPITAL": 0.63,
+        "AID_PARAMETERS": [0.38, -10.01, 37.00, 88],
+        "DROP_OFF_PARAMETERS": [0.39, -8.25, 35.89, 88],
+        "NUM_AMBULANCES": 20,
+        "ENGINE_TYPE": "electric",
+        "IDLE_USAGE": 5,
+        "DRIVING_USAGE": 0.4,
+        "BATTERY_CAPACITY": 150.0,
+        "NO_SIREN_PENALTY": 0.95,
+        "PRINT": False,
+        "DATA_COLUMNS_PATIENT": list(PATIENT_COLUMN_TYPES),
+        "DATA_COLUMNS_AMBULANCE": list(AMBULANCE_COLUMN_TYPES),
+        "TRAVEL_TIMES_FILE": "siren_driving_matrix_2022.csv",
+        "DISTANCE_FILE": "distance_matrix_2022.csv",
+        "NODES_FILE": "nodes_Utrecht_2021.csv",
+        "HOSPITAL_FILE": "Hospital_Postal_Codes_Utrecht_2021.csv",
+        "BASE_LOCATIONS_FILE": "RAVU_base_locations_Utrecht_2021.csv",
+        "AMBULANCE_BASE_LOCATIONS_FILE": (
+            "Base_Locations_Ambulances_MEXCLP_21_22_20.csv"
+        ),
+        "CHARGING_SCENARIO_FILE": "charging_scenario_21_22_RB1_RH1.csv",
+        "DATA_DIRECTORY": os.path.join(ROOT_DIRECTORY, "data/"),
+        "LOAD_INPUT_DATA": False,
+        "INTERVAL_CHECK_WP": 1,
+        "TIME_AFTER_LAST_ARRIVAL": 100,
+    }
+
+    outputs = []
+    for TELEMETRY_INTERVAL in [None, 1]:
+        SIMULATION_PARAMETERS["TELEMETRY_INTERVAL"] = TELEMETRY_INTERVAL
+        SIMULATION_DATA = {
+            "DATA_COLUMNS_PATIENT": SIMULATION_PARAMETERS[
+                "DATA_COLUMNS_PATIENT"
+            ],
+            "DATA_COLUMNS_AMBULANCE": SIMULATION_PARAMETERS[
+                "DATA_COLUMNS_AMBULANCE"
+            ],
+        }
+        run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
+        outputs.append(SIMULATION_DATA)
+
+    assert "output_telemetry" not in outputs[0]
+    assert len(outputs[1]["output_telemetry"]) > 1440
+    assert np.any(outputs[0]["output_ambulance"]["charging_type"] >= 0)
+    for output in ["output_patient", "output_ambulance"]:
+        pd.testing.assert_frame_equal(
+            outputs[0][output].to_dataframe(),
+            outputs[1][output].to_dataframe(),
+        )
+
+
+def test_road_network():
+    """
+    The travel times are the fastest routes and the distances belong to these
+    routes. The lookups behave like the lookups on the dense matrices.
+    """
+
+    edges = pd.DataFrame(
+        {
+            "source": [1, 2, 1, 3, 1],
+            "target": [2, 3, 3, 4, 3],
+            "travel_time": [1.0, 1.0, 5.0, 2.0, 6.0],
+            "distance": [1.0, 1.0, 1.0, 3.0, 0.5],
+        }
+    )
+    network = RoadNetwork(edges, CACHE_SIZE=1)
+    travel_times = network.travel_times
+    distances = network.distances
+
+    assert travel_times.loc[1, 3] == 2
+    assert distances.loc[1, 3] == 2
+    assert travel_times.loc[3, 1] == np.inf
+    assert travel_times.loc[[1, 2, 2], 4].idxmin() == 2
+    assert list(travel_times.loc[1, [3, 4]]) == [2, 4]
+    assert np.array_equal(
+        distances.loc[[1, 2], [3, 4]].to_numpy(), [[2, 5], [1, 4]]
+    )
+    assert len(network.cache) == 1
+
+    network.precompute([1])
+    nr_searches = network.nr_searches
+    assert travel_times.loc[1, 4] == 4
+    assert network.nr_searches == nr_searches
+    assert copy.deepcopy(travel_times) is travel_times
+
+
+def test_quantized_matrix():
+    """
+    The dequantized values differ at most half of the scale from the source
+    and the lookups behave like the lookups on the source DataFrame.
+    """
+
+    rng = np.random.default_rng(1)
+    matrix = pd.DataFrame(
+        rng.uniform(0, 100, size=(4, 4)),
+        index=[3, 1, 4, 2],
+        columns=[3, 1, 4, 2],
+    )
+    matrix.iloc[0, 1] = np.inf
+    quantized = QuantizedMatrix(matrix)
+
+    assert quantized.loc[3, 1] == np.inf
+    assert abs(quantized.loc[4, 2] - matrix.loc[4, 2]) <= quantized.scale / 2
+    assert (
+        quantized.loc[[1, 2, 2], 4].idxmin()
+        == matrix.loc[[1, 2, 2], 4].idxmin()
+    )
+    pd.testing.assert_frame_equal(
+        quantized.loc[[1, 4], [2, 3]],
+        matrix.loc[[1, 4], [2, 3]],
+        atol=quantized.scale / 2,
+    )
+
+    report = create_precision_report({"matrix": (matrix, quantized)})
+    assert report.loc["matrix", "max_absolute_error"] <= quantized.scale / 2
+    assert report.loc["matrix", "memory_stored"] == (
+        report.loc["matrix", "memory_source"] / 4
+    )
+
+
+def test_columnar_output(tmp_path):
+    """
+    Runs are appended to one file and selected runs and columns are loaded
+    with their type.
+    """
+
+    directory = f"{tmp_path}/"
+    for run_nr in range(3):
+        output_dataframe = pd.DataFrame(
+            {
+                "time": np.arange(run_nr + 1) / 3,
+                "ambulance_ID": np.arange(run_nr + 1),
+                "location": ["3584H"] * (run_nr + 1),
+            }
+        )
+        save_columnar_output(directory, "output", output_dataframe, run_nr)
+
+    output = load_columnar_output(
+        f"{directory}output.npz", ["time", "location"], [2, 0]
+    )
+    assert list(output.columns) == ["run_nr", "time", "location"]
+    assert list(output["run_nr"]) == [2, 2, 2, 0]
+    assert output["time"].iloc[2] == 2 / 3
+    assert output["location"].iloc[0] == "3584H"
+    assert load_columnar_output(f"{directory}output.npz").shape == (6, 4)
+    assert load_columnar_output(f"{directory}output.npz")[
+        "ambulance_ID"
+    ].dtype == np.dtype(int)
+
+    with pytest.raises(Exception):
+        save_columnar_output(directory, "output", output_dataframe, 1)
+
+
+def test_async_output_writer(tmp_path):
+    """
+    The outputs are saved in the background in the submitted order and
+    saving errors are raised when the writer is closed.
+    """
+
+    directory = f"{tmp_path}/"
+    with AsyncOutputWriter(MAX_PENDING=1) as output_writer:
+        for run_nr in range(3):
+            output_writer.submit(
+                save_columnar_output,
+                directory,
+                "output",
+                pd.DataFrame({"time": [run_nr]}),
+                run_nr,
+            )
+    assert list(load_columnar_output(f"{directory}output.npz")["time"]) == [
+        0,
+        1,
+        2,
+    ]
+
+    output_writer = AsyncOutputWriter(MAX_PENDING=2)
+    output_writer.submit(
+        save_columnar_output,
+        directory,
+        "output",
+        pd.DataFrame({"time": [0]}),
+        0,
+    )
+    with pytest.raises(Exception):
+        output_writer.close()
+    assert output_writer.executor is None
+
+
+def test_output_columns():
+    """
+    Rows are added beyond the initial capacity, missing values are NaN and
+    the DataFrame shares its memory with the typed columns.
+    """
+
+    columns = list(AMBULANCE_COLUMN_TYPES)
+    output = OutputColumns(columns, AMBULANCE_COLUMN_TYPES, capacity=2)
+    for row_nr in range(5):
+        output.add_row(ambulance_ID=row_nr, time=row_nr / 3, charging_type=2)
+    with pytest.raises(Exception):
+        output.add_row(unknown_column=0)
+    assert len(output) == 5 and output.capacity == 8
+
+    df_output = output.to_dataframe()
+    assert list(df_output.columns) == columns
+    assert df_output["ambulance_ID"].dtype == np.int32
+    assert df_output["charging_type"].dtype == np.float32
+    assert list(df_output["time"]) == [row_nr / 3 for row_nr in range(5)]
+    assert df_output["charging_location_ID"].isna().all()
+    assert np.shares_memory(df_output["time"].to_numpy(), output["time"])
+    assert output.get_memory() < 5 * len(columns) * 8
+
+
+def test_results_store(tmp_path):
+    """
+    Replications are stored per configuration and seed, persist after
+    reopening the store and output and post-processing parameters do not
+    change the key.
+    """
+
+    directory = f"{tmp_path}/"
+    with open(f"{directory}nodes.csv", "w") as f:
+        f.write("1,2")
+    SIMULATION_PARAMETERS = {
+        "DATA_DIRECTORY": directory,
+        "LOAD_INPUT_DATA": False,
+        "NODES_FILE": "nodes.csv",
+        "NUM_AMBULANCES": 20,
+        "NUM_RUNS": 200,
+        "SIMULATION_OUTPUT_DIRECTORY": directory,
+        "MEAN_RESPONSE_TIMES_FILE_NAME": "mean_response_times",
+    }
+    checksums = calculate_input_checksums(SIMULATION_PARAMETERS)
+    df_patient = pd.DataFrame(
+        {column: np.arange(3.0) for column in PATIENT_OUTPUT_COLUMNS}
+        | {"patient_ID": np.arange(3)}
+    )
+    df_patient.loc[1, "to_hospital"] = np.nan
+    results = {
+        "mean_response_time": 10.5,
+        "emp_quantile_response_time": 20.0,
+        "busy_fraction": 0.4,
+        "running_time": 3.0,
+    }
+
+    with ResultsStore(f"{directory}results.sqlite") as results_store:
+        key = results_store.add_configuration(SIMULATION_PARAMETERS, checksums)
+        results_store.add_replication(key, 110, results)
+        with pytest.raises(Exception):
+            results_store.add_replication(key, 110, results)
+        results_store.add_replication(key, 112, results, df_patient)
+
+    extended_parameters = SIMULATION_PARAMETERS | {
+        "NUM_RUNS": 500,
+        "MEAN_RESPONSE_TIMES_FILE_NAME": "other",
+        "DETECT_WARM_UP": True,
+        "BATCH_MEANS_CI": "batch_means",
+    }
+    with ResultsStore(f"{directory}results.sqlite") as results_store:
+        assert (
+            results_store.add_configuration(extended_parameters, checksums)
+            == key
+        )
+        assert results_store.get_replication(key, 110) == results
+        assert results_store.get_replication(key, 111) is None
+        assert list(results_store.get_replications(key)["seed"]) == [
+            110,
+            112,
+        ]
+        assert results_store.get_patient_output(key, 110) is None
+        pd.testing.assert_frame_equal(
+            results_store.get_patient_output(key, 112),
+            df_patient[PATIENT_OUTPUT_COLUMNS],
+        )
+
+        other_key = results_store.add_configuration(
+            SIMULATION_PARAMETERS | {"NUM_AMBULANCES": 19}, checksums
+        )
+        assert other_key != key
+        assert results_store.get_replications(other_key).empty
+
+    with open(f"{directory}nodes.csv", "w") as f:
+        f.write("1,3")
+    assert calculate_input_checksums(SIMULATION_PARAMETERS) != checksums
+
+
+def test_calculate_mser():
+    """
+    The vectorized MSER statistic equals its definition and the truncation
+    point removes the initial transient.
+    """
+
+    rng = np.random.default_rng(1)
+    series = np.concatenate([np.linspace(20, 1, 50), rng.normal(0, 1, 450)])
+    truncation, mser = calculate_mser(series)
+
+    batch_means = series.reshape(100, 5).mean(axis=1)
+    assert np.allclose(
+        mser,
+        [
+            np.var(batch_means[d:]) / (100 - d) if d < 99 else 0
+            for d in range(100)
+        ],
+    )
+    assert 45 <= truncation <= 60 and truncation % 5 == 0
+    with pytest.raises(Exception):
+        calculate_mser(np.ones(9))
+
+
+def test_batch_means_ci():
+    """
+    The batch means intervals equal their definitions and the overlapping
+    batch means interval of an independent series has the expected width.
+    """
+
+    rng = np.random.default_rng(2)
+    series = rng.normal(5, 2, 10003)
+
+    mean, lower, upper = calculate_batch_means_ci(series, 10)
+    batch_means = series[:10000].reshape(10, 1000).mean(axis=1)
+    error = (
+        scipy.stats.t.ppf(0.975, 9) * np.std(batch_means, ddof=1) / np.sqrt(10)
+    )
+    assert np.isclose(mean, np.mean(series[:10000]))
+    assert np.isclose(lower, mean - error) and np.isclose(upper, mean + error)
+
+    mean, lower, upper = calculate_batch_means_ci(series, 10, OVERLAPPING=True)
+    assert np.isclose(mean, np.mean(series[:10000]))
+    assert 0.5 < (upper - lower) / (2 * 1.96 * 2 / 100) < 1.5
+
+    quantile, lower, upper = calculate_batch_quantile_ci(series, 0.95, 10)
+    batch_quantiles = np.quantile(
+        series[:10000].reshape(10, 1000), 0.95, axis=1, method="inverted_cdf"
+    )
+    error = (
+        scipy.stats.t.ppf(0.975, 9)
+        * np.std(batch_quantiles, ddof=1)
+        / np.sqrt(10)
+    )
+    assert np.isclose(upper - lower, 2 * error) and lower < quantile < upper
+    with pytest.raises(Exception):
+        calculate_batch_means_ci(np.ones(39), 20)
+
+
+def test_antithetic_inputs():
+    """
+    The runs of an antithetic pair use the uniforms U and 1-U per input
+    stream, and the inverse transformation gives the service time
+    distribution.
+    """
+
+    SIMULATION_PARAMETERS = {
+        "SEED_VALUE": 3,
+        "PROCESS_TYPE": "Time",
+        "PROCESS_NUM_CALLS": None,
+        "PROCESS_TIME": 20000,
+        "CALL_LAMBDA": 1 / 7.75,
+        "PROB_GO_TO_HOSPITAL": 0.63,
+        "AID_PARAMETERS": [0.38, -10.01, 37.00, 88],
+        "DROP_OFF_PARAMETERS": [0.39, -8.25, 35.89, 88],
+    }
+    SIMULATION_DATA = {
+        "NODES_REGION": pd.DataFrame(
+            {"inhabitantsIncreasing": [0.25, 0.5, 1.0]}, index=[10, 11, 12]
+        )
+    }
+
+    inputs = []
+    for ANTITHETIC_RUN in [False, True]:
+        SIMULATION_PARAMETERS["ANTITHETIC_RUN"] = ANTITHETIC_RUN
+        inputs.append(
+            generate_antithetic_inputs(SIMULATION_PARAMETERS, SIMULATION_DATA)
+        )
+    nr_calls = min(len(inputs[0][0]), len(inputs[1][0]))
+
+    interarrival_uniforms = [
+        1 - np.exp(-SIMULATION_PARAMETERS["CALL_LAMBDA"] * run[0][:nr_calls])
+        for run in inputs
+    ]
+    assert np.allclose(interarrival_uniforms[0] + interarrival_uniforms[1], 1)
+    assert np.all(
+        np.diff(inputs[0][1][:nr_calls]) * np.diff(inputs[1][1][:nr_calls])
+        <= 0
+    )
+    assert np.all((inputs[0][1] >= 0) & (inputs[0][1] <= 88))
+    assert np.isclose(
+        np.mean(inputs[0][1]),
+        calculate_truncated_lognormal_mean(0.38, -10.01, 37.00, 88),
+        rtol=0.05,
+    )
+    assert set(inputs[0][3]) == {10, 11, 12}
+    assert np.all(inputs[0][4][:nr_calls] | inputs[1][4][:nr_calls])
+
+
+def test_control_variate_ci():
+    """
+    The control variate estimate removes the part of the results that is
+    explained by the controls.
+    """
+
+    rng = np.random.default_rng(4)
+    controls = rng.normal(2, 1, (50, 2))
+    results = 10 + controls @ np.array([3.0, -1.0]) + rng.normal(0, 0.1, 50)
+
+    estimate, lower, upper = calculate_control_variate_ci(
+        results, controls, np.array([2.0, 2.0])
+    )
+    assert lower < 14 < upper
+    assert upper - lower < 0.1
+    with pytest.raises(Exception):
+        calculate_control_variate_ci(
+            results[:3], controls[:3], np.array([2.0, 2.0])
+        )
+
+
+def test_bootstrap_cis():
+    """
+    The vectorized percentile intervals equal the intervals of resampling
+    with a loop, and BCa intervals shift towards the long tail.
+    """
+
+    rng = np.random.default_rng(5)
+    run_results = {
+        "mean_response_time": rng.normal(8, 1, 40),
+        "emp_quantile_response_time": rng.lognormal(2.5, 0.8, 40),
+        "busy_fraction": rng.uniform(0.3, 0.5, 40),
+    }
+
+    df_cis = calculate_bootstrap_cis(run_results, 500, SEED=6)
+    run_indices = np.random.default_rng(6).integers(0, 40, size=(500, 40))
+    for key, values in run_results.items():
+        bootstrap_means = [np.mean(values[indices]) for indices in run_indices]
+        assert np.allclose(
+            df_cis.loc[key, ["lower", "upper"]],
+            np.quantile(bootstrap_means, [0.025, 0.975]),
+        )
+        assert np.isclose(df_cis.loc[key, "estimate"], np.mean(values))
+
+    df_bca = calculate_bootstrap_cis(run_results, 5000, "bca", SEED=6)
+    df_percentile = calculate_bootstrap_cis(run_results, 5000, SEED=6)
+    assert (
+        df_bca.loc["emp_quantile_response_time", "upper"]
+        > df_percentile.loc["emp_quantile_response_time", "upper"]
+    )
+
+    response_times = [rng.exponential(8, 50) for _ in range(40)]
+    df_patients = calculate_bootstrap_cis(
+        {
+            "mean_response_time": [np.mean(x) for x in response_times],
+            "emp_quantile_response_time": [
+                np.quantile(x, 0.95, method="inverted_cdf")
+                for x in response_times
+            ],
+        },
+        500,
+        response_times=response_times,
+        SEED=6,
+    )
+    assert np.all(df_patients["lower"] < df_patients["estimate"])
+    assert np.all(df_patients["estimate"] < df_patients["upper"])
+    with pytest.raises(Exception):
+        calculate_bootstrap_cis(run_results, METHOD="normal")
+
+
+def test_arrival_rate_function():
+    """
+    The arrivals of a periodic rate function per postal code follow the
+    rates of each interval, and invalid intervals are rejected.
+    """
+
+    SIMULATION_PARAMETERS = {
+        "PROCESS_TYPE": "Time",
+        "PROCESS_NUM_CALLS": None,
+        "PROCESS_TIME": 100 * 1440,
+    }
+    NODES_REGION = pd.DataFrame(
+        {"inhabitantsIncreasing": [0.5, 1.0]}, index=[10, 11]
+    )
+    ARRIVAL_RATES = pd.DataFrame(
+        {
+            "start_time": [0, 360, 1080],
+            "end_time": [360, 1080, 1440],
+            "10": [0.05, 0.05, 0.3],
+            "11": [0.0, 0.1, 0.1],
+        }
+    )
+    check_arrival_rates(ARRIVAL_RATES, NODES_REGION)
+    SIMULATION_DATA = {
+        "NODES_REGION": NODES_REGION,
+        "ARRIVAL_RATES": ARRIVAL_RATES,
+    }
+
+    rng = np.random.default_rng(5)
+    interarrival_times, rate_intervals = generate_arrival_times_rate_function(
+        rng, SIMULATION_PARAMETERS, SIMULATION_DATA
+    )
+    SIMULATION_PARAMETERS["NUM_CALLS"] = len(interarrival_times)
+    location_IDs = location_generator_rate_function(
+        rng, rate_intervals, SIMULATION_PARAMETERS, SIMULATION_DATA
+    )
+    arrival_times = np.cumsum(interarrival_times)
+
+    assert np.all(interarrival_times >= 0)
+    assert arrival_times[-1] <= SIMULATION_PARAMETERS["PROCESS_TIME"]
+    counts = np.bincount(rate_intervals, minlength=3)
+    expected_counts = 100 * np.array([18, 108, 144])
+    assert np.all(
+        np.abs(counts - expected_counts) < 4 * np.sqrt(expected_counts)
+    )
+    assert np.array_equal(
+        rate_intervals,
+        np.searchsorted([360, 1080], arrival_times % 1440, side="right"),
+    )
+    assert np.all(location_IDs[rate_intervals == 0] == 10)
+    assert np.isclose(
+        np.mean(location_IDs[rate_intervals == 2] == 10), 0.75, atol=0.02
+    )
+
+    ARRIVAL_RATES.loc[1, "start_time"] = 300
+    with pytest.raises(Exception):
+        check_arrival_rates(ARRIVAL_RATES, NODES_REGION)
+
+
+def test_mexclp(monkeypatch):
+    """
+    Solving MEXCLP for Utrecht with a busy fraction of 0.6 and a time
+    threshold of 12 minutes should give the ambulance base locations in the
+    data folder.
+    """
+
+    ROOT_DIRECTORY = os.path.dirname(os.path.dirname(__file__))
+    DATA_DIRECTORY = os.path.join(ROOT_DIRECTORY, "data/")
+    monkeypatch.syspath_prepend(os.path.join(ROOT_DIRECTORY, "elaspy/mexclp"))
+    from MEXCLP import (
+        calculate_coverage_matrix,
+        build_mexclp_model,
+        create_ambulance_base_locations,
+    )
+
+    nodes = pd.read_csv(f"{DATA_DIRECTORY}nodes_Utrecht_2021.csv")
+    postal_codes = nodes["postal code"].to_numpy().astype(int)
+    base_indices = np.flatnonzero(
+        np.isin(
+            postal_codes,
+            pd.read_csv(
+                f"{DATA_DIRECTORY}RAVU_base_locations_Utrecht_2021.csv"
+            )["Base Locations"],
+        )
+    )
+    coverage_matrix = calculate_coverage_matrix(
+        pd.read_csv(
+            f"{DATA_DIRECTORY}siren_driving_matrix_2022.csv", index_col=0
+        ).to_numpy(),
+        base_indices,
+        12,
+    )
+
+    for NUM_AMBULANCES in [20, 23, 24]:
+        mip, x, _ = build_mexclp_model(
+            coverage_matrix,
+            nodes["inhabitants"].to_numpy(),
+            base_indices,
+            0.6,
+            NUM_AMBULANCES,
+        )
+        mip.solve(pulp.getSolver("PULP_CBC_CMD", msg=False))
+        assert pulp.LpStatus[mip.status] == "Optimal"
+
+        ambulance_base_locations = create_ambulance_base_locations(
+            {
+                int(postal_codes[b]): int(round(x[int(b)].varValue))
+                for b in base_indices
+                if x[int(b)].varValue > 0.5
+            }
+        )
+        known_base_locations = pd.read_csv(
+            f"{DATA_DIRECTORY}Base_Locations_Ambulances_MEXCLP_21_22_"
+            f"{NUM_AMBULANCES}.csv",
+            index_col=0,
+        )
+        assert len(ambulance_base_locations) == NUM_AMBULANCES
+        assert (
+            ambulance_base_locations["Base"]
+            .value_counts()
+            .sort_index()
+            .equals(known_base_locations["Base"].value_counts().sort_index())
+        )
+
+
+def test_mexclp_sweep(monkeypatch):
+    """
+    The warm-started sweep over busy fractions and numbers of ambulances
+    should give the same expected coverage and base locations as solving
+    each model independently.
+    """
+
+    ROOT_DIRECTORY = os.path.dirname(os.path.dirname(__file__))
+    DATA_DIRECTORY = os.path.join(ROOT_DIRECTORY, "data/")
+    monkeypatch.syspath_prepend(os.path.join(ROOT_DIRECTORY, "elaspy/mexclp"))
+    from MEXCLP import calculate_coverage_matrix, build_mexclp_model
+    from MEXCLP_sweep import solve_mexclp_sweep
+
+    nodes = pd.read_csv(f"{DATA_DIRECTORY}nodes_Utrecht_2021.csv")
+    postal_codes = nodes["postal code"].to_numpy().astype(int)
+    inhabitants = nodes["inhabitants"].to_numpy()
+    base_indices = np.flatnonzero(
+        np.isin(
+            postal_codes,
+            pd.read_csv(
+                f"{DATA_DIRECTORY}RAVU_base_locations_Utrecht_2021.csv"
+            )["Base Locations"],
+        )
+    )
+    travel_times = pd.read_csv(
+        f"{DATA_DIRECTORY}siren_driving_matrix_2022.csv", index_col=0
+    ).to_numpy()
+
+    results = solve_mexclp_sweep(
+        travel_times,
+        inhabitants,
+        base_indices,
+        postal_codes,
+        12,
+        [0.4, 0.6],
+        [19, 20, 23],
+        "PULP_CBC_CMD",
+    )
+
+    assert len(results) == 6
+    coverage_matrix = calculate_coverage_matrix(travel_times, base_indices, 12)
+    for result in results:
+        mip, x, _ = build_mexclp_model(
+            coverage_matrix,
+            inhabitants,
+            base_indices,
+            result["q"],
+            result["NUM_AMBULANCES"],
+        )
+        mip.solve(pulp.getSolver("PULP_CBC_CMD", msg=False))
+
+        assert np.isclose(
+            result["expected_coverage"], pulp.value(mip.objective)
+        )
+        assert result["ambulances_per_base"] == {
+            int(postal_codes[b]): int(round(x[int(b)].varValue))
+            for b in base_indices
+            if x[int(b)].varValue > 0.5
+        }
+
+
+def test_mexclp_heuristic(monkeypatch):
+    """
+    On a small instance, the greedy and swap heuristic should find the
+    optimal assignment, which is obtained by enumerating all assignments of
+    the ambulances to the bases, and its expected coverage should equal the
+    objective of the MEXCLP model. A sparse coverage matrix should give the
+    same assignment.
+    """
+
+    ROOT_DIRECTORY = os.path.dirname(os.path.dirname(__file__))
+    monkeypatch.syspath_prepend(os.path.join(ROOT_DIRECTORY, "elaspy/mexclp"))
+    from MEXCLP import calculate_coverage_matrix, build_mexclp_model
+    from MEXCLP_heuristic import (
+        calculate_expected_coverage,
+        solve_mexclp_heuristic,
+    )
+
+    rng = np.random.default_rng(0)
+    travel_times = rng.uniform(0, 20, (15, 15))
+    inhabitants = rng.dirichlet(np.ones(15))
+    base_indices = np.arange(0, 15, 3)
+    coverage_matrix = calculate_coverage_matrix(travel_times, base_indices, 8)
+
+    ambulances_per_base = solve_mexclp_heuristic(
+        coverage_matrix, inhabitants, 0.5, 4
+    )
+    expected_coverage = calculate_expected_coverage(
+        coverage_matrix, inhabitants, ambulances_per_base, 0.5
+    )
+    optimal_coverage = max(
+        calculate_expected_coverage(
+            coverage_matrix,
+            inhabitants,
+            np.bincount(bases, minlength=len(base_indices)),
+            0.5,
+        )
+        for bases in itertools.combinations_with_replacement(
+            range(len(base_indices)), 4
+        )
+    )
+    mip, _, _ = build_mexclp_model(
+        coverage_matrix, inhabitants, base_indices, 0.5, 4
+    )
+    mip.solve(pulp.getSolver("PULP_CBC_CMD", msg=False))
+
+    assert np.sum(ambulances_per_base) == 4
+    assert np.isclose(expected_coverage, optimal_coverage)
+    assert np.isclose(expected_coverage, pulp.value(mip.objective))
+    assert np.array_equal(
+        solve_mexclp_heuristic(
+            scipy.sparse.csr_matrix(coverage_matrix), inhabitants, 0.5, 4
+        ),
+        ambulances_per_base,
+    )
+
+
+def test_fork_simulation():
+    """
+    A run that is interrupted or forked after a warm-up gives the same output
+    as an uninterrupted run.
+    """
+
+    ROOT_DIRECTORY = os.path.dirname(os.path.dirname(__file__))
+    SIMULATION_PARAMETERS = {
+        "SEED_VALUE": 110,
+        "CRN_GENERATOR": "Generator",
+        "PROCESS_TYPE": "Time",
+        "PROCESS_NUM_CALLS": None,
+        "PROCESS_TIME": 240,
+        "CALL_LAMBDA": 1 / 7.75,
+        "PROB_GO_TO_HOSPITAL": 0.63,
+        "AID_PARAMETERS": [0.38, -10.01, 37.00, 88],
+        "DROP_OFF_PARAMETERS": [0.39, -8.25, 35.89, 88],
+        "NUM_AMBULANCES": 20,
+        "ENGINE_TYPE": "electric",
+        "IDLE_USAGE": 5,
+        "DRIVING_USAGE": 0.4,
+        "BATTERY_CAPACITY": 150.0,
+        "NO_SIREN_PENALTY": 0.95,
+        "PRINT": False,
+        "DATA_COLUMNS_PATIENT": list(PATIENT_COLUMN_TYPES),
+        "DATA_COLUMNS_AMBULANCE": list(AMBULANCE_COLUMN_TYPES),
+        "TRAVEL_TIMES_FILE": "siren_driving_matrix_2022.csv",
+        "DISTANCE_FILE": "distance_matrix_2022.csv",
+        "NODES_FILE": "nodes_Utrecht_2021.csv",
+        "HOSPITAL_FILE": "Hospital_Postal_Codes_Utrecht_2021.csv",
+        "BASE_LOCATIONS_FILE": "RAVU_base_locations_Utrecht_2021.csv",
+        "AMBULANCE_BASE_LOCATIONS_FILE": (
+            "Base_Locations_Ambulances_MEXCLP_21_22_24.csv"
+        ),
+        "CHARGING_SCENARIO_FILE": "charging_scenario_21_22_RB50_RH50.csv",
+        "DATA_DIRECTORY": os.path.join(ROOT_DIRECTORY, "data/"),
+        "LOAD_INPUT_DATA": False,
+        "INTERVAL_CHECK_WP": 1,
+        "TIME_AFTER_LAST_ARRIVAL": 100,
+    }
+    SIMULATION_DATA = {
+        "DATA_COLUMNS_PATIENT": SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
+        "DATA_COLUMNS_AMBULANCE": SIMULATION_PARAMETERS[
+            "DATA_COLUMNS_AMBULANCE"
+        ],
+    }
+
+    run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe().copy()
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe().copy()
+
+    simulation = start_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
+    simulate_until(simulation, 120)
+    nr_rows = len(SIMULATION_DATA["output_ambulance"])
+    with pytest.raises(Exception):
+        simulate_until(simulation, 60)
+
+    outputs = fork_simulation(
+        simulation,
+        SIMULATION_PARAMETERS,
+        SIMULATION_DATA,
+        [{}, {"IDLE_USAGE": 10}],
+        NUM_WORKERS=2,
+    )
+    assert simulation["env"].now == 120
+    pd.testing.assert_frame_equal(
+        outputs[0]["output_patient"].to_dataframe(), df_patient
+    )
+    pd.testing.assert_frame_equal(
+        outputs[0]["output_ambulance"].to_dataframe(), df_ambulance
+    )
+    variant_ambulance = outputs[1]["output_ambulance"].to_dataframe()
+    assert not variant_ambulance.equals(df_ambulance)
+    pd.testing.assert_frame_equal(
+        variant_ambulance.iloc[:nr_rows], df_ambulance.iloc[:nr_rows]
+    )
+
+    finish_simulation(simulation, SIMULATION_PARAMETERS, SIMULATION_DATA)
+    pd.testing.assert_frame_equal(
+        SIMULATION_DATA["output_patient"].to_dataframe(), df_patient
+    )
+    pd.testing.assert_frame_equal(
+        SIMULATION_DATA["output_ambulance"].to_dataframe(), df_ambulance
+    )
+
+
 def test_run_simulation_electric_4():
 
     ROOT_DIRECTORY = os.path.dirname(os.path.dirname(__file__))
@@ -162,15 +1584,9 @@ def test_run_simulation_electric_4():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -185,10 +1601,18 @@ def test_run_simulation_electric_4():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -314,15 +1738,9 @@ def test_run_simulation_electric_5():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -337,10 +1755,18 @@ def test_run_simulation_electric_5():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -466,15 +1892,9 @@ def test_run_simulation_electric_6():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -489,10 +1909,18 @@ def test_run_simulation_electric_6():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -618,15 +2046,9 @@ def test_run_simulation_electric_7():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -641,10 +2063,18 @@ def test_run_simulation_electric_7():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -770,15 +2200,9 @@ def test_run_simulation_electric_8():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -793,10 +2217,18 @@ def test_run_simulation_electric_8():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -922,15 +2354,9 @@ def test_run_simulation_electric_9():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -945,10 +2371,18 @@ def test_run_simulation_electric_9():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -1074,15 +2508,9 @@ def test_run_simulation_electric_10():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -1097,10 +2525,18 @@ def test_run_simulation_electric_10():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -1226,15 +2662,9 @@ def test_run_simulation_electric_11():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -1249,10 +2679,18 @@ def test_run_simulation_electric_11():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -1369,15 +2807,9 @@ def test_run_simulation_diesel_3():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -1392,10 +2824,18 @@ def test_run_simulation_diesel_3():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -1512,15 +2952,9 @@ def test_run_simulation_diesel_4():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -1535,10 +2969,18 @@ def test_run_simulation_diesel_4():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -1655,15 +3097,9 @@ def test_run_simulation_diesel_5():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -1678,10 +3114,18 @@ def test_run_simulation_diesel_5():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
 
 
@@ -1798,15 +3242,9 @@ def test_run_simulation_diesel_6():
 
     # Run simulation and cast output to dataframe.
     run_simulation(SIMULATION_PARAMETERS, SIMULATION_DATA)
-    df_patient = pd.DataFrame(
-        SIMULATION_DATA["output_patient"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_PATIENT"],
-    )
+    df_patient = SIMULATION_DATA["output_patient"].to_dataframe()
     df_patient = calculate_response_time_ecdf(df_patient)
-    df_ambulance = pd.DataFrame(
-        SIMULATION_DATA["output_ambulance"],
-        columns=SIMULATION_PARAMETERS["DATA_COLUMNS_AMBULANCE"],
-    )
+    df_ambulance = SIMULATION_DATA["output_ambulance"].to_dataframe()
 
     # Get saved dataframes
     df_test_patient = pd.read_csv(
@@ -1821,8 +3259,16 @@ def test_run_simulation_diesel_6():
     )
 
     pd.testing.assert_frame_equal(
-        df_patient, df_test_patient, rtol=1e-20, atol=1e-20
+        df_patient,
+        df_test_patient,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )
     pd.testing.assert_frame_equal(
-        df_ambulance, df_test_ambulance, rtol=1e-20, atol=1e-20
+        df_ambulance,
+        df_test_ambulance,
+        rtol=1e-20,
+        atol=1e-20,
+        check_dtype=False,
     )